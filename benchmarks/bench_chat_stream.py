@@ -0,0 +1,158 @@
+"""
+Time-to-first-byte and cancellation benchmark for ``POST /chat/stream``.
+
+Drives the cloud backend's ASGI app in-process with a local fake token
+generator in place of the model (``cloud_backend.chat_token_source``), so
+numbers reflect the pipeline rather than a provider. For each mode it
+reports, over ``--runs`` requests:
+
+  - first byte:   first body chunk on the wire
+  - first token:  first ``event: token`` chunk
+  - total:        final ``event: done``
+
+Modes:
+
+  - buffered:  the generator is drained before anything is sent (how the
+               endpoint behaved before it streamed end to end)
+  - streaming: tokens are forwarded as the generator yields them
+
+A third pass disconnects the client right after the first token and
+reports how long the generator kept running and how many tokens it
+produced after the disconnect (both should be ~0).
+
+Usage:
+    python benchmarks/bench_chat_stream.py [--tokens 60] [--token-ms 20] [--runs 5] [--no-persona]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("BUDDY_RATE_LIMIT_REQUESTS", "100000")
+
+import cloud_backend  # noqa: E402
+
+
+class FakeGenerator:
+    """Yields ``count`` tokens ``delay`` seconds apart and records its own lifetime."""
+
+    def __init__(self, count: int, delay: float, buffered: bool = False):
+        self.count = count
+        self.delay = delay
+        self.buffered = buffered
+        self.produced = 0
+        self.closed_at = None
+
+    async def _tokens(self):
+        try:
+            for i in range(self.count):
+                await asyncio.sleep(self.delay)
+                self.produced += 1
+                yield f"tok{i} "
+        finally:
+            self.closed_at = time.perf_counter()
+
+    async def __call__(self, message: str):
+        if self.buffered:
+            tokens = [t async for t in self._tokens()]
+            for t in tokens:
+                yield t
+        else:
+            async for t in self._tokens():
+                yield t
+
+
+async def request_stream(disconnect_on_first_token: "FakeGenerator" = None) -> dict:
+    body = json.dumps({"message": "benchmark the stream", "user_id": "bench"}).encode()
+    scope = {
+        "type": "http", "asgi": {"version": "3.0", "spec_version": "2.3"}, "http_version": "1.1",
+        "method": "POST", "scheme": "http", "path": "/chat/stream", "raw_path": b"/chat/stream",
+        "query_string": b"scheme=Bearer&credentials=bench", "root_path": "",
+        "headers": [(b"content-type", b"application/json"), (b"host", b"bench")],
+        "client": ("127.0.0.1", 50000), "server": ("bench", 80),
+    }
+    disconnected = asyncio.Event()
+    sent_body = False
+    marks = {"start": time.perf_counter()}
+
+    async def receive():
+        nonlocal sent_body
+        if not sent_body:
+            sent_body = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if disconnected.is_set():
+            raise OSError("client disconnected")
+        if message["type"] != "http.response.body":
+            return
+        chunk = message.get("body", b"")
+        now = time.perf_counter()
+        if chunk:
+            marks.setdefault("first_byte", now)
+        if b"event: token" in chunk:
+            marks.setdefault("first_token", now)
+            if disconnect_on_first_token is not None and not disconnected.is_set():
+                marks["disconnect"] = now
+                marks["produced"] = disconnect_on_first_token.produced
+                disconnected.set()
+        if b"event: done" in chunk:
+            marks["done"] = now
+
+    try:
+        await cloud_backend.app(scope, receive, send)
+    except OSError:
+        pass
+    marks["returned"] = time.perf_counter()
+    return marks
+
+
+def ms(marks: dict, key: str) -> float:
+    return (marks[key] - marks["start"]) * 1000.0 if key in marks else float("nan")
+
+
+async def run(args):
+    if args.no_persona:
+        cloud_backend.BUDDY_PERSONA_AVAILABLE = False
+    delay = args.token_ms / 1000.0
+    print(f"{args.tokens} tokens x {args.token_ms}ms, {args.runs} runs (medians)")
+    for mode in ("buffered", "streaming"):
+        rows = []
+        for _ in range(args.runs):
+            cloud_backend.chat_token_source = FakeGenerator(args.tokens, delay, buffered=(mode == "buffered"))
+            rows.append(await request_stream())
+        med = {k: statistics.median(ms(r, k) for r in rows) for k in ("first_byte", "first_token", "done")}
+        print(f"{mode:<10} first byte {med['first_byte']:8.1f}ms  first token {med['first_token']:8.1f}ms  "
+              f"total {med['done']:8.1f}ms")
+
+    lingering, leaked = [], []
+    for _ in range(args.runs):
+        fake = FakeGenerator(args.tokens, delay)
+        cloud_backend.chat_token_source = fake
+        marks = await request_stream(disconnect_on_first_token=fake)
+        await asyncio.sleep(delay * 3)  # give any leaked work a chance to show up
+        leaked.append(fake.produced - marks["produced"])
+        lingering.append((fake.closed_at - marks["disconnect"]) * 1000.0 if fake.closed_at else float("inf"))
+    print(f"disconnect: generator closed {statistics.median(lingering):.1f}ms after disconnect, "
+          f"max {max(leaked)} token(s) produced afterwards")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tokens", type=int, default=60)
+    parser.add_argument("--token-ms", type=float, default=20.0, help="fake inter-token latency")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--no-persona", action="store_true", help="skip the persona layer")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Cold-start benchmark for the HTTP backends.
+
+Starts each backend in a fresh interpreter (so nothing is warm in
+``sys.modules``) and measures:
+
+  - import:  ``import cloud_backend`` / ``import enhanced_backend``
+  - startup: running the app's startup handlers
+  - ready:   first ``GET /health`` answered, measured from process start
+
+and fails if ``ready`` exceeds the budget. Embedding and NLP models are
+loaded lazily, so none of them should be on this path; the script also
+reports whether the embedding model was already loaded when the first
+request was served (it should not be unless ``--warmup blocking``).
+
+Usage:
+    python benchmarks/bench_cold_start.py [--budget-ms 3000] [--runs 3] [--warmup background]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import textwrap
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKENDS = ("cloud_backend", "enhanced_backend")
+
+CHILD = textwrap.dedent('''
+    import json, sys, time
+    t0 = time.perf_counter()
+    import importlib
+    module = importlib.import_module(sys.argv[1])
+    t_import = time.perf_counter()
+    from fastapi.testclient import TestClient
+    with TestClient(module.app) as client:
+        t_startup = time.perf_counter()
+        status = client.get("/health").status_code
+        t_ready = time.perf_counter()
+        index = getattr(module, "semantic_index", None)
+        handle = getattr(index, "_model_handle", None)
+        print(json.dumps({
+            "import_ms": (t_import - t0) * 1000.0,
+            "startup_ms": (t_startup - t_import) * 1000.0,
+            "ready_ms": (t_ready - t0) * 1000.0,
+            "status": status,
+            "model_loaded": bool(handle and handle.loaded),
+        }))
+''')
+
+
+def measure(backend: str, warmup: str) -> dict:
+    env = dict(os.environ, BUDDY_MODEL_WARMUP=warmup, PYTHONDONTWRITEBYTECODE="1")
+    proc = subprocess.run(
+        [sys.executable, "-c", CHILD, backend],
+        cwd=ROOT, env=env, capture_output=True, text=True, timeout=300
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"{backend} failed to start:\n{proc.stderr[-2000:]}")
+    # The backends log to stdout as well, including on shutdown after the
+    # measurement is printed, so pick the measurement line out by its key
+    line = next(l for l in reversed(proc.stdout.splitlines()) if l.startswith('{"import_ms"'))
+    return json.loads(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=3000.0, help="max process-start to first /health")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--warmup", choices=["background", "blocking", "off"], default="background")
+    parser.add_argument("backends", nargs="*", default=list(BACKENDS))
+    args = parser.parse_args()
+
+    failed = False
+    for backend in args.backends:
+        runs = [measure(backend, args.warmup) for _ in range(args.runs)]
+        median = {key: statistics.median(r[key] for r in runs) for key in ("import_ms", "startup_ms", "ready_ms")}
+        verdict = "PASS" if median["ready_ms"] <= args.budget_ms else "FAIL"
+        failed |= verdict == "FAIL"
+        print(f"{backend:<17} import {median['import_ms']:8.1f}ms  startup {median['startup_ms']:8.1f}ms  "
+              f"ready {median['ready_ms']:8.1f}ms  model loaded at first request: "
+              f"{any(r['model_loaded'] for r in runs)}  {verdict} (budget {args.budget_ms:.0f}ms)")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Contact lookup latency: full scan vs the ContactBook index.
+
+Builds a synthetic book of ``--contacts`` entries and runs the same query
+mix through:
+
+  - scan:   the previous ContactBook lookups (a SequenceMatcher per contact
+            for find_contact, a substring test per contact for search)
+  - index:  buddy_core.utils.contact_book.ContactBook (trigram / prefix /
+            phonetic / email keys, rescoring only the candidates)
+
+"agree" is the share of queries for which both return the same contact(s).
+Fuzzy lookups rescore contacts sharing at least FUZZY_MIN_OVERLAP of the
+query's name trigrams, or its whole-name soundex, and fall back to the scan
+when none of them scores; agreement is measured rather than assumed.
+Persistence is reported last: a contact save (the index is not written),
+an index flush, an index build (cold start) and an index load.
+
+Usage:
+    python benchmarks/bench_contact_book.py [--contacts 100000] [--queries 20]
+"""
+
+import argparse
+import importlib.util
+import os
+import random
+import statistics
+import tempfile
+import time
+from difflib import SequenceMatcher
+
+# Load the module directly: importing the buddy_core package pulls in the full runtime
+_spec = importlib.util.spec_from_file_location(
+    "bench_contact_book", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                       "buddy_core", "utils", "contact_book.py"))
+_contact_book = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(_contact_book)
+ContactBook = _contact_book.ContactBook
+
+FIRST = ["james", "mary", "robert", "patricia", "john", "jennifer", "michael", "linda", "david", "elizabeth",
+         "william", "barbara", "richard", "susan", "joseph", "jessica", "thomas", "sarah", "charles", "karen",
+         "priya", "arjun", "mei", "hiroshi", "olga", "ahmed", "fatima", "lucas", "sofia", "mateo"]
+LAST = ["smith", "johnson", "williams", "brown", "jones", "garcia", "miller", "davis", "rodriguez", "martinez",
+        "hernandez", "lopez", "gonzalez", "wilson", "anderson", "thomas", "taylor", "moore", "jackson", "martin",
+        "patel", "sharma", "chen", "tanaka", "ivanova", "khan", "nguyen", "kowalski", "silva", "rossi"]
+COMPANIES = ["Acme", "Globex", "Initech", "Umbrella", "Hooli", "Stark Industries", "Wayne Enterprises", "Tyrell"]
+
+
+def legacy_find(contacts, query):
+    query_lower = query.lower()
+    best_match = None
+    best_score = 0
+    for contact in contacts.values():
+        for email in contact.emails:
+            if email.lower() == query_lower:
+                return contact
+        name_score = SequenceMatcher(None, contact.name.lower(), query_lower).ratio()
+        if name_score > best_score and name_score > 0.6:
+            best_score = name_score
+            best_match = contact
+        for part in contact.name.lower().split():
+            if part.startswith(query_lower) and len(query_lower) >= 2:
+                return contact
+    return best_match
+
+
+def legacy_search(contacts, query):
+    query_lower = query.lower()
+    return [c for c in contacts.values()
+            if query_lower in c.name.lower() or any(query_lower in e.lower() for e in c.emails)
+            or (c.company and query_lower in c.company.lower())]
+
+
+def typo(word, rng):
+    i = rng.randrange(len(word))
+    op = rng.randrange(3)
+    if op == 0:
+        return word[:i] + word[i + 1:]
+    if op == 1:
+        return word[:i] + rng.choice("abcdefghijklmnopqrstuvwxyz") + word[i + 1:]
+    return word[:i] + word[i:i + 2][::-1] + word[i + 2:]
+
+
+def build_book(path, n, rng):
+    book = ContactBook(path)
+    book.contacts.clear()
+    book.groups.clear()
+    for i in range(n):
+        first, last = rng.choice(FIRST), rng.choice(LAST)
+        name = f"{first.title()} {last.title()}{i}"
+        contact = _contact_book.Contact(name, f"{first}.{last}{i}@example{i % 97}.com",
+                                        company=rng.choice(COMPANIES))
+        book.contacts[f"c{i}"] = contact
+    book.index = _contact_book.ContactIndex.build(book.contacts)
+    book._mark_index_dirty()
+    return book
+
+
+def time_queries(fn, queries):
+    samples, results = [], []
+    for q in queries:
+        began = time.perf_counter()
+        results.append(fn(q))
+        samples.append(time.perf_counter() - began)
+    return statistics.median(samples) * 1e3, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--contacts", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "contacts.json")
+        book = build_book(path, args.contacts, rng)
+        names = [c.name for c in book.contacts.values()]
+        emails = [c.primary_email for c in book.contacts.values()]
+        picks = [rng.randrange(len(names)) for _ in range(args.queries)]
+        finds = {
+            "find exact email": [emails[i] for i in picks],
+            "find typo name": [typo(names[i].lower(), rng) for i in picks],
+            "find two typos": [typo(typo(names[i].lower(), rng), rng) for i in picks],
+            "find no match": [f"zq{rng.randrange(10**6)}xv" for _ in picks],
+        }
+        searches = {"search substring": [names[i].split()[1][:5] for i in picks]}
+
+        print(f"{args.contacts} contacts, {args.queries} queries per row; median latency")
+        print(f"  {'query':<18} {'scan ms':>10} {'index ms':>10} {'agree':>8}")
+        for label, queries in finds.items():
+            scan_ms, expected = time_queries(lambda q: legacy_find(book.contacts, q), queries)
+            index_ms, actual = time_queries(book.find_contact, queries)
+            agree = sum(a is b for a, b in zip(expected, actual)) / len(queries)
+            print(f"  {label:<18} {scan_ms:>10.2f} {index_ms:>10.3f} {agree:>7.1%}")
+        for label, queries in searches.items():
+            scan_ms, expected = time_queries(lambda q: legacy_search(book.contacts, q), queries)
+            index_ms, actual = time_queries(book.search_contacts, queries)
+            agree = sum([id(c) for c in a] == [id(c) for c in b] for a, b in zip(expected, actual)) / len(queries)
+            print(f"  {label:<18} {scan_ms:>10.2f} {index_ms:>10.3f} {agree:>7.1%}")
+
+        began = time.perf_counter()
+        book.save_contacts()
+        save_s = time.perf_counter() - began
+        began = time.perf_counter()
+        book.flush_index()
+        flush_s = time.perf_counter() - began
+        began = time.perf_counter()
+        book._load_index()
+        load_s = time.perf_counter() - began
+        os.remove(book.index_file)
+        began = time.perf_counter()
+        book._load_index()
+        build_s = time.perf_counter() - began
+        print(f"  save {save_s:.2f} s   index flush {flush_s:.2f} s   "
+              f"index build {build_s:.2f} s   index load {load_s:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
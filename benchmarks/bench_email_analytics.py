@@ -0,0 +1,146 @@
+"""
+Email analytics cost as history grows: JSON file vs SQLite event log with rollups.
+
+For each history size the same workload runs against:
+
+  - json:    the previous EmailAnalytics (every event rewrites the whole
+             JSON file; metrics scan every tracked email)
+  - rollups: buddy_core.utils.email_analytics.EmailAnalytics (one SQLite
+             transaction per event updating the email row, the event log
+             and the rollup rows; metrics read the rollups)
+
+"ingest" is the median time of track_email_event; "dashboard" is one
+get_email_performance(30) + get_template_performance() +
+get_time_analysis() + get_analytics_summary() call set.
+
+The previous implementation is only run up to ``--json-max`` emails; it is
+the slow side.
+
+Usage:
+    python benchmarks/bench_email_analytics.py [--sizes 1000,10000,100000] [--events 200] [--json-max 10000]
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Load the module directly: importing the buddy_core package pulls in the full runtime
+_spec = importlib.util.spec_from_file_location(
+    "bench_email_analytics", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                          "buddy_core", "utils", "email_analytics.py"))
+_analytics = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(_analytics)
+EmailAnalytics = _analytics.EmailAnalytics
+EmailStatus = _analytics.EmailStatus
+EmailTrackingData = _analytics.EmailTrackingData
+EmailEvent = _analytics.EmailEvent
+
+EVENTS = [EmailStatus.DELIVERED, EmailStatus.OPENED, EmailStatus.OPENED, EmailStatus.CLICKED, EmailStatus.BOUNCED]
+
+
+class JsonAnalytics:
+    """The previous storage: an in-memory dict rewritten to JSON on every change."""
+
+    def __init__(self, analytics_file):
+        self.analytics_file = analytics_file
+        self.tracked = {}
+
+    def _save(self):
+        data = {'tracked_emails': {k: v.to_dict() for k, v in self.tracked.items()},
+                'last_updated': datetime.now().isoformat()}
+        with open(self.analytics_file, 'w') as f:
+            json.dump(data, f, indent=2)
+
+    def track_email_event(self, email_id, event_type, details=None, user_agent=None, ip_address=None):
+        tracking_data = self.tracked[email_id]
+        tracking_data.events.append(EmailEvent(datetime.now(), event_type, details, user_agent, ip_address))
+        tracking_data.status = event_type
+        if event_type == EmailStatus.OPENED:
+            tracking_data.open_count += 1
+        elif event_type == EmailStatus.CLICKED:
+            tracking_data.click_count += 1
+        self._save()
+        return True
+
+    def dashboard(self, days=30):
+        emails = list(self.tracked.values())
+        cutoff = datetime.now() - timedelta(days=days)
+        recent = [e for e in emails if e.sent_at >= cutoff]
+        delivered = [e for e in recent if e.status not in (EmailStatus.BOUNCED, EmailStatus.FAILED)]
+        templates, hours, statuses = {}, {}, {}
+        for e in emails:
+            if e.template_used:
+                stats = templates.setdefault(e.template_used, [0, 0])
+                stats[0] += 1
+                stats[1] += e.open_count > 0
+            hours.setdefault((e.sent_at.weekday(), e.sent_at.hour), [0, 0])[0] += 1
+            statuses[e.status.value] = statuses.get(e.status.value, 0) + 1
+        recipients = len({e.recipient for e in emails})
+        return len(recent), len(delivered), templates, hours, statuses, recipients
+
+
+def history(n, rng):
+    now = datetime.now()
+    for i in range(n):
+        sent = now - timedelta(days=rng.uniform(0, 365))
+        yield EmailTrackingData(
+            email_id=f"e{i}", recipient=f"user{rng.randrange(max(1, n // 5))}@example.com", subject="Hello",
+            sent_at=sent, status=EmailStatus.SENT, events=[EmailEvent(sent, EmailStatus.SENT)],
+            template_used=rng.choice([None, "welcome", "digest", "promo", "reminder"]))
+
+
+def run(store, ids, events, rng, dashboard):
+    samples = []
+    for _ in range(events):
+        email_id = rng.choice(ids)
+        began = time.perf_counter()
+        store.track_email_event(email_id, rng.choice(EVENTS), user_agent="Mozilla/5.0 (iPhone)")
+        samples.append(time.perf_counter() - began)
+    began = time.perf_counter()
+    dashboard()
+    return statistics.median(samples) * 1e3, (time.perf_counter() - began) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000,100000", help="tracked emails already in history")
+    parser.add_argument("--events", type=int, default=200)
+    parser.add_argument("--json-max", type=int, default=10000)
+    args = parser.parse_args()
+
+    print(f"{args.events} events per size; times in ms")
+    print(f"  {'emails':>8}  {'json ingest':>11} {'dashboard':>10}   {'rollups ingest':>14} {'dashboard':>10}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        with tempfile.TemporaryDirectory() as directory:
+            ids = [f"e{i}" for i in range(size)]
+            legacy = "-"
+            if size <= args.json_max:
+                store = JsonAnalytics(os.path.join(directory, "legacy.json"))
+                store.tracked = {t.email_id: t for t in history(size, random.Random(1))}
+                ingest, dash = run(store, ids, args.events, random.Random(2), store.dashboard)
+                legacy = f"{ingest:>11.2f} {dash:>10.2f}"
+
+            analytics = EmailAnalytics(os.path.join(directory, "analytics.json"))
+            with analytics._lock, analytics._transaction():
+                for tracking_data in history(size, random.Random(1)):
+                    analytics._insert_email(tracking_data)
+
+            def dashboard():
+                analytics.get_email_performance(30)
+                analytics.get_template_performance()
+                analytics.get_time_analysis()
+                analytics.get_analytics_summary()
+
+            ingest, dash = run(analytics, ids, args.events, random.Random(2), dashboard)
+            analytics.close()
+        print(f"  {size:>8}  {legacy:>22}   {ingest:>14.3f} {dash:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Field encryption throughput: per-record calls vs the batch API.
+
+Encrypts and decrypts ``--records`` synthetic conversation records with
+buddy_core.database.encryption.EncryptionManager:
+
+  - before:  one ``encrypt_data`` / ``decrypt_data`` await per record,
+             legacy format (sealed directly with the master key)
+  - after:   ``encrypt_batch`` / ``decrypt_batch`` (envelope format, cached
+             cipher context per data key, thread pool)
+
+and compares key rotation cost: re-encrypting every record (what a
+legacy-format rotation requires) vs ``rotate_keys`` rewrapping data keys.
+The backend is whatever is installed (cryptography > PyCryptodome > the
+insecure development fallback); it is printed with the results. "loop
+stall" is the longest gap a concurrent 1 ms ticker saw while the work ran.
+
+Usage:
+    python benchmarks/bench_encryption.py [--records 20000] [--size 400]
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import logging
+import os
+import time
+
+# Load the module directly: importing the buddy_core package pulls in the full runtime
+_spec = importlib.util.spec_from_file_location(
+    "bench_encryption_mod",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "buddy_core", "database", "encryption.py"))
+_encryption = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(_encryption)
+EncryptionManager = _encryption.EncryptionManager
+
+
+def make_records(n: int, size: int):
+    return [{"id": i, "user_id": f"user{i % 50}", "role": "user",
+             "content": ("remind me about the project meeting " * (size // 36 + 1))[:size]} for i in range(n)]
+
+
+async def timed(fn):
+    """Run ``fn`` while a 1 ms ticker measures the longest event-loop stall."""
+    stall = 0.0
+    stop = False
+
+    async def ticker():
+        nonlocal stall
+        last = time.perf_counter()
+        while not stop:
+            await asyncio.sleep(0.001)
+            now = time.perf_counter()
+            stall = max(stall, now - last)
+            last = now
+
+    tick = asyncio.create_task(ticker())
+    await asyncio.sleep(0.002)  # ticker is sleeping before the work starts
+    began = time.perf_counter()
+    result = await fn()
+    elapsed = time.perf_counter() - began
+    stop = True
+    await tick
+    return result, elapsed, stall
+
+
+async def run(args):
+    records = make_records(args.records, args.size)
+    legacy = EncryptionManager({"envelope": False})
+    await legacy.initialize()
+    batch = EncryptionManager({"envelope": True})
+    await batch.initialize()
+    print(f"{args.records} records x ~{args.size} B, backend {batch.crypto_backend}, {batch._workers} workers")
+
+    async def legacy_encrypt():
+        return [await legacy.encrypt_data(r) for r in records]
+
+    async def legacy_decrypt(sealed):
+        return [await legacy.decrypt_data(c) for c in sealed]
+
+    legacy_sealed, enc_before, stall_enc_before = await timed(legacy_encrypt)
+    opened, dec_before, stall_dec_before = await timed(lambda: legacy_decrypt(legacy_sealed))
+    assert opened == records
+    batch_sealed, enc_after, stall_enc_after = await timed(lambda: batch.encrypt_batch(records))
+    opened, dec_after, stall_dec_after = await timed(lambda: batch.decrypt_batch(batch_sealed))
+    assert opened == records
+
+    def rate(seconds):
+        return args.records / seconds
+
+    print(f"  encrypt  before {rate(enc_before):10.0f} rec/s (stall {stall_enc_before * 1e3:7.1f} ms)   "
+          f"after {rate(enc_after):10.0f} rec/s (stall {stall_enc_after * 1e3:7.1f} ms)   {enc_before / enc_after:5.1f}x")
+    print(f"  decrypt  before {rate(dec_before):10.0f} rec/s (stall {stall_dec_before * 1e3:7.1f} ms)   "
+          f"after {rate(dec_after):10.0f} rec/s (stall {stall_dec_after * 1e3:7.1f} ms)   {dec_before / dec_after:5.1f}x")
+
+    began = time.perf_counter()
+    plain = await legacy_decrypt(legacy_sealed)
+    await legacy.rotate_keys()
+    await legacy_encrypt() if plain == records else None
+    reencrypt_all = time.perf_counter() - began
+    began = time.perf_counter()
+    await batch.rotate_keys()
+    rewrap = time.perf_counter() - began
+    assert (await batch.decrypt_batch(batch_sealed[:100])) == records[:100]
+    print(f"  rotate   re-encrypt all {reencrypt_all * 1e3:9.1f} ms   rewrap data keys {rewrap * 1e3:7.2f} ms")
+    await legacy.close()
+    await batch.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=20000)
+    parser.add_argument("--size", type=int, default=400, help="approximate content bytes per record")
+    logging.basicConfig(level=logging.ERROR)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
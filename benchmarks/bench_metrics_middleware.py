@@ -0,0 +1,121 @@
+"""
+Per-request overhead and label cardinality of the metrics middleware.
+
+Builds a small FastAPI app (``/memory/{user_id}`` and ``/health``) and
+drives it in-process over raw ASGI, once per variant:
+
+  - none:    no metrics middleware (floor)
+  - legacy:  the previous BaseHTTPMiddleware, labelled by raw URL path
+  - asgi:    infrastructure.middleware.MetricsMiddleware (pure ASGI,
+             route-template labels, pre-bound children)
+
+Requests hit ``--users`` distinct user ids, so the legacy variant shows
+the label explosion: the "paths" column is the number of distinct
+``path`` label values in the registry afterwards.
+
+Usage:
+    python benchmarks/bench_metrics_middleware.py [--requests 20000] [--users 5000]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI  # noqa: E402
+from starlette.middleware.base import BaseHTTPMiddleware  # noqa: E402
+
+from infrastructure import metrics as metrics_module  # noqa: E402
+from infrastructure import middleware as middleware_module  # noqa: E402
+from infrastructure.config.settings import settings  # noqa: E402
+from infrastructure.metrics import Metrics  # noqa: E402
+
+
+def make_legacy_middleware(registry_metrics: Metrics):
+    class LegacyMetricsMiddleware(BaseHTTPMiddleware):
+        async def dispatch(self, request, call_next):
+            start = time.perf_counter()
+            response = await call_next(request)
+            duration = time.perf_counter() - start
+            registry_metrics.request_counter.labels(method=request.method, path=request.url.path, status=str(response.status_code)).inc()
+            registry_metrics.request_latency.labels(method=request.method, path=request.url.path).observe(duration)
+            return response
+    return LegacyMetricsMiddleware
+
+
+def make_app(variant: str, registry_metrics: Metrics) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/memory/{user_id}")
+    async def memory(user_id: str):
+        return {"user_id": user_id}
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    if variant == "legacy":
+        app.add_middleware(make_legacy_middleware(registry_metrics))
+    elif variant == "asgi":
+        # Point the middleware at this run's registry
+        metrics_module.metrics = middleware_module.metrics = registry_metrics
+        app.add_middleware(middleware_module.MetricsMiddleware)
+    return app
+
+
+async def call(app, path: str):
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+        "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 50000), "server": ("bench", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    await app(scope, receive, send)
+
+
+def distinct_paths(registry_metrics: Metrics) -> int:
+    paths = set()
+    for family in registry_metrics.registry.collect():
+        for sample in family.samples:
+            if "path" in sample.labels:
+                paths.add(sample.labels["path"])
+    return len(paths)
+
+
+async def run(args):
+    settings.enable_metrics = True
+    paths = [f"/memory/user{i % args.users}" if i % 10 else "/health" for i in range(args.requests)]
+    floor = None
+    print(f"{args.requests} requests over {args.users} user ids")
+    for variant in ("none", "legacy", "asgi"):
+        registry_metrics = Metrics()
+        app = make_app(variant, registry_metrics)
+        for p in paths[:200]:  # warm up routing/middleware stack
+            await call(app, p)
+        began = time.perf_counter()
+        for p in paths:
+            await call(app, p)
+        per_req = (time.perf_counter() - began) / len(paths) * 1e6
+        floor = per_req if floor is None else floor
+        overhead = per_req - floor
+        print(f"  {variant:<7} {per_req:8.1f} us/request  overhead {overhead:7.1f} us  paths {distinct_paths(registry_metrics):6d}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--users", type=int, default=5000)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
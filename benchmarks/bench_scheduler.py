@@ -0,0 +1,101 @@
+"""
+Cost of many registered jobs: one task per job vs the shared heap timer.
+
+Registers ``--jobs`` interval jobs (most with long periods, ``--hot`` of them
+firing every second) and runs the loop for ``--seconds``:
+
+  - tasks:   previous SimpleScheduler (one sleeping asyncio task per job)
+  - heap:    jobs.scheduler.SimpleScheduler (single min-heap timer)
+
+Reports live asyncio tasks, registration time, RSS growth and how late
+the hot jobs fire relative to their due time.
+
+Usage:
+    python benchmarks/bench_scheduler.py [--jobs 10000] [--hot 50] [--seconds 3]
+"""
+
+import argparse
+import asyncio
+import os
+import resource
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jobs.scheduler import SimpleScheduler  # noqa: E402
+
+
+class TaskPerJobScheduler:
+    """The previous implementation: one sleep loop per job."""
+
+    def __init__(self):
+        self._tasks = {}
+
+    def schedule_interval(self, name, seconds, func, one_shot=False, **_):
+        async def runner():
+            while True:
+                await asyncio.sleep(seconds)
+                func()
+        self._tasks[name] = asyncio.create_task(runner())
+
+    def cancel_all(self):
+        for t in self._tasks.values():
+            t.cancel()
+
+
+def rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def run(variant: str, args):
+    sched = TaskPerJobScheduler() if variant == "tasks" else SimpleScheduler(owner="bench")
+    lateness = []
+    rss_before = rss_mb()
+    began = time.perf_counter()
+    for i in range(args.jobs):
+        hot = i < args.hot
+        period = 1 if hot else 3600
+        name = f"job{i}"
+        fires = [0]
+        start = time.time()
+
+        def fire(name=name, period=period, fires=fires, start=start):
+            if period != 1:
+                return
+            fires[0] += 1
+            if variant == "tasks":
+                due = start + fires[0] * period
+            else:
+                due = sched._jobs[name].next_run - period  # the slot being run
+            lateness.append(time.time() - due)
+
+        if variant == "tasks":
+            sched.schedule_interval(name, period, fire)
+        else:
+            sched.schedule_interval(name, period, fire, distributed=False)
+    register_ms = (time.perf_counter() - began) * 1e3
+    await asyncio.sleep(0)
+    tasks = len(asyncio.all_tasks()) - 1
+    await asyncio.sleep(args.seconds)
+    sched.cancel_all()
+    lateness.sort()
+    p99 = lateness[int(len(lateness) * 0.99) - 1] * 1e3 if lateness else float("nan")
+    print(f"  {variant:<6} tasks {tasks:6d}  register {register_ms:8.1f} ms  rss +{rss_mb() - rss_before:6.1f} MB  "
+          f"hot fires {len(lateness):5d}  p99 lateness {p99:7.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=10000)
+    parser.add_argument("--hot", type=int, default=50)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    args = parser.parse_args()
+    print(f"{args.jobs} jobs ({args.hot} firing every second), {args.seconds:.0f} s")
+    # heap first: ru_maxrss is a high-water mark
+    for variant in ("heap", "tasks"):
+        asyncio.run(run(variant, args))
+
+
+if __name__ == "__main__":
+    main()
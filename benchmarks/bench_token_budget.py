@@ -0,0 +1,98 @@
+"""
+Microbenchmark for context-window trimming.
+
+Compares, on the same synthetic history, the previous implementation
+(``tiktoken.encoding_for_model`` resolved and every message re-encoded
+on each call) with ``infrastructure.tokens`` (shared encoder, per-message
+count memo, early-exit running sum). The "warm" column is the steady state
+for a conversation that is re-trimmed on every request; "cold" includes
+encoding every message once. Results are checked to be identical.
+
+Without tiktoken installed both sides fall back to the word-count estimate.
+
+Usage:
+    python benchmarks/bench_token_budget.py [--messages 1000] [--budget 2000] [--repeat 200]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from infrastructure import tokens  # noqa: E402
+from infrastructure.tokens import TokenCountMemo, trim_messages_token_budget  # noqa: E402
+
+WORDS = "the weather tomorrow remind me to call about meeting project notes buddy please schedule".split()
+
+
+def legacy_count_tokens(text: str, model: str = "gpt-3.5-turbo") -> int:
+    if tokens.TIKTOKEN_AVAILABLE:
+        try:
+            enc = tokens.tiktoken.encoding_for_model(model)
+            return len(enc.encode(text))
+        except Exception:
+            pass
+    return max(1, len(text.split()))
+
+
+def legacy_trim(messages, budget, model="gpt-3.5-turbo"):
+    if not messages:
+        return messages
+    total = 0
+    trimmed = []
+    for msg in reversed(messages):
+        n = legacy_count_tokens(msg.get("content", ""), model=model)
+        if total + n > budget:
+            break
+        trimmed.append(msg)
+        total += n
+    return list(reversed(trimmed))
+
+
+def make_history(n: int, seed: int = 7):
+    rng = random.Random(seed)
+    return [
+        {"role": "user" if i % 2 == 0 else "assistant",
+         "content": " ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 60)))}
+        for i in range(n)
+    ]
+
+
+def per_call_us(fn, repeat: int) -> float:
+    began = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - began) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=1000)
+    parser.add_argument("--budget", type=int, default=2000, help="token budget (cut lands mid-history)")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    history = make_history(args.messages)
+    expected = legacy_trim(history, args.budget)
+
+    legacy_us = per_call_us(lambda: legacy_trim(history, args.budget), max(1, args.repeat // 10))
+    cold_us = per_call_us(lambda: trim_messages_token_budget(history, args.budget, memo=TokenCountMemo()), max(1, args.repeat // 10))
+    memo = TokenCountMemo()
+    result = trim_messages_token_budget(history, args.budget, memo=memo)
+    warm_us = per_call_us(lambda: trim_messages_token_budget(history, args.budget, memo=memo), args.repeat)
+    full_us = per_call_us(lambda: trim_messages_token_budget(history, 10 ** 9, memo=memo), args.repeat)
+
+    assert result == expected, "trimmed history differs from the previous implementation"
+    encoder = "tiktoken" if tokens.get_encoder() is not None else "word estimate"
+    print(f"{args.messages} messages, budget {args.budget} -> kept {len(result)} ({encoder})")
+    print(f"  legacy          {legacy_us:10.1f} us/call")
+    print(f"  memo (cold)     {cold_us:10.1f} us/call")
+    print(f"  memo (warm)     {warm_us:10.1f} us/call   {legacy_us / warm_us:6.1f}x")
+    print(f"  warm, keep all  {full_us:10.1f} us/call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Thundering-herd behaviour of the intent/persona caches under request bursts.
+
+Each round fires ``--burst`` concurrent requests over ``--keys`` distinct
+cache keys against a simulated model call (``--model-ms``), then ages the
+cache past its TTL and repeats. Two access patterns are compared:
+
+  - get/set:     check, compute on miss, store (the previous call sites)
+  - get_or_set:  buddy_core.util.cache.TTLCache single-flight with
+                 stale-while-revalidate
+
+"computations" is how many times the model was invoked; "p99" is the
+per-request latency seen by callers.
+
+Usage:
+    python benchmarks/bench_ttl_cache.py [--burst 200] [--keys 10] [--rounds 5] [--model-ms 50]
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import os
+import time
+
+# Load the module directly: importing the buddy_core package pulls in the full runtime
+_spec = importlib.util.spec_from_file_location(
+    "bench_cache", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "buddy_core", "util", "cache.py"))
+_cache = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(_cache)
+TTLCache = _cache.TTLCache
+
+
+class Clock:
+    def __init__(self):
+        self.offset = 0.0
+
+    def __call__(self):
+        return time.monotonic() + self.offset
+
+
+async def run(pattern: str, args):
+    clock = Clock()
+    cache = TTLCache(maxsize=500, ttl_seconds=900, stale_seconds=300, clock=clock)
+    computations = 0
+    latencies = []
+
+    async def model(key):
+        nonlocal computations
+        computations += 1
+        await asyncio.sleep(args.model_ms / 1000)
+        return {"styled": f"response for {key}"}
+
+    async def request(key):
+        began = time.perf_counter()
+        if pattern == "get/set":
+            cached = cache.get(key)
+            if cached is None:
+                cache.set(key, await model(key))
+        else:
+            await cache.get_or_set(key, lambda: model(key))
+        latencies.append(time.perf_counter() - began)
+
+    for _ in range(args.rounds):
+        await asyncio.gather(*(request(f"k{i % args.keys}") for i in range(args.burst)))
+        await asyncio.sleep(args.model_ms / 1000 * 2)  # let background refreshes land
+        clock.offset += 1000  # past the TTL, inside the stale window
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1e3
+    return computations, p99
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--burst", type=int, default=200)
+    parser.add_argument("--keys", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--model-ms", type=float, default=50.0)
+    args = parser.parse_args()
+    print(f"{args.rounds} rounds x {args.burst} concurrent requests over {args.keys} keys, model {args.model_ms:.0f} ms")
+    for pattern in ("get/set", "get_or_set"):
+        computations, p99 = asyncio.run(run(pattern, args))
+        print(f"  {pattern:<11} computations {computations:6d}   p99 {p99:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Request-path persistence cost in enhanced_backend: synchronous writes vs write-behind.
+
+For each memory size, a preferences update plus one audit line is timed as
+the request handler sees it:
+
+  - legacy:       rewrite the whole memory JSON file and reopen the audit
+                  log for every line (the previous save_memory / _audit)
+  - write-behind: infrastructure.persistence.write_behind (journal record +
+                  audit line enqueued; a background task batches, fsyncs
+                  and compacts)
+
+The write-behind handler time should stay flat as the document grows; the
+"drain" column is the wall time for the background writer to make every
+record durable afterwards.
+
+Usage:
+    python benchmarks/bench_write_behind.py [--sizes 100,10000,100000] [--requests 2000]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from infrastructure.persistence.write_behind import PersistenceWriter  # noqa: E402
+
+
+def make_memory(size: int):
+    return {"user_name": "bench", "preferences": {f"pref{i}": f"value {i}" for i in range(size)},
+            "frequent_intents": {}, "topics": []}
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return samples[len(samples) // 2] * 1e6, samples[int(len(samples) * 0.99) - 1] * 1e6
+
+
+def run_legacy(directory: str, size: int, requests: int):
+    memory = make_memory(size)
+    memory_file = os.path.join(directory, "legacy_memory.json")
+    audit_file = os.path.join(directory, "legacy_audit.log")
+    samples = []
+    for i in range(requests):
+        began = time.perf_counter()
+        memory["preferences"][f"pref{i % 50}"] = f"updated {i}"
+        with open(memory_file, "w", encoding="utf-8") as f:
+            json.dump(memory, f, ensure_ascii=False, indent=2)
+        with open(audit_file, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"event": "preferences_update", "i": i}) + "\n")
+        samples.append(time.perf_counter() - began)
+    return samples
+
+
+async def run_write_behind(directory: str, size: int, requests: int):
+    writer = PersistenceWriter(fsync_interval=1.0, compact_interval=3600)
+    doc = writer.document(os.path.join(directory, "wb_memory.json"), lambda: make_memory(size))
+    audit_file = os.path.join(directory, "wb_audit.log")
+    await writer.start()
+    samples = []
+    for i in range(requests):
+        began = time.perf_counter()
+        doc.update("preferences", {f"pref{i % 50}": f"updated {i}"})
+        writer.append(audit_file, json.dumps({"event": "preferences_update", "i": i}))
+        samples.append(time.perf_counter() - began)
+        if i % 64 == 0:
+            await asyncio.sleep(0)  # let the writer run, as it would between requests
+    began = time.perf_counter()
+    await writer.flush()
+    drain = time.perf_counter() - began
+    await writer.stop()
+    return samples, drain
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="100,10000,100000", help="preference entries in the memory document")
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{args.requests} updates per size; handler latency in us")
+    print(f"  {'entries':>8}  {'legacy p50':>10} {'p99':>10}   {'w-b p50':>8} {'p99':>8}   {'drain ms':>8}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        with tempfile.TemporaryDirectory() as directory:
+            # Cap the legacy run on large documents; it is the slow side
+            legacy = run_legacy(directory, size, min(args.requests, max(50, 2_000_000 // max(size, 1))))
+            wb, drain = asyncio.run(run_write_behind(directory, size, args.requests))
+        l50, l99 = percentiles(legacy)
+        w50, w99 = percentiles(wb)
+        print(f"  {size:>8}  {l50:>10.1f} {l99:>10.1f}   {w50:>8.1f} {w99:>8.1f}   {drain * 1e3:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -14,12 +14,13 @@ from .local_db import LocalDatabase
 from .cloud_db import CloudDatabase
 from .vector_db import VectorDatabase
 from .sync_manager import SyncManager
-from .encryption import EncryptionManager
+from .encryption import EncryptionManager, ReencryptionJob
 
 __all__ = [
     'LocalDatabase',
     'CloudDatabase', 
     'VectorDatabase',
     'SyncManager',
-    'EncryptionManager'
+    'EncryptionManager',
+    'ReencryptionJob'
 ]
@@ -6,19 +6,44 @@ Provides:
 - Key management and rotation
 - Platform-specific secure storage
 - Compliance with privacy regulations
+
+Records are envelope-encrypted: each is sealed with a data key (DEK), and
+only the DEKs are encrypted ("wrapped") with the master or device key.
+Rotating the master key therefore rewraps a handful of DEKs instead of
+re-encrypting every record; retiring a DEK is done by ``ReencryptionJob``,
+which streams records through the batch API with a resumable checkpoint.
+Batch encrypt/decrypt runs in a thread pool with one cached cipher context
+per DEK, keeping the event loop free during bulk sync and export.
 """
 
 import asyncio
 import logging
-from typing import Dict, Any, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Any, Optional, Tuple, List, Callable, Awaitable, Iterable
 import base64
 import hashlib
 import json
 import os
+import threading
+import uuid
 from datetime import datetime, timezone
 
 logger = logging.getLogger(__name__)
 
+# "$" never occurs in urlsafe base64 or at the start of JSON, so envelope records are unambiguous
+ENVELOPE_PREFIX = "$env1$"
+
+
+@dataclass
+class DataKey:
+    key_id: str
+    key: bytes
+    wrapped: str  # DEK encrypted with the key-encryption key
+    kek_type: str  # "master" or "device"
+    created_at: str
+    active: bool = True
+
 class EncryptionManager:
     """Manages encryption and decryption of user data"""
     
@@ -27,10 +52,19 @@ class EncryptionManager:
         self.encryption_enabled = self.config.get("enabled", True)
         self.key_rotation_days = self.config.get("key_rotation_days", 90)
         
+        self.envelope_enabled = self.config.get("envelope", True)
+        self.keyring_path = self.config.get("keyring_path")
+        self.batch_chunk_size = self.config.get("batch_chunk_size", 256)
+        
         # Encryption state
         self._master_key = None
         self._device_key = None
-        self._key_cache = {}
+        self._key_cache = {}  # DEK id -> reusable cipher context
+        self._data_keys: Dict[str, DataKey] = {}
+        self._active_keys: Dict[str, str] = {}  # kek_type -> active DEK id
+        self._keyring_lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._workers = self.config.get("workers") or min(32, os.cpu_count() or 1)
         self._initialized = False
         
     async def initialize(self, user_password: str = None, device_id: str = None):
@@ -50,6 +84,10 @@ class EncryptionManager:
             # Generate device-specific key
             await self._initialize_device_key(device_id)
             
+            # Wrapped data keys from a previous run
+            if self.keyring_path and os.path.exists(self.keyring_path):
+                await asyncio.to_thread(self._load_keyring_file, self.keyring_path)
+            
             self._initialized = True
             logger.info("Encryption manager initialized")
             
@@ -65,8 +103,10 @@ class EncryptionManager:
             from cryptography.hazmat.primitives import hashes, serialization
             from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
             from cryptography.hazmat.primitives.asymmetric import rsa
+            from cryptography.hazmat.primitives.ciphers.aead import AESGCM
             
             self.crypto_backend = "cryptography"
+            self.AESGCM = AESGCM
             self.Fernet = Fernet
             self.hashes = hashes
             self.PBKDF2HMAC = PBKDF2HMAC
@@ -170,44 +210,9 @@ class EncryptionManager:
             return json.dumps(data)  # Return unencrypted if disabled
         
         try:
-            # Convert data to JSON string
-            json_data = json.dumps(data)
-            data_bytes = json_data.encode('utf-8')
-            
-            # Choose encryption key
-            if key_type == "device" and self._device_key:
-                key = self._device_key
-            else:
-                key = self._master_key
-            
-            # Encrypt based on backend
-            if self.crypto_backend == "cryptography":
-                encrypted_bytes = key.encrypt(data_bytes)
-                return base64.urlsafe_b64encode(encrypted_bytes).decode('utf-8')
-                
-            elif self.crypto_backend == "pycrypto":
-                # AES encryption
-                cipher = self.AES.new(key[:32], self.AES.MODE_EAX)
-                ciphertext, tag = cipher.encrypt_and_digest(data_bytes)
-                
-                encrypted_data = {
-                    "ciphertext": base64.b64encode(ciphertext).decode('utf-8'),
-                    "nonce": base64.b64encode(cipher.nonce).decode('utf-8'),
-                    "tag": base64.b64encode(tag).decode('utf-8')
-                }
-                
-                return base64.urlsafe_b64encode(json.dumps(encrypted_data).encode()).decode('utf-8')
-                
-            else:
-                # Basic XOR encryption (NOT SECURE)
-                encrypted = bytearray()
-                key_bytes = key[:32]
-                
-                for i, byte in enumerate(data_bytes):
-                    encrypted.append(byte ^ key_bytes[i % len(key_bytes)])
-                
-                return base64.urlsafe_b64encode(encrypted).decode('utf-8')
-                
+            if self.envelope_enabled:
+                return self._encrypt_record(data, self._active_data_key(key_type))
+            return self._encrypt_legacy(data, key_type)
         except Exception as e:
             logger.error(f"Encryption failed: {e}")
             return json.dumps(data)  # Fallback to unencrypted
@@ -219,48 +224,61 @@ class EncryptionManager:
                 return json.loads(encrypted_data)  # Assume unencrypted
             except:
                 return encrypted_data
-        
+        return self._decrypt_one(encrypted_data, key_type)
+    
+    async def encrypt_batch(self, records: List[Any], key_type: str = "master") -> List[str]:
+        """Encrypt many records in the thread pool; same output as ``encrypt_data`` per record."""
+        if not records:
+            return []
+        if not self._initialized or not self.encryption_enabled:
+            return [json.dumps(r) for r in records]
+        if not self.envelope_enabled:
+            return await self._map_chunks(lambda chunk: [self._encrypt_one_legacy(r, key_type) for r in chunk], records)
+        # Resolved on the loop so worker threads never race to create a DEK
+        dek = self._active_data_key(key_type)
+        self._cipher(dek)
+        return await self._map_chunks(lambda chunk: [self._encrypt_one(r, dek) for r in chunk], records)
+    
+    async def decrypt_batch(self, encrypted: List[str], key_type: str = "master") -> List[Any]:
+        """Decrypt many records (envelope or legacy format) in the thread pool."""
+        if not encrypted:
+            return []
+        if not self._initialized or not self.encryption_enabled:
+            return [await self.decrypt_data(e, key_type) for e in encrypted]
+        return await self._map_chunks(lambda chunk: [self._decrypt_one(e, key_type) for e in chunk], encrypted)
+    
+    async def _map_chunks(self, fn: Callable[[List[Any]], List[Any]], items: List[Any]) -> List[Any]:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="buddy-crypto")
+        size = max(1, min(self.batch_chunk_size, -(-len(items) // self._workers)))
+        loop = asyncio.get_running_loop()
+        parts = await asyncio.gather(*(
+            loop.run_in_executor(self._executor, fn, items[i:i + size]) for i in range(0, len(items), size)
+        ))
+        return [r for part in parts for r in part]
+    
+    def _encrypt_one(self, data: Any, dek: DataKey) -> str:
         try:
-            # Choose decryption key
-            if key_type == "device" and self._device_key:
-                key = self._device_key
-            else:
-                key = self._master_key
-            
-            # Decrypt based on backend
-            if self.crypto_backend == "cryptography":
-                encrypted_bytes = base64.urlsafe_b64decode(encrypted_data.encode('utf-8'))
-                decrypted_bytes = key.decrypt(encrypted_bytes)
-                json_data = decrypted_bytes.decode('utf-8')
-                return json.loads(json_data)
-                
-            elif self.crypto_backend == "pycrypto":
-                # Decode and parse encrypted data
-                decoded_data = base64.urlsafe_b64decode(encrypted_data.encode())
-                encrypted_obj = json.loads(decoded_data.decode('utf-8'))
-                
-                ciphertext = base64.b64decode(encrypted_obj["ciphertext"])
-                nonce = base64.b64decode(encrypted_obj["nonce"])
-                tag = base64.b64decode(encrypted_obj["tag"])
-                
-                cipher = self.AES.new(key[:32], self.AES.MODE_EAX, nonce=nonce)
-                decrypted_bytes = cipher.decrypt_and_verify(ciphertext, tag)
-                
-                json_data = decrypted_bytes.decode('utf-8')
-                return json.loads(json_data)
-                
-            else:
-                # Basic XOR decryption
-                encrypted_bytes = base64.urlsafe_b64decode(encrypted_data.encode())
-                decrypted = bytearray()
-                key_bytes = key[:32]
-                
-                for i, byte in enumerate(encrypted_bytes):
-                    decrypted.append(byte ^ key_bytes[i % len(key_bytes)])
-                
-                json_data = decrypted.decode('utf-8')
-                return json.loads(json_data)
-                
+            return self._encrypt_record(data, dek)
+        except Exception as e:
+            logger.error(f"Encryption failed: {e}")
+            return json.dumps(data)
+    
+    def _encrypt_one_legacy(self, data: Any, key_type: str) -> str:
+        try:
+            return self._encrypt_legacy(data, key_type)
+        except Exception as e:
+            logger.error(f"Encryption failed: {e}")
+            return json.dumps(data)
+    
+    def _decrypt_strict(self, encrypted_data: str, key_type: str) -> Any:
+        if encrypted_data.startswith(ENVELOPE_PREFIX):
+            return self._decrypt_record(encrypted_data)
+        return self._decrypt_legacy(encrypted_data, key_type)
+    
+    def _decrypt_one(self, encrypted_data: str, key_type: str) -> Any:
+        try:
+            return self._decrypt_strict(encrypted_data, key_type)
         except Exception as e:
             logger.error(f"Decryption failed: {e}")
             try:
@@ -268,6 +286,255 @@ class EncryptionManager:
             except:
                 return encrypted_data  # Return as-is
     
+    # Envelope records: "$env1$<dek id>$<urlsafe b64 payload>"
+    def _encrypt_record(self, data: Any, dek: DataKey) -> str:
+        payload = self._seal(dek, json.dumps(data).encode('utf-8'))
+        return f"{ENVELOPE_PREFIX}{dek.key_id}${base64.urlsafe_b64encode(payload).decode('ascii')}"
+    
+    def _decrypt_record(self, encrypted_data: str) -> Any:
+        key_id, _, body = encrypted_data[len(ENVELOPE_PREFIX):].partition("$")
+        dek = self._data_keys.get(key_id)
+        if dek is None:
+            raise KeyError(f"unknown data key {key_id}")
+        return json.loads(self._open(dek, base64.urlsafe_b64decode(body)).decode('utf-8'))
+    
+    @staticmethod
+    def record_key_id(encrypted_data: str) -> Optional[str]:
+        """DEK id of an envelope record (None for legacy or plaintext records)."""
+        if not encrypted_data.startswith(ENVELOPE_PREFIX):
+            return None
+        return encrypted_data[len(ENVELOPE_PREFIX):].partition("$")[0]
+    
+    def _cipher(self, dek: DataKey):
+        cipher = self._key_cache.get(dek.key_id)
+        if cipher is None:
+            if self.crypto_backend == "cryptography":
+                cipher = self.AESGCM(dek.key)
+            elif self.crypto_backend == "pycrypto":
+                cipher = dek.key  # PyCryptodome needs a fresh AES object per nonce
+            else:
+                cipher = int.from_bytes(dek.key, "big")
+            self._key_cache[dek.key_id] = cipher
+        return cipher
+    
+    def _seal(self, dek: DataKey, plaintext: bytes) -> bytes:
+        cipher = self._cipher(dek)
+        aad = dek.key_id.encode('ascii')
+        if self.crypto_backend == "cryptography":
+            nonce = os.urandom(12)
+            return nonce + cipher.encrypt(nonce, plaintext, aad)
+        if self.crypto_backend == "pycrypto":
+            aes = self.AES.new(cipher, self.AES.MODE_GCM)
+            aes.update(aad)
+            ciphertext, tag = aes.encrypt_and_digest(plaintext)
+            return aes.nonce + tag + ciphertext
+        return self._xor_stream(cipher, plaintext)
+    
+    def _open(self, dek: DataKey, payload: bytes) -> bytes:
+        cipher = self._cipher(dek)
+        aad = dek.key_id.encode('ascii')
+        if self.crypto_backend == "cryptography":
+            return cipher.decrypt(payload[:12], payload[12:], aad)
+        if self.crypto_backend == "pycrypto":
+            aes = self.AES.new(cipher, self.AES.MODE_GCM, nonce=payload[:16])
+            aes.update(aad)
+            return aes.decrypt_and_verify(payload[32:], payload[16:32])
+        return self._xor_stream(cipher, payload)
+    
+    @staticmethod
+    def _xor_stream(key_int: int, data: bytes) -> bytes:
+        # Basic backend (NOT SECURE): repeating-key XOR done as one big-int operation
+        n = len(data)
+        if not n:
+            return b""
+        reps = -(-n // 32)
+        stream = int.from_bytes(key_int.to_bytes(32, "big") * reps, "big") >> (8 * (reps * 32 - n))
+        return (int.from_bytes(data, "big") ^ stream).to_bytes(n, "big")
+    
+    # Data keys (DEKs)
+    def _kek(self, kek_type: str):
+        return self._device_key if kek_type == "device" and self._device_key else self._master_key
+    
+    def _active_data_key(self, key_type: str = "master") -> DataKey:
+        kek_type = "device" if key_type == "device" and self._device_key else "master"
+        key_id = self._active_keys.get(kek_type)
+        if key_id is not None:
+            return self._data_keys[key_id]
+        with self._keyring_lock:
+            key_id = self._active_keys.get(kek_type)
+            if key_id is not None:
+                return self._data_keys[key_id]
+            raw = os.urandom(32)
+            dek = DataKey(
+                key_id=uuid.uuid4().hex[:12],
+                key=raw,
+                wrapped=self._wrap(self._kek(kek_type), raw),
+                kek_type=kek_type,
+                created_at=datetime.now(timezone.utc).isoformat(),
+            )
+            self._data_keys[dek.key_id] = dek
+            self._active_keys[kek_type] = dek.key_id
+        self._save_keyring()
+        return dek
+    
+    def _wrap(self, kek, raw: bytes) -> str:
+        return self._encrypt_bytes(kek, raw)
+    
+    def _unwrap(self, kek, wrapped: str) -> bytes:
+        return self._decrypt_bytes(kek, wrapped)
+    
+    def _rewrap_data_keys(self):
+        """Re-encrypt every DEK under the current key-encryption keys (records are untouched)."""
+        with self._keyring_lock:
+            for dek in self._data_keys.values():
+                dek.wrapped = self._wrap(self._kek(dek.kek_type), dek.key)
+        self._save_keyring()
+    
+    def rotate_data_key(self, key_type: str = "master") -> DataKey:
+        """Start sealing new records with a fresh DEK; older DEKs stay readable until retired."""
+        kek_type = "device" if key_type == "device" and self._device_key else "master"
+        with self._keyring_lock:
+            old_id = self._active_keys.pop(kek_type, None)
+            if old_id in self._data_keys:
+                self._data_keys[old_id].active = False
+        return self._active_data_key(key_type)
+    
+    def retire_data_key(self, key_id: str) -> bool:
+        """Forget a DEK once no record uses it (see ``ReencryptionJob``)."""
+        with self._keyring_lock:
+            if key_id in self._active_keys.values():
+                return False
+            dek = self._data_keys.pop(key_id, None)
+            self._key_cache.pop(key_id, None)
+        if dek is not None:
+            self._save_keyring()
+        return dek is not None
+    
+    def export_keyring(self) -> Dict[str, Any]:
+        """Wrapped DEKs only; safe to store next to the data."""
+        with self._keyring_lock:
+            return {
+                "active": dict(self._active_keys),
+                "keys": [
+                    {"key_id": d.key_id, "wrapped": d.wrapped, "kek_type": d.kek_type,
+                     "created_at": d.created_at, "active": d.active}
+                    for d in self._data_keys.values()
+                ],
+            }
+    
+    def load_keyring(self, keyring: Dict[str, Any]) -> int:
+        """Unwrap stored DEKs with the current master/device keys."""
+        loaded = 0
+        with self._keyring_lock:
+            for entry in keyring.get("keys", []):
+                try:
+                    raw = self._unwrap(self._kek(entry["kek_type"]), entry["wrapped"])
+                except Exception as e:
+                    logger.error(f"Could not unwrap data key {entry.get('key_id')}: {e}")
+                    continue
+                self._data_keys[entry["key_id"]] = DataKey(
+                    key_id=entry["key_id"], key=raw, wrapped=entry["wrapped"], kek_type=entry["kek_type"],
+                    created_at=entry.get("created_at", ""), active=entry.get("active", False),
+                )
+                loaded += 1
+            for kek_type, key_id in (keyring.get("active") or {}).items():
+                if key_id in self._data_keys:
+                    self._active_keys[kek_type] = key_id
+        return loaded
+    
+    def _load_keyring_file(self, path: str) -> int:
+        with open(path, "r", encoding="utf-8") as f:
+            return self.load_keyring(json.load(f))
+    
+    def _save_keyring(self):
+        if not self.keyring_path:
+            return
+        try:
+            directory = os.path.dirname(self.keyring_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp = f"{self.keyring_path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.export_keyring(), f)
+            os.replace(tmp, self.keyring_path)
+        except Exception as e:
+            logger.error(f"Failed to save keyring: {e}")
+    
+    # Legacy per-record format (no DEK): JSON sealed directly with the master/device key
+    def _encrypt_legacy(self, data: Any, key_type: str = "master") -> str:
+        # Choose encryption key
+        if key_type == "device" and self._device_key:
+            key = self._device_key
+        else:
+            key = self._master_key
+        return self._encrypt_bytes(key, json.dumps(data).encode('utf-8'))
+    
+    def _decrypt_legacy(self, encrypted_data: str, key_type: str = "master") -> Any:
+        # Choose decryption key
+        if key_type == "device" and self._device_key:
+            key = self._device_key
+        else:
+            key = self._master_key
+        return json.loads(self._decrypt_bytes(key, encrypted_data).decode('utf-8'))
+    
+    def _encrypt_bytes(self, key, data_bytes: bytes) -> str:
+        # Encrypt based on backend
+        if self.crypto_backend == "cryptography":
+            encrypted_bytes = key.encrypt(data_bytes)
+            return base64.urlsafe_b64encode(encrypted_bytes).decode('utf-8')
+            
+        elif self.crypto_backend == "pycrypto":
+            # AES encryption
+            cipher = self.AES.new(key[:32], self.AES.MODE_EAX)
+            ciphertext, tag = cipher.encrypt_and_digest(data_bytes)
+            
+            encrypted_data = {
+                "ciphertext": base64.b64encode(ciphertext).decode('utf-8'),
+                "nonce": base64.b64encode(cipher.nonce).decode('utf-8'),
+                "tag": base64.b64encode(tag).decode('utf-8')
+            }
+            
+            return base64.urlsafe_b64encode(json.dumps(encrypted_data).encode()).decode('utf-8')
+            
+        else:
+            # Basic XOR encryption (NOT SECURE)
+            encrypted = bytearray()
+            key_bytes = key[:32]
+            
+            for i, byte in enumerate(data_bytes):
+                encrypted.append(byte ^ key_bytes[i % len(key_bytes)])
+            
+            return base64.urlsafe_b64encode(encrypted).decode('utf-8')
+    
+    def _decrypt_bytes(self, key, encrypted_data: str) -> bytes:
+        # Decrypt based on backend
+        if self.crypto_backend == "cryptography":
+            encrypted_bytes = base64.urlsafe_b64decode(encrypted_data.encode('utf-8'))
+            return key.decrypt(encrypted_bytes)
+            
+        elif self.crypto_backend == "pycrypto":
+            # Decode and parse encrypted data
+            decoded_data = base64.urlsafe_b64decode(encrypted_data.encode())
+            encrypted_obj = json.loads(decoded_data.decode('utf-8'))
+            
+            ciphertext = base64.b64decode(encrypted_obj["ciphertext"])
+            nonce = base64.b64decode(encrypted_obj["nonce"])
+            tag = base64.b64decode(encrypted_obj["tag"])
+            
+            cipher = self.AES.new(key[:32], self.AES.MODE_EAX, nonce=nonce)
+            return cipher.decrypt_and_verify(ciphertext, tag)
+            
+        else:
+            # Basic XOR decryption
+            encrypted_bytes = base64.urlsafe_b64decode(encrypted_data.encode())
+            decrypted = bytearray()
+            key_bytes = key[:32]
+            
+            for i, byte in enumerate(encrypted_bytes):
+                decrypted.append(byte ^ key_bytes[i % len(key_bytes)])
+            
+            return bytes(decrypted)
+    
     # Specialized encryption for different data types
     async def encrypt_user_data(self, user_data: Dict[str, Any]) -> str:
         """Encrypt user data with user-specific settings"""
@@ -282,23 +549,30 @@ class EncryptionManager:
         return await self.encrypt_data(context, "device")
     
     # Key Management
-    async def rotate_keys(self, new_password: str = None) -> bool:
-        """Rotate encryption keys"""
+    async def rotate_keys(self, new_password: str = None, rotate_data_keys: bool = False) -> bool:
+        """Rotate encryption keys.
+        
+        Only the data keys are rewrapped under the new master/device keys;
+        records keep their ciphertext. With ``rotate_data_keys`` new records
+        also get fresh DEKs, and ``ReencryptionJob`` moves old records over.
+        Legacy (non-envelope) records are sealed with the master key itself,
+        so migrate them with ``ReencryptionJob`` before rotating.
+        """
+        # Store old keys for rollback
+        old_master_key = self._master_key
+        old_device_key = self._device_key
+        old_wrapped = {d.key_id: d.wrapped for d in self._data_keys.values()}
         try:
-            # Store old keys for data migration
-            old_master_key = self._master_key
-            old_device_key = self._device_key
-            
             # Generate new keys
             await self._initialize_master_key(new_password)
             await self._initialize_device_key()
             
-            # In a full implementation, you would:
-            # 1. Decrypt all data with old keys
-            # 2. Re-encrypt with new keys
-            # 3. Update key metadata
+            await asyncio.to_thread(self._rewrap_data_keys)
+            if rotate_data_keys:
+                for kek_type in list(self._active_keys):
+                    self.rotate_data_key(kek_type)
             
-            logger.info("Encryption keys rotated successfully")
+            logger.info(f"Encryption keys rotated successfully ({len(self._data_keys)} data keys rewrapped)")
             return True
             
         except Exception as e:
@@ -306,6 +580,9 @@ class EncryptionManager:
             # Restore old keys
             self._master_key = old_master_key
             self._device_key = old_device_key
+            for key_id, wrapped in old_wrapped.items():
+                if key_id in self._data_keys:
+                    self._data_keys[key_id].wrapped = wrapped
             return False
     
     async def export_key_for_device(self, device_id: str) -> Optional[str]:
@@ -350,6 +627,8 @@ class EncryptionManager:
     # Utility Methods
     def is_data_encrypted(self, data: str) -> bool:
         """Check if data appears to be encrypted"""
+        if data.startswith(ENVELOPE_PREFIX):
+            return True
         try:
             # Try to decode as base64
             base64.urlsafe_b64decode(data)
@@ -370,7 +649,10 @@ class EncryptionManager:
             "initialized": self._initialized,
             "key_rotation_days": self.key_rotation_days,
             "has_master_key": self._master_key is not None,
-            "has_device_key": self._device_key is not None
+            "has_device_key": self._device_key is not None,
+            "envelope": self.envelope_enabled,
+            "data_keys": len(self._data_keys),
+            "active_data_keys": dict(self._active_keys)
         }
     
     async def close(self):
@@ -379,5 +661,118 @@ class EncryptionManager:
         self._master_key = None
         self._device_key = None
         self._key_cache.clear()
+        self._data_keys.clear()
+        self._active_keys.clear()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
         
         logger.info("Encryption manager closed")
+
+
+class ReencryptionJob:
+    """Streams encrypted records onto the active data key, resumable from a checkpoint.
+    
+    ``fetch(after_id, limit)`` returns the next page of ``(record_id,
+    ciphertext)`` pairs ordered by id (keyset pagination); ``write(pairs)``
+    persists re-encrypted records. After each written batch the last id is
+    checkpointed, so an interrupted run resumes where it stopped, and records
+    already on the target key are skipped, so replaying a batch is harmless.
+    Legacy (non-envelope) records are migrated along the way. A record that
+    cannot be decrypted or re-sealed is left as it is and its id is listed
+    under ``failed_ids`` in the checkpoint; the job never writes the
+    plaintext fallback ``encrypt_data`` uses. When the run completes without
+    failures, the data keys listed in ``retire`` are dropped from the keyring.
+    """
+    
+    def __init__(self, manager: EncryptionManager,
+                 fetch: Callable[[Optional[str], int], Awaitable[List[Tuple[str, str]]]],
+                 write: Callable[[List[Tuple[str, str]]], Awaitable[None]],
+                 checkpoint_path: str, batch_size: int = 500, key_type: str = "master",
+                 retire: Optional[Iterable[str]] = None):
+        self.manager = manager
+        self.fetch = fetch
+        self.write = write
+        self.checkpoint_path = checkpoint_path
+        self.batch_size = batch_size
+        self.key_type = key_type
+        self.retire = set(retire or ())
+    
+    def _open(self, encrypted_data: str) -> Tuple[bool, Any]:
+        try:
+            return True, self.manager._decrypt_strict(encrypted_data, self.key_type)
+        except Exception as e:
+            logger.warning(f"Re-encryption skipped an unreadable record: {e}")
+            return False, None
+    
+    def _seal(self, value: Any, dek: DataKey) -> Tuple[bool, Optional[str]]:
+        try:
+            return True, self.manager._encrypt_record(value, dek)
+        except Exception as e:
+            logger.error(f"Re-encryption skipped a record that failed to encrypt: {e}")
+            return False, None
+    
+    def _load_checkpoint(self) -> Dict[str, Any]:
+        try:
+            with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def _save_checkpoint(self, state: Dict[str, Any]):
+        directory = os.path.dirname(self.checkpoint_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = f"{self.checkpoint_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.checkpoint_path)
+    
+    async def run(self) -> Dict[str, Any]:
+        # Resolved on the loop so worker threads never race to create a DEK
+        dek = self.manager._active_data_key(self.key_type)
+        self.manager._cipher(dek)
+        target = dek.key_id
+        state = await asyncio.to_thread(self._load_checkpoint)
+        if state.get("status") != "running" or state.get("target") != target:
+            state = {"target": target, "after": None, "scanned": 0, "rewritten": 0, "failed": 0, "failed_ids": [],
+                     "started_at": datetime.now(timezone.utc).isoformat(), "status": "running"}
+        else:
+            logger.info(f"Resuming re-encryption after {state['after']} ({state['scanned']} scanned)")
+        
+        while True:
+            page = await self.fetch(state["after"], self.batch_size)
+            if not page:
+                break
+            stale = [(rid, ct) for rid, ct in page if EncryptionManager.record_key_id(ct) != target]
+            if stale:
+                opened = await self.manager._map_chunks(
+                    lambda chunk: [self._open(ct) for _, ct in chunk], stale)
+                # Records that don't decrypt are left untouched rather than re-sealed as garbage
+                readable = [(rid, value) for (rid, _), (ok, value) in zip(stale, opened) if ok]
+                sealed = await self.manager._map_chunks(
+                    lambda chunk: [self._seal(value, dek) for _, value in chunk], readable) if readable else []
+                # ...and records that don't encrypt keep their old ciphertext
+                done = [(rid, ct) for (rid, _), (ok, ct) in zip(readable, sealed) if ok]
+                failed = ([rid for (rid, _), (ok, _) in zip(stale, opened) if not ok]
+                          + [rid for (rid, _), (ok, _) in zip(readable, sealed) if not ok])
+                state["failed"] = state.get("failed", 0) + len(failed)
+                state.setdefault("failed_ids", []).extend(failed)
+                if done:
+                    await self.write(done)
+                state["rewritten"] += len(done)
+            state["after"] = page[-1][0]
+            state["scanned"] += len(page)
+            await asyncio.to_thread(self._save_checkpoint, state)
+            if len(page) < self.batch_size:
+                break
+        
+        state["status"] = "done"
+        state["finished_at"] = datetime.now(timezone.utc).isoformat()
+        # Keys are only retired when every record was moved off them
+        retire = sorted(self.retire) if not state["failed"] else []
+        state["retired"] = [key_id for key_id in retire if self.manager.retire_data_key(key_id)]
+        await asyncio.to_thread(self._save_checkpoint, state)
+        return state
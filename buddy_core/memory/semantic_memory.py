@@ -13,8 +13,10 @@ import os
 import json
 import asyncio
 import logging
+import sqlite3
+import threading
 import uuid
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Tuple, Callable
 from datetime import datetime, timedelta
 import numpy as np
 
@@ -40,6 +42,138 @@ from mongodb_integration import BuddyDatabase
 
 logger = logging.getLogger(__name__)
 
+class MemoryOutbox:
+    """
+    Durable queue of vector/relational writes that failed or timed out.
+    
+    Each row holds everything needed to redo one backend write, so a backend
+    that was slow or down during ``store_conversation_context`` catches up on
+    the next ``replay_outbox`` instead of silently missing the conversation.
+    A write that fails ``max_attempts`` times is moved to the
+    ``memory_outbox_dead`` table, where it stays for inspection
+    (``dead_letters``) or a manual ``requeue_dead``.
+    """
+    
+    _COLUMNS = "id, backend, conversation_id, payload, attempts, last_error, created_at"
+    
+    def __init__(self, db_path: str, max_attempts: int = 10):
+        self.db_path = db_path
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS memory_outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                backend TEXT NOT NULL,
+                conversation_id TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                attempts INTEGER DEFAULT 0,
+                last_error TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS memory_outbox_dead (
+                id INTEGER PRIMARY KEY,
+                backend TEXT NOT NULL,
+                conversation_id TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                attempts INTEGER,
+                last_error TEXT,
+                created_at TIMESTAMP,
+                dead_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        # Rows exhausted before the dead-letter table existed
+        self._bury("attempts >= ?", (max_attempts,))
+        self._conn.commit()
+    
+    def _bury(self, where: str, params: tuple):
+        """Move matching rows to the dead-letter table (caller commits)."""
+        self._conn.execute(
+            f"INSERT OR REPLACE INTO memory_outbox_dead ({self._COLUMNS}) "
+            f"SELECT {self._COLUMNS} FROM memory_outbox WHERE {where}", params
+        )
+        self._conn.execute(f"DELETE FROM memory_outbox WHERE {where}", params)
+    
+    def enqueue(self, backend: str, conversation_id: str, payload: Dict[str, Any], error: str):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO memory_outbox (backend, conversation_id, payload, last_error) VALUES (?, ?, ?, ?)",
+                (backend, conversation_id, json.dumps(payload, default=str), error)
+            )
+            self._conn.commit()
+    
+    def pending(self, limit: int = 100) -> List[Tuple[int, str, str, Dict[str, Any]]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, backend, conversation_id, payload FROM memory_outbox ORDER BY id LIMIT ?",
+                (limit,)
+            ).fetchall()
+        return [(row_id, backend, cid, json.loads(payload)) for row_id, backend, cid, payload in rows]
+    
+    def complete(self, row_id: int):
+        with self._lock:
+            self._conn.execute("DELETE FROM memory_outbox WHERE id = ?", (row_id,))
+            self._conn.commit()
+    
+    def fail(self, row_id: int, error: str) -> bool:
+        """Count a failed attempt. Returns True when the row was moved to the dead-letter table."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE memory_outbox SET attempts = attempts + 1, last_error = ? WHERE id = ?",
+                (error, row_id)
+            )
+            dead = self._conn.execute(
+                "SELECT 1 FROM memory_outbox WHERE id = ? AND attempts >= ?", (row_id, self.max_attempts)
+            ).fetchone() is not None
+            if dead:
+                self._bury("id = ?", (row_id,))
+            self._conn.commit()
+        return dead
+    
+    def counts(self) -> Dict[str, int]:
+        """Queued (still retried) writes per backend."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT backend, COUNT(*) FROM memory_outbox GROUP BY backend"
+            ).fetchall()
+        return dict(rows)
+    
+    def dead_counts(self) -> Dict[str, int]:
+        """Abandoned writes per backend."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT backend, COUNT(*) FROM memory_outbox_dead GROUP BY backend"
+            ).fetchall()
+        return dict(rows)
+    
+    def dead_letters(self, limit: int = 100) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, backend, conversation_id, attempts, last_error, created_at, dead_at "
+                "FROM memory_outbox_dead ORDER BY id LIMIT ?", (limit,)
+            ).fetchall()
+        keys = ("id", "backend", "conversation_id", "attempts", "last_error", "created_at", "dead_at")
+        return [dict(zip(keys, row)) for row in rows]
+    
+    def requeue_dead(self, backend: Optional[str] = None) -> int:
+        """Put abandoned writes back in the queue with a fresh attempt count."""
+        where, params = ("backend = ?", (backend,)) if backend else ("1 = 1", ())
+        with self._lock:
+            cursor = self._conn.execute(
+                f"INSERT INTO memory_outbox ({self._COLUMNS}) "
+                f"SELECT id, backend, conversation_id, payload, 0, last_error, created_at "
+                f"FROM memory_outbox_dead WHERE {where}", params
+            )
+            self._conn.execute(f"DELETE FROM memory_outbox_dead WHERE {where}", params)
+            self._conn.commit()
+        return cursor.rowcount
+
 class SemanticMemoryEngine:
     """
     Advanced semantic memory engine for BUDDY AI assistant.
@@ -59,9 +193,17 @@ class SemanticMemoryEngine:
         self.sentence_model = None
         self.embedding_dimension = 384  # all-MiniLM-L6-v2 dimension
         
-        # Local storage for fallback
+        # Local storage for fallback: one ID-mapped FAISS index per user, so a
+        # user's recall never competes with other users' vectors for top-k.
+        # FAISS ids are int64; the maps below translate them to and from
+        # local_memory keys (conversation ids).
         self.local_memory = {}
-        self.faiss_index = None
+        self.faiss_enabled = False
+        self.faiss_partitions: Dict[str, Any] = {}
+        self._faiss_ids: Dict[str, Tuple[int, str]] = {}  # conversation_id -> (faiss id, user_id)
+        self._faiss_keys: Dict[int, str] = {}  # faiss id -> conversation_id
+        self._next_faiss_id = 1
+        self._faiss_lock = threading.Lock()
         
         # Database connections
         self.conversation_db = None
@@ -71,6 +213,11 @@ class SemanticMemoryEngine:
         self.max_context_length = self.config.get('max_context_length', 10)
         self.similarity_threshold = self.config.get('similarity_threshold', 0.7)
         self.max_memories_per_query = self.config.get('max_memories_per_query', 5)
+        self.backend_timeout = self.config.get('backend_timeout', 5.0)
+        self.outbox_replay_interval = self.config.get('outbox_replay_interval', 60)
+        
+        # Writes that failed or timed out, replayed on initialize and then every outbox_replay_interval
+        self.outbox: Optional[MemoryOutbox] = None
         
     async def initialize(self, conversation_db: Optional[BuddyDatabase] = None) -> bool:
         """Initialize the semantic memory engine with vector databases"""
@@ -93,8 +240,21 @@ class SemanticMemoryEngine:
             # Initialize fallback storage
             await self._initialize_fallback_storage()
             
+            self._initialize_outbox()
+            
             self.initialized = True
             logger.info("Semantic Memory Engine initialized successfully")
+            
+            # Catch up on writes that did not land before the last shutdown
+            if self.outbox and self.outbox.counts():
+                await self.replay_outbox()
+            if self.outbox:
+                from jobs.scheduler import scheduler
+                # The outbox file is local to this process, so every worker replays its own
+                scheduler.schedule_interval(
+                    f"memory_outbox_replay:{self.outbox.db_path}", self.outbox_replay_interval,
+                    self.replay_outbox, distributed=False, timeout=self.outbox_replay_interval
+                )
             return True
             
         except Exception as e:
@@ -165,12 +325,28 @@ class SemanticMemoryEngine:
         """Initialize FAISS for local vector storage as ultimate fallback"""
         if EMBEDDING_AVAILABLE:
             try:
-                # Create FAISS index for local storage
-                self.faiss_index = faiss.IndexFlatIP(self.embedding_dimension)  # Inner product for cosine similarity
+                # Partitions are created per user on first write; build one
+                # here so a broken FAISS install is detected up front
+                self._new_faiss_partition()
+                self.faiss_enabled = True
                 logger.info("FAISS fallback storage initialized")
             except Exception as e:
                 logger.warning(f"FAISS initialization failed: {e}")
     
+    def _initialize_outbox(self):
+        """Open the durable outbox for failed backend writes"""
+        try:
+            default_path = os.path.join(self.config.get('chroma_persist_dir', './buddy_memory'), 'memory_outbox.db')
+            self.outbox = MemoryOutbox(self.config.get('outbox_path', default_path),
+                                       self.config.get('outbox_max_attempts', 10))
+        except Exception as e:
+            logger.warning(f"Memory outbox initialization failed: {e}")
+            self.outbox = None
+    
+    def _new_faiss_partition(self):
+        """Inner-product index (cosine on normalized vectors) with caller-chosen int64 ids"""
+        return faiss.IndexIDMap(faiss.IndexFlatIP(self.embedding_dimension))
+    
     async def store_conversation_context(self, conversation: Dict[str, Any]) -> str:
         """
         Store conversation with semantic indexing for future retrieval
@@ -207,21 +383,9 @@ class SemanticMemoryEngine:
                 'context_type': self._determine_context_type(conversation)
             }
             
-            # Store in primary vector database (Pinecone)
-            if self.vector_index:
-                await self._store_in_pinecone(conversation_id, embedding, metadata)
-            
-            # Store in local vector database (ChromaDB)
-            if hasattr(self, 'conversation_collection'):
-                await self._store_in_chromadb(conversation_id, content, embedding, metadata)
-            
-            # Store in relational database for full context
-            if self.conversation_db:
-                await self._store_in_relational_db(conversation)
-            
-            # Update FAISS fallback
-            if self.faiss_index is not None:
-                await self._store_in_faiss(conversation_id, embedding, metadata)
+            # Fan out to every configured backend concurrently; a slow or
+            # failing backend lands in the outbox instead of blocking the rest
+            await self._fan_out(conversation_id, conversation, embedding, metadata)
             
             logger.debug(f"Stored conversation context: {conversation_id}")
             return conversation_id
@@ -230,6 +394,113 @@ class SemanticMemoryEngine:
             logger.error(f"Failed to store conversation context: {e}")
             return ""
     
+    def _active_backends(self) -> List[str]:
+        """Backends a conversation write goes to, in the current configuration"""
+        backends = []
+        if self.vector_index:
+            backends.append('pinecone')
+        if hasattr(self, 'conversation_collection'):
+            backends.append('chromadb')
+        if self.conversation_db and hasattr(self.conversation_db, 'save_conversation'):
+            backends.append('relational')
+        if self.faiss_enabled:
+            backends.append('faiss')
+        return backends
+    
+    def _backend_write(self, backend: str, conversation_id: str, conversation: Dict[str, Any],
+                       embedding: np.ndarray, metadata: Dict):
+        """Coroutine performing one backend's write; raises on failure"""
+        if backend == 'pinecone':
+            return self._store_in_pinecone(conversation_id, embedding, metadata)
+        if backend == 'chromadb':
+            return self._store_in_chromadb(conversation_id, conversation.get('content', ''), embedding, metadata)
+        if backend == 'relational':
+            return self._store_in_relational_db(conversation_id, conversation)
+        if backend == 'faiss':
+            return self._store_in_faiss(conversation_id, embedding, metadata)
+        raise ValueError(f"Unknown memory backend: {backend}")
+    
+    async def _run_blocking(self, fn: Callable, *args):
+        """Run a synchronous client call on the default executor"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, lambda: fn(*args))
+    
+    async def _fan_out(self, conversation_id: str, conversation: Dict[str, Any],
+                       embedding: np.ndarray, metadata: Dict) -> Dict[str, bool]:
+        """Write to all backends at once, each bounded by ``backend_timeout``"""
+        backends = self._active_backends()
+        outcomes = await asyncio.gather(*[
+            asyncio.wait_for(
+                self._backend_write(backend, conversation_id, conversation, embedding, metadata),
+                timeout=self.backend_timeout
+            )
+            for backend in backends
+        ], return_exceptions=True)
+        
+        status = {}
+        for backend, outcome in zip(backends, outcomes):
+            status[backend] = not isinstance(outcome, BaseException)
+            if status[backend]:
+                continue
+            error = "timeout" if isinstance(outcome, asyncio.TimeoutError) else str(outcome)
+            logger.warning(f"{backend} storage failed for {conversation_id}: {error}")
+            if self.outbox:
+                payload = {
+                    'conversation': conversation,
+                    'embedding': embedding.tolist(),
+                    'metadata': metadata
+                }
+                try:
+                    await self._run_blocking(self.outbox.enqueue, backend, conversation_id, payload, error)
+                except Exception as e:
+                    logger.error(f"Failed to queue {backend} write for {conversation_id}: {e}")
+        return status
+    
+    async def replay_outbox(self, limit: int = 100) -> Dict[str, int]:
+        """
+        Retry queued backend writes
+        
+        Every backend write is an upsert keyed by conversation id (the
+        relational one through ``save_conversation(conversation_id=...)``),
+        so a write that timed out but eventually landed is safe to replay.
+        Runs on initialize and then periodically from ``jobs.scheduler``.
+        
+        Args:
+            limit: Maximum number of queued writes to attempt
+            
+        Returns:
+            Counts of replayed and still-failing writes, and of those moved to dead letters
+        """
+        stats = {'replayed': 0, 'failed': 0, 'dead': 0}
+        if not self.outbox:
+            return stats
+        
+        active = set(self._active_backends())
+        for row_id, backend, conversation_id, payload in await self._run_blocking(self.outbox.pending, limit):
+            if backend not in active:
+                continue  # Backend not configured in this process; leave queued
+            try:
+                await asyncio.wait_for(
+                    self._backend_write(
+                        backend, conversation_id, payload['conversation'],
+                        np.asarray(payload['embedding'], dtype='float32'), payload['metadata']
+                    ),
+                    timeout=self.backend_timeout
+                )
+                await self._run_blocking(self.outbox.complete, row_id)
+                stats['replayed'] += 1
+            except Exception as e:
+                error = "timeout" if isinstance(e, asyncio.TimeoutError) else str(e)
+                if await self._run_blocking(self.outbox.fail, row_id, error):
+                    stats['dead'] += 1
+                    logger.error(f"Memory outbox gave up on {backend} write for {conversation_id}: {error}")
+                stats['failed'] += 1
+        
+        if stats['replayed'] or stats['failed']:
+            logger.info(f"Memory outbox replay: {stats['replayed']} replayed, {stats['failed']} failed "
+                        f"({stats['dead']} moved to dead letters)")
+        return stats
+    
     async def recall_relevant_context(self, query: str, user_id: str, 
                                     session_id: str = None, limit: int = None) -> List[Dict[str, Any]]:
         """
@@ -267,7 +538,7 @@ class SemanticMemoryEngine:
                 results.extend(chroma_results)
             
             # Search FAISS (ultimate fallback)
-            elif self.faiss_index is not None:
+            elif self.faiss_enabled:
                 faiss_results = await self._search_faiss(query_embedding, user_id, limit)
                 results.extend(faiss_results)
             
@@ -323,7 +594,7 @@ class SemanticMemoryEngine:
             preference_id = f"{user_id}_preferences_{datetime.utcnow().timestamp()}"
             
             if hasattr(self, 'preference_collection'):
-                self.preference_collection.upsert(
+                await self._run_blocking(lambda: self.preference_collection.upsert(
                     documents=[preference_text],
                     embeddings=[preference_embedding.tolist()],
                     metadatas=[{
@@ -334,7 +605,7 @@ class SemanticMemoryEngine:
                         'confidence': interaction_data.get('confidence', 0.8)
                     }],
                     ids=[preference_id]
-                )
+                ))
             
             logger.debug(f"Updated user preferences for {user_id}")
             
@@ -392,7 +663,7 @@ class SemanticMemoryEngine:
         """Generate text embedding using sentence transformer"""
         if self.sentence_model and text:
             try:
-                embedding = self.sentence_model.encode([text])
+                embedding = await self._run_blocking(self.sentence_model.encode, [text])
                 return embedding[0]
             except Exception as e:
                 logger.warning(f"Embedding generation failed: {e}")
@@ -401,9 +672,9 @@ class SemanticMemoryEngine:
         import hashlib
         hash_obj = hashlib.sha256(text.encode())
         hash_bytes = hash_obj.digest()
-        # Convert to float array (simplified)
-        embedding = np.array([float(b) / 255.0 for b in hash_bytes[:self.embedding_dimension]])
-        return embedding
+        # Convert to float array (simplified), repeated to the index dimension
+        embedding = np.array([float(b) / 255.0 for b in hash_bytes])
+        return np.resize(embedding, self.embedding_dimension)
     
     def _determine_context_type(self, conversation: Dict[str, Any]) -> str:
         """Determine the type of conversation context"""
@@ -427,59 +698,66 @@ class SemanticMemoryEngine:
     
     async def _store_in_pinecone(self, conversation_id: str, embedding: np.ndarray, metadata: Dict):
         """Store conversation in Pinecone vector database"""
-        try:
-            self.vector_index.upsert(
-                vectors=[{
-                    'id': conversation_id,
-                    'values': embedding.tolist(),
-                    'metadata': metadata
-                }]
-            )
-        except Exception as e:
-            logger.warning(f"Pinecone storage failed: {e}")
+        await self._run_blocking(lambda: self.vector_index.upsert(
+            vectors=[{
+                'id': conversation_id,
+                'values': embedding.tolist(),
+                'metadata': metadata
+            }]
+        ))
     
     async def _store_in_chromadb(self, conversation_id: str, content: str, 
                                embedding: np.ndarray, metadata: Dict):
         """Store conversation in ChromaDB"""
-        try:
-            self.conversation_collection.upsert(
-                documents=[content],
-                embeddings=[embedding.tolist()],
-                metadatas=[metadata],
-                ids=[conversation_id]
-            )
-        except Exception as e:
-            logger.warning(f"ChromaDB storage failed: {e}")
+        await self._run_blocking(lambda: self.conversation_collection.upsert(
+            documents=[content],
+            embeddings=[embedding.tolist()],
+            metadatas=[metadata],
+            ids=[conversation_id]
+        ))
     
-    async def _store_in_relational_db(self, conversation: Dict[str, Any]):
-        """Store full conversation in relational database"""
-        if self.conversation_db and hasattr(self.conversation_db, 'save_conversation'):
-            try:
-                await self.conversation_db.save_conversation(
-                    session_id=conversation.get('session_id', ''),
-                    user_id=conversation.get('user_id', ''),
-                    role=conversation.get('role', 'user'),
-                    content=conversation.get('content', ''),
-                    metadata=conversation.get('metadata', {})
-                )
-            except Exception as e:
-                logger.warning(f"Relational DB storage failed: {e}")
+    async def _store_in_relational_db(self, conversation_id: str, conversation: Dict[str, Any]):
+        """Store full conversation in relational database (idempotent on conversation id)"""
+        await self.conversation_db.save_conversation(
+            session_id=conversation.get('session_id', ''),
+            user_id=conversation.get('user_id', ''),
+            role=conversation.get('role', 'user'),
+            content=conversation.get('content', ''),
+            metadata=conversation.get('metadata', {}),
+            conversation_id=conversation_id
+        )
     
     async def _store_in_faiss(self, conversation_id: str, embedding: np.ndarray, metadata: Dict):
-        """Store conversation in FAISS index as fallback"""
-        try:
-            # Normalize embedding for cosine similarity
-            norm = np.linalg.norm(embedding)
-            if norm > 0:
-                normalized_embedding = embedding / norm
-                self.faiss_index.add(normalized_embedding.reshape(1, -1))
-                
-                # Store metadata separately (FAISS doesn't store metadata)
-                if conversation_id not in self.local_memory:
-                    self.local_memory[conversation_id] = metadata
-                    
-        except Exception as e:
-            logger.warning(f"FAISS storage failed: {e}")
+        """Store conversation in the user's FAISS partition as fallback"""
+        await self._run_blocking(self._faiss_upsert, conversation_id, embedding, metadata)
+    
+    def _faiss_upsert(self, conversation_id: str, embedding: np.ndarray, metadata: Dict):
+        """Add or replace a conversation vector, keeping its FAISS id stable"""
+        # Normalize embedding for cosine similarity
+        norm = np.linalg.norm(embedding)
+        if norm == 0:
+            return
+        vector = (embedding / norm).astype('float32').reshape(1, -1)
+        user_id = metadata.get('user_id', '')
+        
+        with self._faiss_lock:
+            existing = self._faiss_ids.get(conversation_id)
+            if existing:
+                faiss_id, owner = existing
+                self.faiss_partitions[owner].remove_ids(np.array([faiss_id], dtype='int64'))
+            else:
+                faiss_id = self._next_faiss_id
+                self._next_faiss_id += 1
+            
+            partition = self.faiss_partitions.get(user_id)
+            if partition is None:
+                partition = self.faiss_partitions[user_id] = self._new_faiss_partition()
+            partition.add_with_ids(vector, np.array([faiss_id], dtype='int64'))
+            
+            # Store metadata separately (FAISS doesn't store metadata)
+            self._faiss_ids[conversation_id] = (faiss_id, user_id)
+            self._faiss_keys[faiss_id] = conversation_id
+            self.local_memory[conversation_id] = metadata
     
     async def _search_pinecone(self, query_embedding: np.ndarray, user_id: str, 
                              session_id: str, limit: int) -> List[Dict]:
@@ -489,12 +767,12 @@ class SemanticMemoryEngine:
             if session_id:
                 filter_dict['session_id'] = {'$eq': session_id}
             
-            response = self.vector_index.query(
+            response = await self._run_blocking(lambda: self.vector_index.query(
                 vector=query_embedding.tolist(),
                 top_k=limit,
                 filter=filter_dict,
                 include_metadata=True
-            )
+            ))
             
             results = []
             for match in response['matches']:
@@ -520,12 +798,12 @@ class SemanticMemoryEngine:
             if session_id:
                 where_filter['session_id'] = {'$eq': session_id}
             
-            results = self.conversation_collection.query(
+            results = await self._run_blocking(lambda: self.conversation_collection.query(
                 query_texts=[query],
                 n_results=limit,
                 where=where_filter,
                 include=['metadatas', 'documents', 'distances']
-            )
+            ))
             
             search_results = []
             if results['documents']:
@@ -548,38 +826,44 @@ class SemanticMemoryEngine:
             return []
     
     async def _search_faiss(self, query_embedding: np.ndarray, user_id: str, limit: int) -> List[Dict]:
-        """Search FAISS index for relevant conversations"""
+        """Search the user's FAISS partition for relevant conversations"""
         try:
             # Normalize query embedding
             norm = np.linalg.norm(query_embedding)
-            if norm > 0:
-                normalized_query = (query_embedding / norm).reshape(1, -1)
-                
-                # Search FAISS index
-                scores, indices = self.faiss_index.search(normalized_query, limit)
-                
-                results = []
-                for i, (score, idx) in enumerate(zip(scores[0], indices[0])):
-                    if idx != -1:  # Valid index
-                        # Find conversation ID from local memory (simplified)
-                        conversation_id = f"faiss_{idx}"
-                        metadata = self.local_memory.get(conversation_id, {})
-                        
-                        # Filter by user_id
-                        if metadata.get('user_id') == user_id:
-                            results.append({
-                                'conversation_id': conversation_id,
-                                'relevance_score': float(score),
-                                'metadata': metadata,
-                                'source': 'faiss'
-                            })
-                
-                return results
-                
+            if norm == 0:
+                return []
+            normalized_query = (query_embedding / norm).astype('float32').reshape(1, -1)
+            
+            hits = await self._run_blocking(self._faiss_search, normalized_query, user_id, limit)
+            
+            results = []
+            for score, conversation_id in hits:
+                results.append({
+                    'conversation_id': conversation_id,
+                    'relevance_score': score,
+                    'metadata': self.local_memory.get(conversation_id, {}),
+                    'source': 'faiss'
+                })
+            
+            return results
+            
         except Exception as e:
             logger.warning(f"FAISS search failed: {e}")
             return []
     
+    def _faiss_search(self, normalized_query: np.ndarray, user_id: str, limit: int) -> List[Tuple[float, str]]:
+        """Top-k within one user's partition, mapped back to conversation ids"""
+        with self._faiss_lock:
+            partition = self.faiss_partitions.get(user_id)
+            if partition is None or partition.ntotal == 0:
+                return []
+            scores, ids = partition.search(normalized_query, min(limit, partition.ntotal))
+            return [
+                (float(score), self._faiss_keys[int(faiss_id)])
+                for score, faiss_id in zip(scores[0], ids[0])
+                if faiss_id != -1 and int(faiss_id) in self._faiss_keys
+            ]
+    
     async def _enrich_search_results(self, results: List[Dict]) -> List[Dict[str, Any]]:
         """Enrich search results with additional context and scoring"""
         enriched_results = []
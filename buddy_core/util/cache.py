@@ -1,55 +1,161 @@
 from __future__ import annotations
-"""Simple TTL + size-limited LRU cache (Phase D enhancement)."""
-from collections import OrderedDict
-from typing import Generic, TypeVar, Dict, Tuple, Optional
+"""TTL + size-limited LRU cache with async single-flight (Phase D enhancement).
+
+Entries live in lock-striped shards (each an LRU ``OrderedDict``), so
+threaded callers only contend on keys that hash to the same shard. Expiry
+uses the monotonic clock, so wall-clock adjustments never resurrect or
+drop entries.
+
+``get_or_set`` is the async entry point: concurrent misses for one key
+share a single computation, and with ``stale_seconds`` an expired entry is
+still served for that long while one background refresh replaces it
+(stale-while-revalidate).
+"""
+import asyncio
+import threading
 import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Generic, List, Optional, Tuple, TypeVar
 
 K = TypeVar('K')
 V = TypeVar('V')
 
+_COUNTERS = ("hits", "misses", "stale_hits", "evictions", "expirations", "coalesced", "refreshes", "errors")
+
+
+class _Shard(Generic[K, V]):
+    __slots__ = ("data", "lock", "counts")
+
+    def __init__(self):
+        # key -> (fresh_until, stale_until, value)
+        self.data: "OrderedDict[K, Tuple[float, float, V]]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.counts: Dict[str, int] = dict.fromkeys(_COUNTERS, 0)
+
+
 class TTLCache(Generic[K, V]):
-    def __init__(self, maxsize: int = 256, ttl_seconds: int = 1800):
+    def __init__(self, maxsize: int = 256, ttl_seconds: int = 1800, *, stale_seconds: float = 0.0,
+                 shards: int = 8, clock: Callable[[], float] = time.monotonic):
         self.maxsize = maxsize
         self.ttl = ttl_seconds
-        self._data: "OrderedDict[K, Tuple[float, V]]" = OrderedDict()
-        self.hits: int = 0
-        self.misses: int = 0
+        self.stale = stale_seconds
+        self._clock = clock
+        self._shards: List[_Shard[K, V]] = [_Shard() for _ in range(max(1, min(shards, maxsize)))]
+        self._shard_max = max(1, -(-maxsize // len(self._shards)))
+        self._inflight: Dict[K, "asyncio.Future[V]"] = {}
+
+    def _shard(self, key: K) -> _Shard[K, V]:
+        return self._shards[hash(key) % len(self._shards)]
+
+    def _lookup(self, key: K) -> Tuple[Optional[V], bool]:
+        """(value, fresh); value is None on a miss, fresh is False when serving stale."""
+        shard = self._shard(key)
+        now = self._clock()
+        with shard.lock:
+            item = shard.data.get(key)
+            if item is None:
+                shard.counts["misses"] += 1
+                return None, False
+            fresh_until, stale_until, value = item
+            if now < fresh_until:
+                shard.data.move_to_end(key)
+                shard.counts["hits"] += 1
+                return value, True
+            if now < stale_until:
+                shard.counts["stale_hits"] += 1
+                return value, False
+            del shard.data[key]
+            shard.counts["expirations"] += 1
+            shard.counts["misses"] += 1
+            return None, False
 
     def get(self, key: K) -> Optional[V]:
-        now = time.time()
-        item = self._data.get(key)
-        if not item:
-            self.misses += 1
-            return None
-        exp, value = item
-        if exp < now:
-            self._data.pop(key, None)
-            self.misses += 1
-            return None
-        self._data.move_to_end(key)
-        self.hits += 1
-        return value
+        """Fresh value or None; stale entries are only served through ``get_or_set``."""
+        value, fresh = self._lookup(key)
+        return value if fresh else None
 
     def set(self, key: K, value: V):
-        now = time.time()
-        exp = now + self.ttl
-        if key in self._data:
-            self._data.move_to_end(key)
-        self._data[key] = (exp, value)
-        if len(self._data) > self.maxsize:
-            self._data.popitem(last=False)
+        shard = self._shard(key)
+        now = self._clock()
+        with shard.lock:
+            if key in shard.data:
+                shard.data.move_to_end(key)
+            shard.data[key] = (now + self.ttl, now + self.ttl + self.stale, value)
+            while len(shard.data) > self._shard_max:
+                shard.data.popitem(last=False)
+                shard.counts["evictions"] += 1
+
+    def invalidate(self, key: K) -> None:
+        shard = self._shard(key)
+        with shard.lock:
+            shard.data.pop(key, None)
+
+    async def get_or_set(self, key: K, factory: Callable[[], Awaitable[V]]) -> V:
+        """Cached value for ``key``, computing it with ``factory`` at most once across concurrent callers."""
+        value, fresh = self._lookup(key)
+        if value is not None:
+            if not fresh and key not in self._inflight:
+                self._start_refresh(key, factory)
+            return value
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self._shard(key).counts["coalesced"] += 1
+            # shield: a cancelled waiter must not cancel the shared computation
+            return await asyncio.shield(pending)
+        return await self._compute(key, factory)
+
+    def _launch(self, key: K, factory: Callable[[], Awaitable[V]]) -> "asyncio.Future[V]":
+        # The computation runs as its own task so no caller's cancellation can abort it for the others
+        task = asyncio.ensure_future(self._load(key, factory))
+        self._inflight[key] = task
+
+        def done(t: "asyncio.Future[V]") -> None:
+            if self._inflight.get(key) is t:
+                del self._inflight[key]
+            if not t.cancelled():
+                t.exception()  # retrieved here so an unawaited refresh failure isn't logged as lost
+
+        task.add_done_callback(done)
+        return task
+
+    async def _load(self, key: K, factory: Callable[[], Awaitable[V]]) -> V:
+        try:
+            value = await factory()
+        except Exception:
+            self._shard(key).counts["errors"] += 1
+            raise
+        self.set(key, value)
+        return value
+
+    async def _compute(self, key: K, factory: Callable[[], Awaitable[V]]) -> V:
+        return await asyncio.shield(self._launch(key, factory))
+
+    def _start_refresh(self, key: K, factory: Callable[[], Awaitable[V]]) -> None:
+        # On failure the stale value keeps being served until it ages out
+        self._shard(key).counts["refreshes"] += 1
+        self._launch(key, factory)
 
     def purge_expired(self):
-        now = time.time()
-        expired = [k for k, (exp, _) in self._data.items() if exp < now]
-        for k in expired:
-            self._data.pop(k, None)
+        now = self._clock()
+        for shard in self._shards:
+            with shard.lock:
+                expired = [k for k, (_, stale_until, _) in shard.data.items() if stale_until <= now]
+                for k in expired:
+                    del shard.data[k]
+                shard.counts["expirations"] += len(expired)
 
     def stats(self) -> Dict[str, float]:  # type: ignore[name-defined]
-        total = self.hits + self.misses
-        hit_rate = (self.hits / total) if total else 0.0
-        return {"size": len(self._data), "hits": self.hits, "misses": self.misses, "hit_rate": hit_rate}
+        totals = dict.fromkeys(_COUNTERS, 0)
+        size = 0
+        for shard in self._shards:
+            with shard.lock:
+                size += len(shard.data)
+                for name, count in shard.counts.items():
+                    totals[name] += count
+        lookups = totals["hits"] + totals["stale_hits"] + totals["misses"]
+        hit_rate = ((totals["hits"] + totals["stale_hits"]) / lookups) if lookups else 0.0
+        return {"size": size, **totals, "hit_rate": hit_rate, "inflight": len(self._inflight)}
 
     def __len__(self):
         self.purge_expired()
-        return len(self._data)
\ No newline at end of file
+        return sum(len(shard.data) for shard in self._shards)
@@ -1,4 +1,4 @@
 # BUDDY Core Utils
-from .mailer import AsyncMailer, MockMailer, SendGridMailer, create_mailer
+from .mailer import AsyncMailer, SMTPConnectionPool, MockMailer, SendGridMailer, create_mailer
 
-__all__ = ['AsyncMailer', 'MockMailer', 'SendGridMailer', 'create_mailer']
+__all__ = ['AsyncMailer', 'SMTPConnectionPool', 'MockMailer', 'SendGridMailer', 'create_mailer']
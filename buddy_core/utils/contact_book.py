@@ -1,14 +1,74 @@
 """
 📇 BUDDY 2.0 Enhanced Contact Book System
 Smart contact management with fuzzy matching and groups
+
+Lookups go through an in-memory ``ContactIndex`` (trigram, prefix, phonetic
+and exact-email keys) that is updated on every add/update/delete; only the
+candidates it returns are rescored with ``SequenceMatcher``, with the same
+tie-breaks as a full scan. Fuzzy candidates are those sharing
+``FUZZY_MIN_OVERLAP`` of the query's name trigrams (or its whole-name
+soundex); when none of them scores, the full scan runs, so results match it.
+
+The index is saved next to the contact file only by ``flush_index`` (on
+``close`` or at exit), and only if an indexed field changed since the last
+flush. Each contact save writes a small stamp tying the contact file to the
+index generation it matches, so an out-of-date index is rebuilt on load.
 """
 
+import atexit
 import json
 import os
+import uuid
+from bisect import bisect_left, insort
+from collections import defaultdict
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Iterable, Set, Tuple
 import re
 from difflib import SequenceMatcher
+from functools import lru_cache
+from math import ceil
+
+import numpy as np
+
+INDEX_VERSION = 3
+
+# Share of the query's name trigrams a contact must have to be rescored by find_contact
+# before it falls back to a full scan. SequenceMatcher's 0.6 floor gives no trigram
+# guarantee on its own (matching blocks of one or two characters share none), so this is
+# the Dice-style cut a typo survives: an edit touches at most three padded trigrams,
+# leaving well over half of a name's intact.
+FUZZY_MIN_OVERLAP = 0.5
+
+_SOUNDEX_CODES = {c: d for d, letters in (
+    ("1", "bfpv"), ("2", "cgjkqsxz"), ("3", "dt"), ("4", "l"), ("5", "mn"), ("6", "r")) for c in letters}
+
+
+@lru_cache(maxsize=8192)  # name parts repeat heavily across a book
+def soundex(word: str) -> str:
+    """American Soundex code of ``word`` ("" when it has no letters)."""
+    letters = [c for c in word.lower() if c.isalpha()]
+    if not letters:
+        return ""
+    code = letters[0].upper()
+    last = _SOUNDEX_CODES.get(letters[0], "")
+    for c in letters[1:]:
+        digit = _SOUNDEX_CODES.get(c, "")
+        if digit and digit != last:
+            code += digit
+            if len(code) == 4:
+                break
+        if c not in "hw":
+            last = digit
+    return code.ljust(4, "0")
+
+
+def trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def name_sound(name: str) -> str:
+    """Soundex of each part of ``name``, space-joined ("jon smth" and "John Smith" agree)."""
+    return " ".join(code for code in map(soundex, name.split()) if code)
 
 class Contact:
     """Enhanced contact with multiple email addresses and metadata"""
@@ -53,14 +113,214 @@ class Contact:
             **{k: v for k, v in data.items() if k not in ['name', 'primary_email']}
         )
 
+class ContactIndex:
+    """Inverted index over contacts, keyed by a per-book sequence number.
+
+    Sequence numbers grow with insertion, so the smallest one in a
+    candidate set is the contact a scan of ``ContactBook.contacts`` would
+    reach first. The keys of a contact are derived from its current
+    fields, so unlink it before changing name, emails or company.
+    """
+
+    def __init__(self):
+        self.seq_of: Dict[str, int] = {}
+        self.id_of: Dict[int, str] = {}
+        self._next_seq = 0
+        self.trigrams: Dict[str, Set[int]] = defaultdict(set)   # name (space-padded), emails, company
+        self.name_grams: Dict[str, Set[int]] = defaultdict(set)  # name (space-padded) only
+        self._gram_arrays: Dict[str, np.ndarray] = {}            # name_grams postings as arrays, built on use
+        self.phonetic: Dict[str, Set[int]] = defaultdict(set)   # soundex of the whole name, part by part
+        self.emails: Dict[str, Set[int]] = defaultdict(set)     # exact lowercase email
+        self.name_parts: List[Tuple[str, int]] = []             # sorted (part, seq)
+        self.completions: List[Tuple[str, str, int]] = []       # sorted (lower, original, seq): names and emails
+
+    @staticmethod
+    def _contact_keys(contact: 'Contact'):
+        name = contact.name.lower()
+        emails = [e.lower() for e in contact.emails]
+        name_grams: Set[str] = trigrams(f" {name} ")
+        grams = set(name_grams)
+        for email in emails:
+            grams.update(trigrams(email))
+        if contact.company:
+            grams.update(trigrams(contact.company.lower()))
+        parts = name.split()
+        sound = name_sound(name)
+        sounds = {sound} if sound else set()
+        completions = [(name, contact.name)] + [(e.lower(), e) for e in contact.emails]
+        return grams, name_grams, sounds, parts, emails, completions
+
+    def _tables(self, contact: 'Contact'):
+        grams, name_grams, sounds, parts, emails, completions = self._contact_keys(contact)
+        for gram in name_grams:
+            self._gram_arrays.pop(gram, None)  # callers are about to change these postings
+        tables = ((self.trigrams, grams), (self.name_grams, name_grams),
+                  (self.phonetic, sounds), (self.emails, emails))
+        return tables, parts, completions
+
+    def add(self, contact_id: str, contact: 'Contact'):
+        """Index a new contact, or re-link an unlinked one at its old position."""
+        seq = self.seq_of.get(contact_id)
+        if seq is None:
+            seq = self._next_seq
+            self._next_seq += 1
+            self.seq_of[contact_id] = seq
+            self.id_of[seq] = contact_id
+        self._link(seq, contact, bulk=False)
+
+    @classmethod
+    def build(cls, contacts: Dict[str, 'Contact']) -> 'ContactIndex':
+        """Index a whole book at once, sorting the prefix lists a single time."""
+        index = cls()
+        for seq, (contact_id, contact) in enumerate(contacts.items()):
+            index.seq_of[contact_id] = seq
+            index.id_of[seq] = contact_id
+            index._link(seq, contact, bulk=True)
+        index._next_seq = len(contacts)
+        index.name_parts.sort()
+        index.completions.sort()
+        return index
+
+    def _link(self, seq: int, contact: 'Contact', bulk: bool):
+        tables, parts, completions = self._tables(contact)
+        for table, keys in tables:
+            for key in keys:
+                table[key].add(seq)
+        if bulk:  # caller sorts once at the end
+            self.name_parts.extend((part, seq) for part in parts)
+            self.completions.extend((lower, original, seq) for lower, original in completions)
+        else:
+            for part in parts:
+                insort(self.name_parts, (part, seq))
+            for lower, original in completions:
+                insort(self.completions, (lower, original, seq))
+
+    def unlink(self, contact_id: str, contact: 'Contact'):
+        """Drop the contact's current keys; its position is kept for a following ``add``."""
+        seq = self.seq_of.get(contact_id)
+        if seq is None:
+            return
+        tables, parts, completions = self._tables(contact)
+        for table, keys in tables:
+            for key in keys:
+                postings = table.get(key)
+                if postings is not None:
+                    postings.discard(seq)
+                    if not postings:
+                        del table[key]
+        for item in [(part, seq) for part in parts]:
+            self._remove_sorted(self.name_parts, item)
+        for lower, original in completions:
+            self._remove_sorted(self.completions, (lower, original, seq))
+
+    def remove(self, contact_id: str, contact: 'Contact'):
+        self.unlink(contact_id, contact)
+        seq = self.seq_of.pop(contact_id, None)
+        if seq is not None:
+            del self.id_of[seq]
+
+    @staticmethod
+    def _remove_sorted(items: list, item: tuple):
+        i = bisect_left(items, item)
+        if i < len(items) and items[i] == item:
+            del items[i]
+
+    @staticmethod
+    def _prefix_range(items: list, prefix: str) -> Iterable:
+        i = bisect_left(items, (prefix,))
+        while i < len(items) and items[i][0].startswith(prefix):
+            yield items[i]
+            i += 1
+
+    def name_prefix(self, prefix: str) -> Set[int]:
+        return {seq for _, seq in self._prefix_range(self.name_parts, prefix)}
+
+    def completion_prefix(self, prefix: str) -> Iterable[str]:
+        return (original for _, original, _ in self._prefix_range(self.completions, prefix))
+
+    def fuzzy_candidates(self, query: str) -> List[int]:
+        """Contacts worth rescoring against ``query``, most shared name trigrams first.
+
+        A contact qualifies with at least ``FUZZY_MIN_OVERLAP`` of the query's
+        padded trigrams in its name, or with the same whole-name soundex.
+        Shared grams are counted with one ``bincount`` over the postings, so
+        common grams (" jo", "son") cost array length, not Python loops.
+        """
+        ranked: List[int] = []
+        arrays = [self._gram_array(g) for g in trigrams(f" {query} ")]
+        if arrays:
+            need = max(1, ceil(FUZZY_MIN_OVERLAP * len(arrays)))
+            shared = np.bincount(np.concatenate(arrays))
+            seqs = np.flatnonzero(shared >= need)
+            ranked = seqs[np.lexsort((seqs, -shared[seqs]))].tolist()
+        seen = set(ranked)
+        ranked.extend(sorted(seq for seq in self.phonetic.get(name_sound(query), ()) if seq not in seen))
+        return ranked
+
+    def _gram_array(self, gram: str) -> np.ndarray:
+        array = self._gram_arrays.get(gram)
+        if array is None:
+            seqs = self.name_grams.get(gram, ())
+            array = self._gram_arrays[gram] = np.fromiter(seqs, dtype=np.int64, count=len(seqs))
+        return array
+
+    def substring_candidates(self, query: str) -> Optional[Set[int]]:
+        """Superset of contacts whose name, email or company contains ``query`` (None: too short to index)."""
+        grams = trigrams(query)
+        if not grams:
+            return None
+        postings = sorted((self.trigrams.get(g, set()) for g in grams), key=len)
+        result = set(postings[0])
+        for other in postings[1:]:
+            if not result:
+                break
+            result &= other
+        return result
+
+    # Persistence
+    def to_dict(self, generation: str) -> Dict[str, Any]:
+        return {
+            "version": INDEX_VERSION,
+            "generation": generation,
+            "next_seq": self._next_seq,
+            "ids": [[seq, cid] for seq, cid in self.id_of.items()],
+            "trigrams": {g: list(seqs) for g, seqs in self.trigrams.items()},
+            "name_grams": {g: list(seqs) for g, seqs in self.name_grams.items()},
+            "phonetic": {code: list(seqs) for code, seqs in self.phonetic.items()},
+            "emails": {email: list(seqs) for email, seqs in self.emails.items()},
+            "name_parts": self.name_parts,
+            "completions": self.completions,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ContactIndex':
+        index = cls()
+        index._next_seq = data["next_seq"]
+        for seq, cid in data["ids"]:
+            index.seq_of[cid] = seq
+            index.id_of[seq] = cid
+        for name in ("trigrams", "name_grams", "phonetic", "emails"):
+            getattr(index, name).update((key, set(seqs)) for key, seqs in data[name].items())
+        # saved in sorted order
+        index.name_parts = [tuple(item) for item in data["name_parts"]]
+        index.completions = [tuple(item) for item in data["completions"]]
+        return index
+
+
 class ContactBook:
     """Advanced contact management system"""
     
     def __init__(self, contacts_file: str = "contacts.json"):
         self.contacts_file = contacts_file
+        self.index_file = f"{contacts_file}.idx"
+        self.stamp_file = f"{contacts_file}.idx.stamp"
         self.contacts: Dict[str, Contact] = {}
         self.groups: Dict[str, List[str]] = {}
+        self.index = ContactIndex()
+        self._index_generation = ""   # generation of the in-memory index
+        self._index_dirty = False     # changed since it was last written
         self._load_contacts()
+        atexit.register(self.flush_index)
     
     def _load_contacts(self):
         """Load contacts from file"""
@@ -76,12 +336,76 @@ class ContactBook:
                 # Load groups
                 self.groups = data.get('groups', {})
                 
+                self._load_index()
+                
             except Exception as e:
                 print(f"Error loading contacts: {e}")
                 self._create_sample_contacts()
         else:
             self._create_sample_contacts()
     
+    def _index_source(self) -> Dict[str, Any]:
+        """Identity of the contact file an index was built from."""
+        st = os.stat(self.contacts_file)
+        return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+    
+    def _load_index(self):
+        """Use the saved index when the stamp ties it to the contact file, else rebuild it."""
+        self.index = ContactIndex()
+        try:
+            if os.path.exists(self.index_file) and os.path.exists(self.stamp_file):
+                with open(self.stamp_file, 'r') as f:
+                    stamp = json.load(f)
+                if stamp.get("source") == self._index_source():
+                    with open(self.index_file, 'r') as f:
+                        data = json.load(f)
+                    if (data.get("version") == INDEX_VERSION and data.get("generation") == stamp.get("generation")
+                            and [cid for _, cid in data["ids"]] == list(self.contacts)):
+                        self.index = ContactIndex.from_dict(data)
+                        self._index_generation = data["generation"]
+                        self._index_dirty = False
+                        return
+        except Exception as e:
+            print(f"Error loading contact index, rebuilding: {e}")
+        self.index = ContactIndex.build(self.contacts)
+        self._mark_index_dirty()
+    
+    def _mark_index_dirty(self):
+        """Record that the in-memory index no longer matches the saved one."""
+        if not self._index_dirty:
+            self._index_dirty = True
+            self._index_generation = uuid.uuid4().hex
+    
+    def _write_json(self, path: str, data: Dict[str, Any]):
+        tmp = f"{path}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+    
+    def _save_stamp(self):
+        """Tie the current contact file to the index generation it matches."""
+        try:
+            self._write_json(self.stamp_file, {"generation": self._index_generation,
+                                               "source": self._index_source()})
+        except Exception as e:
+            print(f"Error saving contact index stamp: {e}")
+    
+    def flush_index(self):
+        """Write the index if it changed since it was last written."""
+        if not self._index_dirty or not os.path.exists(self.contacts_file):
+            return
+        try:
+            self._write_json(self.index_file, self.index.to_dict(self._index_generation))
+        except Exception as e:
+            print(f"Error saving contact index: {e}")
+            return
+        self._index_dirty = False
+        self._save_stamp()
+    
+    def close(self):
+        """Flush the index; the book stays usable."""
+        self.flush_index()
+    
     def _create_sample_contacts(self):
         """Create sample contacts for demonstration"""
         sample_contacts = [
@@ -115,6 +439,8 @@ class ContactBook:
             contact = Contact(**contact_data)
             contact_id = self._generate_contact_id(contact.name)
             self.contacts[contact_id] = contact
+            self.index.add(contact_id, contact)
+        self._mark_index_dirty()
         
         # Create sample groups
         self.groups = {
@@ -152,12 +478,16 @@ class ContactBook:
                 
         except Exception as e:
             print(f"Error saving contacts: {e}")
+            return
+        self._save_stamp()
     
     def add_contact(self, name: str, email: str, **kwargs) -> str:
         """Add a new contact"""
         contact_id = self._generate_contact_id(name)
         contact = Contact(name, email, **kwargs)
         self.contacts[contact_id] = contact
+        self.index.add(contact_id, contact)
+        self._mark_index_dirty()
         
         # Add to groups if specified
         for group in contact.groups:
@@ -169,33 +499,92 @@ class ContactBook:
         self.save_contacts()
         return contact_id
     
+    def update_contact(self, contact_id: str, **fields) -> bool:
+        """Update fields of an existing contact (``name``, ``primary_email``, ``emails``, ...)"""
+        contact = self.contacts.get(contact_id)
+        if contact is None:
+            return False
+        old_groups = set(contact.groups)
+        old_keys = ContactIndex._contact_keys(contact)
+        self.index.unlink(contact_id, contact)
+        for key, value in fields.items():
+            setattr(contact, key, value)
+        if 'primary_email' in fields and 'emails' not in fields and contact.primary_email not in contact.emails:
+            contact.emails = [contact.primary_email] + contact.emails
+        self.index.add(contact_id, contact)
+        if ContactIndex._contact_keys(contact) != old_keys:
+            self._mark_index_dirty()
+        
+        for group in old_groups - set(contact.groups):
+            if contact_id in self.groups.get(group, []):
+                self.groups[group].remove(contact_id)
+        for group in contact.groups:
+            if group not in self.groups:
+                self.groups[group] = []
+            if contact_id not in self.groups[group]:
+                self.groups[group].append(contact_id)
+        
+        self.save_contacts()
+        return True
+    
+    def delete_contact(self, contact_id: str) -> bool:
+        """Delete a contact and drop it from its groups"""
+        contact = self.contacts.pop(contact_id, None)
+        if contact is None:
+            return False
+        self.index.remove(contact_id, contact)
+        self._mark_index_dirty()
+        for members in self.groups.values():
+            if contact_id in members:
+                members.remove(contact_id)
+        self.save_contacts()
+        return True
+    
+    def _in_order(self, seqs: Iterable[int]) -> List[Contact]:
+        return [self.contacts[self.index.id_of[seq]] for seq in sorted(seqs)]
+    
     def find_contact(self, query: str) -> Optional[Contact]:
         """Find contact using fuzzy matching"""
         if not query:
             return None
         
         query_lower = query.lower()
-        best_match = None
-        best_score = 0
         
+        # Exact email or name-part prefix: the first such contact in book order wins
+        direct = set(self.index.emails.get(query_lower, ()))
+        if len(query_lower) >= 2:
+            direct |= self.index.name_prefix(query_lower)
+        if direct:
+            return self.contacts[self.index.id_of[min(direct)]]
+        
+        # Name similarity over indexed candidates only, most shared trigrams first so the
+        # bar rises early; ties keep the earlier contact, as a scan in book order would
+        best_seq = None
+        best_score = 0.6
+        matcher = SequenceMatcher(None)
+        matcher.set_seq2(query_lower)  # the query side's analysis is cached across candidates
+        for seq in self.index.fuzzy_candidates(query_lower):
+            matcher.set_seq1(self.contacts[self.index.id_of[seq]].name.lower())
+            # cheap upper bounds first; they can only rule a candidate out
+            if matcher.real_quick_ratio() < best_score or matcher.quick_ratio() < best_score:
+                continue
+            name_score = matcher.ratio()
+            if name_score > best_score or (name_score == best_score and best_seq is not None and seq < best_seq):
+                best_score = name_score
+                best_seq = seq
+        if best_seq is not None:
+            return self.contacts[self.index.id_of[best_seq]]
+        
+        # No candidate clears the bar (e.g. several typos): fall back to scanning the book
+        best_match = None
         for contact in self.contacts.values():
-            # Check exact email match first
-            for email in contact.emails:
-                if email.lower() == query_lower:
-                    return contact
-            
-            # Check name similarity
-            name_score = SequenceMatcher(None, contact.name.lower(), query_lower).ratio()
-            if name_score > best_score and name_score > 0.6:
+            matcher.set_seq1(contact.name.lower())
+            if matcher.real_quick_ratio() <= best_score or matcher.quick_ratio() <= best_score:
+                continue
+            name_score = matcher.ratio()
+            if name_score > best_score:
                 best_score = name_score
                 best_match = contact
-            
-            # Check partial name matches
-            name_parts = contact.name.lower().split()
-            for part in name_parts:
-                if part.startswith(query_lower) and len(query_lower) >= 2:
-                    return contact
-        
         return best_match
     
     def find_contacts_by_group(self, group: str) -> List[Contact]:
@@ -211,7 +600,9 @@ class ContactBook:
         query_lower = query.lower()
         results = []
         
-        for contact in self.contacts.values():
+        candidates = self.index.substring_candidates(query_lower)
+        contacts = self.contacts.values() if candidates is None else self._in_order(candidates)
+        for contact in contacts:
             # Search in name
             if query_lower in contact.name.lower():
                 results.append(contact)
@@ -234,24 +625,16 @@ class ContactBook:
         if len(partial_input) < 2:
             return []
         
-        suggestions = []
         partial_lower = partial_input.lower()
         
-        for contact in self.contacts.values():
-            # Name suggestions
-            if contact.name.lower().startswith(partial_lower):
-                suggestions.append(contact.name)
-            
-            # Email suggestions
-            for email in contact.emails:
-                if email.lower().startswith(partial_lower):
-                    suggestions.append(email)
+        # Names and emails starting with the input, from the sorted prefix list
+        suggestions = set(self.index.completion_prefix(partial_lower))
         
-        return sorted(set(suggestions))[:10]  # Limit to 10 suggestions
+        return sorted(suggestions)[:10]  # Limit to 10 suggestions
     
     def update_contact_activity(self, email: str):
         """Update contact activity when email is sent"""
-        for contact in self.contacts.values():
+        for contact in self._in_order(self.index.emails.get(email.lower(), ())):
             if email.lower() in [e.lower() for e in contact.emails]:
                 contact.last_contacted = datetime.now().isoformat()
                 contact.contact_frequency += 1
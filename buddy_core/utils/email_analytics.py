@@ -1,12 +1,21 @@
 """
 📊 BUDDY 2.0 Enhanced Email Analytics & Tracking
 Advanced email metrics, delivery tracking, and performance analysis
+
+Tracking data lives in SQLite: one row per email (its current status and
+counters) plus an append-only event log. Every send/event also applies a
+delta to rollup tables (per day+template, per template, per weekday+hour,
+per status, per recipient) in the same transaction, so ingestion touches a
+fixed number of rows and the dashboard queries read rollups instead of
+scanning history.
 """
 
 import json
 import os
+import sqlite3
+import threading
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass, asdict
 from enum import Enum
 import hashlib
@@ -102,43 +111,160 @@ class EmailTrackingData:
             location=data.get('location')
         )
 
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS emails (
+    email_id TEXT PRIMARY KEY, recipient TEXT NOT NULL, subject TEXT NOT NULL,
+    sent_at TEXT NOT NULL, day TEXT NOT NULL, weekday INTEGER NOT NULL, hour INTEGER NOT NULL,
+    status TEXT NOT NULL, template TEXT NOT NULL DEFAULT '', campaign_id TEXT,
+    open_count INTEGER NOT NULL DEFAULT 0, click_count INTEGER NOT NULL DEFAULT 0,
+    size_bytes INTEGER NOT NULL DEFAULT 0, provider TEXT, device_type TEXT, location TEXT
+);
+CREATE INDEX IF NOT EXISTS emails_sent_at ON emails (sent_at);
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY, email_id TEXT NOT NULL, timestamp TEXT NOT NULL, event_type TEXT NOT NULL,
+    details TEXT, user_agent TEXT, ip_address TEXT
+);
+CREATE INDEX IF NOT EXISTS events_email ON events (email_id);
+CREATE TABLE IF NOT EXISTS rollup_daily (
+    day TEXT NOT NULL, template TEXT NOT NULL, emails INTEGER NOT NULL DEFAULT 0,
+    delivered INTEGER NOT NULL DEFAULT 0, bounced INTEGER NOT NULL DEFAULT 0, opened INTEGER NOT NULL DEFAULT 0,
+    clicked INTEGER NOT NULL DEFAULT 0, opens INTEGER NOT NULL DEFAULT 0, clicks INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, template)
+);
+CREATE TABLE IF NOT EXISTS rollup_template (
+    template TEXT PRIMARY KEY, emails INTEGER NOT NULL DEFAULT 0,
+    delivered INTEGER NOT NULL DEFAULT 0, bounced INTEGER NOT NULL DEFAULT 0, opened INTEGER NOT NULL DEFAULT 0,
+    clicked INTEGER NOT NULL DEFAULT 0, opens INTEGER NOT NULL DEFAULT 0, clicks INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS rollup_slot (
+    weekday INTEGER NOT NULL, hour INTEGER NOT NULL, emails INTEGER NOT NULL DEFAULT 0,
+    opened INTEGER NOT NULL DEFAULT 0, PRIMARY KEY (weekday, hour)
+);
+CREATE TABLE IF NOT EXISTS rollup_status (status TEXT PRIMARY KEY, emails INTEGER NOT NULL DEFAULT 0);
+CREATE TABLE IF NOT EXISTS rollup_recipient (
+    recipient TEXT PRIMARY KEY, emails INTEGER NOT NULL DEFAULT 0, opens INTEGER NOT NULL DEFAULT 0,
+    clicks INTEGER NOT NULL DEFAULT 0, last_activity TEXT
+);
+"""
+
+_ROLLUPS = ("rollup_daily", "rollup_template", "rollup_slot", "rollup_status", "rollup_recipient")
+_COUNTERS = ("emails", "delivered", "bounced", "opened", "clicked", "opens", "clicks")
+_UNDELIVERED = (EmailStatus.BOUNCED.value, EmailStatus.FAILED.value)
+
+
+def _counters(status: str, open_count: int, click_count: int) -> Tuple[int, ...]:
+    """What one email contributes to a rollup row, in ``_COUNTERS`` order."""
+    return (1, int(status not in _UNDELIVERED), int(status == EmailStatus.BOUNCED.value),
+            int(open_count > 0), int(click_count > 0), open_count, click_count)
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE ... COMMIT, rolled back if the block raises."""
+    
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+    
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+
 class EmailAnalytics:
     """Advanced email analytics and tracking system"""
     
-    def __init__(self, analytics_file: str = "email_analytics.json"):
+    def __init__(self, analytics_file: str = "email_analytics.json", db_path: Optional[str] = None):
         self.analytics_file = analytics_file
-        self.tracked_emails: Dict[str, EmailTrackingData] = {}
+        self.db_path = db_path or f"{os.path.splitext(analytics_file)[0]}.db"
+        self._lock = threading.Lock()
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
         self._load_analytics()
     
     def _load_analytics(self):
-        """Load analytics data from file"""
-        if os.path.exists(self.analytics_file):
-            try:
-                with open(self.analytics_file, 'r') as f:
-                    data = json.load(f)
-                    
-                for email_id, email_data in data.get('tracked_emails', {}).items():
-                    self.tracked_emails[email_id] = EmailTrackingData.from_dict(email_data)
-                    
-            except Exception as e:
-                print(f"Error loading analytics: {e}")
-    
-    def _save_analytics(self):
-        """Save analytics data to file"""
+        """Import a legacy JSON analytics file into an empty database (the JSON file is left in place)"""
+        if not os.path.exists(self.analytics_file):
+            return
+        if self._conn.execute("SELECT 1 FROM emails LIMIT 1").fetchone():
+            return
         try:
-            data = {
-                'tracked_emails': {
-                    email_id: tracking_data.to_dict() 
-                    for email_id, tracking_data in self.tracked_emails.items()
-                },
-                'last_updated': datetime.now().isoformat()
-            }
+            with open(self.analytics_file, 'r') as f:
+                data = json.load(f)
             
-            with open(self.analytics_file, 'w') as f:
-                json.dump(data, f, indent=2)
-                
+            with self._lock, self._transaction():
+                for email_data in data.get('tracked_emails', {}).values():
+                    self._insert_email(EmailTrackingData.from_dict(email_data))
+                    
         except Exception as e:
-            print(f"Error saving analytics: {e}")
+            print(f"Error loading analytics: {e}")
+    
+    def _transaction(self):
+        return _Transaction(self._conn)
+    
+    def _bump(self, table: str, key: Dict[str, Any], deltas: Dict[str, int]):
+        """Add ``deltas`` to the rollup row identified by ``key``, creating it if needed."""
+        columns = list(key) + list(deltas)
+        updates = ", ".join(f"{c} = {c} + excluded.{c}" for c in deltas)
+        self._conn.execute(
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+            f"ON CONFLICT({', '.join(key)}) DO UPDATE SET {updates}",
+            (*key.values(), *deltas.values()),
+        )
+    
+    def _apply(self, row: Dict[str, Any], before: Tuple[int, ...], after: Tuple[int, ...],
+               old_status: Optional[str], activity: Optional[str]):
+        """Move one email's contribution in every rollup from ``before`` to ``after``."""
+        delta = dict(zip(_COUNTERS, (a - b for a, b in zip(after, before))))
+        self._bump("rollup_daily", {"day": row["day"], "template": row["template"]}, delta)
+        if row["template"]:
+            self._bump("rollup_template", {"template": row["template"]}, delta)
+        self._bump("rollup_slot", {"weekday": row["weekday"], "hour": row["hour"]},
+                   {"emails": delta["emails"], "opened": delta["opened"]})
+        if old_status != row["status"]:
+            if old_status is not None:
+                self._bump("rollup_status", {"status": old_status}, {"emails": -1})
+            self._bump("rollup_status", {"status": row["status"]}, {"emails": 1})
+        self._bump("rollup_recipient", {"recipient": row["recipient"]},
+                   {"emails": delta["emails"], "opens": delta["opens"], "clicks": delta["clicks"]})
+        if activity:
+            self._conn.execute(
+                "UPDATE rollup_recipient SET last_activity = ? "
+                "WHERE recipient = ? AND (last_activity IS NULL OR last_activity < ?)",
+                (activity, row["recipient"], activity),
+            )
+    
+    def _insert_email(self, tracking_data: EmailTrackingData):
+        sent_at = tracking_data.sent_at
+        row = {
+            "email_id": tracking_data.email_id, "recipient": tracking_data.recipient,
+            "subject": tracking_data.subject, "sent_at": sent_at.isoformat(),
+            "day": sent_at.date().isoformat(), "weekday": sent_at.weekday(), "hour": sent_at.hour,
+            "status": tracking_data.status.value, "template": tracking_data.template_used or "",
+            "campaign_id": tracking_data.campaign_id, "open_count": tracking_data.open_count,
+            "click_count": tracking_data.click_count, "size_bytes": tracking_data.size_bytes,
+            "provider": tracking_data.provider, "device_type": tracking_data.device_type,
+            "location": tracking_data.location,
+        }
+        self._conn.execute(
+            f"INSERT INTO emails ({', '.join(row)}) VALUES ({', '.join('?' * len(row))})", tuple(row.values()))
+        self._conn.executemany(
+            "INSERT INTO events (email_id, timestamp, event_type, details, user_agent, ip_address) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [(tracking_data.email_id, e.timestamp.isoformat(), e.event_type.value, e.details, e.user_agent,
+              e.ip_address) for e in tracking_data.events],
+        )
+        latest = max((e.timestamp for e in tracking_data.events), default=None)
+        self._apply(row, (0,) * len(_COUNTERS),
+                    _counters(row["status"], row["open_count"], row["click_count"]), None,
+                    latest.isoformat() if latest else None)
     
     def track_email_sent(self, 
                         recipient: str, 
@@ -165,8 +291,8 @@ class EmailAnalytics:
             provider=provider
         )
         
-        self.tracked_emails[email_id] = tracking_data
-        self._save_analytics()
+        with self._lock, self._transaction():
+            self._insert_email(tracking_data)
         
         return email_id
     
@@ -178,36 +304,67 @@ class EmailAnalytics:
                          ip_address: Optional[str] = None):
         """Track an email event (opened, clicked, etc.)"""
         
-        if email_id not in self.tracked_emails:
-            return False
-        
-        tracking_data = self.tracked_emails[email_id]
-        
-        # Add event
-        event = EmailEvent(
-            timestamp=datetime.now(),
-            event_type=event_type,
-            details=details,
-            user_agent=user_agent,
-            ip_address=ip_address
-        )
-        
-        tracking_data.events.append(event)
-        tracking_data.status = event_type
-        
-        # Update counters
-        if event_type == EmailStatus.OPENED:
-            tracking_data.open_count += 1
-        elif event_type == EmailStatus.CLICKED:
-            tracking_data.click_count += 1
-        
-        # Extract device type from user agent
-        if user_agent:
-            tracking_data.device_type = self._extract_device_type(user_agent)
-        
-        self._save_analytics()
+        timestamp = datetime.now().isoformat()
+        with self._lock, self._transaction():
+            found = self._conn.execute(
+                "SELECT recipient, day, weekday, hour, status, template, open_count, click_count "
+                "FROM emails WHERE email_id = ?", (email_id,)).fetchone()
+            if found is None:
+                return False
+            row = dict(zip(("recipient", "day", "weekday", "hour", "status", "template", "open_count",
+                            "click_count"), found))
+            old_status = row["status"]
+            before = _counters(old_status, row["open_count"], row["click_count"])
+            
+            # Update status and counters
+            row["status"] = event_type.value
+            if event_type == EmailStatus.OPENED:
+                row["open_count"] += 1
+            elif event_type == EmailStatus.CLICKED:
+                row["click_count"] += 1
+            
+            # Extract device type from user agent
+            device_type = self._extract_device_type(user_agent) if user_agent else None
+            
+            self._conn.execute(
+                "UPDATE emails SET status = ?, open_count = ?, click_count = ?, "
+                "device_type = COALESCE(?, device_type) WHERE email_id = ?",
+                (row["status"], row["open_count"], row["click_count"], device_type, email_id),
+            )
+            self._conn.execute(
+                "INSERT INTO events (email_id, timestamp, event_type, details, user_agent, ip_address) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (email_id, timestamp, event_type.value, details, user_agent, ip_address),
+            )
+            self._apply(row, before, _counters(row["status"], row["open_count"], row["click_count"]),
+                        old_status, timestamp)
         return True
     
+    def get_tracking_data(self, email_id: str) -> Optional[EmailTrackingData]:
+        """Full tracking record (with its event history) for one email"""
+        with self._lock:
+            self._conn.row_factory = sqlite3.Row
+            try:
+                email = self._conn.execute("SELECT * FROM emails WHERE email_id = ?", (email_id,)).fetchone()
+                if email is None:
+                    return None
+                events = self._conn.execute(
+                    "SELECT * FROM events WHERE email_id = ? ORDER BY id", (email_id,)).fetchall()
+            finally:
+                self._conn.row_factory = None
+        return EmailTrackingData.from_dict({
+            **dict(email),
+            'template_used': email['template'] or None,
+            'events': [dict(e) for e in events],
+        })
+    
+    @property
+    def tracked_emails(self) -> Dict[str, EmailTrackingData]:
+        """Every tracked email, read back from the database (a full scan; for export and debugging)"""
+        with self._lock:
+            ids = [r[0] for r in self._conn.execute("SELECT email_id FROM emails ORDER BY rowid")]
+        return {email_id: self.get_tracking_data(email_id) for email_id in ids}
+    
     def _generate_email_id(self, recipient: str, subject: str) -> str:
         """Generate unique email ID"""
         timestamp = datetime.now().isoformat()
@@ -225,16 +382,31 @@ class EmailAnalytics:
         else:
             return 'desktop'
     
+    def _sum_counters(self, where: str, params: Tuple, table: str = "rollup_daily") -> Dict[str, int]:
+        totals = self._conn.execute(
+            f"SELECT {', '.join(f'COALESCE(SUM({c}), 0)' for c in _COUNTERS)} FROM {table} WHERE {where}",
+            params).fetchone()
+        return dict(zip(_COUNTERS, totals))
+    
     def get_email_performance(self, days: int = 30) -> Dict[str, Any]:
         """Get email performance metrics for the last N days"""
         
         cutoff_date = datetime.now() - timedelta(days=days)
-        recent_emails = [
-            email for email in self.tracked_emails.values()
-            if email.sent_at >= cutoff_date
-        ]
-        
-        if not recent_emails:
+        cutoff_day = cutoff_date.date()
+        next_day = datetime.combine(cutoff_day + timedelta(days=1), datetime.min.time())
+        
+        with self._lock:
+            # Whole days after the cutoff come from the daily rollup; only the cutoff day itself is
+            # read per email, so the answer matches a sent_at >= cutoff filter exactly
+            totals = self._sum_counters("day > ?", (cutoff_day.isoformat(),))
+            partial = self._conn.execute(
+                "SELECT status, open_count, click_count FROM emails WHERE sent_at >= ? AND sent_at < ?",
+                (cutoff_date.isoformat(), next_day.isoformat())).fetchall()
+        for status, open_count, click_count in partial:
+            for name, value in zip(_COUNTERS, _counters(status, open_count, click_count)):
+                totals[name] += value
+        
+        if not totals['emails']:
             return {
                 'total_emails': 0,
                 'delivery_rate': 0,
@@ -243,11 +415,11 @@ class EmailAnalytics:
                 'bounce_rate': 0
             }
         
-        total_emails = len(recent_emails)
-        delivered_emails = len([e for e in recent_emails if e.status not in [EmailStatus.BOUNCED, EmailStatus.FAILED]])
-        opened_emails = len([e for e in recent_emails if e.open_count > 0])
-        clicked_emails = len([e for e in recent_emails if e.click_count > 0])
-        bounced_emails = len([e for e in recent_emails if e.status == EmailStatus.BOUNCED])
+        total_emails = totals['emails']
+        delivered_emails = totals['delivered']
+        opened_emails = totals['opened']
+        clicked_emails = totals['clicked']
+        bounced_emails = totals['bounced']
         
         return {
             'total_emails': total_emails,
@@ -255,35 +427,26 @@ class EmailAnalytics:
             'open_rate': (opened_emails / delivered_emails) * 100 if delivered_emails > 0 else 0,
             'click_rate': (clicked_emails / delivered_emails) * 100 if delivered_emails > 0 else 0,
             'bounce_rate': (bounced_emails / total_emails) * 100 if total_emails > 0 else 0,
-            'avg_opens_per_email': sum(e.open_count for e in recent_emails) / total_emails if total_emails > 0 else 0,
-            'avg_clicks_per_email': sum(e.click_count for e in recent_emails) / total_emails if total_emails > 0 else 0
+            'avg_opens_per_email': totals['opens'] / total_emails if total_emails > 0 else 0,
+            'avg_clicks_per_email': totals['clicks'] / total_emails if total_emails > 0 else 0
         }
     
     def get_template_performance(self) -> Dict[str, Dict[str, float]]:
         """Get performance metrics by template"""
         template_stats = {}
         
-        for email in self.tracked_emails.values():
-            if not email.template_used:
-                continue
-            
-            template = email.template_used
-            if template not in template_stats:
-                template_stats[template] = {
-                    'total': 0.0,      # Use float consistently
-                    'opened': 0.0,     # Use float consistently
-                    'clicked': 0.0,    # Use float consistently
-                    'bounced': 0.0     # Use float consistently
-                }
-            
-            template_stats[template]['total'] += 1.0
-            
-            if email.open_count > 0:
-                template_stats[template]['opened'] += 1.0
-            if email.click_count > 0:
-                template_stats[template]['clicked'] += 1.0
-            if email.status == EmailStatus.BOUNCED:
-                template_stats[template]['bounced'] += 1.0
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT template, emails, opened, clicked, bounced FROM rollup_template "
+                "WHERE emails > 0 ORDER BY rowid").fetchall()
+        
+        for template, total, opened, clicked, bounced in rows:
+            template_stats[template] = {
+                'total': float(total),
+                'opened': float(opened),
+                'clicked': float(clicked),
+                'bounced': float(bounced)
+            }
         
         # Calculate rates
         for template, stats in template_stats.items():
@@ -299,64 +462,41 @@ class EmailAnalytics:
         
         return template_stats
     
-    def get_recipient_engagement(self) -> List[Dict[str, Any]]:
-        """Get recipient engagement statistics"""
-        recipient_stats = {}
-        
-        for email in self.tracked_emails.values():
-            recipient = email.recipient
-            if recipient not in recipient_stats:
-                recipient_stats[recipient] = {
-                    'email_count': 0,
-                    'total_opens': 0,
-                    'total_clicks': 0,
-                    'last_activity': None
-                }
-            
-            stats = recipient_stats[recipient]
-            stats['email_count'] += 1
-            stats['total_opens'] += email.open_count
-            stats['total_clicks'] += email.click_count
-            
-            # Update last activity
-            if email.events:
-                latest_event = max(email.events, key=lambda e: e.timestamp)
-                if (not stats['last_activity'] or 
-                    latest_event.timestamp > stats['last_activity']):
-                    stats['last_activity'] = latest_event.timestamp
+    def get_recipient_engagement(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Get recipient engagement statistics, most engaged first"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT recipient, emails, opens, clicks, last_activity FROM rollup_recipient "
+                "WHERE emails > 0 ORDER BY rowid").fetchall()
         
         # Convert to list and sort by engagement
         engagement_list = []
-        for recipient, stats in recipient_stats.items():
-            engagement_score = (stats['total_opens'] * 1 + stats['total_clicks'] * 2) / stats['email_count']
+        for recipient, email_count, total_opens, total_clicks, last_activity in rows:
+            engagement_score = (total_opens * 1 + total_clicks * 2) / email_count
             engagement_list.append({
                 'recipient': recipient,
                 'engagement_score': round(engagement_score, 2),
-                'email_count': stats['email_count'],
-                'avg_opens': round(stats['total_opens'] / stats['email_count'], 2),
-                'avg_clicks': round(stats['total_clicks'] / stats['email_count'], 2),
-                'last_activity': stats['last_activity'].isoformat() if stats['last_activity'] else None
+                'email_count': email_count,
+                'avg_opens': round(total_opens / email_count, 2),
+                'avg_clicks': round(total_clicks / email_count, 2),
+                'last_activity': last_activity
             })
         
-        return sorted(engagement_list, key=lambda x: x['engagement_score'], reverse=True)
+        return sorted(engagement_list, key=lambda x: x['engagement_score'], reverse=True)[:limit]
     
     def get_time_analysis(self) -> Dict[str, Any]:
         """Analyze best times to send emails"""
         hour_stats = {hour: {'sent': 0, 'opened': 0} for hour in range(24)}
         day_stats = {day: {'sent': 0, 'opened': 0} for day in range(7)}  # 0 = Monday
         
-        for email in self.tracked_emails.values():
-            # Hour analysis
-            hour = email.sent_at.hour
-            hour_stats[hour]['sent'] += 1
-            if email.open_count > 0:
-                hour_stats[hour]['opened'] += 1
-            
-            # Day analysis
-            day = email.sent_at.weekday()
-            day_stats[day]['sent'] += 1
-            if email.open_count > 0:
-                day_stats[day]['opened'] += 1
+        with self._lock:
+            slots = self._conn.execute("SELECT weekday, hour, emails, opened FROM rollup_slot").fetchall()
+        
+        for day, hour, sent, opened in slots:
+            hour_stats[hour]['sent'] += sent
+            hour_stats[hour]['opened'] += opened
+            day_stats[day]['sent'] += sent
+            day_stats[day]['opened'] += opened
         
         # Calculate rates
         for hour_data in hour_stats.values():
@@ -388,7 +528,7 @@ class EmailAnalytics:
         """Generate a comprehensive analytics report"""
         performance = self.get_email_performance(days)
         template_perf = self.get_template_performance()
-        engagement = self.get_recipient_engagement()[:5]  # Top 5
+        engagement = self.get_recipient_engagement(limit=5)  # Top 5
         time_analysis = self.get_time_analysis()
         
         report = f"""
@@ -431,22 +571,58 @@ class EmailAnalytics:
     
     def get_analytics_summary(self) -> Dict[str, Any]:
         """Get a summary of analytics data"""
-        total_emails = len(self.tracked_emails)
+        with self._lock:
+            status_counts = dict(self._conn.execute(
+                "SELECT status, emails FROM rollup_status WHERE emails > 0 ORDER BY rowid").fetchall())
+            templates_used = self._conn.execute("SELECT COUNT(*) FROM rollup_template WHERE emails > 0").fetchone()[0]
+            unique_recipients = self._conn.execute(
+                "SELECT COUNT(*) FROM rollup_recipient WHERE emails > 0").fetchone()[0]
+        total_emails = sum(status_counts.values())
         
         if total_emails == 0:
             return {'total_emails': 0, 'status': 'No data available'}
         
-        status_counts = {}
-        for email in self.tracked_emails.values():
-            status = email.status.value
-            status_counts[status] = status_counts.get(status, 0) + 1
-        
         recent_performance = self.get_email_performance(7)  # Last 7 days
         
         return {
             'total_emails_tracked': total_emails,
             'status_breakdown': status_counts,
             'recent_performance': recent_performance,
-            'templates_used': len(set(e.template_used for e in self.tracked_emails.values() if e.template_used)),
-            'unique_recipients': len(set(e.recipient for e in self.tracked_emails.values()))
+            'templates_used': templates_used,
+            'unique_recipients': unique_recipients
         }
+    
+    def rebuild_rollups(self):
+        """Recompute every rollup from the emails table (after manual edits or a partial restore)"""
+        params = (*_UNDELIVERED, EmailStatus.BOUNCED.value)
+        sums = ", ".join(f"SUM({c})" for c in _COUNTERS)
+        with self._lock, self._transaction():
+            for table in _ROLLUPS:
+                self._conn.execute(f"DELETE FROM {table}")
+            counted = ("SELECT rowid AS rid, day, template, weekday, hour, status, recipient, "
+                       "1 AS emails, status NOT IN (?, ?) AS delivered, status = ? AS bounced, "
+                       "open_count > 0 AS opened, click_count > 0 AS clicked, open_count AS opens, "
+                       "click_count AS clicks FROM emails")
+            self._conn.execute(
+                f"INSERT INTO rollup_daily (day, template, {', '.join(_COUNTERS)}) "
+                f"SELECT day, template, {sums} FROM ({counted}) GROUP BY day, template", params)
+            self._conn.execute(
+                f"INSERT INTO rollup_template (template, {', '.join(_COUNTERS)}) "
+                f"SELECT template, {sums} FROM ({counted}) WHERE template != '' GROUP BY template "
+                f"ORDER BY MIN(rid)", params)
+            self._conn.execute(
+                f"INSERT INTO rollup_slot (weekday, hour, emails, opened) "
+                f"SELECT weekday, hour, SUM(emails), SUM(opened) FROM ({counted}) GROUP BY weekday, hour", params)
+            self._conn.execute(
+                "INSERT INTO rollup_status (status, emails) "
+                "SELECT status, COUNT(*) FROM emails GROUP BY status ORDER BY MIN(rowid)")
+            self._conn.execute(
+                "INSERT INTO rollup_recipient (recipient, emails, opens, clicks, last_activity) "
+                "SELECT e.recipient, COUNT(*), SUM(e.open_count), SUM(e.click_count), "
+                "(SELECT MAX(v.timestamp) FROM events v JOIN emails x ON x.email_id = v.email_id "
+                " WHERE x.recipient = e.recipient) "
+                "FROM emails e GROUP BY e.recipient ORDER BY MIN(e.rowid)")
+    
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -10,6 +10,8 @@ from typing import Dict, List, Optional, Any
 import asyncio
 from dataclasses import dataclass
 from enum import Enum
+import heapq
+import itertools
 import threading
 import time
 
@@ -37,6 +39,9 @@ class ScheduledEmail:
     created_at: Optional[datetime] = None  # Allow None
     last_sent: Optional[datetime] = None
     next_send: Optional[datetime] = None
+    failed_attempts: int = 0
+    failed: bool = False  # gave up after max_attempts consecutive failures
+    last_error: Optional[str] = None
     
     def __post_init__(self):
         if self.created_at is None:
@@ -45,72 +50,159 @@ class ScheduledEmail:
             self.next_send = self.scheduled_time
 
 class EmailScheduler:
-    """Advanced email scheduling system"""
+    """Advanced email scheduling system
+
+    Pending sends live in a min-heap keyed by ``next_send``; a single asyncio
+    task sleeps exactly until the earliest one is due (or until a new schedule
+    wakes it), then dispatches every due email concurrently through the mailer.
+    Changes are appended to a JSON-lines journal next to ``schedules_file``,
+    which is folded back into the snapshot once it grows past
+    ``compact_after`` entries.
+
+    A failed send keeps its occurrence and is retried after ``retry_base``
+    seconds, doubling per consecutive failure up to ``retry_max``. After
+    ``max_attempts`` consecutive failures the schedule is deactivated and
+    marked ``failed`` (see ``get_failed_emails``).
+    """
     
-    def __init__(self, schedules_file: str = "email_schedules.json"):
+    def __init__(self, schedules_file: str = "email_schedules.json", mailer=None, compact_after: int = 500,
+                 retry_base: float = 60.0, retry_max: float = 3600.0, max_attempts: int = 8):
         self.schedules_file = schedules_file
+        self.journal_file = f"{schedules_file}.journal"
+        self.mailer = mailer
+        self.compact_after = compact_after
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.max_attempts = max_attempts
         self.scheduled_emails: Dict[str, ScheduledEmail] = {}
         self.is_running = False
         self.scheduler_thread = None
+        self._heap: List[tuple] = []
+        self._seq = itertools.count()
+        self._lock = threading.RLock()
+        self._journal_entries = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
         self._load_schedules()
     
+    @staticmethod
+    def _to_dict(scheduled_email: ScheduledEmail) -> Dict[str, Any]:
+        return {
+            'id': scheduled_email.id,
+            'recipient': scheduled_email.recipient,
+            'subject': scheduled_email.subject,
+            'body': scheduled_email.body,
+            'scheduled_time': scheduled_email.scheduled_time.isoformat(),
+            'frequency': scheduled_email.frequency.value,
+            'template_name': scheduled_email.template_name,
+            'template_vars': scheduled_email.template_vars,
+            'timezone': scheduled_email.timezone,
+            'max_occurrences': scheduled_email.max_occurrences,
+            'current_occurrence': scheduled_email.current_occurrence,
+            'is_active': scheduled_email.is_active,
+            'created_at': scheduled_email.created_at.isoformat(),
+            'last_sent': scheduled_email.last_sent.isoformat() if scheduled_email.last_sent else None,
+            'next_send': scheduled_email.next_send.isoformat() if scheduled_email.next_send else None,
+            'failed_attempts': scheduled_email.failed_attempts,
+            'failed': scheduled_email.failed,
+            'last_error': scheduled_email.last_error
+        }
+    
+    @staticmethod
+    def _from_dict(email_data: Dict[str, Any]) -> ScheduledEmail:
+        email_data = dict(email_data)
+        # Convert datetime strings back to datetime objects
+        email_data['scheduled_time'] = datetime.fromisoformat(email_data['scheduled_time'])
+        email_data['created_at'] = datetime.fromisoformat(email_data['created_at'])
+        
+        if email_data.get('last_sent'):
+            email_data['last_sent'] = datetime.fromisoformat(email_data['last_sent'])
+        if email_data.get('next_send'):
+            email_data['next_send'] = datetime.fromisoformat(email_data['next_send'])
+        
+        email_data['frequency'] = ScheduleFrequency(email_data['frequency'])
+        return ScheduledEmail(**email_data)
+    
     def _load_schedules(self):
-        """Load scheduled emails from file"""
+        """Load the snapshot, replay the journal and rebuild the heap"""
         if os.path.exists(self.schedules_file):
             try:
                 with open(self.schedules_file, 'r') as f:
                     data = json.load(f)
                     
                 for email_id, email_data in data.get('scheduled_emails', {}).items():
-                    # Convert datetime strings back to datetime objects
-                    email_data['scheduled_time'] = datetime.fromisoformat(email_data['scheduled_time'])
-                    email_data['created_at'] = datetime.fromisoformat(email_data['created_at'])
-                    
-                    if email_data.get('last_sent'):
-                        email_data['last_sent'] = datetime.fromisoformat(email_data['last_sent'])
-                    if email_data.get('next_send'):
-                        email_data['next_send'] = datetime.fromisoformat(email_data['next_send'])
-                    
-                    email_data['frequency'] = ScheduleFrequency(email_data['frequency'])
-                    
-                    self.scheduled_emails[email_id] = ScheduledEmail(**email_data)
+                    self.scheduled_emails[email_id] = self._from_dict(email_data)
                     
             except Exception as e:
                 print(f"Error loading schedules: {e}")
+        
+        if os.path.exists(self.journal_file):
+            try:
+                with open(self.journal_file, 'r') as f:
+                    for line in f:
+                        line = line.strip()
+                        if not line:
+                            continue
+                        try:
+                            email_data = json.loads(line)
+                        except ValueError:
+                            # Torn final line from a crash mid-append
+                            continue
+                        self.scheduled_emails[email_data['id']] = self._from_dict(email_data)
+                        self._journal_entries += 1
+            except Exception as e:
+                print(f"Error replaying schedule journal: {e}")
+        
+        for scheduled_email in self.scheduled_emails.values():
+            self._push(scheduled_email)
     
     def _save_schedules(self):
-        """Save scheduled emails to file"""
-        try:
-            data = {
-                'scheduled_emails': {},
-                'last_updated': datetime.now().isoformat()
-            }
-            
-            for email_id, scheduled_email in self.scheduled_emails.items():
-                email_dict = {
-                    'id': scheduled_email.id,
-                    'recipient': scheduled_email.recipient,
-                    'subject': scheduled_email.subject,
-                    'body': scheduled_email.body,
-                    'scheduled_time': scheduled_email.scheduled_time.isoformat(),
-                    'frequency': scheduled_email.frequency.value,
-                    'template_name': scheduled_email.template_name,
-                    'template_vars': scheduled_email.template_vars,
-                    'timezone': scheduled_email.timezone,
-                    'max_occurrences': scheduled_email.max_occurrences,
-                    'current_occurrence': scheduled_email.current_occurrence,
-                    'is_active': scheduled_email.is_active,
-                    'created_at': scheduled_email.created_at.isoformat(),
-                    'last_sent': scheduled_email.last_sent.isoformat() if scheduled_email.last_sent else None,
-                    'next_send': scheduled_email.next_send.isoformat() if scheduled_email.next_send else None
+        """Compact: write the full snapshot atomically and truncate the journal"""
+        with self._lock:
+            try:
+                data = {
+                    'scheduled_emails': {
+                        email_id: self._to_dict(scheduled_email)
+                        for email_id, scheduled_email in self.scheduled_emails.items()
+                    },
+                    'last_updated': datetime.now().isoformat()
                 }
-                data['scheduled_emails'][email_id] = email_dict
-            
-            with open(self.schedules_file, 'w') as f:
-                json.dump(data, f, indent=2)
                 
-        except Exception as e:
-            print(f"Error saving schedules: {e}")
+                tmp_file = f"{self.schedules_file}.tmp"
+                with open(tmp_file, 'w') as f:
+                    json.dump(data, f, indent=2)
+                os.replace(tmp_file, self.schedules_file)
+                open(self.journal_file, 'w').close()
+                self._journal_entries = 0
+                    
+            except Exception as e:
+                print(f"Error saving schedules: {e}")
+    
+    def _record(self, scheduled_email: ScheduledEmail):
+        """Append one schedule's current state to the journal"""
+        with self._lock:
+            try:
+                with open(self.journal_file, 'a') as f:
+                    f.write(json.dumps(self._to_dict(scheduled_email)) + "\n")
+                self._journal_entries += 1
+            except Exception as e:
+                print(f"Error journaling schedule {scheduled_email.id}: {e}")
+            if self._journal_entries >= self.compact_after:
+                self._save_schedules()
+    
+    def _push(self, scheduled_email: ScheduledEmail):
+        if scheduled_email.is_active and scheduled_email.next_send:
+            with self._lock:
+                heapq.heappush(self._heap, (scheduled_email.next_send, next(self._seq), scheduled_email.id))
+            self._wake()
+    
+    def _wake(self):
+        if self._loop is not None and self._wakeup is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._wakeup.set)
+            except RuntimeError:
+                pass  # loop already closed
     
     def schedule_email(self, 
                       recipient: str, 
@@ -134,7 +226,8 @@ class EmailScheduler:
         )
         
         self.scheduled_emails[email_id] = scheduled_email
-        self._save_schedules()
+        self._record(scheduled_email)
+        self._push(scheduled_email)
         
         # Start scheduler if not running
         if not self.is_running:
@@ -143,10 +236,10 @@ class EmailScheduler:
         return email_id
     
     def cancel_scheduled_email(self, email_id: str) -> bool:
-        """Cancel a scheduled email"""
+        """Cancel a scheduled email (its heap entry is skipped when popped)"""
         if email_id in self.scheduled_emails:
             self.scheduled_emails[email_id].is_active = False
-            self._save_schedules()
+            self._record(self.scheduled_emails[email_id])
             return True
         return False
     
@@ -170,6 +263,10 @@ class EmailScheduler:
         
         return sorted(upcoming, key=lambda x: x.next_send)
     
+    def get_failed_emails(self) -> List[ScheduledEmail]:
+        """Schedules deactivated after ``max_attempts`` consecutive send failures"""
+        return [email for email in self.scheduled_emails.values() if email.failed]
+    
     def _calculate_next_send_time(self, scheduled_email: ScheduledEmail) -> Optional[datetime]:
         """Calculate next send time for recurring emails"""
         if scheduled_email.frequency == ScheduleFrequency.ONCE:
@@ -193,56 +290,120 @@ class EmailScheduler:
         return None
     
     def start_scheduler(self):
-        """Start the email scheduler"""
+        """Start the email scheduler
+
+        Runs as a task on the current event loop when called from async code,
+        otherwise on a private event loop in a daemon thread.
+        """
         if self.is_running:
             return
         
         self.is_running = True
-        self.scheduler_thread = threading.Thread(target=self._scheduler_loop, daemon=True)
-        self.scheduler_thread.start()
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        
+        if loop is not None:
+            self._loop = loop
+            self._task = loop.create_task(self.run())
+        else:
+            ready = threading.Event()
+            
+            def thread_main():
+                self._loop = asyncio.new_event_loop()
+                asyncio.set_event_loop(self._loop)
+                self._task = self._loop.create_task(self.run())
+                ready.set()
+                try:
+                    self._loop.run_until_complete(self._task)
+                except asyncio.CancelledError:
+                    pass
+                finally:
+                    self._loop.close()
+            
+            self.scheduler_thread = threading.Thread(target=thread_main, daemon=True)
+            self.scheduler_thread.start()
+            ready.wait(timeout=5)
         print("📅 Email scheduler started")
     
     def stop_scheduler(self):
         """Stop the email scheduler"""
         self.is_running = False
+        if self._loop is not None and self._task is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._task.cancel)
+            except RuntimeError:
+                pass
         if self.scheduler_thread:
             self.scheduler_thread.join(timeout=5)
+        self._save_schedules()
         print("📅 Email scheduler stopped")
     
-    def _scheduler_loop(self):
-        """Main scheduler loop"""
+    async def run(self):
+        """Main scheduler loop: sleep until the earliest due item, then dispatch"""
+        self._wakeup = asyncio.Event()
         while self.is_running:
             try:
-                self._check_and_send_emails()
-                time.sleep(60)  # Check every minute
+                due = self._pop_due(datetime.now())
+                if due:
+                    await asyncio.gather(*(self._send_scheduled_email(e) for e in due))
+                    continue
+                
+                # Clear before peeking so a schedule added meanwhile still wakes us
+                self._wakeup.clear()
+                with self._lock:
+                    next_at = self._heap[0][0] if self._heap else None
+                timeout = None if next_at is None else max(0.0, (next_at - datetime.now()).total_seconds())
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    pass
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
                 print(f"Scheduler error: {e}")
-                time.sleep(60)
+                await asyncio.sleep(1)
     
-    def _check_and_send_emails(self):
-        """Check for emails that need to be sent"""
-        now = datetime.now()
-        emails_to_send = []
-        
-        for email in self.scheduled_emails.values():
-            if (email.is_active and 
-                email.next_send and 
-                email.next_send <= now):
-                emails_to_send.append(email)
-        
-        for email in emails_to_send:
-            self._send_scheduled_email(email)
+    def _pop_due(self, now: datetime) -> List[ScheduledEmail]:
+        """Pop every heap entry due by ``now``, skipping stale or cancelled ones"""
+        due: List[ScheduledEmail] = []
+        seen = set()
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                send_at, _, email_id = heapq.heappop(self._heap)
+                email = self.scheduled_emails.get(email_id)
+                if (email is None or not email.is_active or email.next_send != send_at
+                        or email_id in seen):
+                    continue
+                seen.add(email_id)
+                due.append(email)
+        return due
     
-    def _send_scheduled_email(self, scheduled_email: ScheduledEmail):
+    async def _send_scheduled_email(self, scheduled_email: ScheduledEmail):
         """Send a scheduled email"""
         try:
-            # This would integrate with the actual email sender
-            print(f"📧 Sending scheduled email to {scheduled_email.recipient}")
-            print(f"   Subject: {scheduled_email.subject}")
-            
+            if self.mailer is not None:
+                result = await self.mailer.send_mail(
+                    to_email=scheduled_email.recipient,
+                    subject=scheduled_email.subject,
+                    body=scheduled_email.body
+                )
+                if not result.get("success", True):
+                    raise RuntimeError(result.get("error") or "send failed")
+            else:
+                print(f"📧 Sending scheduled email to {scheduled_email.recipient}")
+                print(f"   Subject: {scheduled_email.subject}")
+        except Exception as e:
+            self._retry_later(scheduled_email, e)
+            return
+        
+        try:
             # Update email tracking
             scheduled_email.last_sent = datetime.now()
             scheduled_email.current_occurrence += 1
+            scheduled_email.failed_attempts = 0
+            scheduled_email.last_error = None
             
             # Calculate next send time
             if scheduled_email.frequency != ScheduleFrequency.ONCE:
@@ -260,10 +421,30 @@ class EmailScheduler:
                 scheduled_email.is_active = False
                 scheduled_email.next_send = None
             
-            self._save_schedules()
+            self._record(scheduled_email)
+            self._push(scheduled_email)
             
         except Exception as e:
-            print(f"Error sending scheduled email {scheduled_email.id}: {e}")
+            print(f"Error updating scheduled email {scheduled_email.id}: {e}")
+    
+    def _retry_later(self, scheduled_email: ScheduledEmail, error: Exception):
+        """Keep the failed occurrence and re-queue it with exponential backoff, or give up"""
+        scheduled_email.failed_attempts += 1
+        scheduled_email.last_error = str(error)
+        if scheduled_email.failed_attempts >= self.max_attempts:
+            scheduled_email.is_active = False
+            scheduled_email.failed = True
+            scheduled_email.next_send = None
+            print(f"Scheduled email {scheduled_email.id} failed {scheduled_email.failed_attempts} times, "
+                  f"giving up: {error}")
+            self._record(scheduled_email)
+            return
+        delay = min(self.retry_max, self.retry_base * 2 ** (scheduled_email.failed_attempts - 1))
+        scheduled_email.next_send = datetime.now() + timedelta(seconds=delay)
+        print(f"Scheduled email {scheduled_email.id} failed (attempt {scheduled_email.failed_attempts}): "
+              f"{error}; retrying in {delay:.0f}s")
+        self._record(scheduled_email)
+        self._push(scheduled_email)
     
     def parse_schedule_time(self, time_str: str) -> Optional[datetime]:
         """Parse natural language time strings"""
@@ -317,5 +498,6 @@ class EmailScheduler:
             'active_schedules': len(active_emails),
             'upcoming_24h': len(self.get_upcoming_emails(24)),
             'recurring_schedules': len([e for e in active_emails if e.frequency != ScheduleFrequency.ONCE]),
+            'failed_schedules': len(self.get_failed_emails()),
             'is_running': self.is_running
         }
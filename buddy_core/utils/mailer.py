@@ -5,11 +5,18 @@ Production-ready email handling with multiple providers
 import smtplib
 import aiosmtplib
 import asyncio
+import copy
+import io
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.message import EmailMessage
+from email.generator import BytesGenerator
+from email.utils import getaddresses
 import os
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List, Callable, Tuple
 import json
 from datetime import datetime
 import logging
@@ -24,27 +31,271 @@ except ImportError:
     SENDGRID_AVAILABLE = False
     logger.info("⚠️  SendGrid not available. Install with: pip install sendgrid")
 
+class _PooledConnection:
+    """An open SMTP session plus the bookkeeping the pool needs."""
+
+    def __init__(self, smtp: smtplib.SMTP):
+        self.smtp = smtp
+        self.messages_sent = 0
+        self.last_used = time.monotonic()
+
+
+class SMTPConnectionPool:
+    """Thread-safe pool of logged-in SMTP sessions.
+
+    Connections are kept alive between messages, health-checked with NOOP
+    when they have been idle, and recycled after ``max_messages_per_connection``
+    messages. At most ``max_connections`` sessions exist at once; extra
+    callers block until one is released.
+    """
+
+    def __init__(self, smtp_server: str, port: int, username: Optional[str] = None,
+                 password: Optional[str] = None, max_connections: int = 4,
+                 max_messages_per_connection: int = 100, idle_timeout: float = 60.0,
+                 noop_after: float = 10.0, starttls: bool = True, timeout: float = 30.0,
+                 smtp_factory: Optional[Callable[..., smtplib.SMTP]] = None):
+        self.smtp_server = smtp_server
+        self.port = port
+        self.username = username
+        self.password = password
+        self.max_connections = max(1, max_connections)
+        self.max_messages_per_connection = max(1, max_messages_per_connection)
+        self.idle_timeout = idle_timeout
+        self.noop_after = noop_after
+        self.starttls = starttls
+        self.timeout = timeout
+        self.smtp_factory = smtp_factory or smtplib.SMTP
+        self._idle: List[_PooledConnection] = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_connections)
+        self.stats = {"opened": 0, "reused": 0, "recycled": 0, "broken": 0}
+
+    def _open(self) -> _PooledConnection:
+        smtp = self.smtp_factory(self.smtp_server, self.port, timeout=self.timeout)
+        if self.starttls:
+            smtp.starttls()
+        if self.username and self.password:
+            smtp.login(self.username, self.password)
+        self.stats["opened"] += 1
+        return _PooledConnection(smtp)
+
+    @staticmethod
+    def _close(conn: _PooledConnection):
+        try:
+            conn.smtp.quit()
+        except Exception:
+            try:
+                conn.smtp.close()
+            except Exception:
+                pass
+
+    def _healthy(self, conn: _PooledConnection) -> bool:
+        idle_for = time.monotonic() - conn.last_used
+        if idle_for > self.idle_timeout:
+            return False
+        if idle_for < self.noop_after:
+            return True
+        try:
+            code, _ = conn.smtp.noop()
+            return code == 250
+        except Exception:
+            return False
+
+    def acquire(self) -> _PooledConnection:
+        self._slots.acquire()
+        try:
+            while True:
+                with self._lock:
+                    conn = self._idle.pop() if self._idle else None
+                if conn is None:
+                    return self._open()
+                if self._healthy(conn):
+                    self.stats["reused"] += 1
+                    return conn
+                self.stats["broken"] += 1
+                self._close(conn)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, conn: _PooledConnection, reusable: bool = True):
+        try:
+            conn.last_used = time.monotonic()
+            if reusable and conn.messages_sent < self.max_messages_per_connection:
+                with self._lock:
+                    self._idle.append(conn)
+                return
+            if reusable:
+                self.stats["recycled"] += 1
+            self._close(conn)
+        finally:
+            self._slots.release()
+
+    @staticmethod
+    def _retryable(exc: BaseException) -> bool:
+        """A dropped or unreachable session, as opposed to a reply from the server."""
+        if isinstance(exc, smtplib.SMTPServerDisconnected):
+            return True
+        return isinstance(exc, OSError) and not isinstance(exc, smtplib.SMTPException)
+
+    @staticmethod
+    def _envelope(msg) -> Tuple[str, List[str], bytes, List[str]]:
+        """Sender, recipients, wire bytes and MAIL options, derived as ``SMTP.send_message`` does."""
+        from_addr = getaddresses([msg["Sender"] or msg["From"]])[0][1]
+        to_addrs = [addr for _, addr in getaddresses(
+            [value for header in ("To", "Cc", "Bcc") for value in msg.get_all(header, [])])]
+        msg_copy = copy.copy(msg)
+        del msg_copy["Bcc"]
+        del msg_copy["Resent-Bcc"]
+        options: List[str] = []
+        policy = None
+        if not all(addr.isascii() for addr in [from_addr, *to_addrs]):
+            options = ["SMTPUTF8", "BODY=8BITMIME"]
+            policy = msg.policy.clone(utf8=True)
+        with io.BytesIO() as buffer:
+            BytesGenerator(buffer, policy=policy).flatten(msg_copy, linesep="\r\n")
+            return from_addr, to_addrs, buffer.getvalue(), options
+
+    @staticmethod
+    def _reset(smtp: smtplib.SMTP, code: int):
+        """Abort the transaction after a refusal, as ``SMTP.sendmail`` does."""
+        if code == 421:
+            smtp.close()
+            return
+        try:
+            smtp.rset()
+        except smtplib.SMTPServerDisconnected:
+            pass
+
+    @classmethod
+    def _send_in_phases(cls, smtp: smtplib.SMTP, msg) -> Dict[str, Tuple[int, bytes]]:
+        """``smtp.send_message(msg)`` with the envelope and DATA steps issued separately.
+
+        Returns the refused recipients, if some were accepted. An exception
+        raised from here carries ``reached_data``: False when it happened
+        before DATA was sent, so the server cannot have taken the message.
+        """
+        reached_data = False
+        try:
+            from_addr, to_addrs, payload, options = cls._envelope(msg)
+            smtp.ehlo_or_helo_if_needed()
+            if options and not smtp.has_extn("smtputf8"):
+                raise smtplib.SMTPNotSupportedError("One or more source or delivery addresses require"
+                                                    " internationalized email support, but the server"
+                                                    " does not advertise the required SMTPUTF8 capability")
+            code, resp = smtp.mail(from_addr, options)
+            if code != 250:
+                cls._reset(smtp, code)
+                raise smtplib.SMTPSenderRefused(code, resp, from_addr)
+            refused: Dict[str, Tuple[int, bytes]] = {}
+            for addr in to_addrs:
+                code, resp = smtp.rcpt(addr)
+                if code not in (250, 251):
+                    refused[addr] = (code, resp)
+                if code == 421:
+                    smtp.close()
+                    raise smtplib.SMTPRecipientsRefused(refused)
+            if len(refused) == len(to_addrs):
+                cls._reset(smtp, code)
+                raise smtplib.SMTPRecipientsRefused(refused)
+            reached_data = True
+            code, resp = smtp.data(payload)
+            if code != 250:
+                cls._reset(smtp, code)
+                raise smtplib.SMTPDataError(code, resp)
+        except BaseException as e:
+            e.reached_data = reached_data
+            raise
+        return refused
+
+    def send_message(self, msg) -> bool:
+        """Send on a pooled session, retrying once on a fresh one if it dropped before DATA.
+
+        Server replies (refused sender/recipients, rejected data) are raised
+        as-is, and so is any failure after DATA was issued: the server may
+        already have accepted the message, so resending could deliver it twice.
+        """
+        for attempt in range(2):
+            try:
+                conn = self.acquire()
+            except Exception as e:
+                if attempt == 0 and self._retryable(e):
+                    continue
+                raise
+            try:
+                self._send_in_phases(conn.smtp, msg)
+                conn.messages_sent += 1
+            except smtplib.SMTPServerDisconnected as e:
+                self.release(conn, reusable=False)
+                self.stats["broken"] += 1
+                if attempt == 1 or getattr(e, "reached_data", True):
+                    raise
+                continue
+            except smtplib.SMTPResponseException as e:
+                # RSET was sent after the refusal, so the session is still usable unless it was a 421
+                self.release(conn, reusable=e.smtp_code != 421)
+                raise
+            except smtplib.SMTPRecipientsRefused as e:
+                self.release(conn, reusable=all(code != 421 for code, _ in e.recipients.values()))
+                raise
+            except Exception as e:
+                self.release(conn, reusable=False)
+                if self._retryable(e):
+                    self.stats["broken"] += 1
+                    if attempt == 0 and not getattr(e, "reached_data", True):
+                        continue
+                raise
+            self.release(conn)
+            return True
+        return False
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            self._close(conn)
+
+
 class AsyncMailer:
-    """SMTP mailer using asyncio/aiosmtplib for production email sending."""
+    """SMTP mailer using asyncio/aiosmtplib for production email sending.
+
+    Messages are sent over a pool of persistent SMTP sessions so bulk sends
+    (digests, reminders) do not pay a TCP/TLS/login handshake per message.
+    """
     
-    def __init__(self, smtp_server="smtp.gmail.com", port=587, username=None, password=None):
+    def __init__(self, smtp_server="smtp.gmail.com", port=587, username=None, password=None,
+                 pool_size: int = 4, max_messages_per_connection: int = 100,
+                 starttls: bool = True, smtp_factory: Optional[Callable[..., smtplib.SMTP]] = None):
         self.smtp_server = smtp_server
         self.port = port
         self.username = username
         self.password = password
         self.provider = "SMTP"
-        
+        self.pool = SMTPConnectionPool(
+            smtp_server, port, username, password,
+            max_connections=pool_size,
+            max_messages_per_connection=max_messages_per_connection,
+            starttls=starttls,
+            smtp_factory=smtp_factory
+        )
+        # One worker per pooled connection bounds concurrent SMTP sessions
+        self._executor = ThreadPoolExecutor(max_workers=self.pool.max_connections, thread_name_prefix="smtp")
+        
+    def _build_message(self, to_email: str, subject: str, body: str, from_email: Optional[str] = None) -> MIMEText:
+        msg = MIMEText(body, "plain")
+        msg["Subject"] = subject
+        msg["From"] = from_email or self.username
+        msg["To"] = to_email
+        return msg
+
     async def send_mail(self, to_email: str, subject: str, body: str, from_email: Optional[str] = None) -> Dict[str, Any]:
         """Send email via SMTP with asyncio support."""
         try:
-            msg = MIMEText(body, "plain")
-            msg["Subject"] = subject
-            msg["From"] = from_email or self.username
-            msg["To"] = to_email
+            msg = self._build_message(to_email, subject, body, from_email)
 
             # Use basic SMTP instead of aiosmtplib for compatibility
             loop = asyncio.get_event_loop()
-            result = await loop.run_in_executor(None, self._send_smtp_sync, msg)
+            result = await loop.run_in_executor(self._executor, self._send_smtp_sync, msg)
             
             return {
                 "status": "sent",
@@ -65,16 +316,23 @@ class AsyncMailer:
                 "timestamp": datetime.now().isoformat(),
                 "success": False
             }
+
+    async def send_many(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Send many emails concurrently over the shared connection pool.
+
+        Each item takes the ``send_mail`` keyword arguments (to_email, subject,
+        body, optional from_email). Results are returned in input order.
+        """
+        return await asyncio.gather(*(self.send_mail(**m) for m in messages))
     
     def _send_smtp_sync(self, msg):
         """Synchronous SMTP sending for thread execution."""
-        server = smtplib.SMTP(self.smtp_server, self.port)
-        server.starttls()
-        if self.username and self.password:
-            server.login(self.username, self.password)
-        server.send_message(msg)
-        server.quit()
-        return True
+        return self.pool.send_message(msg)
+
+    def close(self):
+        """Close pooled SMTP sessions and stop the worker threads."""
+        self.pool.close()
+        self._executor.shutdown(wait=False)
         
     # Legacy method for backward compatibility
     async def send_email(self, from_address: str, to_address: str, 
@@ -124,6 +382,10 @@ class MockMailer:
         """Legacy send_email method for backward compatibility"""
         return await self.send_mail(to_address, subject, body, from_address)
     
+    async def send_many(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Mock bulk send with the same interface as AsyncMailer.send_many"""
+        return [await self.send_mail(**m) for m in messages]
+    
     def get_sent_emails(self) -> list:
         """Get list of sent emails for testing"""
         return self.sent_emails
@@ -133,6 +395,10 @@ class MockMailer:
         self.sent_emails.clear()
 
 
+# SendGrid accepts at most 1000 personalizations per mail/send request
+SENDGRID_MAX_PERSONALIZATIONS = 1000
+
+
 class SendGridMailer:
     """SendGrid email sender (optional)"""
     
@@ -193,6 +459,68 @@ class SendGridMailer:
             logger.error(f"SendGrid send error: {e}")
             raise Exception(f"SendGrid error: {str(e)}")
 
+    async def send_many(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Send many emails with as few SendGrid API calls as possible.
+
+        Messages sharing sender, subject and body are grouped into one request
+        with a personalization per recipient (up to SENDGRID_MAX_PERSONALIZATIONS),
+        so each recipient still receives an individual email. Groups are sent
+        concurrently. Results are returned in input order.
+        """
+        if not self.available:
+            raise Exception("SendGrid not available - install sendgrid package")
+
+        groups: Dict[tuple, List[int]] = {}
+        for i, m in enumerate(messages):
+            key = (m.get("from_email") or self.from_email, m["subject"], m["body"], m.get("html_body"))
+            groups.setdefault(key, []).append(i)
+
+        batches = []
+        for key, indexes in groups.items():
+            for start in range(0, len(indexes), SENDGRID_MAX_PERSONALIZATIONS):
+                batches.append((key, indexes[start:start + SENDGRID_MAX_PERSONALIZATIONS]))
+
+        results: List[Dict[str, Any]] = [{} for _ in messages]
+        loop = asyncio.get_event_loop()
+
+        async def send_batch(key, indexes):
+            from_address, subject, body, html_body = key
+            recipients = [messages[i]["to_email"] for i in indexes]
+            try:
+                message = self.Mail(
+                    from_email=from_address,
+                    to_emails=recipients,
+                    subject=subject,
+                    plain_text_content=body,
+                    html_content=html_body,
+                    is_multiple=True
+                )
+                response = await loop.run_in_executor(None, self.sg.send, message)
+                success = response.status_code == 202
+                for i in indexes:
+                    results[i] = {
+                        "status": "sent" if success else "failed",
+                        "provider": "SendGrid",
+                        "to": messages[i]["to_email"],
+                        "subject": subject,
+                        "sendgrid_status": response.status_code,
+                        "batch_size": len(indexes),
+                        "success": success
+                    }
+            except Exception as e:
+                logger.error(f"SendGrid batch send error: {e}")
+                for i in indexes:
+                    results[i] = {
+                        "status": "failed",
+                        "provider": "SendGrid",
+                        "to": messages[i]["to_email"],
+                        "error": str(e),
+                        "success": False
+                    }
+
+        await asyncio.gather(*(send_batch(k, idx) for k, idx in batches))
+        return results
+
 
 def create_mailer(provider: str = "mock", **kwargs):
     """
@@ -210,7 +538,10 @@ def create_mailer(provider: str = "mock", **kwargs):
             smtp_server=kwargs.get('smtp_server', 'smtp.gmail.com'),
             port=kwargs.get('port', 587),
             username=kwargs.get('username'),
-            password=kwargs.get('password')
+            password=kwargs.get('password'),
+            pool_size=kwargs.get('pool_size', 4),
+            max_messages_per_connection=kwargs.get('max_messages_per_connection', 100),
+            starttls=kwargs.get('starttls', True)
         )
     elif provider.lower() == "sendgrid":
         return SendGridMailer(
@@ -462,6 +793,6 @@ class BUDDYEmailHandler:
 
 # Export main classes and functions
 __all__ = [
-    'AsyncMailer', 'MockMailer', 'SendGridMailer', 'create_mailer',
+    'AsyncMailer', 'SMTPConnectionPool', 'MockMailer', 'SendGridMailer', 'create_mailer',
     'EmailComposer', 'BUDDYEmailHandler'
 ]
@@ -54,7 +54,7 @@ class SuperEnhancedBUDDYEmailHandler(BaseBUDDYEmailHandler):
             # Initialize everything
             self.template_manager = EmailTemplateManager()
             self.contact_book = ContactBook()
-            self.scheduler = EmailScheduler()
+            self.scheduler = EmailScheduler(mailer=self.mailer)
             self.analytics = EmailAnalytics()
             self.attachment_manager = AttachmentManager()
             self.content_enhancer = EmailContentEnhancer()
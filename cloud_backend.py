@@ -11,7 +11,7 @@ import asyncio
 import logging
 import time
 from datetime import datetime, timedelta
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Dict, Any, List, Optional, Tuple, AsyncIterator, Callable
 import contextlib
 from fastapi import FastAPI, HTTPException, BackgroundTasks, Depends, status, Request, Query, WebSocket, WebSocketDisconnect
 from fastapi.security import HTTPAuthorizationCredentials
@@ -33,12 +33,8 @@ from buddy_core.utils.universal_port_manager import (
 from infrastructure.config.settings import settings
 from infrastructure.logging.structured import configure_logging, get_logger
 from infrastructure.middleware import CorrelationIdMiddleware, RateLimitMiddleware, MetricsMiddleware
-from infrastructure.security.ratelimit import RateLimiter
-try:
-    import redis  # type: ignore
-    REDIS_AVAILABLE = True
-except Exception:
-    REDIS_AVAILABLE = False
+from infrastructure.security.ratelimit import create_rate_limiter
+from infrastructure.security.principal import principal_resolver
 from infrastructure.metrics import metrics
 from plugins.registry import registry, Plugin
 from i18n.translator import translate
@@ -51,6 +47,7 @@ from vector.semantic_index import (
 )
 from packages.core.buddy.memory.memory_service import memory_service, MemoryService  # type: ignore
 from jobs.scheduler import scheduler
+from buddy_core.util.cache import TTLCache
 
 # Auth integration
 from packages.core.buddy.auth.jwt_manager import BuddyAuthManager
@@ -69,10 +66,11 @@ except Exception:
     OTEL_AVAILABLE = False
     trace = None  # type: ignore
 def rbac_required(required_roles: List[str]):
-    async def dependency(credentials: HTTPAuthorizationCredentials = Depends()):
+    async def dependency(request: Request, credentials: HTTPAuthorizationCredentials = Depends()):
         if not auth_api:
             raise HTTPException(status_code=401, detail="Auth not initialized")
-        claims = await auth_api.auth_manager.verify_access_token(credentials.credentials)  # type: ignore
+        # Reuses the principal the auth middleware already verified for this request
+        claims = await principal_resolver.claims_for(request.scope, credentials.credentials)
         if not claims:
             raise HTTPException(status_code=401, detail="Invalid token")
         roles = claims.get("roles", [])
@@ -166,36 +164,11 @@ app.add_middleware(
 )
 
 # Structured / metrics / rate limit middleware (with optional Redis backend)
-if getattr(settings, 'redis_url', None) and REDIS_AVAILABLE:
-    class RedisRateLimiter(RateLimiter):
-        def __init__(self, client, limit, window):
-            super().__init__(limit, window)
-            self.client = client
-            self.script = """
-local current = redis.call('INCR', KEYS[1])
-if current == 1 then redis.call('PEXPIRE', KEYS[1], ARGV[1]) end
-return current
-"""
-        def check(self, key: str, *, limit: int | None = None, window: int | None = None):
-            applied_limit = limit or self.default_limit
-            applied_window = window or self.default_window
-            ttl_ms = applied_window * 1000
-            try:
-                current = self.client.eval(self.script, 1, f"rl:{key}", ttl_ms)
-            except Exception:
-                # fallback to in-memory if redis fails
-                return super().check(key, limit=applied_limit, window=applied_window)
-            remaining = applied_limit - current
-            if current > applied_limit:
-                return False, 0, applied_limit
-            return True, max(0, remaining), applied_limit
-    try:
-        _redis_client = redis.Redis.from_url(str(settings.redis_url))  # type: ignore[arg-type]
-        rate_limiter = RedisRateLimiter(_redis_client, settings.rate_limit_requests, settings.rate_limit_window_seconds)
-    except Exception:
-        rate_limiter = RateLimiter(settings.rate_limit_requests, settings.rate_limit_window_seconds)
-else:
-    rate_limiter = RateLimiter(settings.rate_limit_requests, settings.rate_limit_window_seconds)
+rate_limiter = create_rate_limiter(
+    settings.rate_limit_requests,
+    settings.rate_limit_window_seconds,
+    redis_url=settings.redis_url,
+)
 app.add_middleware(CorrelationIdMiddleware)
 app.add_middleware(RateLimitMiddleware, limiter=rate_limiter)
 app.add_middleware(MetricsMiddleware)
@@ -255,7 +228,8 @@ class ErrorCodes:
     RATE_LIMIT = "rate_limited"
 @app.get("/semantic/search")
 async def semantic_search(q: str, top_k: int = 3):
-    results = semantic_index.search(q, top_k=top_k)
+    # Off the loop: the first search may wait for the embedding model to load
+    results = await asyncio.to_thread(semantic_index.search, q, top_k)
     return {"query": q, "results": [{"text": t, "score": s} for t, s in results]}
 
 @app.get("/admin/echo")
@@ -308,36 +282,8 @@ RESPONSE_PATTERNS = {
     ]
 }
 
-try:
-    import tiktoken  # type: ignore
-    TIKTOKEN_AVAILABLE = True
-except Exception:
-    TIKTOKEN_AVAILABLE = False
-
-def count_tokens(text: str, model: str = "gpt-3.5-turbo") -> int:
-    if TIKTOKEN_AVAILABLE:
-        try:
-            enc = tiktoken.encoding_for_model(model)
-            return len(enc.encode(text))
-        except Exception:
-            pass
-    # fallback word-based estimate
-    return max(1, len(text.split()))
-
-def trim_messages_token_budget(messages: List[Dict[str, str]], budget: int, model: str = "gpt-3.5-turbo") -> List[Dict[str, str]]:
-    # messages: list of {role, content}
-    if not messages:
-        return messages
-    total = 0
-    trimmed: List[Dict[str, str]] = []
-    # iterate from end (most recent) backwards
-    for msg in reversed(messages):
-        tokens = count_tokens(msg.get("content", ""), model=model)
-        if total + tokens > budget:
-            break
-        trimmed.append(msg)
-        total += tokens
-    return list(reversed(trimmed))
+# Token counting / context trimming (shared encoder registry + per-message memo)
+from infrastructure.tokens import count_tokens, trim_messages_token_budget, token_memo
 
 async def get_simple_response(message: str) -> tuple[str, float]:
     """Generate simple response without AI dependencies"""
@@ -375,6 +321,40 @@ async def get_ai_response(message: str) -> tuple[str, float]:
         logger.error(f"OpenAI error: {e}")
         return await get_simple_response(message)
 
+async def stream_ai_response(message: str) -> AsyncIterator[str]:
+    """Yield response text as the model produces it (OpenAI streaming, else simple response words)."""
+    if OPENAI_AVAILABLE:
+        stream = None
+        try:
+            client = openai.AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+            stream = await client.chat.completions.create(
+                model="gpt-3.5-turbo",
+                messages=[
+                    {"role": "system", "content": "You are BUDDY, a helpful AI assistant."},
+                    {"role": "user", "content": message}
+                ],
+                max_tokens=150,
+                stream=True
+            )
+        except Exception as e:
+            logger.error(f"OpenAI error: {e}")
+        if stream is not None:
+            try:
+                async for chunk in stream:
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if delta:
+                        yield delta
+                return
+            finally:
+                # Runs on normal completion and when the consumer is cancelled
+                await stream.close()
+    response_text, _ = await get_simple_response(message)
+    for word in response_text.split():
+        yield word + " "
+
+# Token source for /chat/stream (swappable, e.g. for a local fake generator in benchmarks)
+chat_token_source: Callable[[str], AsyncIterator[str]] = stream_ai_response
+
 # API Endpoints
 @app.get("/health")
 async def health():
@@ -465,10 +445,8 @@ async def chat(message_data: ChatMessage, credentials: HTTPAuthorizationCredenti
         if persona == 'buddy' and BUDDY_PERSONA_AVAILABLE:
             try:
                 cache_key = f"{message_data.user_id}:{conversation_id}:{hash(message_data.message)}"
-                cached = _persona_cache.get(cache_key)
-                if cached and cached.get('augmented'):
-                    response_text = cached['augmented']
-                else:
+                async def augment() -> Dict[str, Any]:
+                    augmented = response_text
                     persona_ctx: Dict[str, Any] = {"user_name": message_data.user_id or "User"}
                     if get_user_profile:
                         try:
@@ -539,9 +517,14 @@ async def chat(message_data: ChatMessage, credentials: HTTPAuthorizationCredenti
                         if proactive.get('upcoming_reminders_count'):
                             augmentation_parts.append(f"{proactive['upcoming_reminders_count']} coming up soon.")
                     augmented_header = '\n\n'.join(augmentation_parts)[:1500]
-                    if styled and styled not in response_text:
-                        response_text = f"{augmented_header}\n\n{response_text}"[:4000]
-                    _persona_cache.set(cache_key, {"augmented": response_text})
+                    if styled and styled not in augmented:
+                        augmented = f"{augmented_header}\n\n{augmented}"[:4000]
+                    return {"augmented": augmented}
+
+                # Concurrent requests for the same key share one augmentation
+                cached = await _persona_cache.get_or_set(cache_key, augment)
+                if cached and cached.get('augmented'):
+                    response_text = cached['augmented']
             except Exception:
                 pass
         elif persona != 'neutral' and persona != 'buddy':
@@ -611,7 +594,6 @@ try:
     from buddy_core.voice.voice_processor import voice_processor_singleton
     from buddy_core.personality.buddy_personality import personality_singleton
     from buddy_core.personality.profile_service import get_user_profile, update_user_profile
-    from buddy_core.util.cache import TTLCache
     BUDDY_PERSONA_AVAILABLE = True
 except Exception:
     BUDDY_PERSONA_AVAILABLE = False
@@ -623,59 +605,23 @@ except Exception:
     CROSS_PLATFORM_AVAILABLE = False
 
 # Enhanced endpoint-specific rate limiter for /chat/universal (Redis-based if available)
-_universal_rl: Dict[str, List[float]] = {}
 _UNIVERSAL_LIMIT = int(os.getenv("UNIVERSAL_CHAT_LIMIT", "30"))
 _UNIVERSAL_WINDOW = int(os.getenv("UNIVERSAL_CHAT_WINDOW", "60"))
+_universal_rl = create_rate_limiter(
+    _UNIVERSAL_LIMIT,
+    _UNIVERSAL_WINDOW,
+    redis_url=settings.redis_url,
+    prefix="universal_rate",
+)
 
 def _check_universal_rate(user_id: str):
-    """Redis-based distributed rate limiter with in-memory fallback"""
-    # Try Redis-based rate limiting first
-    if REDIS_AVAILABLE and hasattr(rate_limiter, 'client'):
-        try:
-            # Use Redis INCR with TTL for atomic rate limiting
-            redis_client = getattr(rate_limiter, 'client')
-            key = f"universal_rate:{user_id}"
-            
-            # Lua script for atomic INCR + EXPIRE
-            script = """
-            local current = redis.call('INCR', KEYS[1])
-            if current == 1 then 
-                redis.call('EXPIRE', KEYS[1], ARGV[1]) 
-            end
-            return current
-            """
-            
-            current_count = redis_client.eval(
-                script, 
-                1, 
-                key, 
-                _UNIVERSAL_WINDOW
-            )
-            
-            remaining = max(0, _UNIVERSAL_LIMIT - current_count)
-            allowed = current_count <= _UNIVERSAL_LIMIT
-            
-            return allowed, remaining
-            
-        except Exception as e:
-            logger.warning("redis_rate_limit_fallback", error=str(e))
-            # Fall through to in-memory implementation
-    
-    # Fallback to in-memory rate limiting
-    now = time.time()
-    bucket = _universal_rl.setdefault(user_id, [])
-    # prune
-    cutoff = now - _UNIVERSAL_WINDOW
-    while bucket and bucket[0] < cutoff:
-        bucket.pop(0)
-    if len(bucket) >= _UNIVERSAL_LIMIT:
-        return False, _UNIVERSAL_LIMIT - len(bucket)
-    bucket.append(now)
-    return True, _UNIVERSAL_LIMIT - len(bucket)
-
-# Caches (TTL + size limited)
-_intent_cache = TTLCache[str, Dict[str, Any]](maxsize=500, ttl_seconds=900)
-_persona_cache = TTLCache[str, Dict[str, Any]](maxsize=500, ttl_seconds=1800)
+    """Distributed GCRA rate limiter (Redis when configured, in-memory fallback)"""
+    decision = _universal_rl.acquire(user_id)
+    return decision.allowed, decision.remaining
+
+# Caches (TTL + size limited, single-flight; stale entries served while one refresh runs)
+_intent_cache = TTLCache[str, Dict[str, Any]](maxsize=500, ttl_seconds=900, stale_seconds=300)
+_persona_cache = TTLCache[str, Dict[str, Any]](maxsize=500, ttl_seconds=1800, stale_seconds=600)
 
 # Memory summarization & compression helpers (heuristic; future: LLM or clustering)
 async def _compress_memory_snippets(texts: List[str], max_items: int = 6, max_len: int = 500) -> str:
@@ -711,85 +657,140 @@ async def _summarize_ranked_memories(ranked: List[Dict[str, Any]]) -> Dict[str,
     compressed = await _compress_memory_snippets(texts)
     return {"snippets": snippets_block, "summary": compressed}
 
-@app.post("/chat/stream")
-async def chat_stream(message_data: ChatMessage, credentials: HTTPAuthorizationCredentials = Depends()):
-    """Basic streaming chat endpoint streaming words."""
-    try:
-        tracer = None
-        if OTEL_AVAILABLE and trace and getattr(trace, "get_tracer_provider", None) and trace.get_tracer_provider():
-            tracer = trace.get_tracer("buddy.chat.stream")
-        span_ctx = tracer.start_as_current_span("chat_stream") if tracer else None
-        with span_ctx if span_ctx else contextlib.nullcontext():
-            response_text, confidence = await get_ai_response(message_data.message)
+async def _stream_persona_context(message_data: ChatMessage) -> Dict[str, Any]:
+    """Persona layer for /chat/stream; profile, memory and reminder lookups run concurrently."""
+    user_id = message_data.user_id or "default"
+    conv_id = message_data.conversation_id or "default"
+    cache_key = f"{message_data.user_id}:{conv_id}"
+
+    async def load_profile() -> Dict[str, Any]:
+        if not get_user_profile:
+            return {}
+        try:
+            return await get_user_profile(user_id) or {}  # type: ignore
+        except Exception:
+            return {}
+
+    async def load_memory() -> List[Dict[str, Any]]:
+        mem_service = globals().get('memory_service')
+        if not mem_service:
+            return []
+        try:
+            return await mem_service.retrieve(user_id, message_data.message, top_k=5)
+        except Exception:
+            return []
+
+    async def load_upcoming() -> List[Any]:
+        if not MONGODB_AVAILABLE:
+            return []
+        try:
+            db = await get_database()
+            return await db.get_due_reminders(buffer_minutes=120)  # next 2h
+        except Exception:
+            return []
+
+    profile, ranked, upcoming = await asyncio.gather(load_profile(), load_memory(), load_upcoming())
+    persona_ctx: Dict[str, Any] = {"user_name": message_data.user_id or "User"}
+    persona_ctx.update(profile)
+    memory_summary = ""
+    if ranked:
+        persona_ctx['memory_snippets'] = "\n".join([f"[{r['type']}] {r['text']}" for r in ranked])[:1000]
+        # summarization: naive compression (later LLM summarizer)
+        memory_summary = "; ".join([r['text'] for r in ranked])[:500]
+    if upcoming:
+        persona_ctx['upcoming_meeting'] = True
+        persona_ctx['meeting_time'] = 'soon'
+
+    async def generate() -> Dict[str, Any]:
+        engine = BUDDYIntelligenceEngine(user_profile=persona_ctx, conversation_memory=[])
+        return {"styled": await engine.generate_buddy_response(message_data.message, persona_ctx)}
+
+    # Single-flight: a burst of identical messages triggers one generation
+    styled = (await _intent_cache.get_or_set(cache_key, generate)).get('styled')
+    # persona preference style switches
+    formality = persona_ctx.get('formality_level', 0.8)
+    humor = persona_ctx.get('humor_subtlety', 0.0)
+    if styled:
+        if humor and humor > 0.5:
+            styled += "\n(An aside: Efficiency remains paramount.)"
+        if formality < 0.5:
+            styled = styled.replace('Sir', persona_ctx.get('user_name','')).replace('Madam', persona_ctx.get('user_name',''))
+    return {"styled": styled, "memory_summary": memory_summary}
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def _chat_event_stream(request: Request, message_data: ChatMessage) -> AsyncIterator[str]:
+    """SSE pipeline: model tokens and the persona layer are produced concurrently and
+    forwarded as soon as each is ready; idle gaps are filled with heartbeats."""
+    queue: asyncio.Queue = asyncio.Queue()
+    conversation_id = message_data.conversation_id or f"conv_{int(time.time())}"
+
+    async def produce_tokens():
+        try:
+            async for chunk in chat_token_source(message_data.message):
+                await queue.put(("token", {"text": chunk}))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error("chat_stream_generation_failed", error=str(e))
+            await queue.put(("error", {"detail": "generation failed"}))
+        finally:
+            queue.put_nowait(("_end", None))
+
+    async def produce_persona():
+        try:
             if BUDDY_PERSONA_AVAILABLE:
-                try:
-                    conv_id = message_data.conversation_id or "default"
-                    cache_key = f"{message_data.user_id}:{conv_id}"
-                    persona_ctx: Dict[str, Any] = {"user_name": message_data.user_id or "User"}
-                    # Load user profile prefs
-                    if get_user_profile:
-                        profile = await get_user_profile(message_data.user_id or "default")  # type: ignore
-                        persona_ctx.update(profile)
-                    # Retrieve top memory items for context (facts + episodes)
-                    mem_service = globals().get('memory_service')
-                    top_memory: str = ""
-                    memory_summary: str = ""
-                    if mem_service:
-                        try:
-                            ranked = await mem_service.retrieve(message_data.user_id or "default", message_data.message, top_k=5)
-                            if ranked:
-                                top_memory = "\n".join([f"[{r['type']}] {r['text']}" for r in ranked])[:1000]
-                                # summarization: naive compression (later LLM summarizer)
-                                memory_summary = ("; ".join([r['text'] for r in ranked])[:500])
-                                persona_ctx['memory_snippets'] = top_memory
-                        except Exception:
-                            pass
-                    # Proactive signals (reminders upcoming)
-                    if MONGODB_AVAILABLE:
-                        try:
-                            db = await get_database()
-                            # Assume db.get_due_reminders(buffer_minutes) exists
-                            upcoming = await db.get_due_reminders(buffer_minutes=120)  # next 2h
-                            if upcoming:
-                                persona_ctx['upcoming_meeting'] = True
-                                first = upcoming[0]
-                                persona_ctx['meeting_time'] = 'soon'
-                        except Exception:
-                            pass
-                    # Intent cache (very simple TTL not implemented yet)
-                    cached = _intent_cache.get(cache_key)
-                    if cached and 'styled' in cached:
-                        styled = cached['styled']
-                    else:
-                        engine = BUDDYIntelligenceEngine(user_profile=persona_ctx, conversation_memory=[])
-                        styled = await engine.generate_buddy_response(message_data.message, persona_ctx)
-                        _intent_cache.set(cache_key, {"styled": styled})
-                    # persona preference style switches
-                    formality = persona_ctx.get('formality_level', 0.8)
-                    humor = persona_ctx.get('humor_subtlety', 0.0)
-                    if styled:
-                        if humor and humor > 0.5:
-                            styled += "\n(An aside: Efficiency remains paramount.)"
-                        if formality < 0.5:
-                            styled = styled.replace('Sir', persona_ctx.get('user_name','')).replace('Madam', persona_ctx.get('user_name',''))
-                    if styled and styled not in response_text:
-                        # Prepend styled persona layer and memory summary if present
-                        if memory_summary:
-                            styled = f"{styled}\n\nContext Summary: {memory_summary}"
-                        response_text = f"{styled}\n\n{response_text}"[:3500]
-                except Exception:
-                    pass
-
-        words = response_text.split()
-
-        async def generator():
-            for w in words:
-                yield w + " "
-                await asyncio.sleep(0.02)
-
-        return StreamingResponse(generator(), media_type="text/plain")
-    except HTTPException:
-        raise
+                layer = await _stream_persona_context(message_data)
+                if layer.get("styled"):
+                    await queue.put(("persona", layer))
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            pass
+        finally:
+            queue.put_nowait(("_end", None))
+
+    producers = [asyncio.create_task(produce_tokens()), asyncio.create_task(produce_persona())]
+    running = len(producers)
+    try:
+        while running:
+            try:
+                kind, data = await asyncio.wait_for(queue.get(), timeout=settings.stream_heartbeat_seconds)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    return
+                yield ": heartbeat\n\n"
+                continue
+            if kind == "_end":
+                running -= 1
+                continue
+            yield _sse(kind, data)
+        yield _sse("done", {"conversation_id": conversation_id})
+    finally:
+        # Client went away (generator closed/cancelled) or stream finished: stop all work now
+        for task in producers:
+            task.cancel()
+        await asyncio.gather(*producers, return_exceptions=True)
+
+@app.post("/chat/stream")
+async def chat_stream(request: Request, message_data: ChatMessage, credentials: HTTPAuthorizationCredentials = Depends()):
+    """Streaming chat endpoint (Server-Sent Events).
+
+    Events: ``token`` ({"text"}) as the model produces them, ``persona``
+    ({"styled", "memory_summary"}) once the persona layer is ready, ``error``,
+    and a final ``done`` ({"conversation_id"}). Comment lines are heartbeats.
+    """
+    tracer = None
+    if OTEL_AVAILABLE and trace and getattr(trace, "get_tracer_provider", None) and trace.get_tracer_provider():
+        tracer = trace.get_tracer("buddy.chat.stream")
+    span_ctx = tracer.start_as_current_span("chat_stream") if tracer else None
+    with span_ctx if span_ctx else contextlib.nullcontext():
+        return StreamingResponse(
+            _chat_event_stream(request, message_data),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
 
 class UniversalChatRequest(ChatMessage):
     device_type: str = Field("web", max_length=30)
@@ -834,7 +835,7 @@ class DeviceRegistrationRequest(BaseModel):
     platform_version: Optional[str] = None
 
 @app.post("/devices/register")
-async def register_device(payload: DeviceRegistrationRequest, credentials: HTTPAuthorizationCredentials = Depends()):
+async def register_device(payload: DeviceRegistrationRequest, request: Request, credentials: HTTPAuthorizationCredentials = Depends()):
     """Register a device for cross-platform sync"""
     if not CROSS_PLATFORM_AVAILABLE:
         raise HTTPException(status_code=501, detail="Cross-platform features not available")
@@ -843,7 +844,7 @@ async def register_device(payload: DeviceRegistrationRequest, credentials: HTTPA
         user_id = "default"
         if auth_api:
             try:
-                claims = await auth_api.auth_manager.verify_access_token(credentials.credentials)
+                claims = await principal_resolver.claims_for(request.scope, credentials.credentials)
                 if claims:
                     user_id = claims.get("sub", "default")
             except Exception:
@@ -1089,6 +1090,7 @@ class MemoryDecayRequest(BaseModel):
     user_id: Optional[str] = None
     idle_days: int = 30
     decay: float = 0.05
+    floor: Optional[float] = None  # tier down / evict from the index below this importance
 
 class UserProfileUpdate(BaseModel):
     preferences: Dict[str, Any]
@@ -1157,8 +1159,9 @@ async def decay_memory(payload: MemoryDecayRequest):
     svc = globals().get('memory_service')
     if not svc:
         raise HTTPException(status_code=501, detail="Memory service not available")
-    updated = await svc.decay_importance(user_id=payload.user_id, idle_days=payload.idle_days, decay=payload.decay)
-    return {"updated": updated}
+    updated = await svc.decay_importance(user_id=payload.user_id, idle_days=payload.idle_days, decay=payload.decay, floor=payload.floor)
+    stats = getattr(svc, 'last_decay_stats', {})
+    return {"updated": updated, "tiered_down": stats.get("tiered_down", 0), "evicted": stats.get("evicted", 0)}
 
 @app.post("/memory/purge")
 async def purge_memory(payload: MemoryPurgeRequest):
@@ -1175,6 +1178,8 @@ async def cache_stats():
     return {
         "intent": _intent_cache.stats() if hasattr(_intent_cache, 'stats') else {},
         "persona": _persona_cache.stats() if hasattr(_persona_cache, 'stats') else {},
+        "token_counts": token_memo.stats(),
+        "principals": principal_resolver.stats(),
         "persona_available": BUDDY_PERSONA_AVAILABLE
     }
 
@@ -1197,7 +1202,7 @@ async def rag_ingest(payload: RAGIngestRequest, claims: Dict = Depends(rbac_requ
     added = 0
     for doc in payload.documents:
         try:
-            semantic_index.add(doc)
+            await asyncio.to_thread(semantic_index.add, doc)
             added += 1
         except Exception as e:
             logger.error("rag_ingest_failed", error=str(e))
@@ -1206,7 +1211,7 @@ async def rag_ingest(payload: RAGIngestRequest, claims: Dict = Depends(rbac_requ
 @app.post("/rag/query")
 async def rag_query(payload: RAGQueryRequest):
     try:
-        results = semantic_index.search(payload.query, top_k=payload.top_k)
+        results = await asyncio.to_thread(semantic_index.search, payload.query, payload.top_k)
         return {"query": payload.query, "results": [{"text": t, "score": s} for t, s in results]}
     except Exception as e:
         logger.error("rag_query_failed", error=str(e))
@@ -1311,6 +1316,7 @@ async def startup_event():
             auth_manager = BuddyAuthManager(jwt_secret=settings.jwt_secret, mongo_client=client, database_name="buddy_auth")
             await auth_manager.initialize_collections()
             auth_api = BuddyAuthAPI(auth_manager=auth_manager)
+            principal_resolver.use_verifier(auth_manager.verify_access_token)
             create_auth_routes(app, auth_api)
             app.middleware("http")(BuddyAuthMiddleware(auth_api))
             logger.info("✅ Auth system initialized")
@@ -1321,9 +1327,15 @@ async def startup_event():
     registry.register(Plugin(name="core_memory"))
     registry.register(Plugin(name="semantic_index"))
 
+    # Embedding models load lazily; warm them off the startup path unless disabled
+    warmup_mode = getattr(settings, 'model_warmup', 'background')
+    if warmup_mode != "off" and hasattr(semantic_index, "warmup"):
+        semantic_index.warmup(background=warmup_mode != "blocking")
+
     # Seed semantic index with sample (later: load from DB)
-    semantic_index.add("BUDDY is your helpful AI assistant.")
-    semantic_index.add("You can set reminders and have conversations.")
+    # (in a thread: with persistence, add encodes and would wait for the warmup)
+    await asyncio.to_thread(semantic_index.add, "BUDDY is your helpful AI assistant.")
+    await asyncio.to_thread(semantic_index.add, "You can set reminders and have conversations.")
 
     # Schedule simple analytics heartbeat
     scheduler.schedule_interval("heartbeat", 300, lambda: logger.info("heartbeat", ts=datetime.utcnow().isoformat()))
@@ -1408,6 +1420,7 @@ async def unhandled_exc_handler(request: Request, exc: Exception):
 async def shutdown_event():
     """Cleanup on shutdown"""
     logger.info("🔄 Shutting down BUDDY Cloud Backend...")
+    scheduler.cancel_all()
     
     if MONGODB_AVAILABLE:
         try:
@@ -9,11 +9,10 @@ import os
 import asyncio
 import httpx
 import logging
-import time
 import hashlib
 from pathlib import Path
 from datetime import datetime, timedelta
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Dict, Any, List, Optional
 from difflib import SequenceMatcher
 from fastapi import FastAPI, HTTPException, BackgroundTasks, Depends, Header, status, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
@@ -24,6 +23,8 @@ from car.middleware.core import AutomotiveMiddlewareCore, MiddlewareConfig
 import json
 from dotenv import load_dotenv
 from fastapi import Query
+from infrastructure.security.ratelimit import RateLimiter
+from infrastructure.persistence.write_behind import PersistenceWriter, read_tail
 
 ########################
 # Early initialization  #
@@ -89,28 +90,23 @@ ENABLE_ADMIN_AUDIT = os.getenv("BUDDY_ENABLE_ADMIN_AUDIT", "1") == "1"
 AUDIT_LOG_PATH = os.getenv("BUDDY_ADMIN_AUDIT_FILE", "logs/admin_audit.log")
 RATE_STATE_FILE = os.getenv("BUDDY_RATE_LIMIT_STATE_FILE", "logs/rate_limit_state.json")
 
-# In-memory rate limit store: { (actor, route): [timestamps] }
-_RATE_BUCKET: Dict[Tuple[str, str], List[float]] = {}
+# In-memory GCRA rate limiter keyed by "actor||route"; snapshotted off the event loop
+_RATE_LIMITER = RateLimiter(RATE_LIMIT_MAX, RATE_LIMIT_WINDOW_SEC)
+RATE_SNAPSHOT_INTERVAL_SEC = float(os.getenv("BUDDY_RATE_LIMIT_SNAPSHOT_SEC", "30"))
+
+# Audit lines, memory journal records and rate snapshots go through one background writer
+_persistence = PersistenceWriter(
+    fsync_interval=float(os.getenv("BUDDY_PERSIST_FSYNC_SEC", "1.0")),
+    compact_interval=RATE_SNAPSHOT_INTERVAL_SEC,
+    compact_bytes=int(os.getenv("BUDDY_PERSIST_COMPACT_BYTES", str(1 << 20))),
+)
 
 def _load_rate_state():
     if not RATE_STATE_FILE:
         return
     try:
-        p = Path(RATE_STATE_FILE)
-        if not p.exists():
-            return
-        data = json.loads(p.read_text(encoding="utf-8"))
-        now = time.time()
-        for k, ts_list in data.items():
-            # key stored as actor||route
-            if not isinstance(ts_list, list):
-                continue
-            actor, route = k.split("||", 1)
-            # keep only those within window to avoid stale buildup
-            fresh = [t for t in ts_list if now - t < RATE_LIMIT_WINDOW_SEC]
-            if fresh:
-                _RATE_BUCKET[(actor, route)] = fresh
-        logger.info("Loaded rate limit state (%d keys)", len(_RATE_BUCKET))
+        loaded = _RATE_LIMITER.load_snapshot(RATE_STATE_FILE)
+        logger.info("Loaded rate limit state (%d keys)", loaded)
     except Exception as e:
         logger.debug(f"Rate state load failed: {e}")
 
@@ -118,11 +114,7 @@ def _save_rate_state():
     if not RATE_STATE_FILE:
         return
     try:
-        Path(RATE_STATE_FILE).parent.mkdir(parents=True, exist_ok=True)
-        serial: Dict[str, List[float]] = {}
-        for (actor, route), ts_list in _RATE_BUCKET.items():
-            serial[f"{actor}||{route}"] = ts_list
-        Path(RATE_STATE_FILE).write_text(json.dumps(serial), encoding="utf-8")
+        _RATE_LIMITER.save_snapshot(RATE_STATE_FILE)
     except Exception as e:
         logger.debug(f"Rate state save failed: {e}")
 
@@ -141,37 +133,25 @@ def _audit(event: str, actor: str, details: Dict[str, Any]):
     if not ENABLE_ADMIN_AUDIT:
         return
     try:
-        Path(AUDIT_LOG_PATH).parent.mkdir(parents=True, exist_ok=True)
         record = {
             "ts": datetime.utcnow().isoformat() + "Z",
             "event": event,
             "actor_hash": _hash_actor(actor),
             **details
         }
-        with open(AUDIT_LOG_PATH, "a", encoding="utf-8") as f:
-            f.write(json.dumps(record) + "\n")
+        _persistence.append(AUDIT_LOG_PATH, json.dumps(record))
     except Exception as e:
         logger.debug(f"Audit log write failed: {e}")
 
 def _check_rate_limit(actor: str, route: str):
-    now = time.time()
-    key = (actor, route)
-    bucket = _RATE_BUCKET.setdefault(key, [])
-    # purge old
-    cutoff = now - RATE_LIMIT_WINDOW_SEC
-    while bucket and bucket[0] < cutoff:
-        bucket.pop(0)
-    if len(bucket) >= RATE_LIMIT_MAX:
-        retry_after = int(bucket[0] + RATE_LIMIT_WINDOW_SEC - now)
+    decision = _RATE_LIMITER.acquire(f"{actor}||{route}")
+    if not decision.allowed:
         raise HTTPException(status_code=429, detail={
             "error": "rate_limited",
             "window_seconds": RATE_LIMIT_WINDOW_SEC,
             "max": RATE_LIMIT_MAX,
-            "retry_after": max(retry_after, 1)
+            "retry_after": max(int(decision.retry_after), 1)
         })
-    bucket.append(now)
-    # Persist after mutation (best-effort)
-    _save_rate_state()
 
 def debug_log_intent(intent: str, message: str | None = None):
     if DEBUG_MODE:
@@ -203,8 +183,13 @@ app.add_middleware(
 async def startup_event():
     """Initialize services on startup"""
     logger.info("🚀 Starting BUDDY 2.0 Backend...")
-    # Load persisted rate limit state
-    _load_rate_state()
+    # Load persisted rate limit state and local memory off the event loop, then
+    # start the background writer (it also snapshots rate state periodically)
+    await asyncio.to_thread(_load_rate_state)
+    await asyncio.to_thread(load_memory)
+    if RATE_STATE_FILE:
+        _persistence.add_snapshot(_save_rate_state)
+    await _persistence.start()
     
     # Initialize MongoDB
     if USE_MONGODB:
@@ -245,6 +230,9 @@ async def startup_event():
 async def shutdown_event():
     """Cleanup on shutdown"""
     logger.info("🛑 Shutting down BUDDY 2.0 Backend...")
+
+    # Drain queued audit/memory records and write the final rate limit state
+    await _persistence.stop()
     
     # Set offline status in Firebase
     if FIREBASE_AVAILABLE:
@@ -351,12 +339,11 @@ async def get_audit_logs(api_key: str = Header(None, alias="X-Admin-API-Key"), r
     try:
         if not ENABLE_ADMIN_AUDIT:
             raise HTTPException(status_code=503, detail="Audit logging disabled")
-        p = Path(AUDIT_LOG_PATH)
-        if not p.exists():
+        # Include lines still queued in the writer, then read only the tail
+        await _persistence.flush()
+        if not Path(AUDIT_LOG_PATH).exists():
             return {"entries": [], "total": 0}
-        # Read last N lines efficiently
-        with p.open("r", encoding="utf-8") as f:
-            lines = f.readlines()[-limit:]
+        lines = await asyncio.to_thread(read_tail, AUDIT_LOG_PATH, limit)
         entries = []
         for line in lines:
             line = line.strip()
@@ -420,26 +407,21 @@ async def get_db() -> Optional[BuddyDatabase]:
 conversations: Dict[str, List[Dict[str, Any]]] = {}
 server_start_time = datetime.now()
 MEMORY_FILE = os.path.join(os.path.dirname(__file__), 'user_memory.json')
-user_memory: Dict[str, Any] = {}
 
-def load_memory() -> Dict[str, Any]:
-    try:
-        if os.path.exists(MEMORY_FILE):
-            with open(MEMORY_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-    except Exception as e:
-        logger.warning(f"Failed to load memory: {e}")
+def _default_memory() -> Dict[str, Any]:
     return {"user_name": None, "preferences": {}, "frequent_intents": {}, "topics": []}
 
-def save_memory() -> None:
+# Snapshot in MEMORY_FILE plus a journal of changes (MEMORY_FILE + ".log"); loaded at startup
+_memory_doc = _persistence.document(MEMORY_FILE, _default_memory)
+user_memory: Dict[str, Any] = _memory_doc.data
+
+def load_memory() -> Dict[str, Any]:
+    """Blocking: snapshot with the journal replayed, loaded into ``user_memory``."""
     try:
-        with open(MEMORY_FILE, 'w', encoding='utf-8') as f:
-            json.dump(user_memory, f, ensure_ascii=False, indent=2)
+        return _memory_doc.load()
     except Exception as e:
-        logger.warning(f"Failed to save memory: {e}")
-
-# Initialize memory on startup
-user_memory.update(load_memory())
+        logger.warning(f"Failed to load memory: {e}")
+    return user_memory
 
 @app.get("/")
 async def root():
@@ -455,7 +437,8 @@ async def health_check(db: Optional[BuddyDatabase] = Depends(get_db)):
         "status": "healthy",
         "uptime_seconds": uptime,
         "timestamp": datetime.now().isoformat(),
-        "mongodb_enabled": USE_MONGODB
+        "mongodb_enabled": USE_MONGODB,
+        "persistence": _persistence.stats()
     }
     
     if db and db.connected:
@@ -867,8 +850,7 @@ async def update_preferences(prefs: UserPreferences, db: Optional[BuddyDatabase]
             return {"success": success, "message": "Preferences updated in database"}
         else:
             # Fallback to file storage
-            user_memory.setdefault("preferences", {}).update(prefs.preferences)
-            save_memory()
+            _memory_doc.update("preferences", prefs.preferences)
             return {"success": True, "message": "Preferences updated locally"}
             
     except Exception as e:
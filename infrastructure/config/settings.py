@@ -52,9 +52,11 @@ class Settings:
     vector_backend: str = "inmemory"  # choices: inmemory, faiss, chroma
     rag_chunk_size: int = 800
     rag_chunk_overlap: int = 80
+    model_warmup: str = "background"  # choices: background, blocking, off
 
     # Redis / persistence backends
     redis_url: Optional[str] = None
+    scheduler_lease_path: str = "data/scheduler_leases.db"  # job leases when Redis is not configured
 
     # Security / rotation
     jwt_active_kid: str = "primary"
@@ -63,6 +65,7 @@ class Settings:
     # Streaming / performance
     streaming_flush_interval_ms: int = 50
     max_stream_latency_ms: int = 2000
+    stream_heartbeat_seconds: float = 15.0  # SSE keep-alive interval for /chat/stream
 
     # Logging
     enable_log_sampling: bool = False
@@ -95,10 +98,13 @@ def get_settings() -> Settings:
     s.supported_locales = [x.strip() for x in supp.split(",") if x.strip()]
     s.max_context_tokens = int(getenv("BUDDY_MAX_CONTEXT_TOKENS", str(s.max_context_tokens)))
     s.max_response_tokens = int(getenv("BUDDY_MAX_RESPONSE_TOKENS", str(s.max_response_tokens)))
+    s.stream_heartbeat_seconds = float(getenv("BUDDY_STREAM_HEARTBEAT", str(s.stream_heartbeat_seconds)))
     s.vector_backend = getenv("BUDDY_VECTOR_BACKEND", s.vector_backend)
     s.rag_chunk_size = int(getenv("BUDDY_RAG_CHUNK_SIZE", str(s.rag_chunk_size)))
     s.rag_chunk_overlap = int(getenv("BUDDY_RAG_CHUNK_OVERLAP", str(s.rag_chunk_overlap)))
+    s.model_warmup = getenv("BUDDY_MODEL_WARMUP", s.model_warmup).lower()
     s.redis_url = os.getenv("REDIS_URL", s.redis_url)
+    s.scheduler_lease_path = getenv("BUDDY_SCHEDULER_LEASE_DB", s.scheduler_lease_path)
     s.jwt_active_kid = getenv("BUDDY_JWT_ACTIVE_KID", s.jwt_active_kid)
     s.encryption_key_version = getenv("BUDDY_ENC_KEY_VERSION", s.encryption_key_version)
     s.streaming_flush_interval_ms = int(getenv("BUDDY_STREAM_FLUSH_MS", str(s.streaming_flush_interval_ms)))
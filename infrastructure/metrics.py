@@ -1,18 +1,62 @@
 """Prometheus metrics registry."""
 from __future__ import annotations
+from typing import Dict, Iterable, Tuple
 from prometheus_client import Counter, Histogram, CollectorRegistry, generate_latest, CONTENT_TYPE_LATEST
 from fastapi import APIRouter, Response
 
+# Label value for requests that matched no route (404s, scanners); keeps
+# arbitrary URLs out of the label space.
+UNMATCHED_ROUTE = "<unmatched>"
+KNOWN_METHODS = frozenset({"GET", "POST", "PUT", "PATCH", "DELETE", "HEAD", "OPTIONS"})
+
 
 class Metrics:
     def __init__(self):
         self.registry = CollectorRegistry()
+        # "path" holds the route template (e.g. /memory/{user_id}), never the raw URL
         self.request_counter = Counter(
             "buddy_requests_total", "Total HTTP requests", ["method", "path", "status"], registry=self.registry
         )
         self.request_latency = Histogram(
             "buddy_request_latency_seconds", "Request latency", ["method", "path"], registry=self.registry
         )
+        # Bound label children; .labels() hashes and locks on every call, these are looked up once
+        self._latency_children: Dict[Tuple[str, str], object] = {}
+        self._counter_children: Dict[Tuple[str, str, str], object] = {}
+        # endpoint -> template, for routers that only leave "endpoint" in the scope
+        self.endpoint_templates: Dict[object, str] = {}
+        self.routes_bound = False
+
+    def bind_routes(self, routes: Iterable) -> None:
+        """Pre-create latency children for every (method, route template) the app serves."""
+        for route in routes:
+            template = getattr(route, "path_format", None) or getattr(route, "path", None)
+            if not template:
+                continue
+            endpoint = getattr(route, "endpoint", None)
+            if endpoint is not None:
+                self.endpoint_templates.setdefault(endpoint, template)
+            for method in getattr(route, "methods", None) or ():
+                self._latency_child(method, template)
+        self._latency_child("GET", UNMATCHED_ROUTE)
+        self.routes_bound = True
+
+    def _latency_child(self, method: str, path: str):
+        key = (method, path)
+        child = self._latency_children.get(key)
+        if child is None:
+            child = self._latency_children[key] = self.request_latency.labels(method=method, path=path)
+        return child
+
+    def observe_request(self, method: str, path: str, status: int, duration: float) -> None:
+        if method not in KNOWN_METHODS:
+            method = "OTHER"
+        self._latency_child(method, path).observe(duration)
+        key = (method, path, str(status))
+        counter = self._counter_children.get(key)
+        if counter is None:
+            counter = self._counter_children[key] = self.request_counter.labels(method=method, path=path, status=key[2])
+        counter.inc()
 
     def router(self) -> APIRouter:
         r = APIRouter()
@@ -5,8 +5,8 @@ from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.responses import JSONResponse
 from typing import Callable, Awaitable
 from .security.ratelimit import RateLimiter
-import jwt, os
-from .metrics import metrics
+from .security.principal import PrincipalResolver, principal_resolver
+from .metrics import metrics, UNMATCHED_ROUTE
 from .config.settings import settings
 
 
@@ -26,10 +26,12 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
         "guest": (max(1, int(settings.rate_limit_requests / 2)), settings.rate_limit_window_seconds)
     }
 
-    def __init__(self, app, limiter: RateLimiter, jwt_secret: str | None = None):
+    def __init__(self, app, limiter: RateLimiter, jwt_secret: str | None = None,
+                 resolver: PrincipalResolver | None = None):
         super().__init__(app)
         self.limiter = limiter
-        self.jwt_secret = jwt_secret or os.getenv("JWT_SECRET", settings.jwt_secret)
+        # Shared resolver by default, so the auth layer reuses the claims verified here
+        self.resolver = resolver or (PrincipalResolver(jwt_secret) if jwt_secret else principal_resolver)
 
     def _derive_limits(self, roles):
         # pick highest privilege first
@@ -40,19 +42,15 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
                 return self.ROLE_LIMITS[r]
         return self.ROLE_LIMITS["guest"]
 
-    def _extract_roles(self, request) -> list[str]:
-        auth = request.headers.get("Authorization")
-        if not auth or not auth.startswith("Bearer "):
-            return []
-        token = auth.split(" ", 1)[1]
-        try:
-            payload = jwt.decode(token, self.jwt_secret, algorithms=["HS256"], options={"verify_aud": False})
-            return payload.get("roles", []) or []
-        except Exception:
+    async def _extract_roles(self, request) -> list[str]:
+        # Verified at most once per request; the result is shared via scope state
+        claims = await self.resolver.resolve(request.scope)
+        if not claims:
             return []
+        return claims.get("roles", []) or []
 
     async def dispatch(self, request, call_next):
-        roles = self._extract_roles(request)
+        roles = await self._extract_roles(request)
         limit, window = self._derive_limits(roles)
         key_base = request.client.host if request.client else "anonymous"
         # differentiate per-role to avoid cross-role contention
@@ -67,16 +65,50 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
         return response
 
 
-class MetricsMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request, call_next):
-        if not settings.enable_metrics:
-            return await call_next(request)
+def route_template(scope) -> str:
+    """Template of the route the router matched (``/memory/{user_id}``), not the raw path."""
+    route = scope.get("route")
+    template = getattr(route, "path_format", None) or getattr(route, "path", None)
+    if not template:
+        template = metrics.endpoint_templates.get(scope.get("endpoint"))
+    if not template:
+        return UNMATCHED_ROUTE
+    return scope.get("root_path", "") + template
+
+
+class MetricsMiddleware:
+    """Pure ASGI request metrics.
+
+    Unlike BaseHTTPMiddleware this adds no task or body buffering per
+    request: messages pass straight through, only the status code is read
+    off ``http.response.start``. Latency is recorded when the app returns,
+    labelled by the matched route template (the router stores the route in
+    the shared scope), so label cardinality is bounded by the route table.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.enable_metrics:
+            await self.app(scope, receive, send)
+            return
         start = time.perf_counter()
-        response = await call_next(request)
-        duration = time.perf_counter() - start
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
         try:
-            metrics.request_counter.labels(method=request.method, path=request.url.path, status=str(response.status_code)).inc()
-            metrics.request_latency.labels(method=request.method, path=request.url.path).observe(duration)
-        except Exception:
-            pass
-        return response
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = time.perf_counter() - start
+            try:
+                if not metrics.routes_bound and "app" in scope:
+                    metrics.bind_routes(getattr(scope["app"], "routes", ()))
+                metrics.observe_request(scope["method"], route_template(scope), status_code, duration)
+            except Exception:
+                pass
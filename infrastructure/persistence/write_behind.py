@@ -0,0 +1,298 @@
+"""Write-behind persistence for request-path state.
+
+Request handlers enqueue pre-serialized records and return; a single
+background task drains the queue in batches and does all file I/O on the
+default executor:
+
+ - append-only logs (``append``): JSON lines written through a handle kept
+   open for the process lifetime, flushed per batch and fsynced at most
+   every ``fsync_interval`` seconds (0 = every batch).
+ - journaled documents (``document``): each mutation is a small record
+   appended to ``<path>.log``; loading replays the journal over the last
+   snapshot, and compaction folds the journal into a fresh snapshot once it
+   grows past ``compact_bytes``, so a write costs the same however large
+   the document is.
+ - snapshot hooks (``add_snapshot``): callables run every
+   ``compact_interval`` seconds and on shutdown (e.g. rate limiter state).
+
+A crash loses at most the records written since the last fsync. Journal
+operations are idempotent, so replaying records that were already folded
+into a snapshot is harmless, and a torn final line is skipped on replay.
+"""
+from __future__ import annotations
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import IO, Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def apply_op(doc: Dict[str, Any], op: Dict[str, Any]) -> None:
+    kind = op.get("op")
+    key = op.get("key")
+    if kind == "set":
+        doc[key] = op.get("value")
+    elif kind == "update":
+        target = doc.get(key)
+        if not isinstance(target, dict):
+            target = doc[key] = {}
+        target.update(op.get("value") or {})
+    elif kind == "delete":
+        doc.pop(key, None)
+
+
+def _atomic_write_json(path: str, data: Any) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def read_tail(path: str, limit: int, block_size: int = 65536) -> List[str]:
+    """Last ``limit`` non-empty lines of ``path``, reading backwards from the end."""
+    if limit <= 0 or not os.path.exists(path):
+        return []
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        buf = b""
+        while pos > 0 and buf.count(b"\n") <= limit:
+            step = min(block_size, pos)
+            pos -= step
+            f.seek(pos)
+            buf = f.read(step) + buf
+    lines = [line for line in buf.decode("utf-8", errors="replace").splitlines() if line.strip()]
+    return lines[-limit:]
+
+
+class JournaledDocument:
+    """JSON document persisted as a snapshot plus an append-only journal."""
+
+    def __init__(self, writer: "PersistenceWriter", path: str, default: Callable[[], Dict[str, Any]]):
+        self.writer = writer
+        self.path = path
+        self.journal_path = f"{path}.log"
+        self.default = default
+        self.data: Dict[str, Any] = default()
+
+    def read(self) -> Tuple[Dict[str, Any], int]:
+        """Snapshot with the journal replayed over it, and the number of records replayed."""
+        data = self.default()
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                loaded = json.load(f)
+            if isinstance(loaded, dict):
+                data = loaded
+        replayed = 0
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        op = json.loads(line)
+                    except ValueError:
+                        continue  # torn tail after a crash
+                    apply_op(data, op)
+                    replayed += 1
+        return data, replayed
+
+    def load(self) -> Dict[str, Any]:
+        """Blocking; replaces ``data`` in place so existing references stay valid."""
+        data, _ = self.read()
+        self.data.clear()
+        self.data.update(data)
+        return self.data
+
+    def compact(self) -> int:
+        """Fold the journal into a new snapshot and truncate it (writer thread only)."""
+        data, replayed = self.read()
+        _atomic_write_json(self.path, data)
+        if os.path.exists(self.journal_path):
+            os.truncate(self.journal_path, 0)
+        return replayed
+
+    def journal_size(self) -> int:
+        try:
+            return os.path.getsize(self.journal_path)
+        except OSError:
+            return 0
+
+    def _record(self, op: Dict[str, Any]) -> None:
+        self.writer.append(self.journal_path, json.dumps(op, ensure_ascii=False))
+
+    def set(self, key: str, value: Any) -> None:
+        self.data[key] = value
+        self._record({"op": "set", "key": key, "value": value})
+
+    def update(self, key: str, values: Dict[str, Any]) -> None:
+        target = self.data.get(key)
+        if not isinstance(target, dict):
+            target = self.data[key] = {}
+        target.update(values)
+        self._record({"op": "update", "key": key, "value": values})
+
+    def delete(self, key: str) -> None:
+        self.data.pop(key, None)
+        self._record({"op": "delete", "key": key})
+
+
+class PersistenceWriter:
+    def __init__(self, *, fsync_interval: float = 1.0, compact_interval: float = 30.0,
+                 compact_bytes: int = 1 << 20, max_batch: int = 1024):
+        self.fsync_interval = fsync_interval
+        self.compact_interval = compact_interval
+        self.compact_bytes = compact_bytes
+        self.max_batch = max_batch
+        self._queue: "asyncio.Queue[Tuple[Optional[str], Any]]" = asyncio.Queue()
+        self._handles: Dict[str, IO[str]] = {}
+        self._unsynced: set = set()
+        self._documents: List[JournaledDocument] = []
+        self._snapshots: List[Callable[[], Any]] = []
+        self._task: Optional[asyncio.Task] = None
+        self._last_fsync = time.monotonic()
+        self._next_compact = time.monotonic() + compact_interval
+        self.stats_counters = {"records": 0, "batches": 0, "fsyncs": 0, "compactions": 0, "errors": 0}
+
+    def append(self, path: str, line: str) -> None:
+        """Queue one line for ``path``; never blocks."""
+        self._queue.put_nowait((path, line))
+
+    def document(self, path: str, default: Callable[[], Dict[str, Any]]) -> JournaledDocument:
+        doc = JournaledDocument(self, path, default)
+        self._documents.append(doc)
+        return doc
+
+    def add_snapshot(self, fn: Callable[[], Any]) -> None:
+        self._snapshots.append(fn)
+
+    async def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def flush(self) -> None:
+        """Wait until everything queued so far is written and fsynced."""
+        if self._task is None or self._task.done():
+            batch = self._drain([])
+            await asyncio.get_running_loop().run_in_executor(None, self._write_batch, batch, True)
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((None, waiter))
+        await waiter
+
+    async def stop(self) -> None:
+        """Drain the queue, run a final compaction and snapshot, and close all files."""
+        if self._task is not None and not self._task.done():
+            await self.flush()
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        batch = self._drain([])
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._write_batch, batch, True)
+        await loop.run_in_executor(None, self._compact, True)
+        await loop.run_in_executor(None, self._close)
+
+    def _drain(self, batch: List[Tuple[Optional[str], Any]]) -> List[Tuple[Optional[str], Any]]:
+        while len(batch) < self.max_batch and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            now = time.monotonic()
+            deadline = self._next_compact
+            if self._unsynced:
+                deadline = min(deadline, self._last_fsync + self.fsync_interval)
+            try:
+                first = await asyncio.wait_for(self._queue.get(), timeout=max(0.0, deadline - now))
+                batch = self._drain([first])
+            except asyncio.TimeoutError:
+                batch = []
+            waiters = [w for path, w in batch if path is None]
+            records = [(path, line) for path, line in batch if path is not None]
+            try:
+                await loop.run_in_executor(None, self._write_batch, records, bool(waiters))
+            except Exception as e:
+                self.stats_counters["errors"] += 1
+                logger.warning(f"Write-behind batch failed: {e}")
+            for w in waiters:
+                if not w.done():
+                    w.set_result(None)
+            if time.monotonic() >= self._next_compact:
+                try:
+                    await loop.run_in_executor(None, self._compact, False)
+                except Exception as e:
+                    self.stats_counters["errors"] += 1
+                    logger.warning(f"Write-behind compaction failed: {e}")
+                self._next_compact = time.monotonic() + self.compact_interval
+
+    def _handle(self, path: str) -> IO[str]:
+        fh = self._handles.get(path)
+        if fh is None:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            fh = self._handles[path] = open(path, "a", encoding="utf-8")
+        return fh
+
+    def _write_batch(self, records: List[Tuple[Optional[str], Any]], force_fsync: bool = False) -> None:
+        groups: Dict[str, List[str]] = {}
+        for path, line in records:
+            if path is not None:
+                groups.setdefault(path, []).append(line)
+        for path, lines in groups.items():
+            fh = self._handle(path)
+            fh.write("\n".join(lines) + "\n")
+            fh.flush()
+            self._unsynced.add(path)
+            self.stats_counters["records"] += len(lines)
+        if groups:
+            self.stats_counters["batches"] += 1
+        if self._unsynced and (force_fsync or time.monotonic() - self._last_fsync >= self.fsync_interval):
+            self._fsync()
+
+    def _fsync(self) -> None:
+        for path in list(self._unsynced):
+            fh = self._handles.get(path)
+            if fh is not None:
+                os.fsync(fh.fileno())
+        self._unsynced.clear()
+        self._last_fsync = time.monotonic()
+        self.stats_counters["fsyncs"] += 1
+
+    def _compact(self, force: bool = False) -> None:
+        # Journal handles are O_APPEND, so they keep writing correctly after truncation
+        for doc in self._documents:
+            size = doc.journal_size()
+            if size and (force or size >= self.compact_bytes):
+                self._fsync()
+                doc.compact()
+                self.stats_counters["compactions"] += 1
+        for fn in self._snapshots:
+            try:
+                fn()
+            except Exception as e:
+                self.stats_counters["errors"] += 1
+                logger.debug(f"Snapshot hook failed: {e}")
+
+    def _close(self) -> None:
+        if self._unsynced:
+            self._fsync()
+        for fh in self._handles.values():
+            fh.close()
+        self._handles.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.stats_counters, "queued": self._queue.qsize(),
+                "journal_bytes": sum(doc.journal_size() for doc in self._documents)}
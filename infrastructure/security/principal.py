@@ -0,0 +1,86 @@
+"""Request-scoped principal resolution.
+
+A bearer token is verified at most once per request: whoever resolves it
+first (auth middleware, rate limiter or an endpoint dependency) stores the
+claims in the ASGI scope state, and every later caller in the same request
+reuses them. Across requests, verified claims are kept in the auth
+package's ``VerifiedTokenCache`` (keyed by token digest, bounded by
+``exp``), so repeated tokens skip the signature check until they expire.
+
+When the auth system is up, ``use_verifier`` hands verification to
+``BuddyAuthManager.verify_access_token`` (key rotation, audience and
+revocation checks, with its own verified-token cache); otherwise tokens are
+decoded locally with the shared HS256 secret.
+"""
+from __future__ import annotations
+import os
+from typing import Awaitable, Callable, Dict, Optional
+
+import jwt
+
+# STATE_* are the keys in scope["state"] (what request.state reads and writes)
+from packages.core.buddy.auth.token_cache import STATE_PRINCIPAL, STATE_TOKEN, VerifiedTokenCache  # type: ignore
+from ..config.settings import settings
+
+Verifier = Callable[[str], Awaitable[Optional[Dict]]]
+
+
+def bearer_token(scope) -> Optional[str]:
+    for name, value in scope.get("headers") or ():
+        if name == b"authorization":
+            auth = value.decode("latin-1")
+            if auth.startswith("Bearer "):
+                return auth[7:].strip() or None
+            return None
+    return None
+
+
+class PrincipalResolver:
+    def __init__(self, jwt_secret: str, maxsize: int = 4096):
+        self.jwt_secret = jwt_secret
+        self.maxsize = maxsize
+        self.verifier: Optional[Verifier] = None
+        self._verified = VerifiedTokenCache(maxsize)
+
+    def use_verifier(self, verifier: Optional[Verifier]):
+        """Delegate verification (e.g. to the auth manager); drops locally cached claims."""
+        self.verifier = verifier
+        self._verified.clear()
+
+    async def resolve(self, scope) -> Optional[Dict]:
+        """Claims for the request's bearer token (None if absent or invalid), verified once per request."""
+        state = scope.setdefault("state", {})
+        if STATE_PRINCIPAL in state:
+            return state[STATE_PRINCIPAL]
+        token = bearer_token(scope)
+        claims = await self.verify(token) if token else None
+        state[STATE_PRINCIPAL] = claims
+        state[STATE_TOKEN] = token
+        return claims
+
+    async def claims_for(self, scope, token: str) -> Optional[Dict]:
+        """Claims for ``token``, reusing the request principal when it was resolved from the same token."""
+        state = scope.setdefault("state", {})
+        if STATE_PRINCIPAL in state and state.get(STATE_TOKEN) == token:
+            return state[STATE_PRINCIPAL]
+        return await self.verify(token)
+
+    async def verify(self, token: str) -> Optional[Dict]:
+        if self.verifier is not None:
+            return await self.verifier(token)
+        digest = VerifiedTokenCache.digest(token)
+        claims = self._verified.get(digest)
+        if claims is not None:
+            return claims
+        try:
+            claims = jwt.decode(token, self.jwt_secret, algorithms=["HS256"], options={"verify_aud": False})
+        except Exception:
+            return None
+        self._verified.put(digest, claims)
+        return claims
+
+    def stats(self) -> Dict[str, float]:
+        return {**self._verified.stats(), "delegated": self.verifier is not None}
+
+
+principal_resolver = PrincipalResolver(os.getenv("JWT_SECRET", settings.jwt_secret))
@@ -1,37 +1,214 @@
-"""Simple in-memory rate limiter (Phase 1)."""
+"""Rate limiting (GCRA token bucket, in-memory or Redis).
+
+Every limiter stores a single "theoretical arrival time" (TAT) per key, the
+Generic Cell Rate Algorithm form of a token bucket: ``limit`` requests may
+burst at once and capacity refills continuously at ``limit / window``.
+Checks are O(1) regardless of traffic volume.
+
+Backends:
+ - ``RateLimiter``: lock-striped in-memory shards with idle-key eviction and
+   snapshot/restore so state can be persisted off the event loop.
+ - ``RedisRateLimiter``: atomic Lua implementation of the same algorithm,
+   shared across workers; falls back to the in-memory shards if Redis errors.
+   Any client exposing ``eval`` works, so a local stand-in (e.g. fakeredis)
+   can be injected for testing.
+"""
 from __future__ import annotations
+import asyncio
+import json
+import logging
+import math
+import os
+import threading
 import time
-from collections import deque
-from typing import Deque, Dict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
 
+logger = logging.getLogger(__name__)
 
-class RateLimiter:
-    """Simple in-memory sliding window counter with optional per-call overrides.
 
-    NOTE: In production replace with Redis + Lua script for atomicity across workers.
-    """
+@dataclass
+class RateLimitDecision:
+    allowed: bool
+    remaining: int
+    limit: int
+    retry_after: float = 0.0
+
+
+class RateLimiter:
+    """In-memory GCRA limiter with per-call limit/window overrides."""
 
-    def __init__(self, limit: int, window_seconds: int):
+    def __init__(self, limit: int, window_seconds: int, *, shards: int = 16, sweep_every: int = 1024):
         self.default_limit = limit
         self.default_window = window_seconds
-        self.store: Dict[str, Deque[float]] = {}
+        self._shards: List[Dict[str, float]] = [{} for _ in range(max(1, shards))]
+        self._locks = [threading.Lock() for _ in self._shards]
+        self._sweep_every = sweep_every
+        self._ops = 0
+        self._next_sweep = 0
+        self._dirty = False
 
-    def _prune(self, q: Deque[float], now: float, window: int):
-        while q and now - q[0] > window:
-            q.popleft()
+    def _index(self, key: str) -> int:
+        return hash(key) % len(self._shards)
+
+    def acquire(self, key: str, *, limit: int | None = None, window: int | None = None,
+                now: float | None = None) -> RateLimitDecision:
+        """Record a hit for ``key`` if capacity allows and report the outcome."""
+        applied_limit = limit or self.default_limit
+        applied_window = window or self.default_window
+        now = time.time() if now is None else now
+        interval = applied_window / applied_limit
+        idx = self._index(key)
+        with self._locks[idx]:
+            shard = self._shards[idx]
+            tat = max(shard.get(key, now), now)
+            new_tat = tat + interval
+            allow_at = new_tat - applied_window
+            if allow_at > now:
+                return RateLimitDecision(False, 0, applied_limit, allow_at - now)
+            shard[key] = new_tat
+            self._dirty = True
+        remaining = int(math.floor((applied_window - (new_tat - now)) / interval + 1e-9))
+        self._ops += 1
+        if self._ops % self._sweep_every == 0:
+            self._sweep_shard(self._next_sweep, now)
+            self._next_sweep = (self._next_sweep + 1) % len(self._shards)
+        return RateLimitDecision(True, max(0, remaining), applied_limit)
 
     def check(self, key: str, *, limit: int | None = None, window: int | None = None) -> tuple[bool, int, int]:
         """Check & record a hit.
 
         Returns (allowed, remaining, applied_limit)
         """
+        decision = self.acquire(key, limit=limit, window=window)
+        return decision.allowed, decision.remaining, decision.limit
+
+    def _sweep_shard(self, idx: int, now: float) -> int:
+        # A key whose TAT is in the past has a full bucket: identical to absent
+        with self._locks[idx]:
+            shard = self._shards[idx]
+            idle = [k for k, tat in shard.items() if tat <= now]
+            for k in idle:
+                del shard[k]
+        return len(idle)
+
+    def evict_idle(self, now: float | None = None) -> int:
+        """Drop every key whose bucket has fully refilled."""
+        now = time.time() if now is None else now
+        return sum(self._sweep_shard(i, now) for i in range(len(self._shards)))
+
+    def snapshot(self) -> Dict[str, float]:
+        data: Dict[str, float] = {}
+        for lock, shard in zip(self._locks, self._shards):
+            with lock:
+                data.update(shard)
+        return data
+
+    def restore(self, data: Dict[str, Any], now: float | None = None) -> int:
+        """Load a snapshot; legacy timestamp lists are converted to an equivalent TAT."""
+        now = time.time() if now is None else now
+        interval = self.default_window / self.default_limit
+        loaded = 0
+        for key, value in data.items():
+            if isinstance(value, list):
+                # Replay the recorded hits through GCRA
+                tat = 0.0
+                for t in sorted(value):
+                    tat = max(tat, float(t)) + interval
+            else:
+                tat = float(value)
+            if tat <= now:
+                continue
+            idx = self._index(key)
+            with self._locks[idx]:
+                self._shards[idx][key] = tat
+            loaded += 1
+        return loaded
+
+    def save_snapshot(self, path: str) -> bool:
+        """Atomically write the current state to ``path``; skipped when unchanged."""
+        if not self._dirty:
+            return False
+        self._dirty = False
+        data = self.snapshot()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+        return True
+
+    def load_snapshot(self, path: str) -> int:
+        if not os.path.exists(path):
+            return 0
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return self.restore(data) if isinstance(data, dict) else 0
+
+    async def snapshot_periodically(self, path: str, interval: float = 30.0):
+        """Persist state every ``interval`` seconds on the default executor."""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await loop.run_in_executor(None, self.save_snapshot, path)
+            except Exception as e:
+                logger.debug(f"Rate limit snapshot failed: {e}")
+
+    def __len__(self):
+        return sum(len(s) for s in self._shards)
+
+
+class RedisRateLimiter(RateLimiter):
+    """GCRA limiter evaluated atomically in Redis, shared by all workers."""
+
+    SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local interval = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then tat = now end
+local new_tat = tat + interval
+local allow_at = new_tat - window
+if allow_at > now then
+  return {0, 0, allow_at - now}
+end
+redis.call('SET', KEYS[1], new_tat, 'PX', math.ceil(new_tat - now))
+return {1, math.floor((window - (new_tat - now)) / interval), 0}
+"""
+
+    def __init__(self, client, limit: int, window_seconds: int, *, prefix: str = "rl", **kwargs):
+        super().__init__(limit, window_seconds, **kwargs)
+        self.client = client
+        self.prefix = prefix
+
+    def acquire(self, key: str, *, limit: int | None = None, window: int | None = None,
+                now: float | None = None) -> RateLimitDecision:
         applied_limit = limit or self.default_limit
         applied_window = window or self.default_window
-        now = time.time()
-        q = self.store.setdefault(key, deque())
-        self._prune(q, now, applied_window)
-        if len(q) >= applied_limit:
-            return False, 0, applied_limit
-        q.append(now)
-        remaining = applied_limit - len(q)
-        return True, remaining, applied_limit
+        window_ms = int(applied_window * 1000)
+        interval_ms = max(1, window_ms // applied_limit)
+        try:
+            allowed, remaining, retry_ms = self.client.eval(
+                self.SCRIPT, 1, f"{self.prefix}:{key}", interval_ms, window_ms
+            )
+        except Exception as e:
+            logger.warning(f"Redis rate limit fallback: {e}")
+            return super().acquire(key, limit=applied_limit, window=applied_window, now=now)
+        return RateLimitDecision(bool(int(allowed)), max(0, int(remaining)), applied_limit, int(retry_ms) / 1000.0)
+
+
+def create_rate_limiter(limit: int, window_seconds: int, redis_url: Optional[str] = None,
+                        prefix: str = "rl") -> RateLimiter:
+    """Build a Redis-backed limiter when ``redis_url`` is usable, else in-memory."""
+    if redis_url:
+        try:
+            import redis  # type: ignore
+            client = redis.Redis.from_url(str(redis_url))
+            return RedisRateLimiter(client, limit, window_seconds, prefix=prefix)
+        except Exception as e:
+            logger.warning(f"Redis rate limiter unavailable, using in-memory: {e}")
+    return RateLimiter(limit, window_seconds)
@@ -0,0 +1,131 @@
+"""Token counting and context-window budgeting.
+
+Encoders are resolved once per model and shared process-wide. History
+messages counted by ``trim_messages_token_budget`` are memoized by content
+digest, so a conversation that is re-trimmed on every request only pays for
+messages it has not seen before; one-off texts (``count_tokens``) are
+encoded directly and never enter the memo.
+"""
+from __future__ import annotations
+import hashlib
+import sys
+import threading
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+try:
+    import tiktoken  # type: ignore
+    TIKTOKEN_AVAILABLE = True
+except Exception:
+    TIKTOKEN_AVAILABLE = False
+
+DEFAULT_MODEL = "gpt-3.5-turbo"
+
+
+@lru_cache(maxsize=None)
+def get_encoder(model: str = DEFAULT_MODEL):
+    """Shared tiktoken encoding for ``model``; None when unavailable (word estimate is used)."""
+    if not TIKTOKEN_AVAILABLE:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except Exception:
+        return None
+
+
+def _digest(text: str) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+
+# Approximate cost of one memo entry: digest key, int value, and the dict entry
+# (hash, key and value pointers) with the table's spare capacity
+_ENTRY_BYTES = sys.getsizeof(_digest("")) + sys.getsizeof(1 << 20) + 36
+
+
+class TokenCountMemo:
+    """Content digest -> token count memo bounded by bytes, one table per model.
+
+    Keys are 16-byte blake2b digests, so the memo never holds message text
+    and each entry costs the same ``_ENTRY_BYTES`` whatever the message
+    length. Two generations instead of an LRU list, so a hit is a plain dict
+    lookup: when the young generation reaches half of ``max_bytes`` it
+    becomes the old one and the previous old generation is dropped. Entries
+    still in use get promoted back to young on their next hit.
+    """
+
+    def __init__(self, max_bytes: int = 4 << 20):
+        self.max_bytes = max_bytes
+        self._generation_size = max(1, max_bytes // 2 // _ENTRY_BYTES)
+        self._models: Dict[str, List[Dict[bytes, int]]] = {}  # model -> [young, old]
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def count(self, text: str, model: str = DEFAULT_MODEL) -> int:
+        gens = self._models.get(model)
+        if gens is None:
+            gens = self._models.setdefault(model, [{}, {}])
+        key = _digest(text)
+        n = gens[0].get(key)
+        if n is not None:
+            self.hits += 1
+            return n
+        n = gens[1].get(key)
+        if n is None:
+            self.misses += 1
+            n = _encode_count(text, model)
+        else:
+            self.hits += 1
+        with self._lock:
+            if len(gens[0]) >= self._generation_size:
+                gens[1], gens[0] = gens[0], {}
+            gens[0][key] = n
+        return n
+
+    def clear(self) -> None:
+        with self._lock:
+            self._models = {}
+
+    def stats(self) -> Dict[str, int]:
+        size = sum(len(young) + len(old) for young, old in self._models.values())
+        return {"hits": self.hits, "misses": self.misses, "size": size, "bytes": size * _ENTRY_BYTES}
+
+
+def _encode_count(text: str, model: str) -> int:
+    enc = get_encoder(model)
+    if enc is not None:
+        try:
+            return len(enc.encode(text))
+        except Exception:
+            pass
+    # fallback word-based estimate
+    return max(1, len(text.split()))
+
+
+token_memo = TokenCountMemo()
+
+
+def count_tokens(text: str, model: str = DEFAULT_MODEL) -> int:
+    """Token count of a one-off text (not memoized; history goes through ``token_memo``)."""
+    return _encode_count(text, model)
+
+
+def trim_messages_token_budget(messages: List[Dict[str, str]], budget: int, model: str = DEFAULT_MODEL,
+                               memo: Optional[TokenCountMemo] = None) -> List[Dict[str, str]]:
+    """Longest suffix of ``messages`` (most recent) whose token total fits ``budget``.
+
+    One backward pass over the running suffix sum; it stops at the cut
+    point, so only the kept messages (plus one) are ever counted, and those
+    counts come from the memo after the first call.
+    """
+    if not messages:
+        return messages
+    count = (memo or token_memo).count
+    total = 0
+    keep = 0
+    for msg in reversed(messages):
+        total += count(msg.get("content", ""), model)
+        if total > budget:
+            break
+        keep += 1
+    return messages[len(messages) - keep:]
@@ -1,55 +1,328 @@
-"""Background job scheduler stub.
+"""Background job scheduler.
 
-Phase 1: simple asyncio periodic tasks.
-Later: integrate APScheduler / Celery for distributed scheduling.
+All jobs share one asyncio timer: a min-heap of (fire time, job) entries,
+so registering thousands of jobs costs heap entries rather than sleeping
+tasks. Interval jobs fire on wall-clock slots aligned to their period
+(``ceil(now / interval) * interval``), which every worker computes the
+same way; before running a slot a worker takes a lease named
+``<job>@<slot>`` from the lease store, so a slot runs once across all
+workers sharing the store:
+
+ - ``SQLiteLeaseStore``: lock table in a local SQLite file (all workers on
+   one host).
+ - ``RedisLeaseStore``: ``SET NX PX`` (a whole fleet); falls back to the
+   local store if Redis errors.
+
+Per job: ``jitter`` (random delay added to each fire time, to spread a
+fleet's load), ``catch_up`` policy for slots missed while the loop was
+late ("coalesce" runs once, "all" runs every missed slot, "skip" drops
+runs later than ``misfire_grace``), ``max_instances`` concurrent runs and
+a ``timeout`` for coroutine jobs.
 """
 from __future__ import annotations
-import asyncio, logging
-from datetime import datetime
-from typing import Callable, Dict
+import asyncio, heapq, itertools, logging, math, os, random, socket, sqlite3, threading, time, uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 
 logger = logging.getLogger(__name__)
 
+CATCH_UP_POLICIES = ("coalesce", "all", "skip")
+MAX_CATCH_UP_RUNS = 100
+
+
+class SQLiteLeaseStore:
+    """Lease table shared by every process that opens the same file."""
+
+    blocking = True
+
+    def __init__(self, path: str, prune_every: int = 256):
+        self.path = path
+        self.prune_every = prune_every
+        self._acquired = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS job_leases (name TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+
+    def acquire(self, name: str, owner: str, ttl: float) -> bool:
+        now = time.time()
+        with self._lock:
+            # Upsert only over an expired (or our own) lease; rowcount says whether we hold it
+            cur = self._conn.execute(
+                "INSERT INTO job_leases (name, owner, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+                "WHERE job_leases.expires_at <= ? OR job_leases.owner = excluded.owner",
+                (name, owner, now + ttl, now),
+            )
+            acquired = cur.rowcount == 1
+            self._acquired += 1
+            if self._acquired % self.prune_every == 0:
+                self._conn.execute("DELETE FROM job_leases WHERE expires_at <= ?", (now,))
+        return acquired
+
+    def release(self, name: str, owner: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM job_leases WHERE name = ? AND owner = ?", (name, owner))
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class RedisLeaseStore:
+    """``SET NX PX`` leases; any client exposing ``set``/``eval`` works."""
+
+    blocking = True
+    RELEASE_SCRIPT = "if redis.call('GET', KEYS[1]) == ARGV[1] then return redis.call('DEL', KEYS[1]) end return 0"
+
+    def __init__(self, client, prefix: str = "jobs:lease", fallback: Optional[SQLiteLeaseStore] = None):
+        self.client = client
+        self.prefix = prefix
+        self.fallback = fallback
+
+    def acquire(self, name: str, owner: str, ttl: float) -> bool:
+        try:
+            return bool(self.client.set(f"{self.prefix}:{name}", owner, nx=True, px=max(1, int(ttl * 1000))))
+        except Exception as e:
+            if self.fallback is None:
+                raise
+            logger.warning(f"Redis lease fallback: {e}")
+            return self.fallback.acquire(name, owner, ttl)
+
+    def release(self, name: str, owner: str) -> None:
+        try:
+            self.client.eval(self.RELEASE_SCRIPT, 1, f"{self.prefix}:{name}", owner)
+        except Exception as e:
+            if self.fallback is not None:
+                self.fallback.release(name, owner)
+            else:
+                logger.debug(f"Redis lease release failed: {e}")
+
+
+def create_lease_store(redis_url: Optional[str] = None, sqlite_path: str = "data/scheduler_leases.db"):
+    """Redis-backed leases when ``redis_url`` is usable, else the local SQLite lock table."""
+    local = SQLiteLeaseStore(sqlite_path)
+    if redis_url:
+        try:
+            import redis  # type: ignore
+            return RedisLeaseStore(redis.Redis.from_url(str(redis_url)), fallback=local)
+        except Exception as e:
+            logger.warning(f"Redis lease store unavailable, using SQLite: {e}")
+    return local
+
+
+@dataclass
+class Job:
+    name: str
+    func: Callable
+    interval: Optional[float] = None  # None for one-shot schedule_at jobs
+    one_shot: bool = False
+    jitter: float = 0.0
+    catch_up: str = "coalesce"
+    misfire_grace: float = 60.0
+    max_instances: int = 1
+    timeout: Optional[float] = None
+    distributed: bool = True
+    next_run: float = 0.0  # slot time (epoch seconds), before jitter
+    running: int = 0
+    counts: Dict[str, int] = field(default_factory=lambda: dict.fromkeys(
+        ("runs", "failures", "timeouts", "skipped_busy", "skipped_lease", "missed"), 0))
+
+    def lease_ttl(self) -> float:
+        # Slot leases are never released early, so a late worker can't rerun the slot
+        return max(self.interval or 0.0, self.timeout or 0.0, 60.0)
+
 
 class SimpleScheduler:
-    def __init__(self):
-        self._tasks: Dict[str, asyncio.Task] = {}
+    def __init__(self, lease_store=None, owner: Optional[str] = None):
+        self.lease_store = lease_store
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._jobs: Dict[str, Job] = {}
+        self._heap: List[Tuple[float, int, str, float]] = []  # (fire_at, seq, name, slot)
+        self._seq = itertools.count()
+        self._runner: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._running: Set[asyncio.Task] = set()
+        self._store_lock = asyncio.Lock()
 
-    def schedule_interval(self, name: str, seconds: int, func: Callable, one_shot: bool = False):
-        async def runner():
-            await asyncio.sleep(1)
-            while True:
-                try:
-                    await asyncio.sleep(seconds)
-                    res = func()
-                    if asyncio.iscoroutine(res):
-                        await res
-                    if one_shot:
-                        break
-                except Exception as e:
-                    logger.error(f"Scheduled task {name} failed: {e}")
-        if name not in self._tasks:
-            self._tasks[name] = asyncio.create_task(runner())
-
-    def schedule_at(self, name: str, run_at, func: Callable):
+    # ---- registration -------------------------------------------------
+    def schedule_interval(self, name: str, seconds: int, func: Callable, one_shot: bool = False, *,
+                          jitter: float = 0.0, catch_up: str = "coalesce", misfire_grace: float = 60.0,
+                          max_instances: int = 1, timeout: Optional[float] = None, distributed: bool = True):
+        if name in self._jobs:
+            return
+        if catch_up not in CATCH_UP_POLICIES:
+            raise ValueError(f"catch_up must be one of {CATCH_UP_POLICIES}")
+        interval = float(seconds)
+        now = time.time()
+        job = Job(name=name, func=func, interval=interval, one_shot=one_shot, jitter=jitter, catch_up=catch_up,
+                  misfire_grace=misfire_grace, max_instances=max(1, max_instances), timeout=timeout,
+                  distributed=distributed)
+        # Aligned to the interval grid so every worker agrees on slot ids
+        first = now + interval if one_shot else now + 1
+        job.next_run = math.ceil(first / interval) * interval
+        self._add(job)
+
+    def schedule_at(self, name: str, run_at, func: Callable, *, timeout: Optional[float] = None,
+                    catch_up: str = "coalesce", misfire_grace: float = 60.0, distributed: bool = True):
         """Schedule a one-shot task to run at a specific datetime (UTC)."""
-        if name in self._tasks:
+        if name in self._jobs:
+            return
+        if catch_up not in CATCH_UP_POLICIES:
+            raise ValueError(f"catch_up must be one of {CATCH_UP_POLICIES}")
+        if run_at.tzinfo is None:
+            run_at = run_at.replace(tzinfo=timezone.utc)
+        job = Job(name=name, func=func, one_shot=True, catch_up=catch_up, misfire_grace=misfire_grace,
+                  timeout=timeout, distributed=distributed)
+        job.next_run = run_at.timestamp()
+        self._add(job)
+
+    def cancel(self, name: str) -> bool:
+        # Heap entries of a removed job are skipped when popped
+        return self._jobs.pop(name, None) is not None
+
+    def cancel_all(self):
+        self._jobs.clear()
+        self._heap.clear()
+        if self._runner is not None:
+            self._runner.cancel()
+            self._runner = None
+        for t in list(self._running):
+            t.cancel()
+
+    def _add(self, job: Job):
+        self._jobs[job.name] = job
+        self._push(job)
+        self._ensure_running()
+
+    def _push(self, job: Job):
+        fire_at = job.next_run + (random.uniform(0, job.jitter) if job.jitter > 0 else 0.0)
+        heapq.heappush(self._heap, (fire_at, next(self._seq), job.name, job.next_run))
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _ensure_running(self):
+        if self._runner is not None and not self._runner.done():
             return
-        async def runner():
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return  # started by the first registration made inside the event loop
+        self._runner = asyncio.create_task(self._run())
+
+    # ---- timer loop ---------------------------------------------------
+    async def _run(self):
+        self._wakeup = asyncio.Event()
+        while True:
+            try:
+                now = time.time()
+                for job, slots in self._pop_due(now):
+                    task = asyncio.create_task(self._execute(job, slots))
+                    self._running.add(task)
+                    task.add_done_callback(self._running.discard)
+                # Clear before peeking so a job added meanwhile still wakes us
+                self._wakeup.clear()
+                timeout = None if not self._heap else max(0.0, self._heap[0][0] - time.time())
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Scheduler loop error: {e}")
+                await asyncio.sleep(1)
+
+    def _pop_due(self, now: float) -> List[Tuple[Job, List[float]]]:
+        """Pop every due heap entry, reschedule interval jobs and apply the catch-up policy."""
+        due: List[Tuple[Job, List[float]]] = []
+        while self._heap and self._heap[0][0] <= now:
+            _, _, name, slot = heapq.heappop(self._heap)
+            job = self._jobs.get(name)
+            if job is None or job.next_run != slot:
+                continue  # cancelled or superseded
+            if job.interval and not job.one_shot:
+                missed = int((now - slot) // job.interval)
+                slots = [slot + i * job.interval for i in range(missed + 1)]
+                job.next_run = slot + (missed + 1) * job.interval
+                self._push(job)
+            else:
+                slots = [slot]
+                del self._jobs[name]
+            late = now - slots[-1]
+            if job.catch_up == "all":
+                run = slots[-MAX_CATCH_UP_RUNS:]
+            elif job.catch_up == "skip":
+                run = [slots[-1]] if late <= job.misfire_grace else []
+            else:
+                run = [slots[-1]]  # coalesce: the newest slot stands for all missed ones
+            job.counts["missed"] += len(slots) - len(run)
+            if run:
+                due.append((job, run))
+        return due
+
+    async def _lease_store(self):
+        if self.lease_store is None:
+            async with self._store_lock:
+                if self.lease_store is None:
+                    from infrastructure.config.settings import settings
+                    self.lease_store = await asyncio.to_thread(
+                        create_lease_store, settings.redis_url, settings.scheduler_lease_path)
+        return self.lease_store
+
+    async def _acquire(self, job: Job, slot: float) -> bool:
+        if not job.distributed:
+            return True
+        key = f"{job.name}@{int(slot * 1000)}"
+        try:
+            store = await self._lease_store()
+            if getattr(store, "blocking", False):
+                return await asyncio.to_thread(store.acquire, key, self.owner, job.lease_ttl())
+            return store.acquire(key, self.owner, job.lease_ttl())
+        except Exception as e:
+            logger.error(f"Lease acquire failed for {job.name}: {e}")
+            return False
+
+    async def _execute(self, job: Job, slots: List[float]):
+        for slot in slots:
+            if job.running >= job.max_instances:
+                job.counts["skipped_busy"] += 1
+                continue
+            job.running += 1
             try:
-                delay = (run_at - datetime.utcnow()).total_seconds()
-                if delay > 0:
-                    await asyncio.sleep(delay)
-                res = func()
+                if not await self._acquire(job, slot):
+                    job.counts["skipped_lease"] += 1
+                    continue
+                res = job.func()
                 if asyncio.iscoroutine(res):
-                    await res
+                    await asyncio.wait_for(res, timeout=job.timeout)
+                job.counts["runs"] += 1
+            except asyncio.TimeoutError:
+                job.counts["timeouts"] += 1
+                logger.error(f"Scheduled task {job.name} timed out after {job.timeout}s")
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
-                logger.error(f"Scheduled task {name} failed: {e}")
-        self._tasks[name] = asyncio.create_task(runner())
+                job.counts["failures"] += 1
+                logger.error(f"Scheduled task {job.name} failed: {e}")
+            finally:
+                job.running -= 1
 
-    def cancel_all(self):
-        for t in self._tasks.values():
-            t.cancel()
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "jobs": len(self._jobs),
+            "heap": len(self._heap),
+            "running": len(self._running),
+            "lease_store": type(self.lease_store).__name__ if self.lease_store else None,
+            "per_job": {name: {**job.counts, "next_run": datetime.fromtimestamp(job.next_run, timezone.utc).isoformat()}
+                        for name, job in self._jobs.items()},
+        }
 
 
 scheduler = SimpleScheduler()
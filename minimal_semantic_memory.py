@@ -3,23 +3,37 @@ Minimal Semantic Memory Engine (No Pinecone Dependencies)
 For emergency deployment when vector databases aren't available
 """
 
+import importlib.util
 import logging
+import threading
 from typing import Dict, Any, List, Optional, Union
 import math
 import pathlib
 from datetime import datetime, timezone, timedelta
 
-# Optional richer NLP / vector backends
-try:  # spaCy model
-    import spacy  # type: ignore
-    _SPACY_AVAILABLE = True
-    try:
-        _NLP = spacy.load("en_core_web_sm")  # Ensure model loaded
-    except Exception:
-        _NLP = None
-except Exception:
-    _SPACY_AVAILABLE = False
-    _NLP = None
+# Optional richer NLP / vector backends. The spaCy pipeline is loaded on first
+# use via _get_nlp() rather than at import time, so importing this module (and
+# the backends that import it) does not pay the model-load cost.
+_SPACY_AVAILABLE = importlib.util.find_spec("spacy") is not None
+_NLP = None
+_NLP_LOADED = False
+_NLP_LOCK = threading.Lock()
+
+
+def _get_nlp():
+    """Return the spaCy pipeline, loading it once on first call (None if unavailable)."""
+    global _NLP, _NLP_LOADED
+    if _NLP_LOADED or not _SPACY_AVAILABLE:
+        return _NLP
+    with _NLP_LOCK:
+        if not _NLP_LOADED:
+            try:
+                import spacy  # type: ignore
+                _NLP = spacy.load("en_core_web_sm")
+            except Exception:
+                _NLP = None
+            _NLP_LOADED = True
+    return _NLP
 
 try:  # chroma db for persistent lightweight vector store
     import chromadb  # type: ignore
@@ -79,10 +93,10 @@ class MinimalSemanticMemoryEngine:
                 self.use_chroma = False
         else:
             logger.debug("Chroma not available; using local lightweight embeddings")
-        if _SPACY_AVAILABLE and _NLP is not None:
+        if _NLP_LOADED and _NLP is not None:
             if _NLP.meta.get("vectors", {}).get("width"):
                 self.embedding_dim = _NLP.meta["vectors"]["width"]
-        else:
+        elif not _SPACY_AVAILABLE:
             logger.debug("spaCy model not available; will use bag-of-words hashing for embeddings")
 
     def update_config(self, new_config: Dict[str, Any]):
@@ -118,8 +132,11 @@ class MinimalSemanticMemoryEngine:
         """Produce a lightweight embedding.
         Priority: spaCy vector -> hashed bag-of-words fallback.
         """
-        if _SPACY_AVAILABLE and _NLP is not None:
-            doc = _NLP(text)
+        nlp = _get_nlp()
+        if nlp is not None:
+            if self.embedding_dim is None and nlp.meta.get("vectors", {}).get("width"):
+                self.embedding_dim = nlp.meta["vectors"]["width"]
+            doc = nlp(text)
             if doc.vector is not None and doc.vector.any():  # type: ignore
                 return doc.vector.tolist()  # type: ignore
         # Fallback: simple hashed term frequency vector in fixed dimension
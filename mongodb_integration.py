@@ -77,6 +77,7 @@ class BuddyDatabase:
             # Conversations indexes
             await self.conversations.create_index([("session_id", 1), ("timestamp", -1)])
             await self.conversations.create_index([("user_id", 1), ("timestamp", -1)])
+            await self.conversations.create_index([("conversation_id", 1)], unique=True, sparse=True)
             
             # Users indexes
             await self.users.create_index([("user_id", 1)], unique=True)
@@ -153,8 +154,13 @@ class BuddyDatabase:
     
     # Conversation Management
     async def save_conversation(self, session_id: str, user_id: str, 
-                              role: str, content: str, metadata: Dict[str, Any] = None) -> str:
-        """Save a conversation message"""
+                              role: str, content: str, metadata: Dict[str, Any] = None,
+                              conversation_id: Optional[str] = None) -> str:
+        """Save a conversation message
+        
+        With ``conversation_id`` the write is an upsert on that id, so
+        retrying a save that may already have landed stores it only once.
+        """
         try:
             message_data = {
                 "session_id": session_id,
@@ -165,6 +171,13 @@ class BuddyDatabase:
                 "metadata": metadata or {}
             }
             
+            if conversation_id:
+                message_data["conversation_id"] = conversation_id
+                await self.conversations.update_one(
+                    {"conversation_id": conversation_id}, {"$setOnInsert": message_data}, upsert=True
+                )
+                return conversation_id
+            
             result = await self.conversations.insert_one(message_data)
             return str(result.inserted_id)
             
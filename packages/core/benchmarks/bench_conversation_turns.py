@@ -0,0 +1,211 @@
+"""
+Per-turn write cost for long conversations: append-only records vs the old
+read-modify-write of the embedded ``turns`` array.
+
+Runs ``ConversationRepository`` against a SQLite stand-in for
+``MongoDBClient`` (documents stored as JSON, indexed on conversation_id and
+seq), so every write really re-serializes what it rewrites. For each
+conversation length the script seeds the history directly, then times a
+batch of appends:
+
+  - legacy:      fetch the conversation, append, write the whole array back
+  - append-only: ``add_turn_to_conversation`` ($inc seq + one record)
+
+and reports a paged read of the newest turns and a compaction pass at the
+largest size. The append-only cost should stay flat as length grows.
+
+Usage:
+    python packages/core/benchmarks/bench_conversation_turns.py [--sizes 100 1000 10000] [--appends 50]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from buddy.database.models import ConversationModel, ConversationTurn, MessageType  # noqa: E402
+from buddy.database.repository import ConversationRepository  # noqa: E402
+
+# Fields the stand-in indexes; everything else lives in the JSON body
+KEY_FIELD = "conversation_id"
+SEQ_FIELDS = ("seq", "start_seq")
+OPERATORS = {"$eq": "=", "$lt": "<", "$lte": "<=", "$gt": ">", "$gte": ">="}
+
+
+def _default(value):
+    return value.isoformat() if isinstance(value, datetime) else str(value)
+
+
+class SQLiteDocumentClient:
+    """The slice of MongoDBClient that ConversationRepository uses, on SQLite."""
+
+    def __init__(self, path: str = ":memory:"):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE docs (id INTEGER PRIMARY KEY, coll TEXT, key TEXT, seq INTEGER, body TEXT)"
+        )
+        self.conn.execute("CREATE INDEX idx_docs ON docs (coll, key, seq)")
+
+    @staticmethod
+    def _seq(document):
+        for name in SEQ_FIELDS:
+            if name in document:
+                return document[name]
+        return None
+
+    def _where(self, collection, filter_query):
+        clauses, params = ["coll = ?"], [collection]
+        body_filters = {}
+        for field, condition in (filter_query or {}).items():
+            if field == KEY_FIELD:
+                clauses.append("key = ?")
+                params.append(condition)
+            elif field in SEQ_FIELDS:
+                if not isinstance(condition, dict):
+                    condition = {"$eq": condition}
+                for op, value in condition.items():
+                    clauses.append(f"seq {OPERATORS[op]} ?")
+                    params.append(value)
+            else:
+                body_filters[field] = condition
+        if body_filters:
+            raise NotImplementedError(f"stand-in cannot filter on {sorted(body_filters)}")
+        return " AND ".join(clauses), params
+
+    async def create_document(self, collection_name, document):
+        document["created_at"] = datetime.utcnow()
+        cursor = self.conn.execute(
+            "INSERT INTO docs (coll, key, seq, body) VALUES (?, ?, ?, ?)",
+            (collection_name, document.get(KEY_FIELD), self._seq(document), json.dumps(document, default=_default))
+        )
+        return str(cursor.lastrowid)
+
+    async def find_documents(self, collection_name, filter_query=None, limit=None, sort=None):
+        where, params = self._where(collection_name, filter_query)
+        order = ""
+        if sort:
+            field, direction = sort[0]
+            if field not in SEQ_FIELDS:
+                raise NotImplementedError(f"stand-in cannot sort on {field}")
+            order = f" ORDER BY seq {'DESC' if direction < 0 else 'ASC'}"
+        sql = f"SELECT id, body FROM docs WHERE {where}{order}" + (f" LIMIT {int(limit)}" if limit else "")
+        return [{**json.loads(body), "_id": str(row_id)} for row_id, body in self.conn.execute(sql, params)]
+
+    def _apply(self, document, update):
+        for field, amount in update.get("$inc", {}).items():
+            document[field] = document.get(field, 0) + amount
+        document.update(update.get("$set", {}))
+        return document
+
+    async def _update_one(self, collection_name, filter_query, update, upsert=False):
+        where, params = self._where(collection_name, filter_query)
+        row = self.conn.execute(f"SELECT id, body FROM docs WHERE {where} LIMIT 1", params).fetchone()
+        if row is None:
+            if not upsert:
+                return None
+            document = self._apply(dict(filter_query), update)
+            await self.create_document(collection_name, document)
+            return document
+        document = self._apply(json.loads(row[1]), update)
+        self.conn.execute(
+            "UPDATE docs SET body = ?, seq = ? WHERE id = ?",
+            (json.dumps(document, default=_default), self._seq(document), row[0])
+        )
+        return document
+
+    async def update_document(self, collection_name, filter_query, update_data, upsert=False):
+        update_data["updated_at"] = datetime.utcnow()
+        return await self._update_one(collection_name, filter_query, {"$set": update_data}, upsert) is not None
+
+    async def find_one_and_update(self, collection_name, filter_query, update, projection=None):
+        document = await self._update_one(collection_name, filter_query, update)
+        if document is not None and projection:
+            document = {k: v for k, v in document.items() if k in projection}
+        return document
+
+    async def delete_documents(self, collection_name, filter_query):
+        where, params = self._where(collection_name, filter_query)
+        return self.conn.execute(f"DELETE FROM docs WHERE {where}", params).rowcount
+
+
+def make_turn(i: int) -> ConversationTurn:
+    return ConversationTurn(
+        message_type=MessageType.USER if i % 2 == 0 else MessageType.ASSISTANT,
+        content=f"Turn {i}: what is the weather going to be like tomorrow afternoon?",
+        intent="weather",
+        confidence=0.9,
+    )
+
+
+async def legacy_add_turn(db: SQLiteDocumentClient, conversation_id: str, turn: ConversationTurn):
+    """The previous implementation: read the document, rewrite the whole turns array."""
+    document = (await db.find_documents("conversations", {KEY_FIELD: conversation_id}))[0]
+    turns = document.get("turns", []) + [turn.to_dict()]
+    await db.update_document("conversations", {KEY_FIELD: conversation_id}, {
+        "turns": turns,
+        "total_turns": len(turns),
+        "last_activity": datetime.utcnow().isoformat(),
+    })
+
+
+async def seed(db, repo, size: int, legacy: bool) -> str:
+    conversation = ConversationModel(session_id="bench", user_id="bench")
+    await repo.create_conversation(conversation)
+    cid = conversation.conversation_id
+    if legacy:
+        turns = [make_turn(i).to_dict() for i in range(size)]
+        await db.update_document("conversations", {KEY_FIELD: cid}, {"turns": turns, "total_turns": size})
+    else:
+        await db.update_document("conversations", {KEY_FIELD: cid}, {"total_turns": size})
+        for i in range(size):
+            await repo._insert_turn_record(cid, i, make_turn(i))
+    db.conn.commit()
+    return cid
+
+
+async def time_appends(fn, cid: str, start: int, count: int) -> float:
+    began = time.perf_counter()
+    for i in range(count):
+        await fn(cid, make_turn(start + i))
+    return (time.perf_counter() - began) / count * 1000.0
+
+
+async def run(args):
+    db = SQLiteDocumentClient()
+    repo = ConversationRepository(db)
+    print(f"{'turns':>7} {'legacy ms/turn':>15} {'append-only ms/turn':>20}")
+    for size in args.sizes:
+        legacy_cid = await seed(db, repo, size, legacy=True)
+        legacy_ms = await time_appends(lambda c, t: legacy_add_turn(db, c, t), legacy_cid, size, args.appends)
+        cid = await seed(db, repo, size, legacy=False)
+        append_ms = await time_appends(repo.add_turn_to_conversation, cid, size, args.appends)
+        print(f"{size:>7} {legacy_ms:>15.3f} {append_ms:>20.3f}")
+
+    began = time.perf_counter()
+    turns, next_before = await repo.get_recent_turns(cid, limit=50)
+    read_ms = (time.perf_counter() - began) * 1000.0
+    print(f"newest 50 of {size + args.appends} turns: {read_ms:.2f}ms (next page before seq {next_before})")
+
+    began = time.perf_counter()
+    archived = await repo.compact_conversation(cid, keep_recent=200, chunk_size=500)
+    compact_ms = (time.perf_counter() - began) * 1000.0
+    older, _ = await repo.get_recent_turns(cid, limit=50, before_seq=100)
+    print(f"compaction archived {archived} turns in {compact_ms:.0f}ms; "
+          f"archived page seq {older[0].content.split(':')[0]} .. {older[-1].content.split(':')[0]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--appends", type=int, default=50, help="timed appends per size")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Load test: healthy-skill tail latency while another skill hangs.
+
+Drives a healthy skill (~5ms) through ``SkillRegistry.execute_skill`` at a
+fixed concurrency, first on its own and then while a second skill that never
+returns is hammered in parallel. With per-skill bulkheads and circuit
+breakers the hung skill is capped, fails fast once its breaker opens, and
+the healthy skill's p99 should stay where it was. Also reports cache hits
+for a memoized skill (``calculate``).
+
+Usage:
+    python packages/core/benchmarks/bench_skill_isolation.py [--requests 2000] [--concurrency 50]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from buddy.events import EventBus  # noqa: E402
+from buddy.skills import BaseSkill, SkillRegistry, SkillResult, SkillSchema  # noqa: E402
+
+
+class HealthySkill(BaseSkill):
+    async def initialize(self) -> bool:
+        self.schema = SkillSchema(
+            name="healthy", version="1.0.0", description="Fast skill",
+            input_schema={}, output_schema={}, max_concurrency=64
+        )
+        return True
+
+    async def execute(self, parameters, context) -> SkillResult:
+        await asyncio.sleep(random.uniform(0.003, 0.007))
+        return SkillResult(success=True, data={"text": "ok"})
+
+
+class HangingSkill(BaseSkill):
+    async def initialize(self) -> bool:
+        self.schema = SkillSchema(
+            name="hanging", version="1.0.0", description="Never returns",
+            input_schema={}, output_schema={}, timeout_ms=500, max_concurrency=4
+        )
+        return True
+
+    async def execute(self, parameters, context) -> SkillResult:
+        await asyncio.sleep(3600)
+        return SkillResult(success=True)
+
+
+async def drive(registry: SkillRegistry, skill: str, requests: int, concurrency: int,
+                parameters=None, think_ms: float = 0.0):
+    latencies = []
+    outcomes = {"ok": 0, "failed": 0}
+    queue = asyncio.Queue()
+    for _ in range(requests):
+        queue.put_nowait(None)
+
+    async def worker():
+        while not queue.empty():
+            queue.get_nowait()
+            start = time.perf_counter()
+            result = await registry.execute_skill(skill, parameters or {}, {"user_id": "bench"})
+            latencies.append((time.perf_counter() - start) * 1000.0)
+            outcomes["ok" if result.success else "failed"] += 1
+            if think_ms:
+                await asyncio.sleep(think_ms / 1000.0)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return np.array(latencies), outcomes
+
+
+def summarize(label: str, latencies: np.ndarray):
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    print(f"{label:<28} p50={p50:6.2f}ms p95={p95:6.2f}ms p99={p99:6.2f}ms max={latencies.max():7.2f}ms")
+    return p99
+
+
+async def run(args):
+    registry = SkillRegistry(EventBus())
+    await asyncio.sleep(0)  # let built-in registration run
+    await registry.register_skill(HealthySkill())
+    await registry.register_skill(HangingSkill())
+
+    baseline, _ = await drive(registry, "healthy", args.requests, args.concurrency)
+    baseline_p99 = summarize("healthy alone", baseline)
+
+    # Callers of the hung skill keep retrying every few ms for the whole run
+    hang_task = asyncio.create_task(
+        drive(registry, "hanging", args.requests, args.concurrency, think_ms=args.think_ms)
+    )
+    contended, _ = await drive(registry, "healthy", args.requests, args.concurrency)
+    contended_p99 = summarize("healthy while 'hanging' hangs", contended)
+    _, hang_outcomes = await hang_task
+
+    stats = registry.get_execution_stats()["skills"]["hanging"]
+    print(f"hanging skill: {hang_outcomes['failed']} failed fast, timeouts={stats['timeouts']} "
+          f"rejected_busy={stats['rejected_busy']} rejected_open={stats['rejected_open']} "
+          f"circuit={stats['circuit_state']}")
+
+    await drive(registry, "calculate", 1000, 10, {"expression": "25 * 4"})
+    calc = registry.get_execution_stats()["skills"]["calculate"]
+    print(f"calculate: {calc['calls']} calls, {calc['cache_hits']} served from cache")
+
+    budget = baseline_p99 * 1.5 + 5.0
+    verdict = "PASS" if contended_p99 <= budget else "FAIL"
+    print(f"{verdict}: contended p99 {contended_p99:.2f}ms vs budget {budget:.2f}ms")
+    return verdict == "PASS"
+
+
+def main():
+    logging.basicConfig(level=logging.ERROR)
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--think-ms", type=float, default=5.0, help="pause between calls to the hung skill")
+    ok = asyncio.run(run(parser.parse_args()))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
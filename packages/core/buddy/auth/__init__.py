@@ -3,6 +3,7 @@
 
 from .jwt_manager import BuddyAuthManager, DeviceType, TokenPair, DeviceSession, AuthSecurityUtils
 from .api import BuddyAuthAPI, BuddyAuthMiddleware, create_auth_routes
+from .token_cache import VerifiedTokenCache, RevocationSet
 
 __all__ = [
     "BuddyAuthManager",
@@ -12,7 +13,9 @@ __all__ = [
     "TokenPair",
     "DeviceSession",
     "AuthSecurityUtils",
-    "create_auth_routes"
+    "create_auth_routes",
+    "VerifiedTokenCache",
+    "RevocationSet"
 ]
 
 # Authentication configuration
@@ -10,6 +10,7 @@ import logging
 from motor.motor_asyncio import AsyncIOMotorClient
 
 from .jwt_manager import BuddyAuthManager, DeviceType, TokenPair, DeviceSession, AuthSecurityUtils
+from .token_cache import STATE_PRINCIPAL, STATE_TOKEN
 
 logger = logging.getLogger(__name__)
 
@@ -443,6 +444,10 @@ class BuddyAuthMiddleware:
         if auth_header and auth_header.startswith("Bearer "):
             token = auth_header.split(" ")[1]
             claims = await self.auth_api.auth_manager.verify_access_token(token)
+            # Shared request principal: rate limiting and RBAC dependencies
+            # reuse this verification instead of checking the token again
+            setattr(request.state, STATE_PRINCIPAL, claims)
+            setattr(request.state, STATE_TOKEN, token)
             
             if claims:
                 # Add user info to request state
@@ -10,8 +10,11 @@ from dataclasses import dataclass
 from enum import Enum
 import asyncio
 import logging
+import time
 from motor.motor_asyncio import AsyncIOMotorClient
 
+from .token_cache import VerifiedTokenCache, RevocationSet
+
 logger = logging.getLogger(__name__)
 
 class DeviceType(Enum):
@@ -75,6 +78,15 @@ class BuddyAuthManager:
             DeviceType.CAR: timedelta(days=90),
             DeviceType.WEB: timedelta(days=1)
         }
+        # Verified-claims cache and local view of revoked JTIs
+        self.token_cache = VerifiedTokenCache(maxsize=10000)
+        self.revocations = RevocationSet()
+        self.revocation_refresh_interval = 5.0
+        # Re-read this far behind the watermark: covers writes committed after a later-stamped one was polled
+        self.revocation_clock_skew = 30.0
+        self._revocations_synced_at: Optional[float] = None
+        self._revocation_watermark: Optional[datetime] = None
+        self._revocation_lock = asyncio.Lock()
     
     async def initialize_collections(self):
         """Initialize MongoDB collections with proper indexes"""
@@ -112,6 +124,7 @@ class BuddyAuthManager:
                 expireAfterSeconds=0,
                 name="revoked_jti_ttl"
             )
+            await self.revoked_jti.create_index("revoked_at", name="revoked_jti_revoked_at")
 
             await self.audit.create_index([("ts", -1)])
 
@@ -169,12 +182,64 @@ class BuddyAuthManager:
         if activate:
             self.active_kid = kid
             self.jwt_secret = new_secret
+        # A replaced secret must invalidate claims verified under the old one
+        self.token_cache.clear()
         await self.audit.insert_one({"type": "key_rotation", "kid": kid, "active": activate, "ts": datetime.utcnow()})
 
     async def revoke_jti(self, jti: str, exp: int):
-        await self.revoked_jti.update_one({"jti": jti}, {"$set": {"jti": jti, "exp": datetime.fromtimestamp(exp)}}, upsert=True)
+        # Local set is fed immediately; other workers pick it up on their next refresh
+        self.revocations.add(jti, exp)
+        await self.revoked_jti.update_one(
+            {"jti": jti},
+            # revoked_at is stamped by the server so every worker's writes share one clock
+            {"$set": {"jti": jti, "exp": datetime.fromtimestamp(exp)}, "$currentDate": {"revoked_at": True}},
+            upsert=True
+        )
         await self.audit.insert_one({"type": "token_revoked", "jti": jti, "ts": datetime.utcnow()})
 
+    async def refresh_revocations(self, force: bool = False):
+        """
+        Incrementally pull revoked JTIs into the in-memory revocation set
+
+        The first call loads every live revocation; later calls only fetch
+        documents revoked since the last watermark, minus an overlap of
+        ``revocation_refresh_interval + revocation_clock_skew`` so writes that
+        commit late are still seen (JTIs already held are skipped). Calls within
+        ``revocation_refresh_interval`` seconds of the last sync are no-ops
+        unless ``force`` is set.
+        """
+        if not force and not self._revocation_sync_due():
+            return
+        async with self._revocation_lock:
+            if not force and not self._revocation_sync_due():
+                return
+            query: Dict = {}
+            if self._revocation_watermark is not None:
+                overlap = timedelta(seconds=self.revocation_refresh_interval + self.revocation_clock_skew)
+                query = {"revoked_at": {"$gte": self._revocation_watermark - overlap}}
+            watermark = self._revocation_watermark
+            try:
+                cursor = self.revoked_jti.find(query, {"jti": 1, "exp": 1, "revoked_at": 1})
+                async for doc in cursor:
+                    revoked_at = doc.get("revoked_at")
+                    if revoked_at and (watermark is None or revoked_at > watermark):
+                        watermark = revoked_at
+                    if doc["jti"] in self.revocations:
+                        continue
+                    exp = doc.get("exp")
+                    exp_ts = exp.timestamp() if isinstance(exp, datetime) else float(exp or 0)
+                    self.revocations.add(doc["jti"], exp_ts)
+                self._revocation_watermark = watermark
+            except Exception as e:
+                logger.warning(f"Revocation refresh failed, keeping previous set: {e}")
+            self.revocations.purge_expired()
+            self._revocations_synced_at = time.monotonic()
+
+    def _revocation_sync_due(self) -> bool:
+        if self._revocations_synced_at is None:
+            return True
+        return time.monotonic() - self._revocations_synced_at >= self.revocation_refresh_interval
+
     async def log_audit(self, event_type: str, data: Dict):
         try:
             await self.audit.insert_one({"type": event_type, "data": data, "ts": datetime.utcnow()})
@@ -375,6 +440,11 @@ class BuddyAuthManager:
         """
         Verify JWT access token
         
+        Signature checks are skipped for tokens already verified and still
+        within their ``exp``; revocation is checked against the in-memory
+        revocation set, which is refreshed from Mongo at most every
+        ``revocation_refresh_interval`` seconds.
+        
         Args:
             token: JWT access token
             
@@ -382,28 +452,32 @@ class BuddyAuthManager:
             Token claims if valid, None otherwise
         """
         try:
-            unverified = jwt.get_unverified_header(token)
-            kid = unverified.get("kid", self.active_kid)
-            secret = self.jwt_secrets.get(kid)
-            if not secret:
-                logger.warning(f"Unknown kid {kid}")
-                return None
-            claims = jwt.decode(
-                token,
-                secret,
-                algorithms=["HS256"],
-                audience="buddy-api",
-                issuer="buddy-ai"
-            )
+            digest = self.token_cache.digest(token)
+            claims = self.token_cache.get(digest)
+            if claims is None:
+                unverified = jwt.get_unverified_header(token)
+                kid = unverified.get("kid", self.active_kid)
+                secret = self.jwt_secrets.get(kid)
+                if not secret:
+                    logger.warning(f"Unknown kid {kid}")
+                    return None
+                claims = jwt.decode(
+                    token,
+                    secret,
+                    algorithms=["HS256"],
+                    audience="buddy-api",
+                    issuer="buddy-ai"
+                )
+                self.token_cache.put(digest, claims)
             # Revocation check
+            await self.refresh_revocations()
             jti = claims.get("jti")
-            if jti:
-                existing = await self.revoked_jti.find_one({"jti": jti})
-                if existing:
-                    logger.info("token_jti_revoked", extra={"jti": jti})
-                    return None
+            if jti and jti in self.revocations:
+                self.token_cache.discard(digest)
+                logger.info("token_jti_revoked", extra={"jti": jti})
+                return None
             
-            return claims
+            return dict(claims)
             
         except jwt.ExpiredSignatureError:
             logger.debug("Access token expired")
@@ -0,0 +1,96 @@
+# BUDDY 2.0 - Verified Token Cache
+# Keeps recently verified access-token claims and revoked JTIs in memory so
+# authenticated requests avoid a signature check and a Mongo round-trip.
+
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+# request.state attributes holding the request's verified claims and the token they came from
+STATE_PRINCIPAL = "principal"
+STATE_TOKEN = "principal_token"
+
+
+class VerifiedTokenCache:
+    """LRU of verified JWT claims keyed by token digest and bounded by ``exp``."""
+
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, Dict]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def digest(token: str) -> str:
+        """Digest used as cache key so raw bearer tokens are never held as keys."""
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def get(self, digest: str) -> Optional[Dict]:
+        claims = self._data.get(digest)
+        if claims is None:
+            self.misses += 1
+            return None
+        if claims.get("exp", 0) <= time.time():
+            self._data.pop(digest, None)
+            self.misses += 1
+            return None
+        self._data.move_to_end(digest)
+        self.hits += 1
+        return claims
+
+    def put(self, digest: str, claims: Dict):
+        if "exp" not in claims:
+            # Tokens without expiry are never cached; they must be re-verified
+            return
+        self._data[digest] = claims
+        self._data.move_to_end(digest)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def discard(self, digest: str):
+        self._data.pop(digest, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / total) if total else 0.0,
+        }
+
+    def __len__(self):
+        return len(self._data)
+
+
+class RevocationSet:
+    """Exact in-memory set of revoked JTIs, each kept only until its token expires.
+
+    The number of live revocations is bounded by the access-token lifetime, so an
+    exact set stays small and avoids the false positives of a Bloom filter.
+    """
+
+    def __init__(self):
+        self._expiry: Dict[str, float] = {}
+
+    def add(self, jti: str, exp: float):
+        current = self._expiry.get(jti, 0.0)
+        self._expiry[jti] = max(current, float(exp))
+
+    def purge_expired(self, now: Optional[float] = None) -> int:
+        now = now if now is not None else time.time()
+        expired = [jti for jti, exp in self._expiry.items() if exp <= now]
+        for jti in expired:
+            del self._expiry[jti]
+        return len(expired)
+
+    def __contains__(self, jti: str) -> bool:
+        exp = self._expiry.get(jti)
+        return exp is not None and exp > time.time()
+
+    def __len__(self):
+        return len(self._expiry)
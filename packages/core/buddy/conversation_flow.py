@@ -16,6 +16,8 @@ import uuid
 
 logger = logging.getLogger(__name__)
 
+from .session_store import SessionStore, cap_history, get_session_backend
+
 # Import flow persistence manager (would normally be separate)
 try:
     from .flow_persistence import FlowPersistenceManager
@@ -47,16 +49,30 @@ class ConversationContext:
     unresolved_questions: List[str] = field(default_factory=list)
     pending_actions: List[Dict] = field(default_factory=list)
     conversation_state: ConversationState = ConversationState.ACTIVE
+    history_summary: str = ""  # rolling summary of messages trimmed from conversation_history
+    
+    def to_dict(self) -> Dict[str, Any]:
+        data = dict(self.__dict__)
+        data['last_interaction'] = self.last_interaction.isoformat()
+        data['conversation_state'] = self.conversation_state.value
+        return data
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ConversationContext":
+        data = dict(data)
+        data['last_interaction'] = datetime.fromisoformat(data['last_interaction'])
+        data['conversation_state'] = ConversationState(data['conversation_state'])
+        return cls(**data)
 
 
 class ConversationFlowManager:
     """Main conversation flow management system"""
     
-    def __init__(self, skill_registry=None, event_bus=None):
+    def __init__(self, skill_registry=None, event_bus=None, max_history: int = 50):
         self.skill_registry = skill_registry
         self.event_bus = event_bus
-        self.active_conversations = {}
         self.flow_strategies = {}
+        self.max_history = max_history
         self.memory_engine = ConversationMemoryEngine()
         
         # Initialize flow persistence manager if available
@@ -65,6 +81,18 @@ class ConversationFlowManager:
         else:
             self.persistence_manager = None
         
+    async def cleanup_expired(self) -> int:
+        """Expire idle conversations and flow snapshots. Returns the number dropped."""
+        dropped = len(await self.memory_engine.store.expire())
+        if self.persistence_manager:
+            dropped += await self.persistence_manager.expire()
+        return dropped
+    
+    @property
+    def active_conversations(self) -> Dict[str, ConversationContext]:
+        """Conversations resident in memory on this worker."""
+        return self.memory_engine.store.resident
+    
     async def manage_conversation_flow(self, message: Dict, device_context: Dict = None) -> Dict:
         """Main flow management method"""
         session_id = message.get('session_id', str(uuid.uuid4()))
@@ -92,8 +120,9 @@ class ConversationFlowManager:
         """Retrieve or create conversation context"""
         context_key = f"{user_id}:{session_id}"
         
-        if context_key in self.active_conversations:
-            return self.active_conversations[context_key]
+        context = await self.memory_engine.retrieve_conversation(context_key)
+        if context is not None:
+            return context
         
         # Create new conversation context
         context = ConversationContext(
@@ -111,7 +140,7 @@ class ConversationFlowManager:
             pending_actions=[]
         )
         
-        self.active_conversations[context_key] = context
+        await self.memory_engine.store_conversation(context_key, context)
         return context
     
     async def update_context(self, context: ConversationContext, message: Dict, device_context: Dict) -> ConversationContext:
@@ -309,6 +338,10 @@ class ConversationFlowManager:
         # Check for follow-up questions
         if response.get('requires_followup'):
             context.unresolved_questions.append(response.get('followup_question', ''))
+        
+        # Keep history bounded and persist the updated context
+        context.history_summary = cap_history(context.conversation_history, context.history_summary, self.max_history)
+        await self.memory_engine.store_conversation(f"{context.user_id}:{context.session_id}", context)
     
     # Helper methods for flow analysis
     async def detect_topic_shift(self, context: ConversationContext, text: str) -> bool:
@@ -437,15 +470,25 @@ class ConversationFlowManager:
 
 
 class ConversationMemoryEngine:
-    """Simple in-memory conversation memory engine"""
+    """Conversation memory backed by the bounded session store"""
+    
+    def __init__(self, store: Optional[SessionStore] = None):
+        self.store = store or SessionStore(
+            "conversation",
+            backend=get_session_backend(),
+            ttl_seconds=24 * 3600,
+            encode=ConversationContext.to_dict,
+            decode=ConversationContext.from_dict
+        )
     
-    def __init__(self):
-        self.conversation_memory = {}
+    @property
+    def conversation_memory(self) -> Dict[str, ConversationContext]:
+        return self.store.resident
     
     async def store_conversation(self, session_id: str, context: ConversationContext):
         """Store conversation context"""
-        self.conversation_memory[session_id] = context
+        await self.store.put(session_id, context)
     
     async def retrieve_conversation(self, session_id: str) -> Optional[ConversationContext]:
         """Retrieve conversation context"""
-        return self.conversation_memory.get(session_id)
+        return await self.store.get(session_id)
@@ -82,6 +82,7 @@ class ConversationModel:
     start_time: datetime = field(default_factory=datetime.utcnow)
     last_activity: datetime = field(default_factory=datetime.utcnow)
     total_turns: int = 0
+    compacted_seq: int = 0  # turns with seq below this live in the turn archive
     summary: Optional[str] = None
     tags: List[str] = field(default_factory=list)
     metadata: Dict[str, Any] = field(default_factory=dict)
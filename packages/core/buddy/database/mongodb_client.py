@@ -11,7 +11,7 @@ from typing import Dict, List, Any, Optional, Union
 from datetime import datetime, timedelta
 import os
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase, AsyncIOMotorCollection
-from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo import ASCENDING, DESCENDING, IndexModel, ReturnDocument
 from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError
 import yaml
 from pathlib import Path
@@ -161,6 +161,8 @@ class MongoDBClient:
         """Initialize database collections."""
         collection_names = [
             'conversations',
+            'conversation_turns',
+            'conversation_turn_archive',
             'users', 
             'skill_executions',
             'devices',
@@ -184,7 +186,16 @@ class MongoDBClient:
                 IndexModel([('user_id', ASCENDING)]),
                 IndexModel([('timestamp', DESCENDING)]),
                 IndexModel([('user_id', ASCENDING), ('timestamp', DESCENDING)]),
-                IndexModel([('session_id', ASCENDING), ('turn_number', ASCENDING)])
+                IndexModel([('session_id', ASCENDING), ('turn_number', ASCENDING)]),
+                IndexModel([('conversation_id', ASCENDING)])
+            ])
+            
+            # Append-only turn records and their compacted archive chunks
+            await self.collections['conversation_turns'].create_indexes([
+                IndexModel([('conversation_id', ASCENDING), ('seq', ASCENDING)], unique=True)
+            ])
+            await self.collections['conversation_turn_archive'].create_indexes([
+                IndexModel([('conversation_id', ASCENDING), ('start_seq', ASCENDING)], unique=True)
             ])
             
             # Users indexes
@@ -405,7 +416,7 @@ class MongoDBClient:
             raise
     
     async def update_document(self, collection_name: str, filter_query: Dict[str, Any], 
-                            update_data: Dict[str, Any]) -> bool:
+                            update_data: Dict[str, Any], upsert: bool = False) -> bool:
         """
         Update a document in the specified collection.
         
@@ -413,19 +424,46 @@ class MongoDBClient:
             collection_name: Name of the collection
             filter_query: Query to find document to update
             update_data: Update operations
+            upsert: Insert the document if no match exists
             
         Returns:
-            True if document was updated
+            True if document was updated (or inserted)
         """
         try:
             collection = self.collections[collection_name]
             update_data['updated_at'] = datetime.utcnow()
-            result = await collection.update_one(filter_query, {'$set': update_data})
-            return result.modified_count > 0
+            result = await collection.update_one(filter_query, {'$set': update_data}, upsert=upsert)
+            return result.modified_count > 0 or result.upserted_id is not None
         except Exception as e:
             logger.error(f"Failed to update document in {collection_name}: {e}")
             raise
     
+    async def find_one_and_update(self, collection_name: str, filter_query: Dict[str, Any],
+                                  update: Dict[str, Any], projection: Dict[str, Any] = None) -> Optional[Dict[str, Any]]:
+        """
+        Atomically apply update operators to one document and return it.
+        
+        Args:
+            collection_name: Name of the collection
+            filter_query: Query to find the document
+            update: Update operators (e.g. ``$inc``, ``$set``)
+            projection: Fields to return
+            
+        Returns:
+            The document after the update, or None if nothing matched
+        """
+        try:
+            collection = self.collections[collection_name]
+            document = await collection.find_one_and_update(
+                filter_query, update, projection=projection, return_document=ReturnDocument.AFTER
+            )
+            if document and '_id' in document:
+                document['_id'] = str(document['_id'])
+            return document
+        except Exception as e:
+            logger.error(f"Failed to find and update document in {collection_name}: {e}")
+            raise
+    
     async def delete_document(self, collection_name: str, filter_query: Dict[str, Any]) -> bool:
         """
         Delete a document from the specified collection.
@@ -445,6 +483,25 @@ class MongoDBClient:
             logger.error(f"Failed to delete document in {collection_name}: {e}")
             raise
     
+    async def delete_documents(self, collection_name: str, filter_query: Dict[str, Any]) -> int:
+        """
+        Delete all documents matching a filter.
+        
+        Args:
+            collection_name: Name of the collection
+            filter_query: Query selecting documents to delete
+            
+        Returns:
+            Number of documents deleted
+        """
+        try:
+            collection = self.collections[collection_name]
+            result = await collection.delete_many(filter_query)
+            return result.deleted_count
+        except Exception as e:
+            logger.error(f"Failed to delete documents in {collection_name}: {e}")
+            raise
+    
     async def aggregate(self, collection_name: str, pipeline: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
         Perform aggregation query on the specified collection.
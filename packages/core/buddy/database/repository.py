@@ -7,7 +7,8 @@ for different data entities using MongoDB.
 
 import asyncio
 import logging
-from typing import Dict, List, Any, Optional, Union
+from dataclasses import fields
+from typing import Dict, List, Any, Optional, Tuple, Union
 from datetime import datetime, timedelta
 from .mongodb_client import MongoDBClient
 from .models import (
@@ -21,6 +22,13 @@ from .models import (
 
 logger = logging.getLogger(__name__)
 
+TURNS_COLLECTION = 'conversation_turns'
+TURN_ARCHIVE_COLLECTION = 'conversation_turn_archive'
+COMPACTION_JOB = 'conversation_compaction'
+
+_TURN_FIELDS = {f.name for f in fields(ConversationTurn)}
+_CONVERSATION_FIELDS = {f.name for f in fields(ConversationModel)}
+
 
 class BaseRepository:
     """Base repository class with common database operations."""
@@ -34,7 +42,17 @@ class BaseRepository:
 
 
 class ConversationRepository(BaseRepository):
-    """Repository for conversation data operations."""
+    """
+    Repository for conversation data operations.
+    
+    Turns are stored append-only in ``conversation_turns``, one record per
+    turn keyed by ``(conversation_id, seq)``. ``seq`` comes from an atomic
+    ``$inc`` of the conversation's ``total_turns``, so adding a turn costs
+    the same at turn 10 as at turn 10,000. ``compact_conversation`` folds
+    older records into chunked ``conversation_turn_archive`` documents.
+    Conversations written before this layout keep their embedded ``turns``
+    array (seq 0..n-1) until they are compacted.
+    """
     
     async def create_conversation(self, conversation: ConversationModel) -> str:
         """
@@ -47,37 +65,145 @@ class ConversationRepository(BaseRepository):
             Created conversation ID
         """
         try:
-            if not validate_conversation_data(conversation.to_dict()):
+            data = conversation.to_dict()
+            if not validate_conversation_data(data):
                 raise ValueError("Invalid conversation data")
             
-            conversation_id = await self.db.create_document(
-                'conversations', 
-                conversation.to_dict()
-            )
+            # Initial turns become records like any later turn
+            initial_turns = conversation.turns
+            data['turns'] = []
+            data['total_turns'] = len(initial_turns)
+            
+            document_id = await self.db.create_document('conversations', data)
+            for seq, turn in enumerate(initial_turns):
+                await self._insert_turn_record(conversation.conversation_id, seq, turn)
             
-            logger.info(f"Created conversation {conversation_id} for user {conversation.user_id}")
-            return conversation_id
+            logger.info(f"Created conversation {document_id} for user {conversation.user_id}")
+            return document_id
             
         except Exception as e:
             logger.error(f"Failed to create conversation: {e}")
             raise
     
-    async def get_conversation(self, conversation_id: str) -> Optional[ConversationModel]:
-        """Get conversation by ID."""
+    @staticmethod
+    def _conversation_from_doc(document: Dict[str, Any]) -> ConversationModel:
+        return ConversationModel.from_dict({k: v for k, v in document.items() if k in _CONVERSATION_FIELDS})
+    
+    @staticmethod
+    def _turn_from_record(record: Dict[str, Any]) -> ConversationTurn:
+        return ConversationTurn.from_dict({k: v for k, v in record.items() if k in _TURN_FIELDS})
+    
+    async def _get_conversation_document(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        documents = await self.db.find_documents(
+            'conversations',
+            {'conversation_id': conversation_id},
+            limit=1
+        )
+        return documents[0] if documents else None
+    
+    async def _insert_turn_record(self, conversation_id: str, seq: int, turn: ConversationTurn):
+        record = turn.to_dict()
+        record['conversation_id'] = conversation_id
+        record['seq'] = seq
+        await self.db.create_document(TURNS_COLLECTION, record)
+    
+    async def get_conversation(self, conversation_id: str,
+                               recent_turns: Optional[int] = None) -> Optional[ConversationModel]:
+        """
+        Get conversation by ID.
+        
+        ``turns`` holds every turn (oldest first), or only the most recent
+        ``recent_turns`` when given; ``total_turns`` is always the full
+        count. Long conversations are cheaper to read with a bound, paging
+        further back with ``get_recent_turns``.
+        """
         try:
-            documents = await self.db.find_documents(
-                'conversations',
-                {'conversation_id': conversation_id}
-            )
+            document = await self._get_conversation_document(conversation_id)
+            if not document:
+                return None
             
-            if documents:
-                return ConversationModel.from_dict(documents[0])
-            return None
+            conversation = self._conversation_from_doc({**document, 'turns': []})
+            if recent_turns is None:
+                recent_turns = document.get('total_turns', len(document.get('turns') or []))
+            conversation.turns, _ = await self._read_turns(document, recent_turns, None)
+            return conversation
             
         except Exception as e:
             logger.error(f"Failed to get conversation {conversation_id}: {e}")
             raise
     
+    async def get_recent_turns(self, conversation_id: str, limit: int = 50,
+                               before_seq: Optional[int] = None) -> Tuple[List[ConversationTurn], Optional[int]]:
+        """
+        Page backwards through a conversation's turns.
+        
+        Args:
+            conversation_id: Conversation to read
+            limit: Maximum number of turns to return
+            before_seq: Only return turns older than this seq (None = newest)
+            
+        Returns:
+            (turns oldest first, ``before_seq`` for the next older page or None)
+        """
+        try:
+            document = await self._get_conversation_document(conversation_id)
+            if not document:
+                return [], None
+            return await self._read_turns(document, limit, before_seq)
+        except Exception as e:
+            logger.error(f"Failed to get turns for conversation {conversation_id}: {e}")
+            raise
+    
+    async def _read_turns(self, document: Dict[str, Any], limit: int,
+                          before_seq: Optional[int]) -> Tuple[List[ConversationTurn], Optional[int]]:
+        """Collect up to ``limit`` turns below ``before_seq`` from records, archive and legacy array."""
+        conversation_id = document['conversation_id']
+        legacy = document.get('turns') or []
+        compacted = document.get('compacted_seq', 0)
+        upper = document.get('total_turns', len(legacy)) if before_seq is None else before_seq
+        lower = max(compacted, len(legacy))  # records cover [lower, total_turns)
+        found: List[Tuple[int, Dict[str, Any]]] = []
+        
+        if upper > lower and limit > 0:
+            records = await self.db.find_documents(
+                TURNS_COLLECTION,
+                {'conversation_id': conversation_id, 'seq': {'$gte': lower, '$lt': upper}},
+                limit=limit,
+                sort=[('seq', -1)]
+            )
+            found.extend((r['seq'], r) for r in records)
+            upper = min(upper, lower)
+        
+        # Older turns: archive chunks below compacted_seq, then any legacy array
+        while len(found) < limit and upper > 0:
+            if upper > compacted:
+                # Between the archive and the records only legacy turns remain
+                seq = upper - 1
+                if seq < len(legacy):
+                    found.append((seq, legacy[seq]))
+                upper = seq
+                continue
+            chunks = await self.db.find_documents(
+                TURN_ARCHIVE_COLLECTION,
+                {'conversation_id': conversation_id, 'start_seq': {'$lt': upper}},
+                limit=1,
+                sort=[('start_seq', -1)]
+            )
+            if not chunks:
+                break
+            chunk = chunks[0]
+            for offset in range(min(upper, chunk['end_seq']) - chunk['start_seq'] - 1, -1, -1):
+                if len(found) >= limit:
+                    break
+                if chunk['turns'][offset] is not None:  # None: a turn lost before it was stored
+                    found.append((chunk['start_seq'] + offset, chunk['turns'][offset]))
+            upper = found[-1][0] if len(found) >= limit else chunk['start_seq']
+        
+        found.sort(key=lambda item: item[0])
+        turns = [self._turn_from_record(record) for _, record in found]
+        next_before = found[0][0] if found and found[0][0] > 0 else None
+        return turns, next_before
+    
     async def get_conversations_by_user(self, user_id: str, limit: int = 50) -> List[ConversationModel]:
         """Get conversations for a user."""
         try:
@@ -110,33 +236,184 @@ class ConversationRepository(BaseRepository):
             raise
     
     async def add_turn_to_conversation(self, conversation_id: str, turn: ConversationTurn) -> bool:
-        """Add a turn to an existing conversation."""
+        """Append a turn to an existing conversation (constant cost per turn)."""
         try:
-            conversation = await self.get_conversation(conversation_id)
-            if not conversation:
-                return False
-            
-            conversation.add_turn(turn)
-            
-            success = await self.db.update_document(
+            # Reserve the next seq atomically; concurrent appends get distinct seqs
+            now = datetime.utcnow()
+            conversation = await self.db.find_one_and_update(
                 'conversations',
                 {'conversation_id': conversation_id},
                 {
-                    'turns': [turn.to_dict() for turn in conversation.turns],
-                    'total_turns': conversation.total_turns,
-                    'last_activity': conversation.last_activity.isoformat()
-                }
+                    '$inc': {'total_turns': 1},
+                    '$set': {'last_activity': now.isoformat(), 'updated_at': now}
+                },
+                projection={'total_turns': 1}
             )
+            if not conversation:
+                return False
             
-            if success:
-                logger.debug(f"Added turn to conversation {conversation_id}")
-                
-            return success
+            await self._insert_turn_record(conversation_id, conversation['total_turns'] - 1, turn)
+            logger.debug(f"Added turn to conversation {conversation_id}")
+            return True
             
         except Exception as e:
             logger.error(f"Failed to add turn to conversation {conversation_id}: {e}")
             raise
     
+    async def _holes_expired(self, conversation_id: str, start: int, end: int,
+                             records: List[Dict[str, Any]], grace_seconds: float) -> bool:
+        """
+        Whether every seq in ``[start, end)`` missing from ``records`` was
+        reserved more than ``grace_seconds`` ago.
+        
+        Seqs are reserved in order, so the first record after the newest
+        hole was created after that hole, and after every older one, was
+        reserved.
+        """
+        present = {r['seq'] for r in records}
+        newest_hole = max(seq for seq in range(start, end) if seq not in present)
+        later = [r for r in records if r['seq'] > newest_hole] or await self.db.find_documents(
+            TURNS_COLLECTION,
+            {'conversation_id': conversation_id, 'seq': {'$gt': newest_hole}},
+            limit=1,
+            sort=[('seq', 1)]
+        )
+        if not later:
+            return False
+        created_at = later[0].get('created_at')
+        if isinstance(created_at, str):
+            created_at = datetime.fromisoformat(created_at)
+        return created_at is not None and created_at <= datetime.utcnow() - timedelta(seconds=grace_seconds)
+    
+    async def compact_conversation(self, conversation_id: str, keep_recent: int = 200,
+                                   chunk_size: int = 500, hole_grace_seconds: float = 600) -> int:
+        """
+        Fold old turns into archive chunks of ``chunk_size`` turns.
+        
+        The newest ``keep_recent`` turns stay as individual records. An
+        embedded legacy ``turns`` array is archived first. Each chunk is
+        upserted before ``compacted_seq`` advances and the records are
+        deleted, so an interrupted run is safe to repeat.
+        
+        A seq whose record is missing (the insert after its reservation
+        failed) holds the chunk back for ``hole_grace_seconds``, in case the
+        write is still in flight; after that it is archived as a ``None``
+        gap, which readers skip.
+        
+        Returns:
+            Number of turns archived
+        """
+        try:
+            document = await self._get_conversation_document(conversation_id)
+            if not document:
+                return 0
+            
+            compacted = document.get('compacted_seq', 0)
+            legacy = document.get('turns') or []
+            total = document.get('total_turns', len(legacy))
+            archived = 0
+            
+            async def archive(start: int, turns: List[Dict[str, Any]]):
+                await self.db.update_document(
+                    TURN_ARCHIVE_COLLECTION,
+                    {'conversation_id': conversation_id, 'start_seq': start},
+                    {
+                        'conversation_id': conversation_id,
+                        'start_seq': start,
+                        'end_seq': start + len(turns),
+                        'turns': turns
+                    },
+                    upsert=True
+                )
+            
+            if legacy:
+                for start in range(compacted, len(legacy), chunk_size):
+                    chunk = legacy[start:start + chunk_size]
+                    await archive(start, chunk)
+                    archived += len(chunk)
+                compacted = max(compacted, len(legacy))
+                await self.db.update_document(
+                    'conversations',
+                    {'conversation_id': conversation_id},
+                    {'turns': [], 'compacted_seq': compacted}
+                )
+            
+            while total - compacted - keep_recent >= chunk_size:
+                records = await self.db.find_documents(
+                    TURNS_COLLECTION,
+                    {'conversation_id': conversation_id, 'seq': {'$gte': compacted, '$lt': compacted + chunk_size}},
+                    sort=[('seq', 1)]
+                )
+                if len(records) < chunk_size:
+                    if not await self._holes_expired(conversation_id, compacted, compacted + chunk_size,
+                                                     records, hole_grace_seconds):
+                        # A reserved seq whose record may still land; retry next run
+                        break
+                    logger.warning(f"Archiving {chunk_size - len(records)} lost turns of conversation "
+                                   f"{conversation_id} as gaps from seq {compacted}")
+                by_seq = {r['seq']: {k: v for k, v in r.items() if k in _TURN_FIELDS} for r in records}
+                await archive(compacted, [by_seq.get(seq) for seq in range(compacted, compacted + chunk_size)])
+                compacted += chunk_size
+                await self.db.update_document(
+                    'conversations',
+                    {'conversation_id': conversation_id},
+                    {'compacted_seq': compacted}
+                )
+                await self.db.delete_documents(
+                    TURNS_COLLECTION,
+                    {'conversation_id': conversation_id, 'seq': {'$lt': compacted}}
+                )
+                archived += len(records)
+            
+            if archived:
+                logger.info(f"Compacted {archived} turns of conversation {conversation_id}")
+            return archived
+            
+        except Exception as e:
+            logger.error(f"Failed to compact conversation {conversation_id}: {e}")
+            raise
+    
+    async def compact_conversations(self, keep_recent: int = 200, chunk_size: int = 500,
+                                    limit: int = 100, hole_grace_seconds: float = 600) -> int:
+        """Periodic job: compact the longest conversations. Returns turns archived."""
+        try:
+            # Uncompacted turns = total_turns - compacted_seq (missing on legacy documents)
+            documents = await self.db.find_documents(
+                'conversations',
+                {'$expr': {'$gte': [
+                    {'$subtract': ['$total_turns', {'$ifNull': ['$compacted_seq', 0]}]},
+                    keep_recent + chunk_size
+                ]}},
+                limit=limit,
+                sort=[('last_activity', 1)]
+            )
+            archived = 0
+            for document in documents:
+                archived += await self.compact_conversation(document['conversation_id'], keep_recent,
+                                                            chunk_size, hole_grace_seconds)
+            return archived
+        except Exception as e:
+            logger.error(f"Failed to compact conversations: {e}")
+            raise
+    
+    def schedule_compaction(self, interval_seconds: int = 3600, scheduler=None, **kwargs):
+        """
+        Run ``compact_conversations`` every ``interval_seconds``.
+        
+        Uses the application scheduler (``jobs.scheduler``) unless another
+        is given; its slot leases keep one worker per run. ``kwargs`` go to
+        ``compact_conversations``. Returns the scheduler, for cancelling
+        ``COMPACTION_JOB`` later.
+        """
+        if scheduler is None:
+            from jobs.scheduler import scheduler
+        
+        async def run():
+            await self.compact_conversations(**kwargs)
+        
+        scheduler.schedule_interval(COMPACTION_JOB, interval_seconds, run, timeout=interval_seconds)
+        return scheduler
+    
     async def update_conversation_summary(self, conversation_id: str, summary: str) -> bool:
         """Update conversation summary."""
         try:
@@ -18,6 +18,7 @@ from .events import EventBus, Event, get_event_bus
 from .skills import SkillRegistry
 from .conversation_flow import ConversationFlowManager
 from .device_context import DeviceContextManager, DeviceType
+from .session_store import SessionStore, cap_history, get_session_backend
 
 logger = logging.getLogger(__name__)
 
@@ -46,11 +47,27 @@ class DialogueContext:
     previous_intents: List[str] = field(default_factory=list)
     entities: Dict[str, Any] = field(default_factory=dict)
     conversation_history: List[Dict[str, Any]] = field(default_factory=list)
+    history_summary: str = ""  # rolling summary of turns trimmed from conversation_history
     user_preferences: Dict[str, Any] = field(default_factory=dict)
     current_skill: Optional[str] = None
     pending_confirmations: List[Dict[str, Any]] = field(default_factory=list)
     created_at: datetime = field(default_factory=datetime.now)
     last_activity: datetime = field(default_factory=datetime.now)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to a JSON-compatible dictionary for the session store."""
+        data = dict(self.__dict__)
+        data["created_at"] = self.created_at.isoformat()
+        data["last_activity"] = self.last_activity.isoformat()
+        return data
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "DialogueContext":
+        """Rebuild a context saved with to_dict."""
+        data = dict(data)
+        data["created_at"] = datetime.fromisoformat(data["created_at"])
+        data["last_activity"] = datetime.fromisoformat(data["last_activity"])
+        return cls(**data)
 
 
 @dataclass
@@ -78,14 +95,24 @@ class DialogueManager:
     with support for multi-turn conversations and error recovery.
     """
     
-    def __init__(self, event_bus: Optional[EventBus] = None, skill_registry: Optional[SkillRegistry] = None):
+    def __init__(self, event_bus: Optional[EventBus] = None, skill_registry: Optional[SkillRegistry] = None,
+                 session_store: Optional[SessionStore] = None, max_history: int = 100):
         self.event_bus = event_bus or get_event_bus()
-        self.active_contexts: Dict[str, DialogueContext] = {}
         self.dialogue_policies: Dict[str, callable] = {}
         self.confirmation_handlers: Dict[str, callable] = {}
         self.session_timeout = timedelta(minutes=30)
+        self.max_history = max_history  # turns kept verbatim; older ones are summarized
         self.skill_registry = skill_registry  # late-bound by runtime
         
+        # Bounded, restart-safe session state (LRU + timing wheel + backend)
+        self.sessions = session_store or SessionStore(
+            "dialogue",
+            backend=get_session_backend(),
+            ttl_seconds=self.session_timeout.total_seconds(),
+            encode=DialogueContext.to_dict,
+            decode=DialogueContext.from_dict
+        )
+        
         # Initialize conversation flow manager
         self.flow_manager = ConversationFlowManager(skill_registry, self.event_bus)
         
@@ -100,6 +127,11 @@ class DialogueManager:
         
         logger.info("Dialogue manager initialized with conversation flow management")
         
+    @property
+    def active_contexts(self) -> Dict[str, DialogueContext]:
+        """Sessions resident in memory on this worker (others live in the session backend)."""
+        return self.sessions.resident
+        
     async def start_session(self, user_id: str, device_id: str, 
                            context_data: Optional[Dict[str, Any]] = None) -> str:
         """
@@ -124,7 +156,7 @@ class DialogueManager:
             context.language = context_data.get("language", "en")
             context.user_preferences = context_data.get("preferences", {})
             
-        self.active_contexts[context.session_id] = context
+        await self.sessions.put(context.session_id, context)
         
         await self.event_bus.publish(
             "dialogue.session_started",
@@ -141,22 +173,24 @@ class DialogueManager:
         
     async def end_session(self, session_id: str):
         """End a dialogue session."""
-        if session_id in self.active_contexts:
-            context = self.active_contexts[session_id]
-            del self.active_contexts[session_id]
-            
-            await self.event_bus.publish(
-                "dialogue.session_ended",
-                {
-                    "session_id": session_id,
-                    "duration_minutes": (datetime.now() - context.created_at).total_seconds() / 60,
-                    "turns": len(context.conversation_history)
-                },
-                source="dialogue_manager"
-            )
+        context = await self.sessions.get(session_id)
+        if context is not None:
+            await self.sessions.delete(session_id)
+            await self._publish_session_ended(session_id, context)
             
             logger.info(f"Ended dialogue session {session_id}")
             
+    async def _publish_session_ended(self, session_id: str, context: DialogueContext):
+        await self.event_bus.publish(
+            "dialogue.session_ended",
+            {
+                "session_id": session_id,
+                "duration_minutes": (datetime.now() - context.created_at).total_seconds() / 60,
+                "turns": len(context.conversation_history)
+            },
+            source="dialogue_manager"
+        )
+            
     async def process_turn(self, session_id: str, user_input: str, 
                           intent_data: Optional[Dict[str, Any]] = None) -> DialogueTurn:
         """
@@ -170,10 +204,10 @@ class DialogueManager:
         Returns:
             DialogueTurn object with results
         """
-        if session_id not in self.active_contexts:
+        context = await self.sessions.get(session_id)
+        if context is None:
             raise ValueError(f"Session {session_id} not found")
             
-        context = self.active_contexts[session_id]
         context.last_activity = datetime.now()
         
         turn = DialogueTurn(user_input=user_input)
@@ -254,8 +288,14 @@ class DialogueManager:
             # Calculate duration
             turn.duration_ms = int((datetime.now() - start_time).total_seconds() * 1000)
 
-            # Add to conversation history
+            # Add to conversation history, folding the oldest turns into the summary
             context.conversation_history.append(turn.__dict__)
+            context.history_summary = cap_history(
+                context.conversation_history, context.history_summary, self.max_history
+            )
+            if len(context.previous_intents) > self.max_history:
+                del context.previous_intents[:-self.max_history]
+            await self.sessions.put(session_id, context)
 
             # Publish turn completion
             await self.event_bus.publish(
@@ -682,10 +722,11 @@ class DialogueManager:
         session_id = payload.get("session_id")
         turn_id = payload.get("turn_id")
         
-        if session_id in self.active_contexts:
+        context = await self.sessions.get(session_id)
+        if context is not None:
             # Update dialogue state based on intent
-            context = self.active_contexts[session_id]
             # Implementation would coordinate with ongoing turns
+            pass
             
     async def _handle_speech_end(self, event: Event):
         """Handle end of speech events."""
@@ -699,9 +740,10 @@ class DialogueManager:
         turn_id = payload.get("turn_id")
         result = payload.get("result")
         
-        if session_id in self.active_contexts:
-            context = self.active_contexts[session_id]
+        context = await self.sessions.get(session_id)
+        if context is not None:
             # Update turn with skill result and generate response
+            pass
             
     async def _handle_confirmation(self, event: Event):
         """Handle user confirmations."""
@@ -709,11 +751,12 @@ class DialogueManager:
         session_id = payload.get("session_id")
         confirmed = payload.get("confirmed", False)
         
-        if session_id in self.active_contexts:
-            context = self.active_contexts[session_id]
+        context = await self.sessions.get(session_id)
+        if context is not None:
             if context.pending_confirmations and confirmed:
                 # Execute pending action
                 pending = context.pending_confirmations.pop(0)
+                await self.sessions.put(session_id, context)
                 await self._execute_confirmed_action(context, pending)
                 
     async def _execute_confirmed_action(self, context: DialogueContext, action: Dict[str, Any]):
@@ -732,25 +775,24 @@ class DialogueManager:
         
     async def cleanup_expired_sessions(self):
         """Clean up expired dialogue sessions."""
-        now = datetime.now()
-        expired_sessions = []
+        # The timing wheel hands back only the sessions that are due, and the
+        # backend drops expired sessions that are no longer resident.
+        expired_sessions = await self.sessions.expire()
         
-        for session_id, context in self.active_contexts.items():
-            if now - context.last_activity > self.session_timeout:
-                expired_sessions.append(session_id)
-                
-        for session_id in expired_sessions:
-            await self.end_session(session_id)
+        for session_id, context in expired_sessions:
+            await self._publish_session_ended(session_id, context)
+            
+        await self.flow_manager.cleanup_expired()
             
         if expired_sessions:
             logger.info(f"Cleaned up {len(expired_sessions)} expired sessions")
             
     def get_session_info(self, session_id: str) -> Optional[Dict[str, Any]]:
-        """Get information about a dialogue session."""
-        if session_id not in self.active_contexts:
+        """Get information about a dialogue session resident on this worker."""
+        context = self.sessions.resident.get(session_id)
+        if context is None:
             return None
             
-        context = self.active_contexts[session_id]
         return {
             "session_id": session_id,
             "user_id": context.user_id,
@@ -758,6 +800,7 @@ class DialogueManager:
             "created_at": context.created_at.isoformat(),
             "last_activity": context.last_activity.isoformat(),
             "turns": len(context.conversation_history),
+            "history_summary": context.history_summary,
             "current_skill": context.current_skill,
             "pending_confirmations": len(context.pending_confirmations)
         }
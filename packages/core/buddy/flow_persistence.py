@@ -11,17 +11,39 @@ from typing import Dict, Any, Optional, List
 import asyncio
 import uuid
 
+from .session_store import SessionStore, get_session_backend
+
 logger = logging.getLogger(__name__)
 
 
 class FlowPersistenceManager:
     """Manages conversation flow persistence and recovery"""
     
-    def __init__(self):
-        # In-memory storage for demonstration - would use Redis/Database in production
-        self.flow_snapshots = {}
-        self.conversation_memory = {}
-        self.user_sessions = {}
+    def __init__(self, backend=None, max_entries: int = 10000):
+        # Bounded in-memory LRUs that write through to the shared session backend
+        backend = backend or get_session_backend()
+        self.snapshot_store = SessionStore("flow_snapshot", backend, max_entries=max_entries, ttl_seconds=24 * 3600)
+        self.latest_store = SessionStore("flow_latest", backend, max_entries=max_entries, ttl_seconds=24 * 3600)
+        self.pattern_store = SessionStore("flow_patterns", backend, max_entries=max_entries, ttl_seconds=30 * 24 * 3600)
+    
+    @property
+    def flow_snapshots(self) -> Dict[str, Dict[str, Any]]:
+        return self.snapshot_store.resident
+    
+    @property
+    def conversation_memory(self) -> Dict[str, Dict[str, Any]]:
+        return self.latest_store.resident
+    
+    @property
+    def user_sessions(self) -> Dict[str, List[Dict[str, Any]]]:
+        return self.pattern_store.resident
+    
+    async def expire(self) -> int:
+        """Expire idle snapshots and pattern histories. Returns the number dropped."""
+        dropped = 0
+        for store in (self.snapshot_store, self.latest_store, self.pattern_store):
+            dropped += len(await store.expire())
+        return dropped
         
     async def create_flow_snapshot(self, session_id: str, context: Dict[str, Any], 
                                  reason: str = "periodic_backup") -> str:
@@ -52,17 +74,17 @@ class FlowPersistenceManager:
         }
         
         # Store snapshot
-        self.flow_snapshots[snapshot_id] = snapshot_data
+        await self.snapshot_store.put(snapshot_id, snapshot_data)
         
         # Also store as latest for session
-        self.conversation_memory[session_id] = snapshot_data
+        await self.latest_store.put(session_id, snapshot_data)
         
         logger.info(f"Created flow snapshot {snapshot_id} for session {session_id}")
         return snapshot_id
     
     async def restore_flow_from_snapshot(self, snapshot_id: str) -> Optional[Dict[str, Any]]:
         """Restore conversation flow from snapshot"""
-        snapshot_data = self.flow_snapshots.get(snapshot_id)
+        snapshot_data = await self.snapshot_store.get(snapshot_id)
         
         if snapshot_data:
             logger.info(f"Restored flow from snapshot {snapshot_id}")
@@ -73,7 +95,7 @@ class FlowPersistenceManager:
     
     async def get_latest_conversation_snapshot(self, session_id: str) -> Optional[Dict[str, Any]]:
         """Get the most recent conversation snapshot for a session"""
-        return self.conversation_memory.get(session_id)
+        return await self.latest_store.get(session_id)
     
     async def handle_flow_interruption(self, session_id: str, interruption_reason: str, 
                                      context: Dict[str, Any]) -> Dict[str, Any]:
@@ -162,11 +184,10 @@ class FlowPersistenceManager:
     async def track_conversation_patterns(self, user_id: str, session_data: Dict[str, Any]) -> Dict[str, Any]:
         """Track user conversation patterns for better flow management"""
         
-        if user_id not in self.user_sessions:
-            self.user_sessions[user_id] = []
+        sessions = await self.pattern_store.get(user_id) or []
         
         # Add current session data
-        self.user_sessions[user_id].append({
+        sessions.append({
             'session_id': session_data.get('session_id'),
             'start_time': session_data.get('start_time'),
             'end_time': datetime.now(timezone.utc).isoformat(),
@@ -178,7 +199,7 @@ class FlowPersistenceManager:
         })
         
         # Keep only recent sessions (last 50)
-        self.user_sessions[user_id] = self.user_sessions[user_id][-50:]
+        await self.pattern_store.put(user_id, sessions[-50:])
         
         # Analyze patterns
         patterns = await self.analyze_user_patterns(user_id)
@@ -347,7 +368,7 @@ class FlowPersistenceManager:
     async def analyze_user_patterns(self, user_id: str) -> Dict[str, Any]:
         """Analyze user conversation patterns"""
         
-        sessions = self.user_sessions.get(user_id, [])
+        sessions = await self.pattern_store.get(user_id) or []
         
         if not sessions:
             return {
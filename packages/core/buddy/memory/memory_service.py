@@ -5,6 +5,7 @@ Provides user fact storage and semantic retrieval integrating SemanticIndex.
 from __future__ import annotations
 from typing import Optional, Dict, Any, List, Tuple
 from datetime import datetime, timedelta
+import asyncio
 import uuid
 
 # Optional change tracker (not required for core memory operations)
@@ -18,12 +19,20 @@ try:
 except Exception:
     semantic_index = None  # type: ignore
 
+# Lifecycle job checkpoints (one document per job key)
+JOBS_COLLECTION = "mem_jobs"
+
+# Importance assumed for documents written before the field existed
+_DEFAULT_IMPORTANCE = {"mem_facts": 0.5, "mem_episodes": 0.4}
+
 class MemoryService:
     def __init__(self, mongo_db=None):
         self.db = mongo_db
-    # Collections (may be None if mongo not provided)
-    self.facts_coll = self.db["mem_facts"] if self.db else None
-    self.episodes_coll = self.db["mem_episodes"] if self.db else None
+        # Collections (may be None if mongo not provided)
+        self.facts_coll = self.db["mem_facts"] if self.db is not None else None
+        self.episodes_coll = self.db["mem_episodes"] if self.db is not None else None
+        self.jobs_coll = self.db[JOBS_COLLECTION] if self.db is not None else None
+        self.last_decay_stats: Dict[str, Any] = {}
 
     async def add_fact(self, user_id: str, text: str, importance: float = 0.5, tags: Optional[List[str]] = None) -> str:
         fact_id = str(uuid.uuid4())
@@ -37,11 +46,11 @@ class MemoryService:
             "last_used": None,
             "uses": 0
         }
-        if self.facts_coll:
+        if self.facts_coll is not None:
             await self.facts_coll.insert_one(doc)
         if semantic_index:
             try:
-                semantic_index.add(text, metadata={
+                await asyncio.to_thread(semantic_index.add, text, {
                     "type": "fact", "user_id": user_id, "fact_id": fact_id,
                     "importance": float(importance), "created_at": doc["created_at"].isoformat()
                 })
@@ -53,7 +62,8 @@ class MemoryService:
         # If semantic index available, use it scoped by user
         if semantic_index:
             try:
-                results = semantic_index.search_with_meta(query, top_k=top_k, metadata_filter={"user_id": user_id, "type": "fact"})
+                # Embedding + similarity is CPU work; keep it off the event loop
+                results = await asyncio.to_thread(semantic_index.search_with_meta, query, top_k, {"user_id": user_id, "type": "fact"})
                 return [
                     {"text": r["text"], "score": r["score"], **({'metadata': r.get('metadata')} if r.get('metadata') else {})}
                     for r in results
@@ -61,7 +71,7 @@ class MemoryService:
             except Exception:
                 pass
         # fallback naive query in Mongo
-        if self.facts_coll:
+        if self.facts_coll is not None:
             cursor = self.facts_coll.find({"user_id": user_id, "text": {"$regex": query, "$options": "i"}}).limit(top_k)
             return [{"text": d.get("text"), "score": 0.0, "importance": d.get("importance"), "id": d.get("_id")} async for d in cursor]
         return []
@@ -78,13 +88,13 @@ class MemoryService:
             "last_used": None,
             "uses": 0
         }
-        if self.episodes_coll:
+        if self.episodes_coll is not None:
             await self.episodes_coll.insert_one(doc)
         # Optionally index textual summary
         if semantic_index:
             try:
                 summary = f"{event_type}: {payload}"[:500]
-                semantic_index.add(summary, metadata={
+                await asyncio.to_thread(semantic_index.add, summary, {
                     "type": "episode", "user_id": user_id, "episode_id": eid, "event_type": event_type,
                     "importance": float(importance), "ts": doc["ts"].isoformat()
                 })
@@ -99,14 +109,14 @@ class MemoryService:
             results["facts"] = await self.search_facts(user_id, query, top_k=top_k)
         if "episodes" in include and semantic_index:
             try:
-                ep = semantic_index.search_with_meta(query, top_k=top_k, metadata_filter={"user_id": user_id, "type": "episode"})
+                ep = await asyncio.to_thread(semantic_index.search_with_meta, query, top_k, {"user_id": user_id, "type": "episode"})
                 results["episodes"] = ep
             except Exception:
                 pass
         return results
 
     async def list_episodes(self, user_id: str, limit: int = 50) -> List[Dict[str, Any]]:
-        if not self.episodes_coll:
+        if self.episodes_coll is None:
             return []
         cursor = self.episodes_coll.find({"user_id": user_id}).sort("ts", -1).limit(limit)
         return [
@@ -115,17 +125,17 @@ class MemoryService:
         ]
 
     async def mark_used(self, fact_id: str):
-        if not self.facts_coll:
+        if self.facts_coll is None:
             return
         await self.facts_coll.update_one({"_id": fact_id}, {"$set": {"last_used": datetime.utcnow()}, "$inc": {"uses": 1}})
 
     async def mark_episode_used(self, episode_id: str):
-        if not self.episodes_coll:
+        if self.episodes_coll is None:
             return
         await self.episodes_coll.update_one({"_id": episode_id}, {"$set": {"last_used": datetime.utcnow()}, "$inc": {"uses": 1}})
 
     async def list_facts(self, user_id: str, limit: int = 20) -> List[Dict[str, Any]]:
-        if not self.facts_coll:
+        if self.facts_coll is None:
             return []
         cursor = self.facts_coll.find({"user_id": user_id}).sort("importance", -1).limit(limit)
         return [
@@ -162,7 +172,7 @@ class MemoryService:
             combined.append(("fact", {"type": "fact", "text": fr.get('text'), "raw_score": fr.get('score'), "rank": rank_score, "metadata": meta}))
         if semantic_index:
             try:
-                ep_results = semantic_index.search_with_meta(query, top_k=top_k, metadata_filter={"user_id": user_id, "type": "episode"})
+                ep_results = await asyncio.to_thread(semantic_index.search_with_meta, query, top_k, {"user_id": user_id, "type": "episode"})
                 for er in ep_results:
                     meta = er.get('metadata') or {}
                     importance = meta.get('importance') or 0.4
@@ -183,34 +193,99 @@ class MemoryService:
         top = [c[1] for c in combined[:top_k]]
         return top
 
-    async def decay_importance(self, user_id: Optional[str] = None, idle_days: int = 30, decay: float = 0.05):
+    async def decay_importance(self, user_id: Optional[str] = None, idle_days: int = 30, decay: float = 0.05,
+                               floor: Optional[float] = None, batch_size: int = 10000) -> int:
         """Reduce importance slightly for items not used recently.
 
+        Runs as a resumable lifecycle job over facts and episodes. Each batch is
+        a contiguous ``_id`` range decayed server-side by one pipeline
+        ``update_many``; the last ``_id`` done is checkpointed in ``mem_jobs``
+        so an interrupted run resumes where it stopped. Documents are stamped
+        with the run id, so a batch replayed after a crash is not decayed twice.
+
         Args:
             user_id: if provided restrict to user.
             idle_days: threshold for decay.
             decay: amount to subtract (clamped).
+            floor: items whose importance falls below this are tiered down to
+                ``cold`` and evicted from the semantic index.
+            batch_size: documents per update round trip.
         """
-        if not self.facts_coll:
+        if self.facts_coll is None:
             return 0
-        cutoff = datetime.utcnow() - timedelta(days=idle_days)  # type: ignore[name-defined]
+        job_key = f"decay:{user_id or '*'}"
+        params = {"idle_days": idle_days, "decay": decay, "floor": floor}
+        checkpoint = await self.jobs_coll.find_one({"_id": job_key}) if self.jobs_coll is not None else None
+        if checkpoint and checkpoint.get("status") == "running" and checkpoint.get("params") == params:
+            # Resume the interrupted run with its original cutoff
+            run_id, cutoff = checkpoint["run_id"], checkpoint["cutoff"]
+            progress = checkpoint.get("progress", {})
+        else:
+            run_id, cutoff, progress = str(uuid.uuid4()), datetime.utcnow() - timedelta(days=idle_days), {}
+
         q: Dict[str, Any] = {"$or": [{"last_used": None}, {"last_used": {"$lt": cutoff}}]}
         if user_id:
             q['user_id'] = user_id
-        docs = self.facts_coll.find(q).limit(500)
-        updated = 0
-        async for d in docs:
-            imp = float(d.get('importance', 0.5))
-            new_imp = max(0.0, imp - decay)
-            await self.facts_coll.update_one({"_id": d.get('_id')}, {"$set": {"importance": new_imp}})
-            updated += 1
-        return updated
+        stats = {"run_id": run_id, "decayed": 0, "tiered_down": 0, "evicted": 0, "batches": 0}
+        targets = (("mem_facts", self.facts_coll, "fact_id"), ("mem_episodes", self.episodes_coll, "episode_id"))
+        for name, coll, id_field in targets:
+            if coll is None or progress.get(name, {}).get("done"):
+                continue
+            last_id = progress.get(name, {}).get("last_id")
+            pipeline = [{"$set": {
+                "importance": {"$max": [0.0, {"$subtract": [{"$ifNull": ["$importance", _DEFAULT_IMPORTANCE[name]]}, decay]}]},
+                "decay_run": run_id,
+                "decayed_at": "$$NOW",
+            }}]
+            while True:
+                id_range: Dict[str, Any] = {} if last_id is None else {"$gt": last_id}
+                # Upper bound of this batch: the batch_size-th remaining id (None for the tail)
+                upper = None
+                boundary = coll.find({**q, **({"_id": id_range} if id_range else {})}, {"_id": 1}).sort("_id", 1).skip(batch_size - 1).limit(1)
+                async for d in boundary:
+                    upper = d["_id"]
+                if upper is not None:
+                    id_range["$lte"] = upper
+                batch_q = {**q, **({"_id": id_range} if id_range else {})}
+                res = await coll.update_many({**batch_q, "decay_run": {"$ne": run_id}}, pipeline)
+                stats["decayed"] += res.modified_count
+                stats["batches"] += 1
+                if floor is not None:
+                    cold = [d["_id"] async for d in coll.find(
+                        {**batch_q, "importance": {"$lt": floor}, "tier": {"$ne": "cold"}}, {"_id": 1})]
+                    if cold:
+                        await coll.update_many({"_id": {"$in": cold}}, {"$set": {"tier": "cold"}})
+                        stats["tiered_down"] += len(cold)
+                        if semantic_index is not None and hasattr(semantic_index, "remove_where"):
+                            try:
+                                stats["evicted"] += await asyncio.to_thread(semantic_index.remove_where, id_field, cold)
+                            except Exception:
+                                pass
+                if upper is None:
+                    break
+                last_id = upper
+                progress[name] = {"last_id": last_id, "done": False}
+                await self._save_job_checkpoint(job_key, run_id, cutoff, params, progress, "running")
+            progress[name] = {"last_id": last_id, "done": True}
+            await self._save_job_checkpoint(job_key, run_id, cutoff, params, progress, "running")
+        await self._save_job_checkpoint(job_key, run_id, cutoff, params, progress, "done")
+        self.last_decay_stats = stats
+        return stats["decayed"]
+
+    async def _save_job_checkpoint(self, job_key: str, run_id: str, cutoff: datetime, params: Dict[str, Any],
+                                   progress: Dict[str, Any], status: str):
+        if self.jobs_coll is None:
+            return
+        await self.jobs_coll.update_one({"_id": job_key}, {"$set": {
+            "run_id": run_id, "cutoff": cutoff, "params": params, "progress": progress,
+            "status": status, "updated_at": datetime.utcnow(),
+        }}, upsert=True)
 
     async def purge(self, item_id: str, item_type: str) -> bool:
-        if item_type == 'fact' and self.facts_coll:
+        if item_type == 'fact' and self.facts_coll is not None:
             res = await self.facts_coll.delete_one({"_id": item_id})
             return res.deleted_count > 0  # type: ignore[attr-defined]
-        if item_type == 'episode' and self.episodes_coll:
+        if item_type == 'episode' and self.episodes_coll is not None:
             res = await self.episodes_coll.delete_one({"_id": item_id})
             return res.deleted_count > 0  # type: ignore[attr-defined]
         return False
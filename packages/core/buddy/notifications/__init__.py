@@ -5,6 +5,7 @@ Firebase Cloud Messaging Integration
 
 import os
 import json
+import atexit
 import logging
 from typing import Dict, List, Optional, Union
 from datetime import datetime
@@ -17,6 +18,24 @@ try:
 except ImportError:
     FIREBASE_AVAILABLE = False
 
+from .delivery import (
+    FCMDeliveryEngine, FCMTransport, FirebaseTransport, DeliveryReport, TokenResult, MissingResultError
+)
+
+__all__ = [
+    "BuddyPushNotifications",
+    "FCMDeliveryEngine",
+    "FCMTransport",
+    "FirebaseTransport",
+    "DeliveryReport",
+    "TokenResult",
+    "MissingResultError",
+    "push_notifications",
+    "send_push_notification",
+    "send_sync_notification",
+    "get_notification_status"
+]
+
 logger = logging.getLogger(__name__)
 
 class BuddyPushNotifications:
@@ -25,7 +44,7 @@ class BuddyPushNotifications:
     Supports cross-device push notifications with intelligent routing
     """
     
-    def __init__(self):
+    def __init__(self, transport: Optional[FCMTransport] = None):
         self.enabled = os.getenv('PUSH_NOTIFICATIONS_ENABLED', 'false').lower() == 'true'
         self.test_mode = os.getenv('NOTIFICATION_TEST_MODE', 'true').lower() == 'true'
         self.dry_run = os.getenv('NOTIFICATION_DRY_RUN', 'false').lower() == 'true'
@@ -36,12 +55,23 @@ class BuddyPushNotifications:
         self.fcm_project_id = os.getenv('FCM_PROJECT_ID', 'buddyai-42493')
         
         # Notification settings
-        self.batch_size = int(os.getenv('NOTIFICATION_BATCH_SIZE', '100'))
+        self.batch_size = int(os.getenv('NOTIFICATION_BATCH_SIZE', '500'))
         self.retry_attempts = int(os.getenv('NOTIFICATION_RETRY_ATTEMPTS', '3'))
         self.retry_delay = int(os.getenv('NOTIFICATION_RETRY_DELAY_SECONDS', '5'))
+        self.max_concurrency = int(os.getenv('NOTIFICATION_MAX_CONCURRENCY', '4'))
         
         self.firebase_app = None
         self._initialize_firebase()
+        
+        # An injected transport (e.g. a local fake) bypasses the Firebase availability checks
+        self._custom_transport = transport is not None
+        self.delivery = FCMDeliveryEngine(
+            transport or FirebaseTransport(),
+            batch_size=self.batch_size,
+            max_concurrency=self.max_concurrency,
+            retry_attempts=self.retry_attempts,
+            retry_delay=self.retry_delay
+        )
     
     def _initialize_firebase(self):
         """Initialize Firebase Admin SDK"""
@@ -116,7 +146,10 @@ class BuddyPushNotifications:
             if self.test_mode:
                 logger.info(f"TEST MODE - Sending notification: {title}")
             
-            response = messaging.send(message, dry_run=self.test_mode)
+            loop = asyncio.get_running_loop()
+            response = await loop.run_in_executor(
+                None, lambda: messaging.send(message, dry_run=self.test_mode)
+            )
             
             logger.info(f"Notification sent successfully: {response}")
             return {
@@ -144,6 +177,12 @@ class BuddyPushNotifications:
         """
         Send notification to multiple devices
         
+        Recipients are split into 500-token batches that are delivered
+        concurrently off the event loop; unregistered tokens are returned
+        in ``invalid_tokens`` so callers can purge them. ``responses`` has
+        one entry per input token, in input order (duplicates share the
+        result of their single send).
+        
         Args:
             device_tokens: List of FCM device tokens
             title: Notification title
@@ -154,7 +193,7 @@ class BuddyPushNotifications:
         Returns:
             Dict with batch results
         """
-        if not self.enabled or not FIREBASE_AVAILABLE:
+        if not self._custom_transport and (not self.enabled or not FIREBASE_AVAILABLE):
             logger.info(f"Multicast notification skipped (disabled): {title}")
             return {"success": False, "reason": "notifications_disabled"}
         
@@ -168,30 +207,34 @@ class BuddyPushNotifications:
             }
         
         try:
-            # Build multicast message
-            message = messaging.MulticastMessage(
-                notification=messaging.Notification(title=title, body=body),
-                data=data or {},
-                tokens=device_tokens
-            )
-            
-            # Send to all devices
-            response = messaging.send_multicast(message, dry_run=self.test_mode)
+            report = await self.delivery.deliver(device_tokens, title, body, data, dry_run=self.test_mode)
+            by_token = {resp.token: resp for resp in report.results}
+            responses = []
+            for token in device_tokens:
+                resp = by_token.get(token)
+                if resp is None:  # empty token, never sent
+                    responses.append({"token": token, "success": False, "message_id": None, "error": "invalid_token"})
+                    continue
+                responses.append({
+                    "token": token,
+                    "success": resp.success,
+                    "message_id": resp.message_id if resp.success else None,
+                    "error": str(resp.error) if not resp.success else None
+                })
             
-            logger.info(f"Multicast notification sent: {response.success_count}/{len(device_tokens)} successful")
+            logger.info(f"Multicast notification sent: {report.success_count}/{len(device_tokens)} successful "
+                        f"in {report.batches} batch(es), {len(report.invalid_tokens)} invalid token(s)")
             
             return {
                 "success": True,
-                "success_count": response.success_count,
-                "failure_count": response.failure_count,
-                "responses": [
-                    {
-                        "success": resp.success,
-                        "message_id": resp.message_id if resp.success else None,
-                        "error": str(resp.exception) if not resp.success else None
-                    }
-                    for resp in response.responses
-                ],
+                "success_count": report.success_count,
+                "failure_count": report.failure_count,
+                "invalid_tokens": report.invalid_tokens,
+                "missing_tokens": report.missing_tokens,
+                "batches": report.batches,
+                "batch_failures": report.batch_failures,
+                "retries": report.retries,
+                "responses": responses,
                 "test_mode": self.test_mode
             }
             
@@ -347,6 +390,10 @@ class BuddyPushNotifications:
         
         return await self.send_notification(device_token, title, body, data, priority="normal")
     
+    def close(self):
+        """Release the delivery engine's worker threads"""
+        self.delivery.shutdown()
+    
     def get_status(self) -> Dict:
         """Get notification system status"""
         service_account_exists = bool(
@@ -369,6 +416,7 @@ class BuddyPushNotifications:
 
 # Global notification instance
 push_notifications = BuddyPushNotifications()
+atexit.register(push_notifications.close)
 
 # Convenience functions
 async def send_push_notification(device_token: str, title: str, body: str, **kwargs):
@@ -0,0 +1,220 @@
+"""
+BUDDY 2.0 - FCM Delivery Engine
+Chunked, concurrent multicast delivery with retries and invalid-token collection
+"""
+
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Protocol
+
+logger = logging.getLogger(__name__)
+
+# FCM rejects multicast requests with more than 500 registration tokens
+FCM_MAX_TOKENS_PER_BATCH = 500
+
+# firebase_admin exception class names, matched by name so the engine does not
+# need firebase_admin installed (e.g. when driven by a fake transport). Only a
+# token's own response can mark it invalid: raised for a whole batch, the same
+# errors (InvalidArgumentError especially) describe the request, not the tokens.
+INVALID_TOKEN_ERRORS = {"UnregisteredError", "SenderIdMismatchError", "InvalidArgumentError"}
+TRANSIENT_ERRORS = {"UnavailableError", "InternalError", "QuotaExceededError", "DeadlineExceededError"}
+
+
+class MissingResultError(Exception):
+    """The transport's response had no entry for a token it was sent"""
+
+
+@dataclass
+class TokenResult:
+    """Outcome of sending to one registration token
+
+    ``batch_error`` marks a result synthesized from an exception raised for
+    the whole batch rather than reported for this token.
+    """
+    token: str
+    success: bool
+    message_id: Optional[str] = None
+    error: Optional[BaseException] = None
+    batch_error: bool = False
+
+
+@dataclass
+class DeliveryReport:
+    """Aggregated outcome of a multicast delivery"""
+    success_count: int = 0
+    failure_count: int = 0
+    invalid_tokens: List[str] = field(default_factory=list)
+    missing_tokens: List[str] = field(default_factory=list)  # sent, but absent from the response
+    results: List[TokenResult] = field(default_factory=list)
+    batches: int = 0
+    batch_failures: int = 0  # send attempts that raised for the whole batch
+    retries: int = 0
+
+
+class FCMTransport(Protocol):
+    """Blocking transport that sends one batch (<= 500 tokens)"""
+
+    def send_batch(self, tokens: List[str], title: str, body: str,
+                   data: Dict[str, str], dry_run: bool) -> List[TokenResult]:
+        ...
+
+
+class FirebaseTransport:
+    """Transport backed by firebase_admin.messaging"""
+
+    def send_batch(self, tokens: List[str], title: str, body: str,
+                   data: Dict[str, str], dry_run: bool) -> List[TokenResult]:
+        from firebase_admin import messaging
+
+        message = messaging.MulticastMessage(
+            notification=messaging.Notification(title=title, body=body),
+            data=data,
+            tokens=tokens
+        )
+        send = getattr(messaging, "send_each_for_multicast", None) or messaging.send_multicast
+        response = send(message, dry_run=dry_run)
+        return [
+            TokenResult(
+                token=token,
+                success=resp.success,
+                message_id=resp.message_id if resp.success else None,
+                error=None if resp.success else resp.exception
+            )
+            for token, resp in zip(tokens, response.responses)
+        ]
+
+
+def classify_error(error: Optional[BaseException], batch_error: bool = False) -> str:
+    """Return 'invalid', 'transient' or 'permanent' for a send error
+
+    A ``batch_error`` is never 'invalid': it says nothing about any one token.
+    """
+    if error is None:
+        return "permanent"
+    name = type(error).__name__
+    if name in INVALID_TOKEN_ERRORS:
+        return "permanent" if batch_error else "invalid"
+    if name in TRANSIENT_ERRORS or isinstance(error, (TimeoutError, ConnectionError)):
+        return "transient"
+    return "permanent"
+
+
+class FCMDeliveryEngine:
+    """
+    Splits recipients into FCM-sized batches and sends them on a thread pool
+
+    Batches run concurrently up to ``max_concurrency``. Transient failures
+    (whole-batch or per-token) are retried with exponential backoff; tokens
+    FCM reports as unregistered or invalid in their own response are
+    collected so callers can purge them, and tokens missing from a response
+    are reported as failed. The thread pool is created on first use; call
+    ``shutdown`` when done with the engine.
+    """
+
+    def __init__(self,
+                 transport: FCMTransport,
+                 batch_size: int = FCM_MAX_TOKENS_PER_BATCH,
+                 max_concurrency: int = 4,
+                 retry_attempts: int = 3,
+                 retry_delay: float = 1.0,
+                 executor: Optional[ThreadPoolExecutor] = None):
+        self.transport = transport
+        self.batch_size = max(1, min(batch_size, FCM_MAX_TOKENS_PER_BATCH))
+        self.max_concurrency = max(1, max_concurrency)
+        self.retry_attempts = max(0, retry_attempts)
+        self.retry_delay = retry_delay
+        self._executor = executor
+        self._owns_executor = executor is None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_concurrency, thread_name_prefix="fcm-delivery"
+            )
+        return self._executor
+
+    def _chunks(self, tokens: List[str]) -> List[List[str]]:
+        return [tokens[i:i + self.batch_size] for i in range(0, len(tokens), self.batch_size)]
+
+    async def deliver(self,
+                      tokens: List[str],
+                      title: str,
+                      body: str,
+                      data: Optional[Dict[str, str]] = None,
+                      dry_run: bool = False) -> DeliveryReport:
+        """Send one notification to every token and aggregate the results"""
+        report = DeliveryReport()
+        # Duplicate tokens would be billed and delivered twice
+        unique_tokens = list(dict.fromkeys(t for t in tokens if t))
+        if not unique_tokens:
+            return report
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        chunks = self._chunks(unique_tokens)
+        report.batches = len(chunks)
+
+        async def run(chunk: List[str]) -> List[TokenResult]:
+            async with semaphore:
+                return await self._send_with_retry(chunk, title, body, data or {}, dry_run, report)
+
+        for results in await asyncio.gather(*(run(c) for c in chunks)):
+            for result in results:
+                report.results.append(result)
+                if result.success:
+                    report.success_count += 1
+                    continue
+                report.failure_count += 1
+                if isinstance(result.error, MissingResultError):
+                    report.missing_tokens.append(result.token)
+                elif classify_error(result.error, result.batch_error) == "invalid":
+                    report.invalid_tokens.append(result.token)
+        if report.missing_tokens:
+            logger.warning(f"FCM response omitted {len(report.missing_tokens)} token(s)")
+        return report
+
+    async def _send_with_retry(self, tokens: List[str], title: str, body: str,
+                               data: Dict[str, str], dry_run: bool,
+                               report: DeliveryReport) -> List[TokenResult]:
+        loop = asyncio.get_running_loop()
+        final: Dict[str, TokenResult] = {}
+        pending = tokens
+        attempt = 0
+        while pending:
+            try:
+                results = await loop.run_in_executor(
+                    self._get_executor(), self.transport.send_batch, pending, title, body, data, dry_run
+                )
+            except Exception as e:
+                report.batch_failures += 1
+                logger.warning(f"FCM batch of {len(pending)} token(s) failed: {type(e).__name__}: {e}")
+                results = [TokenResult(token=t, success=False, error=e, batch_error=True) for t in pending]
+
+            by_token = {result.token: result for result in results}
+            retry: List[str] = []
+            for token in pending:
+                result = by_token.get(token)
+                if result is None:
+                    result = TokenResult(token=token, success=False,
+                                         error=MissingResultError(f"no result for token {token[:10]}..."))
+                final[token] = result
+                if not result.success and classify_error(result.error, result.batch_error) == "transient":
+                    retry.append(token)
+
+            if not retry or attempt >= self.retry_attempts:
+                break
+            attempt += 1
+            report.retries += 1
+            delay = self.retry_delay * (2 ** (attempt - 1))
+            logger.warning(f"Retrying {len(retry)} FCM tokens in {delay:.1f}s (attempt {attempt})")
+            await asyncio.sleep(delay)
+            pending = retry
+
+        return [final[t] for t in tokens]
+
+    def shutdown(self, wait: bool = True):
+        """Stop the engine's own thread pool (an injected executor is left to its owner)"""
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
@@ -21,7 +21,8 @@ from .skills import SkillRegistry
 
 # Database imports (optional)
 try:
-    from .database import MongoDBClient
+    from .database import MongoDBClient, ConversationRepository
+    from .database.repository import COMPACTION_JOB
     DATABASE_AVAILABLE = True
 except ImportError:
     DATABASE_AVAILABLE = False
@@ -43,7 +44,10 @@ class BuddyRuntime:
         # Core components
         self.event_bus = get_event_bus()
         self.skill_registry = SkillRegistry(self.event_bus)
-        self.dialogue_manager = DialogueManager(self.event_bus, self.skill_registry)
+        self.dialogue_manager = DialogueManager(
+            self.event_bus, self.skill_registry,
+            max_history=self.config.get("dialogue", {}).get("max_conversation_history", 100)
+        )
         
         # Database (optional)
         self.database = None
@@ -54,6 +58,8 @@ class BuddyRuntime:
             except Exception as e:
                 logger.warning(f"Database initialization failed: {e}")
                 self.database = None
+        self.conversations = None
+        self._compaction_scheduler = None
         
         # State tracking
         self.active_sessions: Dict[str, str] = {}  # session_id -> user_id
@@ -113,7 +119,8 @@ class BuddyRuntime:
             "database": {
                 "enabled": True,
                 "type": "mongodb",
-                "config_file": "config/database.yml"
+                "config_file": "config/database.yml",
+                "compaction_interval_minutes": 60
             }
         }
         
@@ -148,6 +155,8 @@ class BuddyRuntime:
                     logger.warning(f"Database connection failed: {e}")
                     logger.info("BUDDY will continue without database persistence")
                     self.database = None
+            if self.database:
+                self._schedule_compaction()
             
             # Start core components
             await self.event_bus.start()
@@ -284,8 +293,21 @@ class BuddyRuntime:
         self._cleanup_task = asyncio.create_task(self._periodic_cleanup())
         self._metrics_task = asyncio.create_task(self._periodic_metrics())
         
+    def _schedule_compaction(self):
+        """Fold old conversation turns into archive chunks periodically."""
+        self.conversations = ConversationRepository(self.database)
+        minutes = self.config.get("database", {}).get("compaction_interval_minutes", 60)
+        try:
+            self._compaction_scheduler = self.conversations.schedule_compaction(int(minutes * 60))
+            logger.info(f"Conversation compaction scheduled every {minutes} minutes")
+        except ImportError as e:
+            logger.warning(f"Conversation compaction not scheduled (no job scheduler): {e}")
+        
     def _stop_background_tasks(self):
         """Stop background tasks."""
+        if self._compaction_scheduler is not None:
+            self._compaction_scheduler.cancel(COMPACTION_JOB)
+            self._compaction_scheduler = None
         if hasattr(self, '_cleanup_task'):
             self._cleanup_task.cancel()
         if hasattr(self, '_metrics_task'):
@@ -0,0 +1,548 @@
+"""
+BUDDY Session Store
+
+Bounded, externalizable storage for per-session state (dialogue contexts,
+conversation flow contexts, flow snapshots). Each ``SessionStore`` keeps a
+size-capped LRU of live objects in memory, expires idle entries through a
+hierarchical timing wheel (O(1) per touch, no full scans), and writes
+through to a shared backend so another worker - or this one after a
+restart - can pick a session up again. SQLite is used locally; Redis when
+``REDIS_URL`` is configured and the ``redis`` package is installed.
+"""
+
+import asyncio
+import json
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from enum import Enum
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class TimingWheel:
+    """
+    Hierarchical timing wheel for expiry deadlines.
+
+    Level 0 has ``slots`` buckets of ``tick_seconds`` each; every level above
+    covers ``slots`` times the span of the one below. Entries cascade down a
+    level as their bucket comes up, so scheduling, rescheduling and
+    cancelling are O(1) and ``advance`` only touches due buckets. Deadlines
+    beyond the top level's span are parked in its furthest bucket and
+    re-placed when it cascades.
+    """
+
+    def __init__(self, tick_seconds: float = 1.0, slots: int = 64, levels: int = 4,
+                 start: Optional[float] = None):
+        self.tick_seconds = tick_seconds
+        self.slots = slots
+        self.levels = levels
+        self.current_tick = int((time.time() if start is None else start) // tick_seconds)
+        self._wheels = [[set() for _ in range(slots)] for _ in range(levels)]
+        self._deadlines: Dict[Hashable, int] = {}
+        self._positions: Dict[Hashable, Tuple[int, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._deadlines
+
+    def schedule(self, key: Hashable, deadline: float):
+        """Schedule (or reschedule) ``key`` to expire at ``deadline`` (epoch seconds)."""
+        self.cancel(key)
+        tick = max(math.ceil(deadline / self.tick_seconds), self.current_tick + 1)
+        self._deadlines[key] = tick
+        self._place(key, tick)
+
+    def cancel(self, key: Hashable):
+        position = self._positions.pop(key, None)
+        if position is not None:
+            level, slot = position
+            self._wheels[level][slot].discard(key)
+            del self._deadlines[key]
+
+    def _place(self, key: Hashable, tick: int):
+        delta = tick - self.current_tick
+        for level in range(self.levels):
+            span = self.slots ** level
+            if delta < span * self.slots:
+                slot = (tick // span) % self.slots
+                break
+        else:
+            # Too far out for the wheel: park in the furthest top-level bucket
+            level = self.levels - 1
+            span = self.slots ** level
+            slot = (self.current_tick // span - 1) % self.slots
+        self._wheels[level][slot].add(key)
+        self._positions[key] = (level, slot)
+
+    def _cascade(self, level: int):
+        span = self.slots ** level
+        slot = (self.current_tick // span) % self.slots
+        bucket = self._wheels[level][slot]
+        if not bucket:
+            return
+        self._wheels[level][slot] = set()
+        for key in bucket:
+            self._place(key, self._deadlines[key])
+
+    def advance(self, now: Optional[float] = None) -> List[Hashable]:
+        """Move the wheel to ``now`` and return the keys whose deadline has passed."""
+        target = int((time.time() if now is None else now) // self.tick_seconds)
+        expired: List[Hashable] = []
+        while self.current_tick < target:
+            if not self._deadlines:
+                self.current_tick = target
+                break
+            self.current_tick += 1
+            for level in range(self.levels - 1, 0, -1):
+                if self.current_tick % (self.slots ** level) == 0:
+                    self._cascade(level)
+            slot = self.current_tick % self.slots
+            bucket = self._wheels[0][slot]
+            if bucket:
+                self._wheels[0][slot] = set()
+                for key in bucket:
+                    if self._deadlines[key] <= self.current_tick:
+                        del self._deadlines[key]
+                        del self._positions[key]
+                        expired.append(key)
+                    else:
+                        self._place(key, self._deadlines[key])
+        return expired
+
+
+# ---------- Backends ----------
+
+class SessionBackend:
+    """Durable key/value storage shared by all session stores of a process.
+
+    Methods are blocking; ``SessionStore`` calls them from an executor.
+    Every saved entry carries an opaque ``version`` token so a store can
+    tell whether its resident copy is still the one in the backend.
+    """
+
+    def load(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self.load_versioned(key)
+        return entry[0] if entry else None
+
+    def load_versioned(self, key: str) -> Optional[Tuple[Dict[str, Any], str]]:
+        """Return ``(data, version)`` for a live entry, or None."""
+        raise NotImplementedError
+
+    def version(self, key: str) -> Optional[str]:
+        """Version token of a live entry without loading it, or None if it is gone."""
+        raise NotImplementedError
+
+    def save(self, key: str, data: Dict[str, Any], ttl_seconds: float, version: str = ""):
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def touch(self, key: str, ttl_seconds: float) -> bool:
+        """Extend an entry's expiry to ``ttl_seconds`` from now. False if it is gone (or unsupported)."""
+        return False
+
+    def purge_expired(self) -> int:
+        """Drop entries whose TTL has passed. Returns the number removed."""
+        return 0
+
+    def close(self):
+        pass
+
+
+def _json_default(value: Any):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (set, tuple)):
+        return list(value)
+    return str(value)
+
+
+def dumps(data: Dict[str, Any]) -> str:
+    return json.dumps(data, default=_json_default, separators=(",", ":"))
+
+
+class SQLiteSessionBackend(SessionBackend):
+    """Single-file SQLite backend (WAL mode) for local deployments."""
+
+    def __init__(self, db_path: str = "buddy_sessions.db"):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS sessions (
+                key TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                version TEXT NOT NULL DEFAULT ''
+            )
+        ''')
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(sessions)")}
+        if "version" not in columns:  # databases created before entries were versioned
+            self._conn.execute("ALTER TABLE sessions ADD COLUMN version TEXT NOT NULL DEFAULT ''")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions(expires_at)")
+        self._conn.commit()
+
+    def load_versioned(self, key: str) -> Optional[Tuple[Dict[str, Any], str]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data, version FROM sessions WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        return (json.loads(row[0]), row[1]) if row else None
+
+    def version(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT version FROM sessions WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def save(self, key: str, data: Dict[str, Any], ttl_seconds: float, version: str = ""):
+        payload = dumps(data)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions (key, data, expires_at, version) VALUES (?, ?, ?, ?)",
+                (key, payload, time.time() + ttl_seconds, version)
+            )
+            self._conn.commit()
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM sessions WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def touch(self, key: str, ttl_seconds: float) -> bool:
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE sessions SET expires_at = ? WHERE key = ? AND expires_at > ?",
+                (now + ttl_seconds, key, now)
+            )
+            self._conn.commit()
+        return cursor.rowcount == 1
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM sessions WHERE expires_at <= ?", (time.time(),))
+            self._conn.commit()
+        return cursor.rowcount
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class RedisSessionBackend(SessionBackend):
+    """Redis backend; expiry is left to Redis key TTLs.
+
+    The version token lives in a sibling ``<key>#v`` key written in the same
+    transaction, so checking it does not transfer the session payload.
+    """
+
+    def __init__(self, url: str, prefix: str = "buddy:session:"):
+        import redis  # optional dependency
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def _keys(self, key: str) -> Tuple[str, str]:
+        return self.prefix + key, self.prefix + key + "#v"
+
+    def load_versioned(self, key: str) -> Optional[Tuple[Dict[str, Any], str]]:
+        raw, version = self.client.mget(*self._keys(key))
+        if not raw:
+            return None
+        return json.loads(raw), version.decode() if version else ""
+
+    def version(self, key: str) -> Optional[str]:
+        data_key, version_key = self._keys(key)
+        pipe = self.client.pipeline()
+        pipe.exists(data_key)
+        pipe.get(version_key)
+        exists, version = pipe.execute()
+        if not exists:
+            return None
+        return version.decode() if version else ""
+
+    def save(self, key: str, data: Dict[str, Any], ttl_seconds: float, version: str = ""):
+        ttl = max(1, int(math.ceil(ttl_seconds)))
+        data_key, version_key = self._keys(key)
+        pipe = self.client.pipeline()
+        pipe.set(data_key, dumps(data), ex=ttl)
+        pipe.set(version_key, version, ex=ttl)
+        pipe.execute()
+
+    def delete(self, key: str):
+        self.client.delete(*self._keys(key))
+
+    def touch(self, key: str, ttl_seconds: float) -> bool:
+        ttl = max(1, int(math.ceil(ttl_seconds)))
+        data_key, version_key = self._keys(key)
+        pipe = self.client.pipeline()
+        pipe.expire(data_key, ttl)
+        pipe.expire(version_key, ttl)
+        return bool(pipe.execute()[0])
+
+    def close(self):
+        self.client.close()
+
+
+_default_backend: Optional[SessionBackend] = None
+_default_backend_lock = threading.Lock()
+
+
+def create_session_backend(redis_url: Optional[str] = None,
+                           sqlite_path: Optional[str] = None) -> SessionBackend:
+    """Redis when a URL is given (or ``REDIS_URL`` is set) and reachable, else SQLite."""
+    redis_url = redis_url or os.getenv("REDIS_URL")
+    if redis_url:
+        try:
+            backend = RedisSessionBackend(redis_url)
+            backend.client.ping()
+            logger.info("Session store using Redis backend")
+            return backend
+        except Exception as e:
+            logger.warning(f"Redis session backend unavailable, falling back to SQLite: {e}")
+    path = sqlite_path or os.getenv("BUDDY_SESSION_DB", "buddy_sessions.db")
+    logger.info(f"Session store using SQLite backend at {path}")
+    return SQLiteSessionBackend(path)
+
+
+def get_session_backend() -> SessionBackend:
+    """Process-wide default backend, created on first use."""
+    global _default_backend
+    if _default_backend is None:
+        with _default_backend_lock:
+            if _default_backend is None:
+                _default_backend = create_session_backend()
+    return _default_backend
+
+
+# ---------- Store ----------
+
+class SessionStore:
+    """
+    LRU + timing-wheel session cache with write-through to a backend.
+
+    Only the ``max_entries`` most recently used sessions stay resident;
+    evicted ones are reloaded from the backend on the next ``get``. Idle
+    sessions expire ``ttl_seconds`` after their last access: a read that
+    finds the backend copy more than half a TTL since it was last written
+    or touched pushes its expiry out again, so a session that is only read
+    does not vanish from the backend while it is in use.
+
+    Other workers may write or delete the same session, so a resident copy
+    is revalidated against the backend's version token on every ``get``:
+    a changed version reloads the backend copy, a missing one drops the
+    session. Local expiry (``expire``) only frees memory; the backend copy
+    is left to its own TTL. ``encode`` and ``decode`` convert stored
+    objects to and from JSON-compatible dicts.
+    """
+
+    def __init__(self, namespace: str, backend: Optional[SessionBackend] = None,
+                 max_entries: int = 10000, ttl_seconds: float = 1800.0,
+                 encode: Optional[Callable[[Any], Dict[str, Any]]] = None,
+                 decode: Optional[Callable[[Dict[str, Any]], Any]] = None,
+                 clock: Callable[[], float] = time.time):
+        self.namespace = namespace
+        self.backend = backend
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.encode = encode or (lambda value: value)
+        self.decode = decode or (lambda data: data)
+        self.clock = clock
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self._synced: Dict[str, float] = {}  # key -> when its backend expiry was last set
+        self._versions: Dict[str, str] = {}  # key -> backend version of the resident copy
+        self._wheel = TimingWheel(start=clock())
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "loads": 0,
+            "stale_reloads": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "backend_touches": 0,
+            "backend_errors": 0
+        }
+
+    @property
+    def resident(self) -> "OrderedDict[str, Any]":
+        """Sessions currently held in memory (least recently used first)."""
+        return self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _backend_key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    async def _call_backend(self, fn, *args, on_error: Any = None):
+        try:
+            return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+        except Exception as e:
+            self.stats["backend_errors"] += 1
+            logger.warning(f"Session backend error ({self.namespace}): {e}")
+            return on_error
+
+    def _remember(self, key: str, value: Any):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        self._wheel.schedule(key, self.clock() + self.ttl_seconds)
+        while len(self._entries) > self.max_entries:
+            evicted, _ = self._entries.popitem(last=False)
+            self._wheel.cancel(evicted)
+            self._forget(evicted)
+            self.stats["evictions"] += 1
+
+    def _forget(self, key: str):
+        self._synced.pop(key, None)
+        self._versions.pop(key, None)
+
+    def _drop(self, key: str):
+        self._entries.pop(key, None)
+        self._wheel.cancel(key)
+        self._forget(key)
+
+    async def _save(self, key: str, value: Any):
+        version = uuid.uuid4().hex
+        self._synced[key] = self.clock()
+        self._versions[key] = version
+        await self._call_backend(self.backend.save, self._backend_key(key),
+                                 self.encode(value), self.ttl_seconds, version)
+
+    async def _refresh_backend(self, key: str, value: Any):
+        """Restart the backend copy's TTL, re-saving it if it has already gone."""
+        self._synced[key] = self.clock()
+        self.stats["backend_touches"] += 1
+        backend_key = self._backend_key(key)
+        if not await self._call_backend(self.backend.touch, backend_key, self.ttl_seconds):
+            await self._save(key, value)
+
+    async def _load(self, key: str) -> Optional[Any]:
+        present, before = key in self._entries, self._versions.get(key)
+        entry = await self._call_backend(self.backend.load_versioned, self._backend_key(key))
+        if key in self._entries and (not present or self._versions.get(key) != before):
+            return self._entries[key]  # stored by someone else while we were loading
+        if entry is None:
+            return None
+        data, version = entry
+        value = self.decode(data)
+        self.stats["loads"] += 1
+        self._remember(key, value)
+        self._versions[key] = version
+        await self._refresh_backend(key, value)  # the stored copy may be close to expiring
+        return value
+
+    async def get(self, key: str) -> Optional[Any]:
+        """Return the session for ``key`` (refreshing its expiry), or None."""
+        if key in self._entries:
+            if self.backend is not None:
+                known = self._versions.get(key)
+                # On a backend error keep serving the resident copy
+                stored = await self._call_backend(self.backend.version, self._backend_key(key), on_error=known)
+                if stored is None:  # deleted (or expired) by another worker
+                    self._drop(key)
+                    self.stats["misses"] += 1
+                    return None
+                if key in self._entries and stored != self._versions.get(key):
+                    self.stats["stale_reloads"] += 1
+                    value = await self._load(key)
+                    if value is None:
+                        self._drop(key)
+                    return value
+            if key in self._entries:  # may have been dropped while we were checking
+                self.stats["hits"] += 1
+                value = self._entries[key]
+                self._remember(key, value)
+                if self.backend is not None and self.clock() - self._synced.get(key, 0.0) >= self.ttl_seconds / 2:
+                    await self._refresh_backend(key, value)
+                return value
+        self.stats["misses"] += 1
+        if self.backend is None:
+            return None
+        return await self._load(key)
+
+    async def put(self, key: str, value: Any):
+        """Store or update a session and write it through to the backend."""
+        self._remember(key, value)
+        if self.backend is not None:
+            await self._save(key, value)
+
+    async def delete(self, key: str) -> Optional[Any]:
+        """Remove a session everywhere. Returns the resident object, if any."""
+        value = self._entries.get(key)
+        self._drop(key)
+        if self.backend is not None:
+            await self._call_backend(self.backend.delete, self._backend_key(key))
+        return value
+
+    async def expire(self, now: Optional[float] = None) -> List[Tuple[str, Any]]:
+        """Drop idle sessions from memory. Returns the ``(key, session)`` pairs that expired.
+
+        Backend copies are not deleted here - another worker may still be
+        using the session - they go when their own TTL runs out.
+        """
+        expired = []
+        for key in self._wheel.advance(self.clock() if now is None else now):
+            value = self._entries.pop(key, None)
+            self._forget(key)
+            if value is not None:
+                expired.append((key, value))
+        if self.backend is not None:
+            await self._call_backend(self.backend.purge_expired)
+        self.stats["expirations"] += len(expired)
+        return expired
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "namespace": self.namespace,
+            "resident": len(self._entries),
+            "max_entries": self.max_entries,
+            "scheduled": len(self._wheel),
+            **self.stats
+        }
+
+
+# ---------- History capping ----------
+
+def summarize_turns(summary: str, dropped: List[Dict[str, Any]], max_chars: int = 1000) -> str:
+    """Fold dropped history items into a bounded, rolling plain-text summary."""
+    pieces = [summary] if summary else []
+    for item in dropped:
+        text = str(item.get("user_input") or item.get("content") or "").strip()
+        intent = item.get("intent")
+        if text or intent:
+            pieces.append(f"{intent}: {text[:80]}" if intent else text[:80])
+    combined = "; ".join(pieces)
+    if len(combined) > max_chars:
+        combined = "..." + combined[-(max_chars - 3):]
+    return combined
+
+
+def cap_history(history: List[Dict[str, Any]], summary: str, max_items: int,
+                summarize: Callable[[str, List[Dict[str, Any]]], str] = summarize_turns) -> str:
+    """Trim ``history`` in place to its last ``max_items`` entries.
+
+    The dropped entries are folded into ``summary``; the updated summary is
+    returned (unchanged if nothing was dropped).
+    """
+    overflow = len(history) - max_items
+    if max_items <= 0 or overflow <= 0:
+        return summary
+    dropped = history[:overflow]
+    del history[:overflow]
+    return summarize(summary, dropped)
@@ -0,0 +1,373 @@
+"""
+BUDDY Skill Execution Engine
+
+Runs skill invocations behind per-skill isolation so one slow or failing
+skill cannot degrade the rest:
+
+- Bulkheads: a concurrency cap and a bounded wait queue per skill
+- Circuit breakers: open on a high error rate, probe again when half-open
+- Result cache: TTL memoization of idempotent skills, keyed on normalized input
+- Latency histograms: per-skill buckets for monitoring and tail percentiles
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, replace
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is +Inf
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class SkillUnavailableError(Exception):
+    """Raised when a call is rejected by a circuit breaker or a full bulkhead."""
+
+    def __init__(self, message: str, reason: str):
+        super().__init__(message)
+        self.reason = reason
+
+
+@dataclass
+class ExecutionPolicy:
+    """Isolation settings for one skill."""
+
+    max_concurrency: int = 8
+    max_queue: int = 32
+    cache_ttl_seconds: float = 0.0
+    error_threshold: float = 0.5
+    min_calls: int = 10
+    window_size: int = 20
+    reset_timeout_seconds: float = 30.0
+    half_open_max_calls: int = 1
+
+
+class LatencyHistogram:
+    """Cumulative latency histogram with fixed millisecond buckets."""
+
+    def __init__(self, buckets_ms: Tuple[float, ...] = LATENCY_BUCKETS_MS):
+        self.buckets_ms = buckets_ms
+        self.counts = [0] * (len(buckets_ms) + 1)
+        self.count = 0
+        self.sum_ms = 0.0
+
+    def observe(self, latency_ms: float):
+        index = len(self.buckets_ms)
+        for i, bound in enumerate(self.buckets_ms):
+            if latency_ms <= bound:
+                index = i
+                break
+        self.counts[index] += 1
+        self.count += 1
+        self.sum_ms += latency_ms
+
+    def percentile(self, q: float) -> float:
+        """Upper bound of the bucket containing the q-th percentile (0-100)."""
+        if self.count == 0:
+            return 0.0
+        rank = q / 100.0 * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and n:
+                return float(self.buckets_ms[i]) if i < len(self.buckets_ms) else float("inf")
+        return float("inf")
+
+    def to_dict(self) -> Dict[str, Any]:
+        cumulative = 0
+        buckets = {}
+        for bound, n in zip([*map(str, self.buckets_ms), "+Inf"], self.counts):
+            cumulative += n
+            buckets[bound] = cumulative
+        return {
+            "buckets_ms": buckets,
+            "count": self.count,
+            "sum_ms": round(self.sum_ms, 3),
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+        }
+
+
+class CircuitBreaker:
+    """
+    Error-rate circuit breaker over a sliding window of recent calls.
+
+    closed -> open when at least ``min_calls`` outcomes are recorded and the
+    failure ratio reaches ``error_threshold``; open -> half_open after
+    ``reset_timeout_seconds``; half_open admits ``half_open_max_calls`` probes
+    and closes on a successful probe or re-opens on a failed one.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, policy: ExecutionPolicy, clock: Callable[[], float] = time.monotonic):
+        self.policy = policy
+        self.clock = clock
+        self.state = self.CLOSED
+        self.outcomes: Deque[bool] = deque(maxlen=policy.window_size)
+        self.opened_at = 0.0
+        self.probes_in_flight = 0
+        self.times_opened = 0
+
+    def allow(self) -> bool:
+        if self.state == self.OPEN:
+            if self.clock() - self.opened_at < self.policy.reset_timeout_seconds:
+                return False
+            self.state = self.HALF_OPEN
+            self.probes_in_flight = 0
+        if self.state == self.HALF_OPEN:
+            if self.probes_in_flight >= self.policy.half_open_max_calls:
+                return False
+            self.probes_in_flight += 1
+        return True
+
+    def record(self, success: bool):
+        if self.state == self.HALF_OPEN:
+            self.probes_in_flight = max(0, self.probes_in_flight - 1)
+            if success:
+                self.state = self.CLOSED
+                self.outcomes.clear()
+            else:
+                self._open()
+            return
+
+        self.outcomes.append(success)
+        if self.state == self.CLOSED and len(self.outcomes) >= self.policy.min_calls:
+            failures = self.outcomes.count(False)
+            if failures / len(self.outcomes) >= self.policy.error_threshold:
+                self._open()
+
+    def _open(self):
+        self.state = self.OPEN
+        self.opened_at = self.clock()
+        self.outcomes.clear()
+        self.times_opened += 1
+        logger.warning(f"Circuit opened ({self.times_opened} times so far)")
+
+
+class Bulkhead:
+    """Concurrency cap with a bounded number of waiting callers."""
+
+    def __init__(self, max_concurrency: int, max_queue: int):
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max(0, max_queue)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.active = 0
+        self.waiting = 0
+        self.rejected = 0
+
+    async def __aenter__(self):
+        if self._semaphore.locked() and self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise SkillUnavailableError("busy", "bulkhead_full")
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.active += 1
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.active -= 1
+        self._semaphore.release()
+        return False
+
+
+class ResultCache:
+    """TTL + LRU cache of successful skill results keyed on normalized input."""
+
+    def __init__(self, max_entries: int = 2048, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.clock = clock
+        self._data: "OrderedDict[Tuple[str, str], Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def normalize(parameters: Optional[Dict[str, Any]]) -> str:
+        """Canonical form of skill input: sorted keys, trimmed lower-case strings."""
+
+        def canonical(value):
+            if isinstance(value, str):
+                return " ".join(value.split()).lower()
+            if isinstance(value, dict):
+                return {str(k): canonical(v) for k, v in value.items()}
+            if isinstance(value, (list, tuple)):
+                return [canonical(v) for v in value]
+            return value
+
+        return json.dumps(canonical(parameters or {}), sort_keys=True, default=str)
+
+    def get(self, skill_name: str, key: str) -> Optional[Any]:
+        entry = self._data.get((skill_name, key))
+        if entry is None or entry[0] <= self.clock():
+            if entry is not None:
+                del self._data[(skill_name, key)]
+            self.misses += 1
+            return None
+        self._data.move_to_end((skill_name, key))
+        self.hits += 1
+        return entry[1]
+
+    def put(self, skill_name: str, key: str, value: Any, ttl_seconds: float):
+        self._data[(skill_name, key)] = (self.clock() + ttl_seconds, value)
+        self._data.move_to_end((skill_name, key))
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def invalidate(self, skill_name: str):
+        for key in [k for k in self._data if k[0] == skill_name]:
+            del self._data[key]
+
+
+class SkillExecutionEngine:
+    """
+    Executes skill calls with per-skill bulkheads, circuit breakers,
+    result caching and latency histograms.
+
+    Policies are created on first use from ``default_policy`` unless set with
+    ``configure``; ``SkillRegistry`` derives them from each skill's schema.
+    """
+
+    def __init__(self, default_policy: Optional[ExecutionPolicy] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.default_policy = default_policy or ExecutionPolicy()
+        self.clock = clock
+        self.policies: Dict[str, ExecutionPolicy] = {}
+        self.bulkheads: Dict[str, Bulkhead] = {}
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self.counters: Dict[str, Dict[str, int]] = {}
+        self.cache = ResultCache(clock=clock)
+
+    def configure(self, skill_name: str, policy: ExecutionPolicy):
+        """Install (or replace) the policy for a skill and reset its state."""
+        self.reset(skill_name)
+        self.policies[skill_name] = policy
+
+    def reset(self, skill_name: str):
+        for table in (self.policies, self.bulkheads, self.breakers, self.histograms, self.counters):
+            table.pop(skill_name, None)
+        self.cache.invalidate(skill_name)
+
+    def _state(self, skill_name: str):
+        policy = self.policies.setdefault(skill_name, self.default_policy)
+        if skill_name not in self.bulkheads:
+            self.bulkheads[skill_name] = Bulkhead(policy.max_concurrency, policy.max_queue)
+            self.breakers[skill_name] = CircuitBreaker(policy, self.clock)
+            self.histograms[skill_name] = LatencyHistogram()
+            self.counters[skill_name] = {
+                "calls": 0, "successes": 0, "failures": 0, "timeouts": 0,
+                "cache_hits": 0, "rejected_open": 0, "rejected_busy": 0,
+            }
+        return (policy, self.bulkheads[skill_name], self.breakers[skill_name],
+                self.histograms[skill_name], self.counters[skill_name])
+
+    async def execute(self, skill_name: str, call: Callable[[], Awaitable[Any]],
+                      parameters: Optional[Dict[str, Any]] = None,
+                      timeout_seconds: Optional[float] = None) -> Any:
+        """
+        Run ``call`` for ``skill_name`` under its policy.
+
+        Raises:
+            SkillUnavailableError: circuit open or bulkhead full
+            asyncio.TimeoutError: the call exceeded ``timeout_seconds``
+            Exception: whatever the skill raised
+        """
+        policy, bulkhead, breaker, histogram, counters = self._state(skill_name)
+        counters["calls"] += 1
+
+        cache_key = None
+        if policy.cache_ttl_seconds > 0:
+            cache_key = ResultCache.normalize(parameters)
+            cached = self.cache.get(skill_name, cache_key)
+            if cached is not None:
+                counters["cache_hits"] += 1
+                return _copy_result(cached, cached=True)
+
+        if not breaker.allow():
+            counters["rejected_open"] += 1
+            raise SkillUnavailableError(
+                f"Skill '{skill_name}' is temporarily unavailable", "circuit_open"
+            )
+
+        try:
+            async with bulkhead:
+                start = time.perf_counter()
+                try:
+                    result = await asyncio.wait_for(call(), timeout=timeout_seconds)
+                finally:
+                    histogram.observe((time.perf_counter() - start) * 1000.0)
+        except SkillUnavailableError as e:
+            if e.reason != "bulkhead_full":
+                raise
+            counters["rejected_busy"] += 1
+            # The rejected call never ran; release a half-open probe slot
+            if breaker.state == CircuitBreaker.HALF_OPEN:
+                breaker.probes_in_flight = max(0, breaker.probes_in_flight - 1)
+            raise SkillUnavailableError(f"Skill '{skill_name}' is busy", "bulkhead_full")
+        except asyncio.TimeoutError:
+            counters["timeouts"] += 1
+            counters["failures"] += 1
+            breaker.record(False)
+            raise
+        except Exception:
+            counters["failures"] += 1
+            breaker.record(False)
+            raise
+        counters["successes"] += 1
+        breaker.record(True)
+
+        if cache_key is not None and getattr(result, "success", False):
+            self.cache.put(skill_name, cache_key, _copy_result(result), policy.cache_ttl_seconds)
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-skill counters, breaker state, bulkhead occupancy and latency histogram."""
+        stats = {}
+        for skill_name, counters in self.counters.items():
+            bulkhead = self.bulkheads[skill_name]
+            breaker = self.breakers[skill_name]
+            stats[skill_name] = {
+                **counters,
+                "circuit_state": breaker.state,
+                "circuit_opened": breaker.times_opened,
+                "active": bulkhead.active,
+                "waiting": bulkhead.waiting,
+                "latency": self.histograms[skill_name].to_dict(),
+            }
+        return {
+            "skills": stats,
+            "cache": {"entries": len(self.cache._data), "hits": self.cache.hits, "misses": self.cache.misses},
+        }
+
+    def prometheus_lines(self, metric: str = "buddy_skill_latency_ms") -> List[str]:
+        """Latency histograms in Prometheus text exposition format."""
+        lines = [f"# TYPE {metric} histogram"]
+        for skill_name, histogram in self.histograms.items():
+            cumulative = 0
+            for bound, n in zip([*map(str, histogram.buckets_ms), "+Inf"], histogram.counts):
+                cumulative += n
+                lines.append(f'{metric}_bucket{{skill="{skill_name}",le="{bound}"}} {cumulative}')
+            lines.append(f'{metric}_sum{{skill="{skill_name}"}} {histogram.sum_ms}')
+            lines.append(f'{metric}_count{{skill="{skill_name}"}} {histogram.count}')
+        return lines
+
+
+def _copy_result(result: Any, cached: bool = False) -> Any:
+    """Copy a SkillResult so callers can annotate it without touching the cache."""
+    try:
+        metadata = dict(getattr(result, "metadata", None) or {})
+        if cached:
+            metadata["cached"] = True
+        return replace(result, metadata=metadata)
+    except TypeError:
+        return result
@@ -0,0 +1,157 @@
+"""
+Skill manifest for BUDDY's lazy skill registry.
+
+Discovery used to exec-import every skill module at startup. The manifest
+instead describes each skill module statically (parsed with ``ast``, never
+imported) and caches the result keyed by file mtime and size, so a restart
+only re-parses files that changed. The registry imports a module the first
+time one of its skills is actually executed.
+"""
+
+import ast
+import json
+import logging
+import os
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+DEFAULT_MANIFEST_PATH = Path.home() / ".cache" / "buddy" / "skill_manifest.json"
+
+# SkillSchema keywords that can be read from a literal in the source
+_STATIC_FIELDS = ("name", "version", "description", "category")
+
+
+@dataclass
+class SkillManifestEntry:
+    """Static description of one skill class inside a module."""
+    name: Optional[str]  # None when the schema name is not a literal
+    module_path: str
+    class_name: str
+    version: str = "1.0.0"
+    description: str = ""
+    category: str = "general"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _base_name(node: ast.expr) -> str:
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    return ""
+
+
+def _schema_literals(class_node: ast.ClassDef) -> Dict[str, Any]:
+    """Literal keyword arguments of the first ``SkillSchema(...)`` call in a class body."""
+    for node in ast.walk(class_node):
+        if isinstance(node, ast.Call) and _base_name(node.func) == "SkillSchema":
+            fields = {}
+            for kw in node.keywords:
+                if kw.arg in _STATIC_FIELDS:
+                    try:
+                        fields[kw.arg] = ast.literal_eval(kw.value)
+                    except (ValueError, TypeError, SyntaxError):
+                        pass
+            return fields
+    return {}
+
+
+class SkillManifest:
+    """Cached, import-free index of skill modules."""
+
+    def __init__(self, cache_path: Optional[Path] = None):
+        env_path = os.getenv("BUDDY_SKILL_MANIFEST")
+        self.cache_path = Path(cache_path or env_path or DEFAULT_MANIFEST_PATH)
+        # module path -> {"mtime", "size", "skills": [SkillManifestEntry]}
+        self.modules: Dict[str, Dict[str, Any]] = {}
+        self.parsed = 0  # modules (re)parsed rather than served from the cache
+        self._dirty = False
+        self._load()
+
+    def _load(self):
+        try:
+            data = json.loads(self.cache_path.read_text())
+        except (OSError, ValueError):
+            return
+        if data.get("version") != MANIFEST_VERSION:
+            return
+        for path, record in data.get("modules", {}).items():
+            self.modules[path] = {
+                "mtime": record["mtime"],
+                "size": record["size"],
+                "skills": [SkillManifestEntry(**e) for e in record["skills"]],
+            }
+
+    def save(self):
+        """Write the manifest back if anything changed since it was loaded."""
+        if not self._dirty:
+            return
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            payload = {
+                "version": MANIFEST_VERSION,
+                "modules": {
+                    path: {**record, "skills": [e.to_dict() for e in record["skills"]]}
+                    for path, record in self.modules.items()
+                },
+            }
+            tmp = self.cache_path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(payload, indent=2))
+            tmp.replace(self.cache_path)
+            self._dirty = False
+        except OSError as e:
+            logger.warning(f"Could not write skill manifest {self.cache_path}: {e}")
+
+    @staticmethod
+    def parse_module(module_path: Path) -> List[SkillManifestEntry]:
+        """Find skill classes in a module without importing it."""
+        tree = ast.parse(module_path.read_text(encoding="utf-8"), filename=str(module_path))
+        entries = []
+        for node in tree.body:
+            if not isinstance(node, ast.ClassDef):
+                continue
+            if not any(_base_name(base).endswith("Skill") for base in node.bases):
+                continue
+            fields = _schema_literals(node)
+            entries.append(SkillManifestEntry(
+                name=fields.get("name"),
+                module_path=str(module_path),
+                class_name=node.name,
+                version=fields.get("version", "1.0.0"),
+                description=fields.get("description", ""),
+                category=fields.get("category", "general"),
+            ))
+        return entries
+
+    def scan(self, search_path: Path) -> List[SkillManifestEntry]:
+        """Entries for every ``*.py`` under ``search_path``, re-parsing only changed files."""
+        entries: List[SkillManifestEntry] = []
+        seen = set()
+        for py_file in sorted(search_path.glob("*.py")):
+            key = str(py_file)
+            seen.add(key)
+            try:
+                stat = py_file.stat()
+                record = self.modules.get(key)
+                if record and record["mtime"] == stat.st_mtime and record["size"] == stat.st_size:
+                    entries.extend(record["skills"])
+                    continue
+                parsed = self.parse_module(py_file)
+                self.parsed += 1
+            except (OSError, SyntaxError, UnicodeDecodeError) as e:
+                logger.error(f"Error indexing skill module {py_file}: {e}")
+                continue
+            self.modules[key] = {"mtime": stat.st_mtime, "size": stat.st_size, "skills": parsed}
+            self._dirty = True
+            entries.extend(parsed)
+        # Drop modules that disappeared from this directory
+        for key in [k for k in self.modules if Path(k).parent == search_path and k not in seen]:
+            del self.modules[key]
+            self._dirty = True
+        return entries
@@ -17,6 +17,8 @@ from pathlib import Path
 import yaml
 
 from .events import EventBus, Event, get_event_bus
+from .skill_engine import ExecutionPolicy, SkillExecutionEngine, SkillUnavailableError
+from .skill_manifest import SkillManifest, SkillManifestEntry
 
 logger = logging.getLogger(__name__)
 
@@ -37,6 +39,8 @@ class SkillSchema:
     requires_confirmation: bool = False
     requires_online: bool = False
     supported_devices: List[str] = field(default_factory=lambda: ["all"])
+    max_concurrency: int = 8  # concurrent executions before callers queue
+    cache_ttl_seconds: float = 0.0  # > 0 memoizes successful results of idempotent skills
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for serialization."""
@@ -52,7 +56,9 @@ class SkillSchema:
             "author": self.author,
             "requires_confirmation": self.requires_confirmation,
             "requires_online": self.requires_online,
-            "supported_devices": self.supported_devices
+            "supported_devices": self.supported_devices,
+            "max_concurrency": self.max_concurrency,
+            "cache_ttl_seconds": self.cache_ttl_seconds
         }
     
     @classmethod
@@ -165,6 +171,9 @@ class SkillRegistry:
         self.permission_grants: Dict[str, List[str]] = {}  # user_id -> permissions
         self._registration_lock = asyncio.Lock()  # Prevent concurrent registrations
         self._builtin_skills_loaded = False  # Track if builtin skills are loaded
+        self.engine = SkillExecutionEngine()  # Bulkheads, circuit breakers, result cache
+        self.lazy_skills: Dict[str, SkillManifestEntry] = {}  # discovered, not yet imported
+        self._materialize_locks: Dict[str, asyncio.Lock] = {}
         
         # Subscribe to skill execution requests
         self.event_bus.subscribe("skill.execute", self._handle_skill_execution)
@@ -322,6 +331,11 @@ class SkillRegistry:
             # Register skill
             self.skills[schema.name] = skill
             self.schemas[schema.name] = schema
+            self.engine.configure(schema.name, ExecutionPolicy(
+                max_concurrency=schema.max_concurrency,
+                max_queue=schema.max_concurrency * 4,
+                cache_ttl_seconds=schema.cache_ttl_seconds
+            ))
             
             # Update category mapping
             if schema.category not in self.categories:
@@ -372,6 +386,7 @@ class SkillRegistry:
             # Remove from registry
             del self.skills[skill_name]
             del self.schemas[skill_name]
+            self.engine.reset(skill_name)
             
             # Update category mapping
             if schema.category in self.categories:
@@ -409,6 +424,10 @@ class SkillRegistry:
         """
         start_time = datetime.now()
         
+        # Import discovered skills on first use
+        if skill_name not in self.skills and skill_name in self.lazy_skills:
+            await self._materialize(skill_name)
+            
         # Check if skill exists
         if skill_name not in self.skills:
             return SkillResult(
@@ -450,10 +469,12 @@ class SkillRegistry:
             )
             
         try:
-            # Execute skill with timeout
-            result = await asyncio.wait_for(
-                skill.execute(parameters, context),
-                timeout=schema.timeout_ms / 1000.0
+            # Execute skill with timeout, behind its bulkhead and circuit breaker
+            result = await self.engine.execute(
+                skill_name,
+                lambda: skill.execute(parameters, context),
+                parameters,
+                timeout_seconds=schema.timeout_ms / 1000.0
             )
             
             # Calculate execution time
@@ -477,6 +498,12 @@ class SkillRegistry:
             
             return result
             
+        except SkillUnavailableError as e:
+            return SkillResult(
+                success=False,
+                error_message=str(e),
+                metadata={"rejected": e.reason}
+            )
         except asyncio.TimeoutError:
             return SkillResult(
                 success=False,
@@ -557,16 +584,38 @@ class SkillRegistry:
                 "requires_confirmation": schema.requires_confirmation
             })
             
+        # Discovered skills that have not been imported yet
+        for name, entry in self.lazy_skills.items():
+            if name in self.schemas or (category and entry.category != category):
+                continue
+            skills.append({
+                "name": name,
+                "version": entry.version,
+                "description": entry.description,
+                "category": entry.category,
+                "enabled": True,
+                "loaded": False
+            })
+            
         return skills
 
+    def get_execution_stats(self) -> Dict[str, Any]:
+        """Per-skill latency histograms, breaker states and cache counters."""
+        return self.engine.get_stats()
+
     # (Removed duplicate out-of-class helper methods)
 
-    async def discover_skills(self, search_paths: List[Path]):
+    async def discover_skills(self, search_paths: List[Path], manifest: Optional[SkillManifest] = None):
         """
-        Discover and load skills from specified paths.
+        Discover skills from specified paths.
+        
+        Python modules are indexed through the skill manifest and imported on
+        first execution; only modules whose skill name cannot be read
+        statically are imported up front.
         
         Args:
             search_paths: List of paths to search for skills
+            manifest: Manifest to use (defaults to the shared on-disk cache)
         """
         # Register built-in skills first
         try:
@@ -575,26 +624,66 @@ class SkillRegistry:
         except Exception as e:
             logger.error(f"Failed to register built-in skills: {e}")
         
+        manifest = manifest or SkillManifest()
+        
         # Then discover custom skills from paths
         for path in search_paths:
             if not path.exists():
                 continue
                 
-            # Look for Python skill modules
-            for py_file in path.glob("*.py"):
-                await self._load_skill_module(py_file)
+            # Index Python skill modules without importing them
+            eager_modules = set()
+            for entry in manifest.scan(path):
+                if entry.name is None:
+                    eager_modules.add(entry.module_path)
+                elif entry.name not in self.skills:
+                    self.lazy_skills[entry.name] = entry
+                    
+            for module_path in sorted(eager_modules):
+                await self._load_skill_module(Path(module_path))
                 
             # Look for YAML skill definitions
             for yaml_file in path.glob("*.yaml"):
                 await self._load_skill_yaml(yaml_file)
                 
+        manifest.save()
+        logger.info(f"Skill discovery: {len(self.lazy_skills)} deferred, "
+                    f"{manifest.parsed} module(s) parsed")
+                
+    async def _materialize(self, skill_name: str) -> bool:
+        """Import, instantiate and register a discovered skill."""
+        lock = self._materialize_locks.setdefault(skill_name, asyncio.Lock())
+        async with lock:
+            if skill_name in self.skills:
+                return True
+            entry = self.lazy_skills.get(skill_name)
+            if entry is None:
+                return False
+            try:
+                loop = asyncio.get_running_loop()
+                module = await loop.run_in_executor(None, self._import_module, Path(entry.module_path))
+                skill_class = getattr(module, entry.class_name)
+                ok = await self.register_skill(skill_class(self.event_bus))
+            except Exception as e:
+                logger.error(f"Error loading skill {skill_name} from {entry.module_path}: {e}")
+                ok = False
+            if ok and skill_name in self.skills:
+                del self.lazy_skills[skill_name]
+                return True
+            return False
+            
+    @staticmethod
+    def _import_module(module_path: Path):
+        import importlib.util
+        spec = importlib.util.spec_from_file_location(f"buddy_skill_{module_path.stem}", module_path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module
+        
     async def _load_skill_module(self, module_path: Path):
         """Load a skill from a Python module."""
         try:
-            import importlib.util
-            spec = importlib.util.spec_from_file_location("skill", module_path)
-            module = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(module)
+            module = self._import_module(module_path)
             
             # Look for skill classes
             for attr_name in dir(module):
@@ -630,7 +719,8 @@ class TimeSkill(BaseSkill):
             description="Provide current local time with contextual information",
             input_schema={"type": "object", "properties": {"query_type": {"type": "string"}}},
             output_schema={"type": "object", "properties": {"text": {"type": "string"}}},
-            category="utility"
+            category="utility",
+            cache_ttl_seconds=1.0  # answer has minute resolution
         )
         return True
 
@@ -771,7 +861,8 @@ class WeatherSkill(BaseSkill):
             description="Provide detailed weather information with contextual advice",
             input_schema={"type": "object", "properties": {"location": {"type": "string"}}},
             output_schema={"type": "object", "properties": {"text": {"type": "string"}}},
-            category="information"
+            category="information",
+            max_concurrency=4  # outbound HTTP; keep a slow upstream from piling up tasks
         )
         return True
 
@@ -848,7 +939,8 @@ class CalculatorSkill(BaseSkill):
             description="Perform mathematical calculations with detailed explanations",
             input_schema={"type": "object", "properties": {"expression": {"type": "string"}}},
             output_schema={"type": "object", "properties": {"text": {"type": "string"}}},
-            category="utility"
+            category="utility",
+            cache_ttl_seconds=3600.0
         )
         return True
 
@@ -909,7 +1001,8 @@ class HelpSkill(BaseSkill):
             description="Provide comprehensive help and capability information",
             input_schema={"type": "object", "properties": {"help_type": {"type": "string"}}},
             output_schema={"type": "object", "properties": {"text": {"type": "string"}}},
-            category="information"
+            category="information",
+            cache_ttl_seconds=3600.0
         )
         return True
 
@@ -0,0 +1,160 @@
+"""
+Capture-path benchmark for the BUDDY voice pipeline.
+
+Replays a 16-bit mono WAV file (or a synthesized silence/tone/silence clip)
+into ``VoicePipeline.feed_audio`` at real-time pace from a producer thread,
+the same way the sounddevice callback does, and reports:
+
+  - frame jitter: delay between a frame being captured and the event loop
+    handling it (p50/p95/p99/max), plus ring overruns
+  - end-of-speech to transcript latency, using a stub recognizer with a
+    fixed decode cost so only pipeline overhead is measured
+
+Usage:
+    python packages/voice/benchmarks/bench_capture_latency.py [clip.wav] [--asr-ms 50]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+import wave
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from buddy_voice.pipeline import AudioConfig, VoicePipeline  # noqa: E402
+from buddy_voice.vad import VoiceActivityDetector  # noqa: E402
+
+
+class StubRecognizer:
+    """Stands in for SpeechRecognizer with a fixed decode cost."""
+
+    def __init__(self, decode_ms: float):
+        self.decode_ms = decode_ms
+        self.last_confidence = 1.0
+
+    async def transcribe(self, audio: np.ndarray) -> str:
+        await asyncio.sleep(self.decode_ms / 1000.0)
+        return f"{len(audio)} samples"
+
+    async def stop(self):
+        pass
+
+
+class IdleWakeWord:
+    """Never fires, so the pipeline idles after the first utterance."""
+
+    last_confidence = 0.0
+
+    async def process_audio(self, audio: np.ndarray) -> bool:
+        return False
+
+    async def stop(self):
+        pass
+
+
+class InstrumentedPipeline(VoicePipeline):
+    """Records how long each frame waited between capture and handling."""
+
+    def __init__(self, config: AudioConfig, event_callback=None):
+        super().__init__(config, event_callback)
+        self.frame_delays = []
+
+    async def _handle_frame(self, audio_chunk, captured_at):
+        self.frame_delays.append(time.perf_counter() - captured_at)
+        await super()._handle_frame(audio_chunk, captured_at)
+
+
+def load_wav(path: str, sample_rate: int) -> np.ndarray:
+    with wave.open(path, "rb") as wav:
+        if wav.getsampwidth() != 2:
+            raise ValueError("Only 16-bit PCM WAV files are supported")
+        if wav.getframerate() != sample_rate:
+            raise ValueError(f"Expected {sample_rate}Hz audio, got {wav.getframerate()}Hz")
+        audio = np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16)
+        if wav.getnchannels() > 1:
+            audio = audio[::wav.getnchannels()]
+    return audio
+
+
+def synthesize_clip(sample_rate: int) -> np.ndarray:
+    """0.5s silence, 2s of 'speech' (tone + noise), 2s silence."""
+    rng = np.random.default_rng(0)
+    t = np.arange(int(2.0 * sample_rate)) / sample_rate
+    speech = 0.3 * np.sin(2 * np.pi * 1000 * t) + 0.05 * rng.standard_normal(t.size)
+    silence = lambda seconds: 0.001 * rng.standard_normal(int(seconds * sample_rate))
+    clip = np.concatenate([silence(0.5), speech, silence(2.0)])
+    return (clip * 32767).astype(np.int16)
+
+
+def replay(pipeline: VoicePipeline, audio: np.ndarray, chunk_size: int, sample_rate: int):
+    """Producer thread: push frames at the rate a sound card would deliver them."""
+    period = chunk_size / sample_rate
+    start = time.perf_counter()
+    for i, offset in enumerate(range(0, len(audio) - chunk_size + 1, chunk_size)):
+        delay = start + i * period - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        pipeline.feed_audio(audio[offset:offset + chunk_size])
+
+
+def percentiles(values_ms):
+    if not values_ms:
+        return "n/a"
+    p50, p95, p99 = np.percentile(values_ms, [50, 95, 99])
+    return f"p50={p50:.3f}ms p95={p95:.3f}ms p99={p99:.3f}ms max={max(values_ms):.3f}ms"
+
+
+async def run(args):
+    config = AudioConfig()
+    audio = load_wav(args.wav, config.sample_rate) if args.wav else synthesize_clip(config.sample_rate)
+
+    events = {}
+
+    def on_event(event):
+        events.setdefault(event.event_type, time.perf_counter())
+
+    pipeline = InstrumentedPipeline(config, event_callback=on_event)
+    pipeline.vad = VoiceActivityDetector(config)
+    await pipeline.vad.initialize()
+    pipeline.asr = StubRecognizer(args.asr_ms)
+    pipeline.wake_word_detector = IdleWakeWord()
+
+    await pipeline.start_processing(capture_audio=False)
+    await pipeline.force_listen()
+
+    producer = threading.Thread(
+        target=replay, args=(pipeline, audio, config.chunk_size, config.sample_rate), daemon=True
+    )
+    producer.start()
+    while producer.is_alive():
+        await asyncio.sleep(0.05)
+    # Let the loop drain the tail of the clip and finish any transcription
+    await asyncio.sleep(0.5 + args.asr_ms / 1000.0)
+    await pipeline.stop()
+
+    delays_ms = [d * 1000.0 for d in pipeline.frame_delays]
+    print(f"frames handled: {len(delays_ms)}  overruns: {pipeline.frame_ring.overruns}")
+    print(f"frame jitter:   {percentiles(delays_ms)}")
+    if "speech_end" in events and "transcript" in events:
+        total_ms = (events["transcript"] - events["speech_end"]) * 1000.0
+        overhead_ms = total_ms - args.asr_ms
+        print(f"end-of-speech -> transcript: {total_ms:.2f}ms "
+              f"(pipeline overhead {overhead_ms:.2f}ms over {args.asr_ms:.0f}ms decode)")
+    else:
+        print(f"no complete utterance detected (events: {sorted(events)})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("wav", nargs="?", help="16kHz 16-bit WAV to replay")
+    parser.add_argument("--asr-ms", type=float, default=50.0, help="stub recognizer decode time")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
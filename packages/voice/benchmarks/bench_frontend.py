@@ -0,0 +1,79 @@
+"""
+VAD + wake-word front-end throughput.
+
+Runs the energy VAD and the simple wake-word detector over synthetic audio
+frame by frame (``process_audio``, as the pipeline does) and in blocks
+(``process_block``), and reports per-frame cost and how many real-time
+16kHz sessions one core could sustain.
+
+Usage:
+    python packages/voice/benchmarks/bench_frontend.py [--frames 5000] [--block 32]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from buddy_voice.pipeline import AudioConfig  # noqa: E402
+from buddy_voice.vad import VoiceActivityDetector  # noqa: E402
+from buddy_voice.wake_word import WakeWordDetector  # noqa: E402
+
+
+def make_frames(n_frames: int, frame_length: int) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    t = np.arange(frame_length) / 16000
+    amplitude = np.repeat(rng.choice([0.0, 300.0, 8000.0], size=n_frames // 20 + 1), 20)[:n_frames]
+    tone = np.sin(2 * np.pi * 440 * t)
+    frames = amplitude[:, None] * tone[None, :] + rng.normal(0, 20, (n_frames, frame_length))
+    return np.clip(frames, -32768, 32767).astype(np.int16)
+
+
+async def build(config: AudioConfig):
+    vad = VoiceActivityDetector(config)
+    await vad.initialize()
+    vad.webrtc_vad = None  # measure the NumPy front end only
+    wake = WakeWordDetector(config)
+    await wake.initialize()
+    return vad, wake
+
+
+async def run(args):
+    config = AudioConfig()
+    frames = make_frames(args.frames, config.chunk_size)
+    frame_seconds = config.chunk_size / config.sample_rate
+
+    vad, wake = await build(config)
+    start = time.perf_counter()
+    for frame in frames:
+        await vad.process_audio(frame)
+        await wake.process_audio(frame)
+    per_frame = (time.perf_counter() - start) / len(frames)
+
+    vad, wake = await build(config)
+    start = time.perf_counter()
+    for offset in range(0, len(frames), args.block):
+        block = frames[offset:offset + args.block]
+        vad.process_block(block)
+        wake.process_block(block)
+    per_block = (time.perf_counter() - start) / len(frames)
+
+    for label, cost in (("per-frame", per_frame), (f"block={args.block}", per_block)):
+        print(f"{label:>10}: {cost * 1e6:8.1f}us/frame  "
+              f"~{frame_seconds / cost:,.0f} real-time sessions per core")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=5000)
+    parser.add_argument("--block", type=int, default=32)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+TTS latency benchmark: cold vs warm vs cached Piper synthesis.
+
+For each phase the script reports time-to-first-audio (first sentence ready)
+and total synthesis time for the same multi-sentence reply:
+
+  - cold:   one-shot ``piper`` process per reply (spawn + model load + synth),
+            i.e. the previous per-utterance behaviour
+  - warm:   the persistent ``PiperWorker`` with sentence-level streaming
+  - cached: the same reply again, served from the on-disk phrase cache
+
+Usage:
+    python packages/voice/benchmarks/bench_tts_latency.py --piper /usr/local/bin/piper \
+        --model voices/en_US-lessac-medium.onnx
+    python packages/voice/benchmarks/bench_tts_latency.py --simulate
+        (uses a stand-in Piper script with a fixed model-load and per-character cost)
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import textwrap
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from buddy_voice.pipeline import AudioConfig  # noqa: E402
+from buddy_voice.tts import PiperWorker, TextToSpeech, split_sentences  # noqa: E402
+
+REPLY = ("Good morning! It is seven thirty and the weather looks clear. "
+         "You have two meetings today. Would you like me to read them out?")
+
+FAKE_PIPER = textwrap.dedent('''
+    import json, sys, time, wave
+    args = sys.argv[1:]
+    load_ms = float(args[args.index("--load-ms") + 1])
+    char_ms = float(args[args.index("--char-ms") + 1])
+    time.sleep(load_ms / 1000.0)  # model load
+    def synth(text, path):
+        time.sleep(char_ms * len(text) / 1000.0)
+        with wave.open(path, "wb") as w:
+            w.setnchannels(1); w.setsampwidth(2); w.setframerate(22050)
+            w.writeframes(b"\\x00\\x00" * int(22050 * 0.06 * len(text.split())))
+    if "--json-input" in args:
+        for line in sys.stdin:
+            req = json.loads(line)
+            synth(req["text"], req["output_file"])
+            print(req["output_file"], flush=True)
+    else:
+        synth(sys.stdin.read(), args[args.index("--output_file") + 1])
+''')
+
+
+def write_fake_piper(directory: str, load_ms: float, char_ms: float) -> Path:
+    script = Path(directory) / "fake_piper.py"
+    script.write_text(FAKE_PIPER)
+    wrapper = Path(directory) / "piper"
+    wrapper.write_text(f"#!/bin/sh\nexec {sys.executable} {script} --load-ms {load_ms} --char-ms {char_ms} \"$@\"\n")
+    wrapper.chmod(0o755)
+    return wrapper
+
+
+def cold_synthesis(binary: Path, model: Path, config: Path, text: str, scratch: str):
+    """One process per reply, the way synthesis worked before the persistent worker."""
+    out = os.path.join(scratch, "cold.wav")
+    start = time.perf_counter()
+    subprocess.run(
+        [str(binary), "--model", str(model), "--config", str(config), "--output_file", out],
+        input=text, text=True, capture_output=True, timeout=60, check=True
+    )
+    elapsed = time.perf_counter() - start
+    # Playback can only start once the whole reply is synthesized
+    return elapsed, elapsed
+
+
+async def streamed_synthesis(tts: TextToSpeech, text: str):
+    start = time.perf_counter()
+    first = None
+    async for _audio, _rate in tts.synthesize_stream(text):
+        if first is None:
+            first = time.perf_counter() - start
+    return first, time.perf_counter() - start
+
+
+async def run(args):
+    with tempfile.TemporaryDirectory() as scratch:
+        if args.simulate:
+            binary = write_fake_piper(scratch, args.load_ms, args.char_ms)
+            model = Path(scratch) / "voice.onnx"
+            model.touch()
+        else:
+            binary, model = Path(args.piper), Path(args.model)
+        config = Path(f"{model}.json") if Path(f"{model}.json").exists() else model.with_suffix(".json")
+
+        tts = TextToSpeech(AudioConfig(), cache_dir=Path(scratch) / "cache")
+        tts.piper_model = {"binary": binary, "model": model, "config": config}
+        tts.piper_worker = PiperWorker(binary, model, config)
+        tts.engine_type = "piper"
+        tts.is_initialized = True
+
+        print(f"reply: {len(REPLY)} chars, {len(split_sentences(REPLY))} sentences")
+        results = {"cold": cold_synthesis(binary, model, config, REPLY, scratch)}
+
+        # Spawn and load once, as initialize() does, then measure a fresh reply
+        await asyncio.get_running_loop().run_in_executor(None, tts.piper_worker.synthesize, "Ready.")
+        results["warm"] = await streamed_synthesis(tts, REPLY)
+        # Cache writes are fire-and-forget; give them a moment to land
+        await asyncio.sleep(0.2)
+        results["cached"] = await streamed_synthesis(tts, REPLY)
+
+        for phase, (ttfa, total) in results.items():
+            print(f"{phase:>7}: time-to-first-audio {ttfa * 1000:8.1f}ms   total {total * 1000:8.1f}ms")
+        print(f"worker starts: {tts.piper_worker.starts}  cache: {tts.cache.stats()}")
+        await tts.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--piper", help="path to the piper binary")
+    parser.add_argument("--model", help="path to a piper .onnx voice")
+    parser.add_argument("--simulate", action="store_true", help="use a stand-in piper process")
+    parser.add_argument("--load-ms", type=float, default=800.0, help="simulated model load time")
+    parser.add_argument("--char-ms", type=float, default=2.0, help="simulated synthesis cost per character")
+    args = parser.parse_args()
+    if not args.simulate and not (args.piper and args.model):
+        parser.error("pass --piper and --model, or --simulate")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -13,11 +13,14 @@ from .wake_word import WakeWordDetector
 from .vad import VoiceActivityDetector
 from .asr import SpeechRecognizer
 from .tts import TextToSpeech
+from .ring_buffer import FrameRingBuffer, SampleRingBuffer
 
 __all__ = [
     "VoicePipeline",
     "WakeWordDetector", 
     "VoiceActivityDetector",
     "SpeechRecognizer",
-    "TextToSpeech"
+    "TextToSpeech",
+    "FrameRingBuffer",
+    "SampleRingBuffer"
 ]
@@ -7,8 +7,14 @@ streaming with partial results and confidence scoring.
 """
 
 import asyncio
+import json
 import logging
+import threading
+import time
+import uuid
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from typing import Optional, Dict, Any, List
 import tempfile
 import os
@@ -17,15 +23,28 @@ from pathlib import Path
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class PartialTranscript:
+    """Incremental result emitted by a streaming session."""
+    text: str
+    is_final: bool = False  # True when ``text`` is a committed segment
+    confidence: float = 0.0
+
+
 class SpeechRecognizer:
     """
     Automatic Speech Recognition system for BUDDY.
     
     Supports multiple ASR backends with emphasis on offline capability,
     real-time performance, and multilingual support.
+    
+    Model loading and decoding run on a dedicated worker pool so a slow
+    transcription never blocks the event loop. Models stay loaded (and are
+    warmed up once) for the lifetime of the recognizer; Whisper decodes are
+    serialized on the shared model while Vosk sessions decode in parallel.
     """
     
-    def __init__(self, audio_config, model_name: str = "whisper_base"):
+    def __init__(self, audio_config, model_name: str = "whisper_base", max_workers: int = 2):
         self.audio_config = audio_config
         self.model_name = model_name
         self.sample_rate = audio_config.sample_rate
@@ -36,6 +55,14 @@ class SpeechRecognizer:
         self.model_type = None
         self.is_initialized = False
         
+        # Worker pool for blocking model calls
+        self.max_workers = max(1, max_workers)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # Whisper installs per-call decoder hooks on the model, so concurrent
+        # decodes on one model must not interleave
+        self._whisper_lock = threading.Lock()
+        self.sessions: Dict[str, "StreamingSession"] = {}
+        
         # Configuration
         self.language = "en"
         self.min_confidence = 0.3
@@ -52,9 +79,25 @@ class SpeechRecognizer:
             "successful_transcriptions": 0,
             "avg_confidence": 0.0,
             "avg_processing_time": 0.0,
-            "total_audio_processed": 0.0
+            "total_audio_processed": 0.0,
+            "total_processing_time": 0.0
         }
         
+    def _ensure_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="buddy-asr"
+            )
+        return self._executor
+        
+    async def _run(self, fn, *args, **kwargs):
+        """Run a blocking model call on the ASR worker pool."""
+        loop = asyncio.get_running_loop()
+        executor = self._ensure_executor()
+        if kwargs:
+            return await loop.run_in_executor(executor, lambda: fn(*args, **kwargs))
+        return await loop.run_in_executor(executor, fn, *args)
+        
     async def initialize(self) -> bool:
         """Initialize ASR model."""
         try:
@@ -96,11 +139,17 @@ class SpeechRecognizer:
             
             whisper_model_name = model_map.get(self.model_name, "base")
             
-            # Load model
-            self.whisper_model = whisper.load_model(whisper_model_name)
+            # Load model off the event loop
+            self.whisper_model = await self._run(whisper.load_model, whisper_model_name)
             self.model_type = "whisper"
             self.is_initialized = True
             
+            # First decode pays for kernel selection and allocator growth
+            try:
+                await self._run(self._decode_whisper, np.zeros(self.sample_rate // 2, dtype=np.float32))
+            except Exception as e:
+                logger.debug(f"Whisper warmup failed: {e}")
+            
             logger.info(f"Loaded Whisper model: {whisper_model_name}")
             return True
             
@@ -115,7 +164,6 @@ class SpeechRecognizer:
         """Initialize Vosk model."""
         try:
             import vosk
-            import json
             
             # Try to find Vosk model
             model_path = self._find_vosk_model()
@@ -123,8 +171,8 @@ class SpeechRecognizer:
                 logger.debug("Vosk model not found")
                 return False
                 
-            # Load model
-            self.vosk_model = vosk.Model(str(model_path))
+            # Load model off the event loop
+            self.vosk_model = await self._run(vosk.Model, str(model_path))
             self.model_type = "vosk"
             self.is_initialized = True
             
@@ -182,12 +230,8 @@ class SpeechRecognizer:
             return ""
             
         try:
-            import time
-            start_time = time.time()
-            
-            self.stats["total_transcriptions"] += 1
+            start_time = time.perf_counter()
             audio_duration = len(audio_data) / self.sample_rate
-            self.stats["total_audio_processed"] += audio_duration
             
             # Limit audio length
             if audio_duration > self.max_audio_length:
@@ -208,27 +252,7 @@ class SpeechRecognizer:
                 
             # Update state
             self.last_transcript = transcript
-            self.last_confidence = confidence
-            self.processing_time = time.time() - start_time
-            
-            # Update statistics
-            if confidence >= self.min_confidence:
-                self.stats["successful_transcriptions"] += 1
-                
-            # Update average confidence
-            total_successful = self.stats["successful_transcriptions"]
-            if total_successful > 0:
-                self.stats["avg_confidence"] = (
-                    (self.stats["avg_confidence"] * (total_successful - 1) + confidence)
-                    / total_successful
-                )
-                
-            # Update average processing time
-            total_transcriptions = self.stats["total_transcriptions"]
-            self.stats["avg_processing_time"] = (
-                (self.stats["avg_processing_time"] * (total_transcriptions - 1) + self.processing_time)
-                / total_transcriptions
-            )
+            self._record_transcription(audio_duration, time.perf_counter() - start_time, confidence)
             
             logger.debug(f"Transcribed ({self.processing_time:.2f}s): '{transcript}' "
                         f"(confidence: {confidence:.3f})")
@@ -239,85 +263,127 @@ class SpeechRecognizer:
             logger.error(f"Transcription error: {e}")
             return ""
             
-    async def _transcribe_whisper(self, audio_data: np.ndarray) -> tuple[str, float]:
-        """Transcribe using Whisper."""
-        try:
-            # Convert to float32 and normalize
-            if audio_data.dtype != np.float32:
-                audio_float = audio_data.astype(np.float32) / 32767.0
-            else:
-                audio_float = audio_data
-                
-            # Ensure sample rate is 16kHz for Whisper
-            if self.sample_rate != 16000:
-                # Simple resampling (should use proper resampling in production)
-                target_length = int(len(audio_float) * 16000 / self.sample_rate)
-                audio_float = np.interp(
-                    np.linspace(0, len(audio_float), target_length),
-                    np.arange(len(audio_float)),
-                    audio_float
-                )
-                
-            # Transcribe
-            result = self.whisper_model.transcribe(
-                audio_float,
-                language=self.language,
-                fp16=False  # Use fp32 for better compatibility
+    def _record_transcription(self, audio_duration: float, processing_time: float, confidence: float):
+        """Fold one completed transcription into the running statistics."""
+        self.last_confidence = confidence
+        self.processing_time = processing_time
+        
+        self.stats["total_transcriptions"] += 1
+        self.stats["total_audio_processed"] += audio_duration
+        self.stats["total_processing_time"] += processing_time
+        
+        # Update statistics
+        if confidence >= self.min_confidence:
+            self.stats["successful_transcriptions"] += 1
+            
+        # Update average confidence
+        total_successful = self.stats["successful_transcriptions"]
+        if total_successful > 0:
+            self.stats["avg_confidence"] = (
+                (self.stats["avg_confidence"] * (total_successful - 1) + confidence)
+                / total_successful
             )
             
-            text = result.get("text", "").strip()
-            
-            # Calculate confidence from segment scores
-            segments = result.get("segments", [])
-            if segments:
-                confidences = [seg.get("no_speech_prob", 1.0) for seg in segments]
-                # Convert no_speech_prob to speech confidence
-                avg_confidence = 1.0 - np.mean(confidences)
-            else:
-                avg_confidence = 0.5  # Default moderate confidence
-                
-            return text, avg_confidence
-            
+        # Update average processing time
+        total_transcriptions = self.stats["total_transcriptions"]
+        self.stats["avg_processing_time"] = (
+            (self.stats["avg_processing_time"] * (total_transcriptions - 1) + processing_time)
+            / total_transcriptions
+        )
+        
+    async def _transcribe_whisper(self, audio_data: np.ndarray) -> tuple[str, float]:
+        """Transcribe using Whisper on the worker pool."""
+        try:
+            return await self._run(self._decode_whisper, audio_data)
         except Exception as e:
             logger.error(f"Whisper transcription error: {e}")
             return "", 0.0
             
+    def _decode_whisper(self, audio_data: np.ndarray,
+                        initial_prompt: Optional[str] = None) -> tuple[str, float]:
+        """Blocking Whisper decode; runs on an ASR worker thread."""
+        segments = self._decode_whisper_segments(audio_data, initial_prompt)
+        return _segments_text(segments), _segments_confidence(segments)
+        
+    def _decode_whisper_segments(self, audio_data: np.ndarray, initial_prompt: Optional[str] = None,
+                                 word_timestamps: bool = False) -> List[Dict[str, Any]]:
+        """Blocking Whisper decode returning its segments (``start``/``end`` in seconds of ``audio_data``)."""
+        # Convert to float32 and normalize
+        if audio_data.dtype != np.float32:
+            audio_float = audio_data.astype(np.float32) / 32767.0
+        else:
+            audio_float = audio_data
+            
+        # Ensure sample rate is 16kHz for Whisper
+        if self.sample_rate != 16000:
+            # Simple resampling (should use proper resampling in production)
+            target_length = int(len(audio_float) * 16000 / self.sample_rate)
+            audio_float = np.interp(
+                np.linspace(0, len(audio_float), target_length),
+                np.arange(len(audio_float)),
+                audio_float
+            ).astype(np.float32)
+            
+        options = {"language": self.language, "fp16": False}  # fp32 for better compatibility
+        if initial_prompt:
+            # Condition on already-committed text instead of re-decoding its audio
+            options["initial_prompt"] = initial_prompt
+        if word_timestamps:
+            options["word_timestamps"] = True
+            
+        with self._whisper_lock:
+            result = self.whisper_model.transcribe(audio_float, **options)
+            
+        segments = result.get("segments")
+        if segments is None:  # no segmentation reported: one segment over the whole input
+            segments = [{"text": result.get("text", ""), "start": 0.0,
+                         "end": len(audio_float) / 16000, "no_speech_prob": 0.5}]
+        return segments
+        
     async def _transcribe_vosk(self, audio_data: np.ndarray) -> tuple[str, float]:
-        """Transcribe using Vosk."""
+        """Transcribe using Vosk on the worker pool."""
         try:
-            import vosk
-            import json
-            
-            # Create recognizer
-            rec = vosk.KaldiRecognizer(self.vosk_model, self.sample_rate)
-            
-            # Convert to int16 bytes
-            if audio_data.dtype != np.int16:
-                audio_int16 = (audio_data.clip(-1, 1) * 32767).astype(np.int16)
-            else:
-                audio_int16 = audio_data
-                
-            audio_bytes = audio_int16.tobytes()
-            
-            # Process audio
-            rec.AcceptWaveform(audio_bytes)
-            result = json.loads(rec.FinalResult())
-            
-            text = result.get("text", "").strip()
-            confidence = result.get("confidence", 0.0)
-            
-            return text, confidence
-            
+            return await self._run(self._decode_vosk, audio_data)
         except Exception as e:
             logger.error(f"Vosk transcription error: {e}")
             return "", 0.0
             
+    def _new_vosk_recognizer(self):
+        import vosk
+        rec = vosk.KaldiRecognizer(self.vosk_model, self.sample_rate)
+        rec.SetWords(True)
+        return rec
+        
+    def _decode_vosk(self, audio_data: np.ndarray) -> tuple[str, float]:
+        """Blocking one-shot Vosk decode; runs on an ASR worker thread."""
+        rec = self._new_vosk_recognizer()
+        rec.AcceptWaveform(_to_int16(audio_data).tobytes())
+        result = json.loads(rec.FinalResult())
+        return result.get("text", "").strip(), _vosk_confidence(result)
+            
     async def _transcribe_simple(self, audio_data: np.ndarray) -> tuple[str, float]:
         """Transcribe using simple recognizer."""
         if hasattr(self, 'simple_recognizer'):
             return await self.simple_recognizer.transcribe(audio_data)
         return "", 0.0
         
+    def create_session(self, session_id: Optional[str] = None, **kwargs) -> "StreamingSession":
+        """
+        Open a persistent streaming session (e.g. one per WebSocket).
+        
+        Keyword arguments are passed to ``StreamingSession``.
+        """
+        session_id = session_id or uuid.uuid4().hex
+        session = StreamingSession(self, session_id, **kwargs)
+        self.sessions[session_id] = session
+        return session
+        
+    def close_session(self, session_id: str):
+        """Drop a session without producing a final transcript."""
+        session = self.sessions.pop(session_id, None)
+        if session:
+            session.close()
+            
     async def stream_transcribe(self, audio_stream) -> List[str]:
         """
         Transcribe streaming audio with partial results.
@@ -326,33 +392,34 @@ class SpeechRecognizer:
             audio_stream: Async generator of audio chunks
             
         Returns:
-            List of partial transcriptions
+            List of partial transcriptions, ending with the final transcript
         """
         partial_results = []
-        audio_buffer = []
+        session = self.create_session()
         
         try:
             async for audio_chunk in audio_stream:
-                audio_buffer.append(audio_chunk)
-                
-                # Process every few chunks for partial results
-                if len(audio_buffer) >= 5:  # Adjust based on chunk size
-                    combined_audio = np.concatenate(audio_buffer)
-                    partial_transcript = await self.transcribe(combined_audio)
-                    
-                    if partial_transcript:
-                        partial_results.append(partial_transcript)
-                        
-                    # Keep only recent audio for next partial
-                    audio_buffer = audio_buffer[-3:]
+                update = await session.accept(audio_chunk)
+                if update and update.text:
+                    partial_results.append(update.text)
                     
+            transcript, confidence = await session.finish()
+            if transcript and confidence >= self.min_confidence:
+                partial_results.append(transcript)
+                
         except Exception as e:
             logger.error(f"Stream transcription error: {e}")
+            self.close_session(session.session_id)
             
         return partial_results
         
     async def stop(self):
         """Stop ASR processing."""
+        for session_id in list(self.sessions):
+            self.close_session(session_id)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
         self.whisper_model = None
         self.vosk_model = None
         self.is_initialized = False
@@ -369,6 +436,10 @@ class SpeechRecognizer:
         if self.stats["total_transcriptions"] > 0:
             success_rate = self.stats["successful_transcriptions"] / self.stats["total_transcriptions"]
             
+        real_time_factor = 0.0
+        if self.stats["total_audio_processed"] > 0:
+            real_time_factor = self.stats["total_processing_time"] / self.stats["total_audio_processed"]
+            
         return {
             "model_type": self.model_type,
             "is_initialized": self.is_initialized,
@@ -376,10 +447,236 @@ class SpeechRecognizer:
             "last_confidence": self.last_confidence,
             "last_processing_time": self.processing_time,
             "success_rate": success_rate,
+            "real_time_factor": real_time_factor,
+            "active_sessions": len(self.sessions),
             **self.stats
         }
 
 
+class StreamingSession:
+    """
+    Incremental recognition state for one audio stream.
+    
+    Only audio that has not been decoded yet is sent to the model:
+    - Vosk keeps one ``KaldiRecognizer`` for the whole stream and is fed each
+      new chunk exactly once.
+    - Whisper has no streaming decoder, so every ``partial_interval``
+      seconds the session decodes the audio since the last committed
+      boundary. Whisper segments that end at least ``stable_seconds``
+      before the end of that audio, with another segment after them, are
+      committed, and their audio is dropped at the segment's end
+      timestamp. The tail therefore stays about one phrase long. If it
+      still reaches ``commit_seconds`` with no such segment, the session
+      decodes with word timestamps and commits at the last stable word
+      boundary instead. Committed text is passed as the prompt for the
+      next tail.
+    
+    Partial decodes are skipped while one is still running for this session,
+    so a slow model drops intermediate hypotheses instead of falling behind.
+    """
+    
+    def __init__(self, recognizer: SpeechRecognizer, session_id: str,
+                 partial_interval: float = 0.5, commit_seconds: float = 8.0,
+                 stable_seconds: float = 1.0):
+        self.recognizer = recognizer
+        self.session_id = session_id
+        self.sample_rate = recognizer.sample_rate
+        self.partial_interval_samples = int(partial_interval * self.sample_rate)
+        self.commit_samples = int(commit_seconds * self.sample_rate)
+        self.stable_seconds = stable_seconds
+        
+        self.segments: List[str] = []
+        self.segment_confidences: List[float] = []
+        self.partial = ""
+        self.audio_seconds = 0.0
+        self.decode_seconds = 0.0
+        
+        self._pending: List[np.ndarray] = []
+        self._pending_samples = 0
+        self._since_partial = 0
+        self._lock = asyncio.Lock()
+        self._closed = False
+        self._vosk_rec = None
+        if recognizer.model_type == "vosk":
+            self._vosk_rec = recognizer._new_vosk_recognizer()
+            
+    async def _decode(self, fn, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await self.recognizer._run(fn, *args, **kwargs)
+        finally:
+            self.decode_seconds += time.perf_counter() - start
+            
+    def _commit(self, text: str, confidence: float):
+        if text:
+            self.segments.append(text)
+            self.segment_confidences.append(confidence)
+        self.partial = ""
+        
+    async def accept(self, audio_chunk: np.ndarray) -> Optional[PartialTranscript]:
+        """
+        Feed the next chunk of audio.
+        
+        Returns:
+            A new partial or committed hypothesis, or None when nothing changed
+        """
+        if self._closed or len(audio_chunk) == 0:
+            return None
+        self.audio_seconds += len(audio_chunk) / self.sample_rate
+        
+        if self._vosk_rec is not None:
+            async with self._lock:
+                is_final, text, confidence = await self._decode(
+                    self._vosk_accept, _to_int16(audio_chunk).tobytes()
+                )
+            if is_final:
+                self._commit(text, confidence)
+                return PartialTranscript(text, True, confidence) if text else None
+            if text != self.partial:
+                self.partial = text
+                return PartialTranscript(text)
+            return None
+            
+        self._pending.append(audio_chunk)
+        self._pending_samples += len(audio_chunk)
+        self._since_partial += len(audio_chunk)
+        
+        if self.recognizer.model_type != "whisper":
+            return None
+        if self._since_partial < self.partial_interval_samples or self._lock.locked():
+            return None
+            
+        async with self._lock:
+            self._since_partial = 0
+            taken = len(self._pending)
+            tail = np.concatenate(self._pending[:taken])
+            force = len(tail) >= self.commit_samples
+            segments = await self._decode(
+                self.recognizer._decode_whisper_segments, tail,
+                initial_prompt=self._prompt(), word_timestamps=force
+            )
+            committed, cut_seconds = self._stable_prefix(segments, len(tail) / self.sample_rate, force)
+            if cut_seconds > 0:
+                # Audio after the boundary, including what arrived during the decode, stays pending
+                cut = min(len(tail), int(round(cut_seconds * self.sample_rate)))
+                rest = tail[cut:]
+                self._pending = ([rest] if len(rest) else []) + self._pending[taken:]
+                self._pending_samples -= cut
+                text, confidence = _segments_text(committed), _segments_confidence(committed)
+                self._commit(text, confidence)
+                return PartialTranscript(text, True, confidence) if text else None
+            text, confidence = _segments_text(segments), _segments_confidence(segments)
+                
+        if text != self.partial:
+            self.partial = text
+            return PartialTranscript(text, False, confidence)
+        return None
+        
+    def _stable_prefix(self, segments: List[Dict[str, Any]], tail_seconds: float,
+                       force: bool) -> tuple[List[Dict[str, Any]], float]:
+        """
+        Leading segments that later audio will not change, and where their audio ends.
+        
+        A segment is stable when another one follows it and it ends at least
+        ``stable_seconds`` before the decoded audio does. With ``force`` and
+        no stable segment, falls back to word timestamps, then to the whole tail.
+        """
+        horizon = tail_seconds - self.stable_seconds
+        count = 0
+        while count < len(segments) - 1 and segments[count].get("end", tail_seconds) <= horizon:
+            count += 1
+        if count or not force:
+            return segments[:count], segments[count - 1]["end"] if count else 0.0
+            
+        words = [w for seg in segments for w in seg.get("words") or ()]
+        count = 0
+        while count < len(words) - 1 and words[count].get("end", tail_seconds) <= horizon:
+            count += 1
+        if count:
+            text = "".join(w.get("word", "") for w in words[:count])
+            probs = [seg.get("no_speech_prob", 0.5) for seg in segments]
+            return [{"text": text, "no_speech_prob": float(np.mean(probs))}], words[count - 1]["end"]
+        # No boundary at all: commit everything so the tail stays bounded
+        return segments, tail_seconds
+        
+    def _vosk_accept(self, audio_bytes: bytes) -> tuple[bool, str, float]:
+        if self._vosk_rec.AcceptWaveform(audio_bytes):
+            result = json.loads(self._vosk_rec.Result())
+            return True, result.get("text", "").strip(), _vosk_confidence(result)
+        partial = json.loads(self._vosk_rec.PartialResult())
+        return False, partial.get("partial", "").strip(), 0.0
+        
+    def _vosk_finish(self) -> tuple[str, float]:
+        result = json.loads(self._vosk_rec.FinalResult())
+        return result.get("text", "").strip(), _vosk_confidence(result)
+        
+    def _prompt(self) -> Optional[str]:
+        # Whisper only looks at the last ~224 prompt tokens anyway
+        return " ".join(self.segments)[-800:] or None
+        
+    async def finish(self) -> tuple[str, float]:
+        """
+        Decode any remaining audio and close the session.
+        
+        Returns:
+            (full transcript, mean segment confidence)
+        """
+        recognizer = self.recognizer
+        async with self._lock:
+            if self._vosk_rec is not None:
+                text, confidence = await self._decode(self._vosk_finish)
+                self._commit(text, confidence)
+            elif self._pending:
+                tail = np.concatenate(self._pending)
+                if recognizer.model_type == "whisper":
+                    text, confidence = await self._decode(
+                        recognizer._decode_whisper, tail, initial_prompt=self._prompt()
+                    )
+                else:
+                    text, confidence = await recognizer._transcribe_simple(tail)
+                self._commit(text, confidence)
+            self._pending = []
+            self._pending_samples = 0
+            
+        transcript = " ".join(self.segments)
+        confidence = float(np.mean(self.segment_confidences)) if self.segment_confidences else 0.0
+        recognizer.last_transcript = transcript
+        recognizer._record_transcription(self.audio_seconds, self.decode_seconds, confidence)
+        recognizer.sessions.pop(self.session_id, None)
+        self.close()
+        return transcript, confidence
+        
+    def close(self):
+        self._closed = True
+        self._vosk_rec = None
+        self._pending = []
+
+
+def _segments_text(segments: List[Dict[str, Any]]) -> str:
+    return "".join(seg.get("text", "") for seg in segments).strip()
+
+
+def _segments_confidence(segments: List[Dict[str, Any]]) -> float:
+    """Mean speech probability (1 - ``no_speech_prob``) of Whisper segments."""
+    if not segments:
+        return 0.5  # Default moderate confidence
+    return 1.0 - float(np.mean([seg.get("no_speech_prob", 1.0) for seg in segments]))
+
+
+def _to_int16(audio_data: np.ndarray) -> np.ndarray:
+    if audio_data.dtype != np.int16:
+        return (audio_data.clip(-1, 1) * 32767).astype(np.int16)
+    return audio_data
+
+
+def _vosk_confidence(result: Dict[str, Any]) -> float:
+    """Mean word confidence of a Vosk result (requires ``SetWords(True)``)."""
+    words = result.get("result") or []
+    if words:
+        return float(np.mean([w.get("conf", 0.0) for w in words]))
+    return float(result.get("confidence", 0.0))
+
+
 class SimpleASR:
     """
     Simple ASR implementation for testing and fallback.
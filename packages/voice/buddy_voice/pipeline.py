@@ -9,11 +9,13 @@ Handles the full voice interaction flow with error recovery and optimization.
 import asyncio
 import logging
 import numpy as np
-from typing import Optional, Callable, Dict, Any, List
+from typing import Optional, Callable, Dict, Any
 from dataclasses import dataclass
 from datetime import datetime
 import threading
-import queue
+import time
+
+from .ring_buffer import FrameRingBuffer, SampleRingBuffer
 
 logger = logging.getLogger(__name__)
 
@@ -62,9 +64,15 @@ class VoicePipeline:
         self.is_recording_speech = False
         self.current_session = None
         
-        # Audio streaming
-        self.audio_queue = queue.Queue()
+        # Audio streaming: capture thread -> preallocated ring -> event loop
+        self.frame_ring = FrameRingBuffer(capacity=256, frame_size=config.chunk_size)
+        # Rolling utterance window (~6 seconds at 16kHz, 1024 chunk)
+        self.utterance_buffer = SampleRingBuffer(capacity=100 * config.chunk_size)
         self.audio_thread = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._frames_ready: Optional[asyncio.Event] = None
+        self._wakeup_pending = False
+        self._processing_task: Optional[asyncio.Task] = None
         
         # Performance tracking
         self.stats = {
@@ -112,16 +120,48 @@ class VoicePipeline:
         if not await self.initialize():
             raise RuntimeError("Failed to initialize voice pipeline")
             
+        await self.start_processing()
+        
+        logger.info("Voice pipeline started")
+        
+    async def start_processing(self, capture_audio: bool = True):
+        """
+        Start the processing loop on already-initialized components.
+        
+        Args:
+            capture_audio: Open the local input device. When False, audio must
+                be supplied through ``feed_audio`` (e.g. from a network stream).
+        """
         self.is_running = True
+        self._loop = asyncio.get_running_loop()
+        self._frames_ready = asyncio.Event()
         
-        # Start audio processing thread
-        self.audio_thread = threading.Thread(target=self._audio_processing_loop, daemon=True)
-        self.audio_thread.start()
+        if capture_audio:
+            # Start audio processing thread
+            self.audio_thread = threading.Thread(target=self._audio_processing_loop, daemon=True)
+            self.audio_thread.start()
         
         # Start main processing loop
-        asyncio.create_task(self._main_processing_loop())
+        self._processing_task = asyncio.create_task(self._main_processing_loop())
         
-        logger.info("Voice pipeline started")
+    def feed_audio(self, audio_data: np.ndarray):
+        """
+        Hand a captured int16 frame to the pipeline. Safe to call from any
+        single producer thread; wakes the event loop at most once per batch.
+        """
+        self.frame_ring.push(audio_data)
+        if not self._wakeup_pending and self._loop is not None:
+            self._wakeup_pending = True
+            try:
+                self._loop.call_soon_threadsafe(self._on_frames_ready)
+            except RuntimeError:
+                # Event loop already closed during shutdown
+                self._wakeup_pending = False
+                
+    def _on_frames_ready(self):
+        self._wakeup_pending = False
+        if self._frames_ready is not None:
+            self._frames_ready.set()
         
     async def stop(self):
         """Stop the voice pipeline."""
@@ -129,6 +169,8 @@ class VoicePipeline:
             return
             
         self.is_running = False
+        if self._frames_ready is not None:
+            self._frames_ready.set()
         
         # Stop components
         if self.wake_word_detector:
@@ -157,7 +199,7 @@ class VoicePipeline:
                 
                 # Convert to the format expected by our pipeline
                 audio_data = (indata[:, 0] * 32767).astype(np.int16)
-                self.audio_queue.put(audio_data)
+                self.feed_audio(audio_data)
             
             # Start audio stream
             with sd.InputStream(
@@ -176,36 +218,37 @@ class VoicePipeline:
             self.stats["errors"] += 1
             
     async def _main_processing_loop(self):
-        """Main voice processing loop."""
-        audio_buffer = []
-        
+        """Main voice processing loop: sleep until frames arrive, then drain the ring."""
         while self.is_running:
             try:
-                # Get audio data (non-blocking)
-                try:
-                    audio_chunk = self.audio_queue.get_nowait()
-                    audio_buffer.append(audio_chunk)
-                    
-                    # Keep buffer to reasonable size
-                    if len(audio_buffer) > 100:  # ~6 seconds at 16kHz, 1024 chunk
-                        audio_buffer.pop(0)
-                        
-                except queue.Empty:
-                    await asyncio.sleep(0.01)
-                    continue
+                # Clear before draining so frames pushed meanwhile re-arm the event
+                await self._frames_ready.wait()
+                self._frames_ready.clear()
                 
-                # Process based on current state
-                if self.is_listening_for_wake and not self.is_recording_speech:
-                    await self._process_wake_detection(audio_chunk)
-                    
-                elif self.is_recording_speech:
-                    await self._process_speech_recording(audio_chunk, audio_buffer)
+                while self.is_running:
+                    item = self.frame_ring.pop()
+                    if item is None:
+                        break
+                    audio_chunk, captured_at = item
+                    await self._handle_frame(audio_chunk, captured_at)
                     
             except Exception as e:
                 logger.error(f"Processing loop error: {e}")
                 self.stats["errors"] += 1
                 await asyncio.sleep(0.1)
                 
+    async def _handle_frame(self, audio_chunk: np.ndarray, captured_at: float):
+        """Route one captured frame according to the current state."""
+        # Keep a rolling window of recent audio for transcription
+        self.utterance_buffer.extend(audio_chunk)
+        
+        # Process based on current state
+        if self.is_listening_for_wake and not self.is_recording_speech:
+            await self._process_wake_detection(audio_chunk)
+            
+        elif self.is_recording_speech:
+            await self._process_speech_recording(audio_chunk, self.utterance_buffer)
+                
     async def _process_wake_detection(self, audio_chunk: np.ndarray):
         """Process audio for wake word detection."""
         try:
@@ -230,7 +273,7 @@ class VoicePipeline:
         except Exception as e:
             logger.error(f"Wake detection error: {e}")
             
-    async def _process_speech_recording(self, audio_chunk: np.ndarray, audio_buffer: List[np.ndarray]):
+    async def _process_speech_recording(self, audio_chunk: np.ndarray, audio_buffer: SampleRingBuffer):
         """Process audio during speech recording."""
         try:
             # Check for voice activity
@@ -259,7 +302,7 @@ class VoicePipeline:
         except Exception as e:
             logger.error(f"Speech recording error: {e}")
             
-    async def _end_speech_recording(self, audio_buffer: List[np.ndarray]):
+    async def _end_speech_recording(self, audio_buffer: SampleRingBuffer):
         """End speech recording and process transcript."""
         try:
             self.is_recording_speech = False
@@ -272,12 +315,15 @@ class VoicePipeline:
                 data={}
             ))
             
-            # Combine audio buffer for transcription
-            if audio_buffer:
-                full_audio = np.concatenate(audio_buffer)
+            # Materialize the buffered utterance once for transcription
+            if len(audio_buffer):
+                full_audio = audio_buffer.snapshot()
+                audio_buffer.clear()
                 
                 # Process with ASR
+                eos_at = time.perf_counter()
                 transcript = await self.asr.transcribe(full_audio)
+                self.stats["last_eos_to_transcript_ms"] = (time.perf_counter() - eos_at) * 1000.0
                 
                 if transcript and transcript.strip():
                     self.stats["transcriptions"] += 1
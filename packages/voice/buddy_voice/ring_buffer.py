@@ -0,0 +1,123 @@
+"""
+BUDDY Audio Ring Buffers
+
+Preallocated NumPy ring buffers used on the capture path. Frames move from
+the audio callback thread to the event loop without locks or per-frame
+allocation, and utterance audio accumulates without list churn.
+"""
+
+import time
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+class FrameRingBuffer:
+    """
+    Single-producer / single-consumer ring of fixed-size audio frames.
+
+    The capture thread is the only writer of ``_write`` and the event loop the
+    only writer of ``_read``; each index is published with a single attribute
+    store, so no lock is needed. If the consumer falls more than ``capacity``
+    frames behind, the oldest frames are dropped and counted in ``overruns``.
+
+    ``pop`` returns a view into the ring: it is valid until the producer laps
+    the buffer, so copy it if it must outlive the current processing step.
+    """
+
+    def __init__(self, capacity: int, frame_size: int, dtype=np.int16):
+        self.capacity = capacity
+        self.frame_size = frame_size
+        self._frames = np.zeros((capacity, frame_size), dtype=dtype)
+        self._lengths = np.zeros(capacity, dtype=np.int32)
+        self._timestamps = np.zeros(capacity, dtype=np.float64)
+        self._write = 0
+        self._read = 0
+        self.overruns = 0
+
+    def push(self, frame: np.ndarray, timestamp: Optional[float] = None):
+        """Copy a frame into the next slot (producer side)."""
+        slot = self._write % self.capacity
+        n = min(len(frame), self.frame_size)
+        self._frames[slot, :n] = frame[:n]
+        self._lengths[slot] = n
+        self._timestamps[slot] = time.perf_counter() if timestamp is None else timestamp
+        # Publish only after the slot is fully written
+        self._write += 1
+
+    def pop(self) -> Optional[Tuple[np.ndarray, float]]:
+        """Return ``(frame_view, capture_timestamp)`` or None when empty (consumer side)."""
+        write = self._write
+        if self._read >= write:
+            return None
+        lag = write - self._read
+        if lag > self.capacity:
+            self.overruns += lag - self.capacity
+            self._read = write - self.capacity
+        slot = self._read % self.capacity
+        frame = self._frames[slot, :self._lengths[slot]]
+        timestamp = float(self._timestamps[slot])
+        self._read += 1
+        return frame, timestamp
+
+    def clear(self):
+        """Drop all unread frames (consumer side)."""
+        self._read = self._write
+
+    def __len__(self) -> int:
+        return min(self._write - self._read, self.capacity)
+
+
+class SampleRingBuffer:
+    """
+    Rolling window of the most recent ``capacity`` samples (or per-frame
+    feature values, with a float/bool ``dtype``).
+
+    Appends are at most two slice copies into a preallocated array; the
+    ordered audio is materialized once, by ``snapshot``, at end of speech.
+    """
+
+    def __init__(self, capacity: int, dtype=np.int16):
+        self.capacity = capacity
+        self._data = np.zeros(capacity, dtype=dtype)
+        self._end = 0  # total samples ever written
+
+    def extend(self, samples: np.ndarray):
+        n = len(samples)
+        if n >= self.capacity:
+            self._data[:] = samples[-self.capacity:]
+            self._end += n
+            # Re-align so the oldest sample sits at the write position
+            self._data = np.roll(self._data, self._end % self.capacity)
+            return
+        start = self._end % self.capacity
+        first = min(n, self.capacity - start)
+        self._data[start:start + first] = samples[:first]
+        if first < n:
+            self._data[:n - first] = samples[first:]
+        self._end += n
+
+    def snapshot(self) -> np.ndarray:
+        """Return the buffered samples, oldest first, as a new array."""
+        size = len(self)
+        if size < self.capacity:
+            return self._data[:size].copy()
+        start = self._end % self.capacity
+        return np.concatenate((self._data[start:], self._data[:start]))
+
+    def latest(self, n: int) -> np.ndarray:
+        """Return the most recent ``n`` samples (fewer if not yet written), oldest first."""
+        size = min(n, len(self))
+        if size <= 0:
+            return self._data[:0].copy()
+        end = self._end % self.capacity
+        start = (self._end - size) % self.capacity
+        if start < end:
+            return self._data[start:end].copy()
+        return np.concatenate((self._data[start:], self._data[:end]))
+
+    def clear(self):
+        self._end = 0
+
+    def __len__(self) -> int:
+        return min(self._end, self.capacity)
@@ -7,9 +7,16 @@ emotional expression, and real-time streaming synthesis.
 """
 
 import asyncio
+import hashlib
+import json
 import logging
+import re
+import shutil
+import threading
+import time
+import wave
 import numpy as np
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, AsyncIterator, Set, Tuple
 import tempfile
 import os
 from pathlib import Path
@@ -17,6 +24,229 @@ import subprocess
 
 logger = logging.getLogger(__name__)
 
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?;:])\s+|\n+")
+
+
+def split_sentences(text: str, min_chars: int = 20) -> List[str]:
+    """
+    Split text into sentence-sized synthesis units.
+    
+    Fragments shorter than ``min_chars`` are merged into the following one so
+    that very short clauses do not each pay per-request overhead.
+    """
+    chunks: List[str] = []
+    carry = ""
+    for part in _SENTENCE_BOUNDARY.split(text):
+        part = part.strip()
+        if not part:
+            continue
+        carry = f"{carry} {part}" if carry else part
+        if len(carry) >= min_chars:
+            chunks.append(carry)
+            carry = ""
+    if carry:
+        if chunks and len(carry) < min_chars:
+            chunks[-1] = f"{chunks[-1]} {carry}"
+        else:
+            chunks.append(carry)
+    return chunks
+
+
+def _read_wav(path: str) -> Tuple[np.ndarray, int]:
+    with wave.open(path, "rb") as wav:
+        audio = np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16)
+        channels = wav.getnchannels()
+        if channels > 1:
+            audio = audio[::channels]
+        return audio.copy(), wav.getframerate()
+
+
+def _write_wav(path: str, audio: np.ndarray, sample_rate: int):
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(audio.astype(np.int16).tobytes())
+
+
+class PCMCache:
+    """
+    Content-addressed on-disk cache of synthesized speech.
+    
+    Entries are keyed by a hash of the engine, voice model, speaking rate and
+    normalized text, so frequent phrases (greetings, time announcements,
+    error messages) are synthesized once and replayed from disk afterwards.
+    """
+    
+    def __init__(self, cache_dir: Path, max_entries: int = 1024, max_text_length: int = 300):
+        self.cache_dir = Path(cache_dir)
+        self.max_entries = max_entries
+        self.max_text_length = max_text_length
+        self.hits = 0
+        self.misses = 0
+        self._entries = None
+        
+    @staticmethod
+    def key(text: str, *parts: Any) -> str:
+        normalized = " ".join(text.split()).lower()
+        material = "\x1f".join([normalized, *(str(p) for p in parts)])
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+        
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.wav"
+        
+    def get(self, key: str) -> Optional[Tuple[np.ndarray, int]]:
+        path = self._path(key)
+        try:
+            result = _read_wav(str(path))
+        except (FileNotFoundError, wave.Error, EOFError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        try:
+            os.utime(path)  # recency for eviction
+        except OSError:
+            pass
+        return result
+        
+    def put(self, key: str, text: str, audio: np.ndarray, sample_rate: int):
+        if len(text) > self.max_text_length or len(audio) == 0:
+            return
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".{os.getpid()}.tmp")
+            _write_wav(str(tmp), audio, sample_rate)
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.debug(f"TTS cache write failed: {e}")
+            return
+        if self._entries is None:
+            self._entries = sum(1 for _ in self.cache_dir.glob("*/*.wav"))
+        else:
+            self._entries += 1
+        if self._entries > self.max_entries:
+            self._evict()
+            
+    def _evict(self):
+        """Remove the least recently used quarter of the cache."""
+        files = sorted(self.cache_dir.glob("*/*.wav"), key=lambda f: f.stat().st_mtime)
+        excess = len(files) - int(self.max_entries * 0.75)
+        for f in files[:max(0, excess)]:
+            try:
+                f.unlink()
+            except OSError:
+                pass
+        self._entries = len(files) - max(0, excess)
+        
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / total) if total else 0.0,
+        }
+
+
+class PiperWorker:
+    """
+    Long-lived Piper process driven over stdin/stdout.
+    
+    The voice model is loaded once when the process starts. Each request is a
+    JSON line on stdin naming an output file in a private scratch directory
+    (tmpfs where available); Piper answers with the path on stdout once the
+    audio is written. A dead or wedged process is restarted on next use.
+    """
+    
+    def __init__(self, binary: Path, model: Path, config: Path, length_scale: float = 1.0):
+        self.binary = binary
+        self.model = model
+        self.config = config
+        self.length_scale = length_scale
+        self.process: Optional[subprocess.Popen] = None
+        self.sample_rate: Optional[int] = None
+        self.starts = 0
+        self._lock = threading.Lock()
+        self._counter = 0
+        scratch_root = "/dev/shm" if os.path.isdir("/dev/shm") else None
+        self._scratch = tempfile.mkdtemp(prefix="buddy-piper-", dir=scratch_root)
+        
+    def start(self):
+        cmd = [
+            str(self.binary),
+            "--model", str(self.model),
+            "--config", str(self.config),
+            "--json-input",
+            "--output_dir", self._scratch,
+            "--length_scale", str(self.length_scale),
+        ]
+        self.process = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            bufsize=1
+        )
+        self.starts += 1
+        # Piper logs progress on stderr; drain it so the pipe never fills
+        threading.Thread(target=self._drain_stderr, args=(self.process,), daemon=True).start()
+        
+    @staticmethod
+    def _drain_stderr(process: subprocess.Popen):
+        for line in process.stderr:
+            logger.debug(f"piper: {line.rstrip()}")
+            
+    @property
+    def is_alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+        
+    def synthesize(self, text: str) -> np.ndarray:
+        """Blocking synthesis of one utterance; returns int16 PCM."""
+        with self._lock:
+            if not self.is_alive:
+                self.start()
+            self._counter += 1
+            output_path = os.path.join(self._scratch, f"{self._counter}.wav")
+            request = json.dumps({"text": text, "output_file": output_path})
+            try:
+                self.process.stdin.write(request + "\n")
+                self.process.stdin.flush()
+                reply = self.process.stdout.readline()
+            except (BrokenPipeError, OSError) as e:
+                self.kill()
+                raise RuntimeError(f"Piper worker died: {e}")
+            if not reply:
+                self.kill()
+                raise RuntimeError("Piper worker exited unexpectedly")
+            try:
+                audio, self.sample_rate = _read_wav(reply.strip() or output_path)
+            finally:
+                try:
+                    os.unlink(output_path)
+                except OSError:
+                    pass
+            return audio
+            
+    def kill(self):
+        if self.process is not None:
+            try:
+                self.process.kill()
+                self.process.wait(timeout=5)
+            except Exception:
+                pass
+            self.process = None
+            
+    def close(self):
+        if self.is_alive:
+            try:
+                self.process.stdin.close()
+                self.process.wait(timeout=5)
+            except Exception:
+                pass
+        self.kill()
+        shutil.rmtree(self._scratch, ignore_errors=True)
+
 
 class TextToSpeech:
     """
@@ -26,13 +256,16 @@ class TextToSpeech:
     natural voice quality, and low latency for real-time interaction.
     """
     
-    def __init__(self, audio_config, voice_name: str = "default"):
+    def __init__(self, audio_config, voice_name: str = "default",
+                 cache_dir: Optional[Path] = None):
         self.audio_config = audio_config
         self.voice_name = voice_name
         self.sample_rate = audio_config.sample_rate
         
         # TTS engines
         self.piper_model = None
+        self.piper_worker: Optional[PiperWorker] = None
+        self.synthesis_timeout = 30.0
         self.coqui_model = None
         self.system_tts = None
         self.engine_type = None
@@ -48,12 +281,17 @@ class TextToSpeech:
         self.available_voices = {}
         self.current_voice = voice_name
         
+        # Synthesized phrase cache
+        self.cache = PCMCache(cache_dir or Path.home() / ".cache" / "buddy" / "tts")
+        self._cache_writes: Set[asyncio.Future] = set()  # strong refs until each background put finishes
+        
         # Statistics
         self.stats = {
             "total_requests": 0,
             "successful_syntheses": 0,
             "total_characters": 0,
             "avg_synthesis_time": 0.0,
+            "avg_time_to_first_audio": 0.0,
             "total_audio_generated": 0.0
         }
         
@@ -100,8 +338,18 @@ class TextToSpeech:
             self.piper_model = {
                 "binary": piper_path,
                 "model": voice_model,
-                "config": voice_model.with_suffix(".json")
+                # Piper voices ship their config as <voice>.onnx.json
+                "config": Path(f"{voice_model}.json") if Path(f"{voice_model}.json").exists()
+                          else voice_model.with_suffix(".json")
             }
+            
+            # Spawn the worker and load the voice model once, up front
+            self.piper_worker = PiperWorker(
+                piper_path, voice_model, self.piper_model["config"], length_scale=1.0 / self.speed
+            )
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self.piper_worker.synthesize, "Ready.")
+            
             self.engine_type = "piper"
             self.is_initialized = True
             
@@ -112,6 +360,9 @@ class TextToSpeech:
             
         except Exception as e:
             logger.debug(f"Piper initialization failed: {e}")
+            if self.piper_worker:
+                self.piper_worker.close()
+                self.piper_worker = None
             return False
             
     async def _init_coqui(self) -> bool:
@@ -233,103 +484,131 @@ class TextToSpeech:
             return True
             
         try:
-            import time
-            start_time = time.time()
+            start_time = time.perf_counter()
             
             self.stats["total_requests"] += 1
             self.stats["total_characters"] += len(text)
             
             voice_to_use = voice or self.current_voice
             
-            # Synthesize audio
-            audio_data = None
-            
             if self.engine_type == "piper":
-                audio_data = await self._synthesize_piper(text, voice_to_use)
-            elif self.engine_type == "coqui":
-                audio_data = await self._synthesize_coqui(text, voice_to_use)
-            elif self.engine_type == "system":
-                audio_data = await self._synthesize_system(text, voice_to_use)
+                success, audio_duration = await self._speak_streaming(text, voice_to_use, start_time)
+            else:
+                # Synthesize audio
+                audio_data = None
                 
-            if audio_data is not None:
+                if self.engine_type == "coqui":
+                    audio_data = await self._synthesize_coqui(text, voice_to_use)
+                elif self.engine_type == "system":
+                    audio_data = await self._synthesize_system(text, voice_to_use)
+                    
+                if audio_data is None:
+                    return False
+                    
                 # Play the audio
                 success = await self._play_audio(audio_data)
+                audio_duration = len(audio_data) / self.sample_rate if isinstance(audio_data, np.ndarray) else 0.0
                 
-                if success:
-                    self.stats["successful_syntheses"] += 1
-                    
-                # Update statistics
-                synthesis_time = time.time() - start_time
-                self.stats["avg_synthesis_time"] = (
-                    (self.stats["avg_synthesis_time"] * (self.stats["total_requests"] - 1) + synthesis_time)
-                    / self.stats["total_requests"]
-                )
+            if success:
+                self.stats["successful_syntheses"] += 1
                 
-                if isinstance(audio_data, np.ndarray):
-                    audio_duration = len(audio_data) / self.sample_rate
-                    self.stats["total_audio_generated"] += audio_duration
-                    
-                logger.debug(f"TTS completed ({synthesis_time:.2f}s): '{text[:50]}...'")
-                return success
+            # Update statistics
+            synthesis_time = time.perf_counter() - start_time
+            self.stats["avg_synthesis_time"] = (
+                (self.stats["avg_synthesis_time"] * (self.stats["total_requests"] - 1) + synthesis_time)
+                / self.stats["total_requests"]
+            )
+            self.stats["total_audio_generated"] += audio_duration
+            
+            logger.debug(f"TTS completed ({synthesis_time:.2f}s): '{text[:50]}...'")
+            return success
                 
         except Exception as e:
             logger.error(f"TTS synthesis error: {e}")
             
         return False
         
-    async def _synthesize_piper(self, text: str, voice: str) -> Optional[np.ndarray]:
-        """Synthesize using Piper."""
-        try:
-            if not self.piper_model:
-                return None
-                
-            # Create temporary files
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False) as text_file:
-                text_file.write(text)
-                text_file_path = text_file.name
-                
-            with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as audio_file:
-                audio_file_path = audio_file.name
+    async def synthesize_stream(self, text: str, voice: Optional[str] = None) -> AsyncIterator[Tuple[np.ndarray, int]]:
+        """
+        Synthesize text sentence by sentence.
+        
+        Yields ``(int16 PCM, sample_rate)`` for each sentence as soon as it is
+        ready, serving repeated sentences from the phrase cache.
+        """
+        if self.engine_type != "piper" or not self.piper_worker:
+            raise RuntimeError("Streaming synthesis requires the Piper engine")
+            
+        voice_to_use = voice or self.current_voice
+        loop = asyncio.get_running_loop()
+        for sentence in split_sentences(text):
+            key = PCMCache.key(sentence, "piper", self.piper_model["model"], voice_to_use, self.speed)
+            cached = await loop.run_in_executor(None, self.cache.get, key)
+            if cached is not None:
+                yield cached
+                continue
                 
             try:
-                # Run Piper
-                cmd = [
-                    str(self.piper_model["binary"]),
-                    "--model", str(self.piper_model["model"]),
-                    "--config", str(self.piper_model["config"]),
-                    "--output_file", audio_file_path
-                ]
-                
-                # Add text via stdin
-                process = subprocess.run(
-                    cmd,
-                    input=text,
-                    text=True,
-                    capture_output=True,
-                    timeout=30
+                audio = await asyncio.wait_for(
+                    loop.run_in_executor(None, self.piper_worker.synthesize, sentence),
+                    timeout=self.synthesis_timeout
                 )
-                
-                if process.returncode == 0:
-                    # Load generated audio
-                    import soundfile as sf
-                    audio_data, sr = sf.read(audio_file_path)
-                    
-                    # Convert to numpy array if needed
-                    if not isinstance(audio_data, np.ndarray):
-                        audio_data = np.array(audio_data)
-                        
-                    return audio_data
-                else:
-                    logger.error(f"Piper process failed: {process.stderr}")
-                    
+            except asyncio.TimeoutError:
+                # The executor thread is still blocked reading the worker while holding its lock;
+                # killing the process unblocks it so later syntheses do not queue behind it
+                self.piper_worker.kill()
+                raise
+            sample_rate = self.piper_worker.sample_rate or self.sample_rate
+            write = loop.run_in_executor(None, self.cache.put, key, sentence, audio, sample_rate)
+            self._cache_writes.add(write)
+            write.add_done_callback(self._cache_writes.discard)
+            yield audio, sample_rate
+            
+    async def _speak_streaming(self, text: str, voice: str, start_time: float) -> Tuple[bool, float]:
+        """Play sentences as they are synthesized, overlapping synthesis with playback."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=2)
+        
+        async def produce():
+            try:
+                async for chunk in self.synthesize_stream(text, voice):
+                    await queue.put(chunk)
             finally:
-                # Clean up temporary files
-                try:
-                    os.unlink(text_file_path)
-                    os.unlink(audio_file_path)
-                except:
-                    pass
-                    
+                await queue.put(None)
+                
+        producer = asyncio.create_task(produce())
+        success = True
+        audio_duration = 0.0
+        first = True
+        try:
+            while True:
+                chunk = await queue.get()
+                if chunk is None:
+                    break
+                audio, sample_rate = chunk
+                if first:
+                    first = False
+                    ttfa = time.perf_counter() - start_time
+                    n = self.stats["total_requests"]
+                    self.stats["avg_time_to_first_audio"] = (
+                        (self.stats["avg_time_to_first_audio"] * (n - 1) + ttfa) / n
+                    )
+                audio_duration += len(audio) / sample_rate
+                success = await self._play_audio(audio, sample_rate) and success
+            await producer
+        except Exception as e:
+            logger.error(f"Piper synthesis error: {e}")
+            producer.cancel()
+            return False, audio_duration
+        return success and not first, audio_duration
+        
+    async def _synthesize_piper(self, text: str, voice: str) -> Optional[np.ndarray]:
+        """Synthesize a whole utterance using the Piper worker."""
+        try:
+            if not self.piper_worker:
+                return None
+                
+            chunks = [audio async for audio, _ in self.synthesize_stream(text, voice)]
+            return np.concatenate(chunks) if chunks else None
+            
         except Exception as e:
             logger.error(f"Piper synthesis error: {e}")
             
@@ -376,7 +655,7 @@ class TextToSpeech:
             
         return None
         
-    async def _play_audio(self, audio_data) -> bool:
+    async def _play_audio(self, audio_data, sample_rate: Optional[int] = None) -> bool:
         """Play audio data."""
         try:
             if isinstance(audio_data, bool):
@@ -385,9 +664,6 @@ class TextToSpeech:
             if not isinstance(audio_data, np.ndarray):
                 return False
                 
-            # Play using sounddevice
-            import sounddevice as sd
-            
             # Ensure audio is in correct format
             if audio_data.dtype != np.float32:
                 if audio_data.dtype == np.int16:
@@ -395,9 +671,9 @@ class TextToSpeech:
                 else:
                     audio_data = audio_data.astype(np.float32)
                     
-            # Play audio
-            sd.play(audio_data, self.sample_rate)
-            sd.wait()  # Wait until audio finishes
+            # Play audio without blocking the event loop
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self._play_blocking, audio_data, sample_rate or self.sample_rate)
             
             return True
             
@@ -405,6 +681,13 @@ class TextToSpeech:
             logger.error(f"Audio playback error: {e}")
             return False
             
+    @staticmethod
+    def _play_blocking(audio_data: np.ndarray, sample_rate: int):
+        # Play using sounddevice
+        import sounddevice as sd
+        sd.play(audio_data, sample_rate)
+        sd.wait()  # Wait until audio finishes
+            
     async def _load_piper_voices(self):
         """Load available Piper voices."""
         # Implementation would scan voice directories
@@ -423,6 +706,9 @@ class TextToSpeech:
             
     async def stop(self):
         """Stop TTS processing."""
+        if self.piper_worker:
+            self.piper_worker.close()
+            self.piper_worker = None
         self.piper_model = None
         self.coqui_model = None
         self.system_tts = None
@@ -456,6 +742,7 @@ class TextToSpeech:
             "current_voice": self.current_voice,
             "available_voices": len(self.get_available_voices()),
             "success_rate": success_rate,
+            "cache": self.cache.stats(),
             **self.stats
         }
 
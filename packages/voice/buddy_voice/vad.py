@@ -9,18 +9,46 @@ Optimized for real-time processing with low latency.
 import asyncio
 import logging
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 from typing import Optional, Dict, Any
 import time
 
+from .ring_buffer import SampleRingBuffer
+
 logger = logging.getLogger(__name__)
 
 
+def frame_times(n_frames: int, frame_length: int, sample_rate: int,
+                timestamps: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Arrival times for a block of frames.
+    
+    Without explicit timestamps the block is assumed to end now, with frames
+    spaced one frame duration apart, which matches per-frame processing of
+    live audio.
+    """
+    if timestamps is not None:
+        return np.asarray(timestamps, dtype=float)
+    frame_duration = frame_length / sample_rate
+    return time.time() - frame_duration * np.arange(n_frames - 1, -1, -1)
+
+
+def frame_rms(frames: np.ndarray) -> np.ndarray:
+    """RMS energy of each row of a 2-D frame block."""
+    return np.sqrt(np.mean(frames.astype(float) ** 2, axis=1))
+
+
 class VoiceActivityDetector:
     """
     Voice Activity Detection for distinguishing speech from silence/noise.
     
     Uses multiple detection methods with configurable sensitivity and
     temporal smoothing to reduce false positives.
+    
+    ``process_block`` evaluates a whole block of equal-length frames at once:
+    features, noise floor and smoothing are computed with NumPy over
+    circular histories, and only the speech/silence hysteresis steps through
+    the frames. ``process_audio`` is the single-frame case of the same path.
     """
     
     def __init__(self, audio_config):
@@ -44,8 +72,8 @@ class VoiceActivityDetector:
         self.last_detection_time = 0
         
         # Smoothing buffers
-        self.detection_buffer = []
         self.buffer_size = 5  # Number of frames to average
+        self.detection_buffer = SampleRingBuffer(self.buffer_size, dtype=bool)
         
         # Statistics
         self.stats = {
@@ -110,45 +138,60 @@ class VoiceActivityDetector:
             return False
             
         try:
-            current_time = time.time()
-            self.stats["total_frames"] += 1
-            
-            # Get detection from available methods
-            detections = []
+            return bool(self.process_block(audio_data[np.newaxis, :])[-1])
             
-            # WebRTC VAD
-            if self.webrtc_vad:
-                webrtc_result = await self._detect_webrtc(audio_data)
-                if webrtc_result is not None:
-                    detections.append(webrtc_result)
-                    
-            # Energy-based detection
-            energy_result = await self._detect_energy(audio_data)
-            detections.append(energy_result)
-            
-            # Combine detections (simple voting for now)
-            raw_detection = any(detections) if detections else False
+        except Exception as e:
+            logger.error(f"VAD processing error: {e}")
+            return False
             
-            # Apply temporal smoothing
-            smoothed_detection = self._apply_smoothing(raw_detection)
+    def process_block(self, frames: np.ndarray, timestamps: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Process a block of consecutive, equal-length frames.
+        
+        Args:
+            frames: Array of shape (n_frames, frame_length)
+            timestamps: Arrival time of each frame (defaults to ending now)
             
-            # Update state and apply minimum duration constraints
-            final_detection = self._update_state(smoothed_detection, current_time)
+        Returns:
+            Boolean array with the speech decision for each frame
+        """
+        frames = np.atleast_2d(frames)
+        n_frames = len(frames)
+        if not self.is_initialized or n_frames == 0:
+            return np.zeros(n_frames, dtype=bool)
             
-            # Update statistics
-            if final_detection:
-                self.stats["speech_frames"] += 1
-            else:
-                self.stats["silence_frames"] += 1
-                
-            self.last_detection_time = current_time
-            return final_detection
+        times = frame_times(n_frames, frames.shape[1], self.sample_rate, timestamps)
+        self.stats["total_frames"] += n_frames
+        
+        # Energy-based detection
+        if self.energy_detector:
+            raw_detection = self.energy_detector.detect_block(frames)
+        else:
+            raw_detection = np.zeros(n_frames, dtype=bool)
             
-        except Exception as e:
-            logger.error(f"VAD processing error: {e}")
-            return False
+        # WebRTC VAD (simple voting: either detector may flag speech)
+        if self.webrtc_vad:
+            raw_detection |= np.fromiter(
+                (self._detect_webrtc(frame) is True for frame in frames), dtype=bool, count=n_frames
+            )
             
-    async def _detect_webrtc(self, audio_data: np.ndarray) -> Optional[bool]:
+        # Apply temporal smoothing
+        smoothed = self._apply_smoothing(raw_detection)
+        
+        # Update state and apply minimum duration constraints
+        decisions = np.empty(n_frames, dtype=bool)
+        for i in range(n_frames):
+            decisions[i] = self._update_state(bool(smoothed[i]), float(times[i]))
+            
+        # Update statistics
+        speech_frames = int(np.count_nonzero(decisions))
+        self.stats["speech_frames"] += speech_frames
+        self.stats["silence_frames"] += n_frames - speech_frames
+        
+        self.last_detection_time = float(times[-1])
+        return decisions
+        
+    def _detect_webrtc(self, audio_data: np.ndarray) -> Optional[bool]:
         """Detect speech using WebRTC VAD."""
         try:
             # WebRTC VAD expects 16-bit PCM data
@@ -170,28 +213,23 @@ class VoiceActivityDetector:
             
         return None
         
-    async def _detect_energy(self, audio_data: np.ndarray) -> bool:
-        """Detect speech using energy-based method."""
-        if self.energy_detector:
-            return await self.energy_detector.detect(audio_data)
-        return False
+    def _apply_smoothing(self, detections: np.ndarray) -> np.ndarray:
+        """Apply temporal smoothing to reduce noise (majority vote over the last frames)."""
+        previous = self.detection_buffer.latest(self.buffer_size - 1)
+        self.detection_buffer.extend(detections)
         
-    def _apply_smoothing(self, detection: bool) -> bool:
-        """Apply temporal smoothing to reduce noise."""
-        # Add to buffer
-        self.detection_buffer.append(detection)
-        
-        # Keep buffer at fixed size
-        if len(self.detection_buffer) > self.buffer_size:
-            self.detection_buffer.pop(0)
-            
-        # Apply smoothing - require majority vote
-        if len(self.detection_buffer) >= self.buffer_size:
-            positive_count = sum(self.detection_buffer)
+        # Frames without a full window yet keep their raw decision
+        smoothed = detections.copy()
+        first_full = max(0, self.buffer_size - 1 - len(previous))
+        if first_full < len(detections):
+            history = np.concatenate((previous, detections)).astype(np.int32)
+            counts = np.concatenate(([0], np.cumsum(history)))
+            ends = len(previous) + np.arange(first_full, len(detections)) + 1
+            positive_count = counts[ends] - counts[ends - self.buffer_size]
             threshold = self.buffer_size * self.sensitivity
-            return positive_count >= threshold
+            smoothed[first_full:] = positive_count >= threshold
             
-        return detection
+        return smoothed
         
     def _update_state(self, detection: bool, current_time: float) -> bool:
         """Update speech state with minimum duration constraints."""
@@ -298,8 +336,8 @@ class EnergyVAD:
         self.spectral_threshold = 0.5
         
         # Adaptive threshold tracking
-        self.energy_history = []
         self.history_size = 100
+        self.energy_history = SampleRingBuffer(self.history_size, dtype=np.float64)
         self.noise_floor = 0.001
         
         # Zero crossing rate for basic spectral analysis
@@ -316,53 +354,82 @@ class EnergyVAD:
             True if speech detected
         """
         try:
-            # Calculate RMS energy
-            energy = np.sqrt(np.mean(audio_data.astype(float) ** 2))
-            
-            # Update adaptive threshold
-            self._update_adaptive_threshold(energy)
-            
-            # Energy-based detection
-            energy_detection = energy > self.energy_threshold
-            
-            # Zero crossing rate (simple spectral feature)
-            zcr = self._calculate_zcr(audio_data)
-            spectral_detection = zcr > self.zcr_threshold
-            
-            # Combine detections
-            return energy_detection and spectral_detection
+            return bool(self.detect_block(audio_data[np.newaxis, :])[0])
             
         except Exception as e:
             logger.error(f"Energy VAD error: {e}")
             return False
             
-    def _update_adaptive_threshold(self, energy: float):
-        """Update adaptive energy threshold based on recent history."""
-        self.energy_history.append(energy)
+    def detect_block(self, frames: np.ndarray) -> np.ndarray:
+        """
+        Detect speech in each row of a block of equal-length frames.
         
-        if len(self.energy_history) > self.history_size:
-            self.energy_history.pop(0)
-            
-        if len(self.energy_history) >= 10:
-            # Use percentile-based threshold
-            sorted_energies = sorted(self.energy_history)
-            noise_estimate = sorted_energies[len(sorted_energies) // 4]  # 25th percentile
-            self.noise_floor = max(noise_estimate, 0.001)
-            self.energy_threshold = self.noise_floor * 3.0  # 3x noise floor
-            
-    def _calculate_zcr(self, audio_data: np.ndarray) -> float:
-        """Calculate zero crossing rate."""
-        try:
-            if len(audio_data) < 2:
-                return 0.0
-                
-            # Count zero crossings
-            crossings = np.sum(np.diff(np.sign(audio_data)) != 0)
-            
-            # Normalize by frame length
-            zcr = crossings / len(audio_data)
-            
-            return zcr
-            
-        except Exception:
-            return 0.0
+        Returns:
+            Boolean array, one decision per frame
+        """
+        frames = np.atleast_2d(frames)
+        
+        # Calculate RMS energy
+        energies = frame_rms(frames)
+        
+        # Update adaptive threshold (each frame sees the history up to itself)
+        thresholds = self._update_adaptive_threshold(energies)
+        
+        # Energy-based detection
+        energy_detection = energies > thresholds
+        
+        # Zero crossing rate (simple spectral feature)
+        zcr = self._calculate_zcr(frames)
+        spectral_detection = zcr > self.zcr_threshold
+        
+        # Combine detections
+        return energy_detection & spectral_detection
+        
+    def _update_adaptive_threshold(self, energies: np.ndarray) -> np.ndarray:
+        """
+        Update adaptive energy threshold based on recent history.
+        
+        Returns the threshold in effect for each frame of the block.
+        """
+        previous = self.energy_history.latest(self.history_size - 1)
+        self.energy_history.extend(energies)
+        history = np.concatenate((previous, energies))
+        n_previous = len(previous)
+        
+        thresholds = np.empty(len(energies))
+        threshold = self.energy_threshold
+        
+        # While the history is still filling, window sizes differ per frame
+        i = 0
+        while i < len(energies) and n_previous + i + 1 < self.history_size:
+            size = n_previous + i + 1
+            if size >= 10:
+                # Use percentile-based threshold (25th percentile)
+                noise_estimate = np.partition(history[:size], size // 4)[size // 4]
+                self.noise_floor = max(noise_estimate, 0.001)
+                threshold = self.noise_floor * 3.0  # 3x noise floor
+            thresholds[i] = threshold
+            i += 1
+            
+        # Full windows: one partition over every window of the block
+        if i < len(energies):
+            start = n_previous + i + 1 - self.history_size
+            windows = sliding_window_view(history[start:], self.history_size)
+            k = self.history_size // 4
+            noise_floors = np.maximum(np.partition(windows, k, axis=1)[:, k], 0.001)
+            thresholds[i:] = noise_floors * 3.0
+            self.noise_floor = noise_floors[-1]
+            threshold = thresholds[-1]
+            
+        self.energy_threshold = threshold
+        return thresholds
+        
+    def _calculate_zcr(self, frames: np.ndarray) -> np.ndarray:
+        """Calculate zero crossing rate of each frame."""
+        frames = np.atleast_2d(frames)
+        if frames.shape[1] < 2:
+            return np.zeros(len(frames))
+            
+        # Count zero crossings, normalized by frame length
+        crossings = np.count_nonzero(np.diff(np.sign(frames), axis=1), axis=1)
+        return crossings / frames.shape[1]
@@ -9,9 +9,12 @@ thresholding with false positive mitigation.
 import asyncio
 import logging
 import numpy as np
-from typing import Optional, Dict, Any, List
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import Optional, Dict, Any, List, Callable, Tuple
 from pathlib import Path
-import time
+
+from .ring_buffer import SampleRingBuffer
+from .vad import frame_rms, frame_times
 
 logger = logging.getLogger(__name__)
 
@@ -137,65 +140,105 @@ class WakeWordDetector:
         Returns:
             True if wake word detected with sufficient confidence
         """
+        return self.process_block(audio_data[np.newaxis, :])
+        
+    def process_block(self, frames: np.ndarray, timestamps: Optional[np.ndarray] = None) -> bool:
+        """
+        Process a block of consecutive, equal-length frames.
+        
+        Frames are scored together; confirmation then steps through the
+        scores so the result matches feeding the frames one at a time.
+        
+        Args:
+            frames: Array of shape (n_frames, frame_length)
+            timestamps: Arrival time of each frame (defaults to ending now)
+            
+        Returns:
+            True if the wake word was confirmed in any frame of the block
+        """
         if not self.is_initialized:
             return False
             
         try:
-            # Check false positive timeout
-            current_time = time.time()
-            if current_time - self.last_detection_time < self.false_positive_timeout:
-                return False
-                
-            # Process with appropriate model
-            confidence = 0.0
+            frames = np.atleast_2d(frames)
+            times = frame_times(len(frames), frames.shape[1], self.audio_config.sample_rate, timestamps)
+            detected = False
+            start = 0
             
-            if self.model_type == "porcupine":
-                confidence = await self._process_porcupine(audio_data)
-            elif self.model_type == "precise":
-                confidence = await self._process_precise(audio_data)
-            elif self.model_type == "simple":
-                confidence = await self._process_simple(audio_data)
+            while start < len(frames):
+                # Check false positive timeout: frames inside it are not scored at all
+                live = times[start:] - self.last_detection_time >= self.false_positive_timeout
+                if not live.any():
+                    break
+                start += int(np.argmax(live))
                 
-            self.last_confidence = confidence
-            
-            # Apply confidence thresholding with buffering
-            if confidence > self.confidence_threshold:
-                self.detection_buffer.append(confidence)
-                
-                # Keep buffer at fixed size
-                if len(self.detection_buffer) > self.buffer_size:
-                    self.detection_buffer.pop(0)
-                    
-                # Check if we have enough confident detections
-                if len(self.detection_buffer) >= self.buffer_size:
-                    avg_confidence = np.mean(self.detection_buffer)
-                    
-                    if avg_confidence > self.confirmation_threshold:
-                        self.last_detection_time = current_time
-                        self.detection_buffer.clear()
-                        
-                        # Update statistics
-                        self.stats["total_detections"] += 1
-                        self.stats["confirmed_detections"] += 1
-                        self.stats["avg_confidence"] = (
-                            (self.stats["avg_confidence"] * (self.stats["confirmed_detections"] - 1) + avg_confidence) 
-                            / self.stats["confirmed_detections"]
-                        )
+                confidences, commit = self._score_frames(frames[start:])
+                confirmed_at = None
+                for i, confidence in enumerate(confidences):
+                    self.last_confidence = float(confidence)
+                    if self._confirm(self.last_confidence, float(times[start + i])):
+                        confirmed_at = i
+                        break
                         
-                        logger.debug(f"Wake word detected with confidence: {avg_confidence:.3f}")
-                        return True
-            else:
-                # Clear buffer on low confidence
-                if self.detection_buffer:
-                    self.detection_buffer.clear()
-                    
-            return False
+                if confirmed_at is None:
+                    commit(len(confidences))
+                    break
+                # Frames after a detection fall in the timeout; leave them unscored
+                commit(confirmed_at + 1)
+                detected = True
+                start += confirmed_at + 1
+                
+            return detected
             
         except Exception as e:
             logger.error(f"Wake word processing error: {e}")
             return False
             
-    async def _process_porcupine(self, audio_data: np.ndarray) -> float:
+    def _score_frames(self, frames: np.ndarray) -> Tuple[np.ndarray, Callable[[int], None]]:
+        """Score frames with the active model; ``commit(k)`` keeps the state of the first k."""
+        if self.model_type == "simple" and self.model:
+            confidences, energies = self.model.score_block(frames)
+            return confidences, lambda k: self.model.commit(energies[:k])
+        if self.model_type == "porcupine":
+            return np.array([self._process_porcupine(frame) for frame in frames]), lambda k: None
+        # Precise placeholder
+        return np.zeros(len(frames)), lambda k: None
+        
+    def _confirm(self, confidence: float, current_time: float) -> bool:
+        """Apply confidence thresholding with buffering to one frame score."""
+        if confidence > self.confidence_threshold:
+            self.detection_buffer.append(confidence)
+            
+            # Keep buffer at fixed size
+            if len(self.detection_buffer) > self.buffer_size:
+                self.detection_buffer.pop(0)
+                
+            # Check if we have enough confident detections
+            if len(self.detection_buffer) >= self.buffer_size:
+                avg_confidence = np.mean(self.detection_buffer)
+                
+                if avg_confidence > self.confirmation_threshold:
+                    self.last_detection_time = current_time
+                    self.detection_buffer.clear()
+                    
+                    # Update statistics
+                    self.stats["total_detections"] += 1
+                    self.stats["confirmed_detections"] += 1
+                    self.stats["avg_confidence"] = (
+                        (self.stats["avg_confidence"] * (self.stats["confirmed_detections"] - 1) + avg_confidence) 
+                        / self.stats["confirmed_detections"]
+                    )
+                    
+                    logger.debug(f"Wake word detected with confidence: {avg_confidence:.3f}")
+                    return True
+        else:
+            # Clear buffer on low confidence
+            if self.detection_buffer:
+                self.detection_buffer.clear()
+                
+        return False
+        
+    def _process_porcupine(self, audio_data: np.ndarray) -> float:
         """Process audio with Porcupine model."""
         try:
             # Convert to int16 if needed
@@ -214,17 +257,6 @@ class WakeWordDetector:
             
         return 0.0
         
-    async def _process_precise(self, audio_data: np.ndarray) -> float:
-        """Process audio with Precise model."""
-        # Placeholder for Precise implementation
-        return 0.0
-        
-    async def _process_simple(self, audio_data: np.ndarray) -> float:
-        """Process audio with simple detector."""
-        if self.model:
-            return await self.model.detect(audio_data)
-        return 0.0
-        
     async def stop(self):
         """Stop the wake word detector."""
         if self.model and self.model_type == "porcupine":
@@ -278,8 +310,8 @@ class SimpleWakeWordDetector:
         # Simple energy-based detection parameters
         self.energy_threshold = 0.01
         self.pattern_length = int(sample_rate * 2.0)  # 2 seconds
-        self.energy_buffer = []
         self.max_buffer_size = 10
+        self.energy_buffer = SampleRingBuffer(self.max_buffer_size, dtype=np.float64)
         
     async def detect(self, audio_data: np.ndarray) -> float:
         """
@@ -292,27 +324,64 @@ class SimpleWakeWordDetector:
             Confidence score (0.0 to 1.0)
         """
         try:
-            # Calculate RMS energy
-            energy = np.sqrt(np.mean(audio_data.astype(float) ** 2))
-            
-            # Add to energy buffer
-            self.energy_buffer.append(energy)
-            if len(self.energy_buffer) > self.max_buffer_size:
-                self.energy_buffer.pop(0)
-                
-            # Check for energy pattern that could indicate speech
-            if len(self.energy_buffer) >= 3:
-                recent_energy = np.mean(self.energy_buffer[-3:])
-                avg_energy = np.mean(self.energy_buffer)
-                
-                # Simple heuristic: recent energy is significantly higher than average
-                if recent_energy > self.energy_threshold and recent_energy > avg_energy * 2.0:
-                    # Return a confidence based on energy ratio
-                    confidence = min(recent_energy / (avg_energy * 3.0), 1.0)
-                    return confidence * 0.8  # Cap at 0.8 since this is a simple detector
-                    
-            return 0.0
+            confidences, energies = self.score_block(audio_data[np.newaxis, :])
+            self.commit(energies)
+            return float(confidences[0])
             
         except Exception as e:
             logger.error(f"Simple wake word detection error: {e}")
             return 0.0
+            
+    def score_block(self, frames: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Score each frame of a block without updating state.
+        
+        Returns:
+            (confidences, energies); pass a prefix of ``energies`` to
+            ``commit`` to advance the detector by that many frames
+        """
+        frames = np.atleast_2d(frames)
+        
+        # Calculate RMS energy
+        energies = frame_rms(frames)
+        previous = self.energy_buffer.latest(self.max_buffer_size - 1)
+        history = np.concatenate((previous, energies))
+        confidences = np.zeros(len(energies))
+        
+        # While the buffer is still filling, windows differ in length per frame
+        i = 0
+        while i < len(energies) and len(previous) + i + 1 < self.max_buffer_size:
+            size = len(previous) + i + 1
+            if size >= 3:
+                window = history[:size]
+                confidences[i] = self._pattern_confidence(np.mean(window[-3:]), np.mean(window))
+            i += 1
+            
+        # Full windows: evaluate the energy pattern for all remaining frames at once
+        if i < len(energies):
+            start = len(previous) + i + 1 - self.max_buffer_size
+            # Contiguous rows keep the per-window sums bit-identical to np.mean on a list
+            windows = np.ascontiguousarray(sliding_window_view(history[start:], self.max_buffer_size))
+            avg_energy = np.mean(windows, axis=1)
+            recent_energy = np.mean(np.ascontiguousarray(windows[:, -3:]), axis=1)
+            
+            # Simple heuristic: recent energy is significantly higher than average
+            pattern = (recent_energy > self.energy_threshold) & (recent_energy > avg_energy * 2.0)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                ratio = np.minimum(recent_energy / (avg_energy * 3.0), 1.0)
+            # Cap at 0.8 since this is a simple detector
+            confidences[i:] = np.where(pattern, ratio * 0.8, 0.0)
+            
+        return confidences, energies
+        
+    def commit(self, energies: np.ndarray):
+        """Append scored frame energies to the pattern history."""
+        self.energy_buffer.extend(energies)
+        
+    def _pattern_confidence(self, recent_energy: float, avg_energy: float) -> float:
+        # Simple heuristic: recent energy is significantly higher than average
+        if recent_energy > self.energy_threshold and recent_energy > avg_energy * 2.0:
+            # Return a confidence based on energy ratio
+            confidence = min(recent_energy / (avg_energy * 3.0), 1.0)
+            return confidence * 0.8  # Cap at 0.8 since this is a simple detector
+        return 0.0
@@ -0,0 +1,170 @@
+"""
+SMTPConnectionPool against a local aiosmtpd server.
+
+Covers connection reuse, recycling, NOOP health checks and which failures
+are retried: a session that dropped before DATA is, server refusals and
+anything after DATA are not.
+"""
+
+import smtplib
+import socket
+from email.mime.text import MIMEText
+
+import pytest
+
+pytest.importorskip("aiosmtpd")
+from aiosmtpd.controller import Controller
+
+from buddy_core.utils.mailer import SMTPConnectionPool
+
+
+class RecordingHandler:
+    """Accepts everything except the addresses and payloads it is told to refuse."""
+
+    def __init__(self):
+        self.delivered = []
+        self.data_attempts = 0
+        self.refuse_rcpt = set()
+        self.refuse_data = False
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address in self.refuse_rcpt:
+            return "550 no such user"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        self.data_attempts += 1
+        if self.refuse_data:
+            return "451 try again later"
+        self.delivered.append((envelope.mail_from, list(envelope.rcpt_tos), envelope.content))
+        return "250 Message accepted for delivery"
+
+
+class LocalServer:
+    """An aiosmtpd server on a free local port that can be restarted in place."""
+
+    hostname = "127.0.0.1"
+
+    def __init__(self):
+        self.handler = RecordingHandler()
+        with socket.socket() as sock:
+            sock.bind((self.hostname, 0))
+            self.port = sock.getsockname()[1]
+        self._start()
+
+    def _start(self):
+        self.controller = Controller(self.handler, hostname=self.hostname, port=self.port)
+        self.controller.start()
+
+    def restart(self):
+        """Drop every open session, then listen again on the same port."""
+        self.controller.stop()
+        self._start()
+
+    def stop(self):
+        self.controller.stop()
+
+
+@pytest.fixture
+def server():
+    server = LocalServer()
+    yield server
+    server.stop()
+
+
+def make_pool(server, **kwargs) -> SMTPConnectionPool:
+    kwargs.setdefault("starttls", False)
+    kwargs.setdefault("timeout", 5.0)
+    return SMTPConnectionPool(server.hostname, server.port, **kwargs)
+
+
+def message(to: str = "bob@example.com", subject: str = "hello") -> MIMEText:
+    msg = MIMEText("body", "plain")
+    msg["Subject"] = subject
+    msg["From"] = "buddy@example.com"
+    msg["To"] = to
+    return msg
+
+
+def test_messages_share_one_session(server):
+    pool = make_pool(server)
+    for i in range(5):
+        assert pool.send_message(message(subject=f"n{i}"))
+    pool.close()
+
+    assert len(server.handler.delivered) == 5
+    assert server.handler.delivered[0][:2] == ("buddy@example.com", ["bob@example.com"])
+    assert pool.stats["opened"] == 1
+    assert pool.stats["reused"] == 4
+
+
+def test_session_recycled_after_max_messages(server):
+    pool = make_pool(server, max_messages_per_connection=2)
+    for _ in range(5):
+        pool.send_message(message())
+    pool.close()
+
+    assert len(server.handler.delivered) == 5
+    assert pool.stats["opened"] == 3
+    assert pool.stats["recycled"] == 2
+
+
+def test_cc_and_bcc_are_recipients_but_bcc_is_not_sent(server):
+    pool = make_pool(server)
+    msg = message()
+    msg["Cc"] = "carol@example.com"
+    msg["Bcc"] = "dave@example.com"
+    pool.send_message(msg)
+    pool.close()
+
+    _, rcpt_tos, content = server.handler.delivered[0]
+    assert rcpt_tos == ["bob@example.com", "carol@example.com", "dave@example.com"]
+    assert b"dave@example.com" not in content
+
+
+def test_refused_recipient_is_raised_and_session_kept(server):
+    server.handler.refuse_rcpt.add("nobody@example.com")
+    pool = make_pool(server)
+    with pytest.raises(smtplib.SMTPRecipientsRefused):
+        pool.send_message(message(to="nobody@example.com"))
+    assert pool.send_message(message())
+    pool.close()
+
+    assert len(server.handler.delivered) == 1
+    assert pool.stats["opened"] == 1
+
+
+def test_failure_after_data_is_not_retried(server):
+    server.handler.refuse_data = True
+    pool = make_pool(server)
+    with pytest.raises(smtplib.SMTPDataError):
+        pool.send_message(message())
+    pool.close()
+
+    assert server.handler.data_attempts == 1
+
+
+def test_dropped_session_is_retried_before_data(server):
+    # Never NOOP, so the dead session is only found when MAIL is sent on it
+    pool = make_pool(server, noop_after=3600)
+    pool.send_message(message())
+    server.restart()
+    assert pool.send_message(message())
+    pool.close()
+
+    assert len(server.handler.delivered) == 2
+    assert pool.stats["opened"] == 2
+    assert pool.stats["broken"] == 1
+
+
+def test_idle_session_failing_noop_is_replaced(server):
+    pool = make_pool(server, noop_after=0)
+    pool.send_message(message())
+    server.restart()
+    assert pool.send_message(message())
+    pool.close()
+
+    assert len(server.handler.delivered) == 2
+    assert pool.stats["opened"] == 2
+    assert pool.stats["broken"] == 1
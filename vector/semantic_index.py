@@ -4,27 +4,87 @@ Phase 1 provides optional in-memory embedding storage using sentence-transformer
 if available. Later phases: persistence, ANN (FAISS), versioned embeddings.
 """
 from __future__ import annotations
+import importlib.util
+import logging
+import threading
+import time
 from typing import List, Tuple, Optional, Dict
 from collections import Counter
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
+# Only probe for the packages here; importing sentence-transformers pulls in
+# torch, which alone costs seconds of startup. The model itself is loaded on
+# first use (or by an explicit warmup) through LazyModel.
 try:
-    from sentence_transformers import SentenceTransformer
-    import numpy as np
-    MODEL_AVAILABLE = True
+    MODEL_AVAILABLE = (importlib.util.find_spec("sentence_transformers") is not None
+                       and importlib.util.find_spec("numpy") is not None)
 except Exception:
     MODEL_AVAILABLE = False
-    SentenceTransformer = None  # type: ignore
-    np = None  # type: ignore
+
+
+class LazyModel:
+    """Deferred SentenceTransformer handle.
+
+    ``get()`` loads the model on first call (thread-safe, at most once) and
+    returns None when sentence-transformers is not installed or loading
+    failed. It blocks for the whole load (or until a warmup in progress
+    finishes), so async code calls the index from a worker thread
+    (``asyncio.to_thread``), never on the event loop. ``warmup()`` does the
+    same load ahead of time, optionally on a daemon thread so process
+    startup is not blocked by it.
+    """
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+        self._model = None
+        self._failed = not MODEL_AVAILABLE
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.load_seconds: Optional[float] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._model is not None
+
+    def get(self):
+        if self._model is not None or self._failed:
+            return self._model
+        with self._lock:
+            if self._model is None and not self._failed:
+                start = time.perf_counter()
+                try:
+                    from sentence_transformers import SentenceTransformer
+                    self._model = SentenceTransformer(self.model_name)
+                    self.load_seconds = time.perf_counter() - start
+                    logger.info(f"Loaded embedding model {self.model_name} in {self.load_seconds:.2f}s")
+                except Exception as e:
+                    self._failed = True
+                    logger.warning(f"Embedding model {self.model_name} unavailable: {e}")
+        return self._model
+
+    def warmup(self, background: bool = True) -> None:
+        if self._model is not None or self._failed:
+            return
+        if not background:
+            self.get()
+            return
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self.get, name=f"warmup-{self.model_name}", daemon=True)
+            self._thread.start()
 
 
 class SemanticIndex:
     def __init__(self, model_name: str = "all-MiniLM-L6-v2", persist: bool = False, mongo_client=None, db_name: str = "buddy_vectors", chunk_size: int = 800, overlap: int = 80):
         self.model_name = model_name
-        self.model = SentenceTransformer(model_name) if MODEL_AVAILABLE and SentenceTransformer else None
+        self._model_handle = LazyModel(model_name)
         self.texts: List[str] = []
         self.metas: List[Dict] = []  # parallel metadata list
         self.embeddings = None
+        self._encoded = 0  # texts[:_encoded] are covered by self.embeddings
+        # Searches may run on executor threads; guards embedding/list mutation
+        self._lock = threading.RLock()
         self.persist = persist and mongo_client is not None
         self.mongo = None
         self.chunk_size = chunk_size
@@ -33,6 +93,25 @@ class SemanticIndex:
             self.mongo = mongo_client[db_name]
             self.collection = self.mongo["embeddings"]
 
+    @property
+    def model(self):
+        return self._model_handle.get()
+
+    def warmup(self, background: bool = True) -> None:
+        """Start loading the embedding model before the first query needs it."""
+        self._model_handle.warmup(background=background)
+
+    def _sync_embeddings(self) -> None:
+        """Encode only the texts added since the last query."""
+        with self._lock:
+            if self._encoded >= len(self.texts) or not self.model:
+                return
+            import numpy as np
+            pending = self.texts[self._encoded:]
+            fresh = self.model.encode(pending, convert_to_numpy=True)
+            self.embeddings = fresh if self.embeddings is None else np.vstack([self.embeddings, fresh])
+            self._encoded += len(pending)
+
     def _chunk(self, text: str) -> List[str]:
         if len(text) <= self.chunk_size:
             return [text]
@@ -52,20 +131,41 @@ class SemanticIndex:
         for chunk in to_add:
             self.texts.append(chunk)
             self.metas.append(meta)
-            if self.model:
-                emb = self.model.encode(self.texts, convert_to_numpy=True)
-                self.embeddings = emb
+            # Embeddings are computed lazily in _sync_embeddings on the next query
             if self.persist and self.mongo:
                 try:
                     vec = None
                     if self.model:
-                        import numpy as np
                         vec = self.model.encode([chunk], convert_to_numpy=True)[0].tolist()
                     self.collection.insert_one({"text": chunk, "vector": vec, "meta": meta, "ts": datetime.utcnow()})
                 except Exception:
                     pass
 
+    def remove_where(self, key: str, values) -> int:
+        """Drop every chunk whose metadata ``key`` is in ``values``; returns chunks removed."""
+        values = set(values)
+        if not values:
+            return 0
+        with self._lock:
+            keep = [i for i, m in enumerate(self.metas) if m.get(key) not in values]
+            removed = len(self.texts) - len(keep)
+            if removed:
+                self.texts = [self.texts[i] for i in keep]
+                self.metas = [self.metas[i] for i in keep]
+                if self.embeddings is not None:
+                    # Rows past _encoded are not embedded yet; keep the prefix invariant
+                    encoded = [i for i in keep if i < self._encoded]
+                    self.embeddings = self.embeddings[encoded] if encoded else None
+                    self._encoded = len(encoded)
+        if self.persist and self.mongo:
+            try:
+                self.collection.delete_many({f"meta.{key}": {"$in": list(values)}})
+            except Exception:
+                pass
+        return removed
+
     def search(self, query: str, top_k: int = 3) -> List[Tuple[str, float]]:
+        self._sync_embeddings()
         if not self.model or self.embeddings is None:
             # fallback to persisted raw vectors if exist
             if self.persist and self.mongo:
@@ -99,36 +199,40 @@ class SemanticIndex:
 
     # New advanced search returning metadata and allowing simple equality filters
     def search_with_meta(self, query: str, top_k: int = 5, metadata_filter: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:  # type: ignore[name-defined]
+        with self._lock:
+            self._sync_embeddings()
+            # Consistent snapshot: remove_where replaces these rather than mutating them
+            texts, metas, embeddings = self.texts[:self._encoded or len(self.texts)], self.metas, self.embeddings
         if metadata_filter:
-            candidate_indices = [i for i, m in enumerate(self.metas) if all(m.get(k) == v for k, v in metadata_filter.items())]
+            candidate_indices = [i for i in range(len(texts)) if all(metas[i].get(k) == v for k, v in metadata_filter.items())]
         else:
-            candidate_indices = list(range(len(self.texts)))
+            candidate_indices = list(range(len(texts)))
         if not candidate_indices:
             return []
-        if not self.model or self.embeddings is None:
+        if not self.model or embeddings is None:
             # naive fallback: keyword overlap score
             q_words = set(query.lower().split())
             scored = []
             for i in candidate_indices:
-                words = set(self.texts[i].lower().split())
+                words = set(texts[i].lower().split())
                 overlap = len(q_words & words)
                 if overlap:
                     scored.append((i, overlap))
             scored.sort(key=lambda x: x[1], reverse=True)
             results = []
             for idx, sc in scored[:top_k]:
-                results.append({"text": self.texts[idx], "score": float(sc), "metadata": self.metas[idx]})
+                results.append({"text": texts[idx], "score": float(sc), "metadata": metas[idx]})
             return results
         # vector path
         import numpy as np  # type: ignore
         q_emb = self.model.encode([query], convert_to_numpy=True)[0]
-        sub_embs = np.array([self.embeddings[i] for i in candidate_indices])
+        sub_embs = np.array([embeddings[i] for i in candidate_indices])
         sims = (sub_embs @ q_emb) / ((sub_embs**2).sum(axis=1) ** 0.5 * (q_emb**2).sum() ** 0.5)
         order = sims.argsort()[::-1][:top_k]
         results = []
         for pos in order:
             orig_idx = candidate_indices[int(pos)]
-            results.append({"text": self.texts[orig_idx], "score": float(sims[pos]), "metadata": self.metas[orig_idx]})
+            results.append({"text": texts[orig_idx], "score": float(sims[pos]), "metadata": metas[orig_idx]})
         return results
 
 
@@ -205,7 +309,14 @@ class FaissIndex:
         self.index = None
         if MODEL_AVAILABLE and self.faiss:
             self.index = self.faiss.IndexFlatIP(self.dim)  # type: ignore
-        self.model = SentenceTransformer("all-MiniLM-L6-v2") if MODEL_AVAILABLE and SentenceTransformer else None
+        self._model_handle = LazyModel("all-MiniLM-L6-v2")
+
+    @property
+    def model(self):
+        return self._model_handle.get()
+
+    def warmup(self, background: bool = True) -> None:
+        self._model_handle.warmup(background=background)
 
     def add(self, text: str, metadata: Optional[Dict] = None):
         if not self.model or not self.index: